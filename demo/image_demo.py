@@ -70,6 +70,12 @@ def parse_args():
         help='bbox score threshold')
     parser.add_argument(
         '--batch-size', type=int, default=1, help='Inference batch size.')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=0,
+        help='Number of workers which prepare the next batches while the '
+        'model is running. 0 means the inference is not pipelined.')
     parser.add_argument(
         '--show',
         action='store_true',
@@ -111,7 +117,7 @@ def parse_args():
         call_args['weights'] = call_args['model']
         call_args['model'] = None
 
-    init_kws = ['model', 'weights', 'device', 'palette']
+    init_kws = ['model', 'weights', 'device', 'palette', 'num_workers']
     init_args = {}
     for init_kw in init_kws:
         init_args[init_kw] = call_args.pop(init_kw)
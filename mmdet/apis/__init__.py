@@ -1,9 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .det_inferencer import DetInferencer
 from .inference import (async_inference_detector, inference_detector,
-                        inference_mot, init_detector, init_track_model)
+                        inference_mot, inference_mot_streams, init_detector,
+                        init_stream_trackers, init_track_model)
+from .prediction_sink import ShardedPredictionSink
 
 __all__ = [
     'init_detector', 'async_inference_detector', 'inference_detector',
-    'DetInferencer', 'inference_mot', 'init_track_model'
+    'DetInferencer', 'inference_mot', 'init_track_model',
+    'ShardedPredictionSink', 'inference_mot_streams', 'init_stream_trackers'
 ]
@@ -2,7 +2,12 @@
 import copy
 import os.path as osp
 import warnings
-from typing import Dict, Iterable, List, Optional, Sequence, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Union)
 
 import mmcv
 import mmengine
@@ -24,6 +29,7 @@ from mmdet.structures import DetDataSample
 from mmdet.structures.mask import encode_mask_results, mask2bbox
 from mmdet.utils import ConfigType
 from ..evaluation import get_classes
+from .prediction_sink import ShardedPredictionSink
 
 try:
     from panopticapi.evaluation import VOID
@@ -40,6 +46,35 @@ ImgType = Union[np.ndarray, Sequence[np.ndarray]]
 IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.ppm', '.bmp', '.pgm', '.tif',
                   '.tiff', '.webp')
 
+# Pipeline and collate function of a preprocessing worker process, set once
+# by the pool initializer so that they are not pickled for every batch.
+_worker_pipeline: Optional[Callable] = None
+_worker_collate_fn: Optional[Callable] = None
+
+
+def _load_single(pipeline: Callable, inputs: InputType) -> tuple:
+    """Run the pipeline on a single input and keep the original input."""
+    if isinstance(inputs, dict):
+        ori_inputs = inputs['img'] if 'img' in inputs else inputs['img_path']
+        return ori_inputs, pipeline(copy.deepcopy(inputs))
+    return inputs, pipeline(inputs)
+
+
+def _load_chunk(pipeline: Callable, collate_fn: Callable,
+                chunk: list) -> tuple:
+    """Run the pipeline on a chunk of inputs and collate the results."""
+    return collate_fn([_load_single(pipeline, inputs) for inputs in chunk])
+
+
+def _init_worker(pipeline: Callable, collate_fn: Callable) -> None:
+    global _worker_pipeline, _worker_collate_fn
+    _worker_pipeline = pipeline
+    _worker_collate_fn = collate_fn
+
+
+def _load_chunk_in_worker(chunk: list) -> tuple:
+    return _load_chunk(_worker_pipeline, _worker_collate_fn, chunk)
+
 
 class DetInferencer(BaseInferencer):
     """Object Detection Inferencer.
@@ -62,6 +97,19 @@ class DetInferencer(BaseInferencer):
             priority is palette -> config -> checkpoint. Defaults to 'none'.
         show_progress (bool): Control whether to display the progress
             bar during the inference process. Defaults to True.
+        num_workers (int): Number of workers which load, transform and
+            collate the next batches while the model runs ``forward`` on the
+            current one. If larger than 0, :meth:`visualize` and
+            :meth:`postprocess` also run asynchronously in a background
+            thread, unless ``show=True``. Results are always returned in the
+            order of the inputs. 0 means all stages run serially in the
+            calling thread. Defaults to 0.
+        worker_type (str): Type of the preprocessing workers, 'thread' or
+            'process'. Threads are enough for pipelines dominated by image
+            decoding and resizing, which release the GIL. Defaults to
+            'thread'.
+        prefetch_factor (int): Number of batches loaded in advance by each
+            worker. Defaults to 2.
     """
 
     preprocess_kwargs: set = set()
@@ -88,7 +136,10 @@ class DetInferencer(BaseInferencer):
                  device: Optional[str] = None,
                  scope: Optional[str] = 'mmdet',
                  palette: str = 'none',
-                 show_progress: bool = True) -> None:
+                 show_progress: bool = True,
+                 num_workers: int = 0,
+                 worker_type: str = 'thread',
+                 prefetch_factor: int = 2) -> None:
         # A global counter tracking the number of images processed, for
         # naming of the output images
         self.num_visualized_imgs = 0
@@ -99,6 +150,14 @@ class DetInferencer(BaseInferencer):
             model=model, weights=weights, device=device, scope=scope)
         self.model = revert_sync_batchnorm(self.model)
         self.show_progress = show_progress
+        assert num_workers >= 0, 'num_workers must not be negative.'
+        assert worker_type in ('thread', 'process'), \
+            f'Unsupported worker_type {worker_type}, only "thread" and ' \
+            '"process" are supported.'
+        assert prefetch_factor > 0, 'prefetch_factor must be positive.'
+        self.num_workers = num_workers
+        self.worker_type = worker_type
+        self.prefetch_factor = prefetch_factor
 
     def _load_weights_to_model(self, model: nn.Module,
                                checkpoint: Optional[dict],
@@ -248,6 +307,9 @@ class DetInferencer(BaseInferencer):
                 for batch in chunked_data:
                     preds = self.forward(batch, **kwargs)
 
+        If ``num_workers`` is larger than 0, batches are prepared by a pool
+        of workers ahead of time, see :meth:`_prefetch_chunk_data`.
+
         Args:
             inputs (InputsType): Inputs given by user.
             batch_size (int): batch size. Defaults to 1.
@@ -255,8 +317,11 @@ class DetInferencer(BaseInferencer):
         Yields:
             Any: Data processed by the ``pipeline`` and ``collate_fn``.
         """
-        chunked_data = self._get_chunk_data(inputs, batch_size)
-        yield from map(self.collate_fn, chunked_data)
+        if self.num_workers > 0:
+            yield from self._prefetch_chunk_data(inputs, batch_size)
+        else:
+            chunked_data = self._get_chunk_data(inputs, batch_size)
+            yield from map(self.collate_fn, chunked_data)
 
     def _get_chunk_data(self, inputs: Iterable, chunk_size: int):
         """Get batch data from inputs.
@@ -268,31 +333,71 @@ class DetInferencer(BaseInferencer):
         Yields:
             list: batch data.
         """
+        for chunk in self._split_chunks(inputs, chunk_size):
+            yield [_load_single(self.pipeline, inputs_) for inputs_ in chunk]
+
+    @staticmethod
+    def _split_chunks(inputs: Iterable, chunk_size: int):
+        """Split inputs into chunks without running the pipeline.
+
+        Args:
+            inputs (Iterable): An iterable dataset.
+            chunk_size (int): Equivalent to batch size.
+
+        Yields:
+            list: A chunk of raw inputs.
+        """
         inputs_iter = iter(inputs)
         while True:
-            try:
-                chunk_data = []
-                for _ in range(chunk_size):
-                    inputs_ = next(inputs_iter)
-                    if isinstance(inputs_, dict):
-                        if 'img' in inputs_:
-                            ori_inputs_ = inputs_['img']
-                        else:
-                            ori_inputs_ = inputs_['img_path']
-                        chunk_data.append(
-                            (ori_inputs_,
-                             self.pipeline(copy.deepcopy(inputs_))))
-                    else:
-                        chunk_data.append((inputs_, self.pipeline(inputs_)))
-                yield chunk_data
-            except StopIteration:
-                if chunk_data:
-                    yield chunk_data
+            chunk = []
+            for inputs_ in inputs_iter:
+                chunk.append(inputs_)
+                if len(chunk) == chunk_size:
+                    break
+            if not chunk:
                 break
+            yield chunk
+
+    def _prefetch_chunk_data(self, inputs: Iterable, chunk_size: int):
+        """Get collated batch data prepared by a pool of workers.
 
-    # TODO: Video and Webcam are currently not supported and
-    #  may consume too much memory if your input folder has a lot of images.
-    #  We will be optimized later.
+        At most ``num_workers * prefetch_factor`` batches are in flight, and
+        batches are yielded in the order of the inputs.
+
+        Args:
+            inputs (Iterable): An iterable dataset.
+            chunk_size (int): Equivalent to batch size.
+
+        Yields:
+            Any: Data processed by the ``pipeline`` and ``collate_fn``.
+        """
+        if self.worker_type == 'thread':
+            executor = ThreadPoolExecutor(self.num_workers)
+            load_chunk = partial(_load_chunk, self.pipeline, self.collate_fn)
+        else:
+            executor = ProcessPoolExecutor(
+                self.num_workers,
+                initializer=_init_worker,
+                initargs=(self.pipeline, self.collate_fn))
+            load_chunk = _load_chunk_in_worker
+
+        max_pending = self.num_workers * self.prefetch_factor
+        chunks = self._split_chunks(inputs, chunk_size)
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(load_chunk, chunk))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    # TODO: Webcam is currently not supported. Use :meth:`stream` for video
+    #  frames or folders with a lot of images to keep the memory constant.
     def __call__(
             self,
             inputs: InputsType,
@@ -366,55 +471,260 @@ class DetInferencer(BaseInferencer):
             stuff_texts = [stuff_texts] * len(ori_inputs)
         if texts is not None:
             assert len(texts) == len(ori_inputs)
-            for i in range(len(texts)):
-                if isinstance(ori_inputs[i], str):
-                    ori_inputs[i] = {
-                        'text': texts[i],
-                        'img_path': ori_inputs[i],
-                        'custom_entities': custom_entities
-                    }
-                else:
-                    ori_inputs[i] = {
-                        'text': texts[i],
-                        'img': ori_inputs[i],
-                        'custom_entities': custom_entities
-                    }
         if stuff_texts is not None:
             assert len(stuff_texts) == len(ori_inputs)
-            for i in range(len(stuff_texts)):
-                ori_inputs[i]['stuff_text'] = stuff_texts[i]
-
-        inputs = self.preprocess(
-            ori_inputs, batch_size=batch_size, **preprocess_kwargs)
+        ori_inputs = list(
+            self._attach_texts(ori_inputs, texts, stuff_texts,
+                               custom_entities))
+
+        visualize_kwargs.update(
+            return_vis=return_vis,
+            show=show,
+            wait_time=wait_time,
+            draw_pred=draw_pred,
+            pred_score_thr=pred_score_thr,
+            no_save_vis=no_save_vis,
+            img_out_dir=out_dir)
+        postprocess_kwargs.update(
+            return_datasample=return_datasample,
+            print_result=print_result,
+            no_save_pred=no_save_pred,
+            pred_out_dir=out_dir)
 
         results_dict = {'predictions': [], 'visualization': []}
-        for ori_imgs, data in (track(inputs, description='Inference')
-                               if self.show_progress else inputs):
-            preds = self.forward(data, **forward_kwargs)
-            visualization = self.visualize(
-                ori_imgs,
-                preds,
-                return_vis=return_vis,
-                show=show,
-                wait_time=wait_time,
-                draw_pred=draw_pred,
-                pred_score_thr=pred_score_thr,
-                no_save_vis=no_save_vis,
-                img_out_dir=out_dir,
-                **visualize_kwargs)
-            results = self.postprocess(
-                preds,
-                visualization,
-                return_datasample=return_datasample,
-                print_result=print_result,
-                no_save_pred=no_save_pred,
-                pred_out_dir=out_dir,
-                **postprocess_kwargs)
+        for _, results in self._run_batches(ori_inputs, batch_size,
+                                            preprocess_kwargs, forward_kwargs,
+                                            visualize_kwargs,
+                                            postprocess_kwargs):
             results_dict['predictions'].extend(results['predictions'])
             if results['visualization'] is not None:
                 results_dict['visualization'].extend(results['visualization'])
         return results_dict
 
+    def stream(self,
+               inputs: Union[InputsType, Iterable],
+               batch_size: int = 1,
+               return_vis: bool = False,
+               show: bool = False,
+               wait_time: int = 0,
+               no_save_vis: bool = False,
+               draw_pred: bool = True,
+               pred_score_thr: float = 0.3,
+               return_datasample: bool = False,
+               print_result: bool = False,
+               no_save_pred: bool = True,
+               out_dir: str = '',
+               texts: Optional[Union[str, Iterable]] = None,
+               stuff_texts: Optional[Union[str, Iterable]] = None,
+               custom_entities: bool = False,
+               sink: Optional[ShardedPredictionSink] = None,
+               **kwargs) -> Iterator[dict]:
+        """Run the inferencer lazily and yield the results batch by batch.
+
+        Unlike :meth:`__call__`, inputs are consumed on demand and results
+        are not accumulated, so the memory does not grow with the number of
+        inputs. ``inputs`` can be anything accepted by :meth:`__call__` or
+        any iterable of image paths and arrays, e.g. a generator or a
+        :obj:`mmcv.VideoReader` whose frames are inferred one after another.
+
+        Examples:
+            >>> inferencer = DetInferencer('rtmdet-s')
+            >>> for results in inferencer.stream(mmcv.VideoReader('a.mp4')):
+            >>>     print(results['predictions'])
+
+        Args:
+            inputs (InputsType | Iterable): Inputs for the inferencer.
+            batch_size (int): Inference batch size. Defaults to 1.
+            texts (str | Iterable[str], optional): Text prompts. A string is
+                used for every input, otherwise it is consumed along with
+                the inputs. Defaults to None.
+            stuff_texts (str | Iterable[str], optional): Stuff text prompts of
+                open panoptic task, consumed like ``texts``.
+                Defaults to None.
+            sink (:obj:`ShardedPredictionSink`, optional): If given, the
+                prediction of each image is written to it as soon as the
+                batch is done. The sink is not closed by this method.
+                Defaults to None.
+            **kwargs: The other arguments are the same as :meth:`__call__`.
+
+        Yields:
+            dict: Inference and visualization results of a batch, in the
+            same format as the return value of :meth:`__call__`.
+        """
+        if sink is not None:
+            assert not return_datasample, \
+                'A sink only accepts predictions converted to dict, ' \
+                'return_datasample must be False.'
+        (
+            preprocess_kwargs,
+            forward_kwargs,
+            visualize_kwargs,
+            postprocess_kwargs,
+        ) = self._dispatch_kwargs(**kwargs)
+        visualize_kwargs.update(
+            return_vis=return_vis,
+            show=show,
+            wait_time=wait_time,
+            draw_pred=draw_pred,
+            pred_score_thr=pred_score_thr,
+            no_save_vis=no_save_vis,
+            img_out_dir=out_dir)
+        postprocess_kwargs.update(
+            return_datasample=return_datasample,
+            print_result=print_result,
+            no_save_pred=no_save_pred,
+            pred_out_dir=out_dir)
+
+        if isinstance(texts, str):
+            texts = repeat(texts)
+        if isinstance(stuff_texts, str):
+            stuff_texts = repeat(stuff_texts)
+        ori_inputs = self._attach_texts(
+            self._iter_inputs(inputs), texts, stuff_texts, custom_entities)
+
+        index = 0
+        for ori_imgs, results in self._run_batches(ori_inputs, batch_size,
+                                                   preprocess_kwargs,
+                                                   forward_kwargs,
+                                                   visualize_kwargs,
+                                                   postprocess_kwargs):
+            if sink is not None:
+                for ori_img, pred in zip(ori_imgs, results['predictions']):
+                    sink.write(
+                        pred,
+                        index,
+                        img_path=ori_img if isinstance(ori_img, str) else None)
+                    index += 1
+            yield results
+
+    def _iter_inputs(self, inputs: Union[InputsType, Iterable]) -> Iterable:
+        """Lazy version of :meth:`_inputs_to_list`.
+
+        Files of a directory are listed on demand and other iterables are
+        returned as is.
+
+        Args:
+            inputs (InputsType | Iterable): Inputs for the inferencer.
+
+        Returns:
+            Iterable: Iterable of inputs for the :meth:`preprocess`.
+        """
+        if isinstance(inputs, str):
+            backend = get_file_backend(inputs)
+            if hasattr(backend, 'isdir') and isdir(inputs):
+                filename_iter = list_dir_or_file(
+                    inputs, list_dir=False, suffix=IMG_EXTENSIONS)
+                return (join_path(inputs, filename)
+                        for filename in filename_iter)
+        if isinstance(inputs, (str, np.ndarray, dict)):
+            return [inputs]
+        return inputs
+
+    @staticmethod
+    def _attach_texts(inputs: Iterable, texts: Optional[Iterable],
+                      stuff_texts: Optional[Iterable],
+                      custom_entities: bool) -> Iterator:
+        """Pack each input with its text prompts.
+
+        Args:
+            inputs (Iterable): Image paths or arrays.
+            texts (Iterable[str], optional): Text prompt of each input.
+            stuff_texts (Iterable[str], optional): Stuff text prompt of each
+                input. Only used along with ``texts``.
+            custom_entities (bool): Whether to use custom entities.
+
+        Yields:
+            str | np.ndarray | dict: The input itself if ``texts`` is None,
+            otherwise a dict with the image and its prompts.
+        """
+        if texts is None:
+            assert stuff_texts is None, \
+                'stuff_texts can only be used along with texts.'
+            yield from inputs
+            return
+        stuff_texts = repeat(None) if stuff_texts is None else stuff_texts
+        for inputs_, text, stuff_text in zip(inputs, texts, stuff_texts):
+            img_key = 'img_path' if isinstance(inputs_, str) else 'img'
+            inputs_ = {
+                'text': text,
+                img_key: inputs_,
+                'custom_entities': custom_entities
+            }
+            if stuff_text is not None:
+                inputs_['stuff_text'] = stuff_text
+            yield inputs_
+
+    def _run_batches(self, inputs: Iterable, batch_size: int,
+                     preprocess_kwargs: dict, forward_kwargs: dict,
+                     visualize_kwargs: dict, postprocess_kwargs: dict):
+        """Run all stages of the inferencer over the inputs.
+
+        Args:
+            inputs (Iterable): Inputs for :meth:`preprocess`.
+            batch_size (int): Inference batch size.
+            preprocess_kwargs (dict): Keyword arguments of :meth:`preprocess`.
+            forward_kwargs (dict): Keyword arguments of :meth:`forward`.
+            visualize_kwargs (dict): Keyword arguments of :meth:`visualize`.
+            postprocess_kwargs (dict): Keyword arguments of
+                :meth:`postprocess`.
+
+        Yields:
+            tuple: Original inputs of a batch and the results returned by
+            :meth:`postprocess`, in the order of the inputs.
+        """
+        inputs = self.preprocess(
+            inputs, batch_size=batch_size, **preprocess_kwargs)
+
+        # Visualization and postprocessing of a batch overlap with the
+        # forward of the next batches. A popup window must be shown in the
+        # calling thread, so it is always synchronous.
+        postprocess_async = self.num_workers > 0 and not visualize_kwargs.get(
+            'show', False)
+        postprocess_executor = ThreadPoolExecutor(1) \
+            if postprocess_async else None
+        pending = deque()
+
+        try:
+            for ori_imgs, data in (track(inputs, description='Inference')
+                                   if self.show_progress else inputs):
+                preds = self.forward(data, **forward_kwargs)
+                if postprocess_executor is None:
+                    yield ori_imgs, self._visualize_and_postprocess(
+                        ori_imgs, preds, visualize_kwargs, postprocess_kwargs)
+                    continue
+                future = postprocess_executor.submit(
+                    self._visualize_and_postprocess, ori_imgs, preds,
+                    visualize_kwargs, postprocess_kwargs)
+                pending.append((ori_imgs, future))
+                # Bound the number of batches waiting for postprocessing.
+                while len(pending) > self.prefetch_factor:
+                    ori_imgs, future = pending.popleft()
+                    yield ori_imgs, future.result()
+            while pending:
+                ori_imgs, future = pending.popleft()
+                yield ori_imgs, future.result()
+        finally:
+            if postprocess_executor is not None:
+                postprocess_executor.shutdown(wait=True)
+
+    def _visualize_and_postprocess(self, ori_imgs: InputsType, preds: PredType,
+                                   visualize_kwargs: dict,
+                                   postprocess_kwargs: dict) -> dict:
+        """Run :meth:`visualize` and :meth:`postprocess` on a batch.
+
+        Args:
+            ori_imgs (InputsType): Original inputs of the batch.
+            preds (List[:obj:`DetDataSample`]): Predictions of the model.
+            visualize_kwargs (dict): Keyword arguments of :meth:`visualize`.
+            postprocess_kwargs (dict): Keyword arguments of
+                :meth:`postprocess`.
+
+        Returns:
+            dict: Results returned by :meth:`postprocess`.
+        """
+        visualization = self.visualize(ori_imgs, preds, **visualize_kwargs)
+        return self.postprocess(preds, visualization, **postprocess_kwargs)
+
     def visualize(self,
                   inputs: InputsType,
                   preds: PredType,
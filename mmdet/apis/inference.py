@@ -2,7 +2,7 @@
 import copy
 import warnings
 from pathlib import Path
-from typing import Optional, Sequence, Union
+from typing import List, Optional, Sequence, Union
 
 import numpy as np
 import torch
@@ -10,7 +10,7 @@ import torch.nn as nn
 from mmcv.ops import RoIPool
 from mmcv.transforms import Compose
 from mmengine.config import Config
-from mmengine.dataset import default_collate
+from mmengine.dataset import default_collate, pseudo_collate
 from mmengine.model.utils import revert_sync_batchnorm
 from mmengine.registry import init_default_scope
 from mmengine.runner import load_checkpoint
@@ -19,7 +19,7 @@ from mmdet.registry import DATASETS
 from mmdet.utils import ConfigType
 from ..evaluation import get_classes
 from ..registry import MODELS
-from ..structures import DetDataSample, SampleList
+from ..structures import DetDataSample, SampleList, TrackSampleList
 from ..utils import get_test_pipeline_cfg
 
 
@@ -302,6 +302,119 @@ def inference_mot(model: nn.Module, img: np.ndarray, frame_id: int,
     return result
 
 
+def init_stream_trackers(model: nn.Module, num_streams: int) -> List:
+    """Create independent tracker states for several video streams.
+
+    Args:
+        model (nn.Module): The loaded mot model.
+        num_streams (int): Number of video streams.
+
+    Returns:
+        list: ``num_streams`` trackers, each of which is a reset copy of
+        ``model.tracker``.
+    """
+    trackers = []
+    for _ in range(num_streams):
+        tracker = copy.deepcopy(model.tracker)
+        tracker.reset()
+        trackers.append(tracker)
+    return trackers
+
+
+def inference_mot_streams(model: nn.Module, imgs: Sequence[np.ndarray],
+                          frame_ids: Sequence[int], video_lens: Sequence[int],
+                          trackers: Sequence) -> TrackSampleList:
+    """Inference the current frames of several video streams with the mot
+    model.
+
+    The frames of all streams go through the detector in one batched forward,
+    then every stream is associated by its own tracker, so that the streams
+    do not share any track. A tracker is reset when its stream is at frame 0.
+    The results of each stream are the same as calling :func:`inference_mot`
+    on it, except for the offline post-processing of the whole video done by
+    StrongSORT (AFLink and interpolation), which is not applied.
+
+    Examples:
+        >>> trackers = init_stream_trackers(model, len(videos))
+        >>> for frame_id in range(video_len):
+        >>>     imgs = [video[frame_id] for video in videos]
+        >>>     results = inference_mot_streams(
+        >>>         model, imgs, [frame_id] * len(videos),
+        >>>         [video_len] * len(videos), trackers)
+
+    Args:
+        model (nn.Module): The loaded mot model.
+        imgs (Sequence[np.ndarray]): Loaded current frame of each stream.
+        frame_ids (Sequence[int]): Frame id of each stream.
+        video_lens (Sequence[int]): Video length of each stream.
+        trackers (Sequence): Tracker of each stream, usually created by
+            :func:`init_stream_trackers`.
+
+    Returns:
+        TrackSampleList: The tracking data sample of each stream.
+    """
+    assert len(imgs) == len(frame_ids) == len(video_lens) == len(trackers), \
+        'imgs, frame_ids, video_lens and trackers must have the same length.'
+    if len(imgs) == 0:
+        return []
+    cfg = model.cfg
+    test_pipeline = build_test_pipeline(cfg)
+    data = []
+    for img, frame_id, video_len in zip(imgs, frame_ids, video_lens):
+        data.append(
+            test_pipeline(
+                dict(
+                    img=[img.astype(np.float32)],
+                    frame_id=[frame_id],
+                    ori_shape=[img.shape[:2]],
+                    img_id=[frame_id + 1],
+                    ori_video_length=[video_len])))
+
+    if not next(model.parameters()).is_cuda:
+        for m in model.modules():
+            assert not isinstance(
+                m, RoIPool
+            ), 'CPU inference with RoIPool is not supported currently.'
+
+    with torch.no_grad():
+        data = model.data_preprocessor(pseudo_collate(data), False)
+        track_data_samples = data['data_samples']
+        # (K, 1, C, H, W) -> (K, C, H, W), the frames of all streams are
+        # padded to the same shape.
+        batch_imgs = data['inputs'][:, 0].contiguous()
+        img_data_samples = [
+            track_data_sample[0] for track_data_sample in track_data_samples
+        ]
+
+        detector = model.detector
+        if hasattr(model, 'track_head'):
+            # QDTrack associates with the features of the detector.
+            x = detector.extract_feat(batch_imgs)
+            rpn_results_list = detector.rpn_head.predict(x, img_data_samples)
+            det_results = detector.roi_head.predict(
+                x, rpn_results_list, img_data_samples, rescale=True)
+            for img_data_sample, pred_instances in zip(img_data_samples,
+                                                       det_results):
+                img_data_sample.pred_instances = pred_instances
+            det_results = img_data_samples
+        else:
+            x = None
+            det_results = detector.predict(batch_imgs, img_data_samples)
+
+        for i, tracker in enumerate(trackers):
+            if frame_ids[i] == 0:
+                tracker.reset()
+            feats = None if x is None else [lvl[i:i + 1] for lvl in x]
+            img_data_samples[i].pred_track_instances = tracker.track(
+                model=model,
+                img=batch_imgs[i:i + 1],
+                feats=feats,
+                data_sample=det_results[i],
+                data_preprocessor=getattr(model, 'preprocess_cfg', None),
+                rescale=True)
+    return track_data_samples
+
+
 def init_track_model(config: Union[str, Config],
                      checkpoint: Optional[str] = None,
                      detector: Optional[str] = None,
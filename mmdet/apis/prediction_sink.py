@@ -0,0 +1,136 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os
+import os.path as osp
+from typing import List, Optional
+
+import numpy as np
+
+
+class ShardedPredictionSink:
+    """Write predictions to a sequence of shard files.
+
+    Predictions are written as soon as they are produced, so that the memory
+    used by inference does not grow with the number of inputs. Every shard
+    holds at most ``shard_size`` predictions and is named
+    ``{prefix}_{shard_id:05d}.{format}``.
+
+    - ``jsonl``: one json object per line, holding ``index``, ``img_path``
+      (None for array inputs) and the fields returned by
+      :meth:`DetInferencer.pred2dict`.
+    - ``npz``: columnar arrays of a shard. ``index``, ``img_path`` and
+      ``inst_offsets`` are per image, ``labels``, ``scores``, ``bboxes`` and
+      ``masks`` (json encoded RLE, only if predicted) are per instance. The
+      instances of the ``i``-th image are
+      ``inst_offsets[i]:inst_offsets[i + 1]``.
+
+    Examples:
+        >>> with ShardedPredictionSink('preds/', format='npz') as sink:
+        >>>     for _ in inferencer.stream(img_dir, sink=sink):
+        >>>         pass
+
+    Args:
+        out_dir (str): Directory of the shard files.
+        format (str): 'jsonl' or 'npz'. Defaults to 'jsonl'.
+        shard_size (int): Maximum number of predictions in a shard.
+            Defaults to 10000.
+        prefix (str): Prefix of the shard file names. Defaults to 'preds'.
+    """
+
+    def __init__(self,
+                 out_dir: str,
+                 format: str = 'jsonl',
+                 shard_size: int = 10000,
+                 prefix: str = 'preds') -> None:
+        assert format in ('jsonl', 'npz'), \
+            f'Unsupported format {format}, only "jsonl" and "npz" are ' \
+            'supported.'
+        assert shard_size > 0, 'shard_size must be positive.'
+        self.out_dir = out_dir
+        self.format = format
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.shard_files: List[str] = []
+        self.num_written = 0
+
+        self._num_in_shard = 0
+        self._file = None
+        self._records: List[dict] = []
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _next_shard_file(self) -> str:
+        shard_file = osp.join(
+            self.out_dir,
+            f'{self.prefix}_{len(self.shard_files):05d}.{self.format}')
+        self.shard_files.append(shard_file)
+        return shard_file
+
+    def write(self,
+              pred: dict,
+              index: int,
+              img_path: Optional[str] = None) -> None:
+        """Write the prediction of an image.
+
+        Args:
+            pred (dict): Prediction returned by
+                :meth:`DetInferencer.pred2dict`.
+            index (int): Index of the image in the inputs.
+            img_path (str, optional): Path of the image. Defaults to None.
+        """
+        record = dict(index=index, img_path=img_path, **pred)
+        if self.format == 'jsonl':
+            if self._file is None:
+                self._file = open(self._next_shard_file(), 'w')
+            self._file.write(json.dumps(record) + '\n')
+        else:
+            self._records.append(record)
+        self._num_in_shard += 1
+        self.num_written += 1
+        if self._num_in_shard == self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Close the current shard, the next prediction starts a new one."""
+        if self.format == 'jsonl':
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        elif self._records:
+            self._dump_npz(self._next_shard_file(), self._records)
+            self._records = []
+        self._num_in_shard = 0
+
+    @staticmethod
+    def _dump_npz(shard_file: str, records: List[dict]) -> None:
+        """Dump records of a shard as columnar arrays."""
+        inst_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum([len(record.get('labels', [])) for record in records],
+                  out=inst_offsets[1:])
+        labels, scores, bboxes, masks = [], [], [], []
+        for record in records:
+            labels.extend(record.get('labels', []))
+            scores.extend(record.get('scores', []))
+            bboxes.extend(record.get('bboxes', []))
+            masks.extend(json.dumps(mask) for mask in record.get('masks', []))
+        arrays = dict(
+            index=np.array([record['index'] for record in records],
+                           dtype=np.int64),
+            img_path=np.array([record['img_path'] or '' for record in records],
+                              dtype=str),
+            inst_offsets=inst_offsets,
+            labels=np.array(labels, dtype=np.int64),
+            scores=np.array(scores, dtype=np.float32),
+            bboxes=np.array(bboxes, dtype=np.float32).reshape(-1, 4))
+        if masks:
+            arrays['masks'] = np.array(masks, dtype=str)
+        np.savez(shard_file, **arrays)
+
+    def close(self) -> None:
+        """Flush the last shard."""
+        self.flush()
+
+    def __enter__(self) -> 'ShardedPredictionSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
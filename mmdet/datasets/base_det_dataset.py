@@ -1,8 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os.path as osp
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Union
 
+import numpy as np
 from mmengine.dataset import BaseDataset
+from mmengine.dataset.base_dataset import force_full_init
 from mmengine.fileio import load
 from mmengine.utils import is_abs
 
@@ -57,8 +59,11 @@ class BaseDetDataset(BaseDataset):
             - load_data_list: Load annotations from annotation file.
             - load_proposals: Load proposals from proposal file, if
               `self.proposal_file` is not None.
+            - build_cat_index: Build the category index of the images.
+            - build_img_sizes: Gather the sizes of the images in an array.
             - filter data information: Filter annotations according to
-              filter_cfg.
+              filter_cfg, which may select the images with the category
+              index and image sizes.
             - slice_data: Slice dataset according to ``self._indices``
             - serialize_data: Serialize ``self.data_list`` if
             ``self.serialize_data`` is True.
@@ -70,12 +75,20 @@ class BaseDetDataset(BaseDataset):
         # get proposals from file
         if self.proposal_file is not None:
             self.load_proposals()
+
+        self.build_cat_index()
+        self.build_img_sizes()
         # filter illegal data, such as data that has no annotations.
         self.data_list = self.filter_data()
+        if len(self.data_list) != len(self.img_sizes):
+            # `filter_data` dropped images without selecting their index
+            self.build_cat_index()
+            self.build_img_sizes()
 
         # Get subset data according to indices.
         if self._indices is not None:
             self.data_list = self._get_unserialized_subset(self._indices)
+            self._select_index(self._indices)
 
         # serialize data_list
         if self.serialize_data:
@@ -111,6 +124,118 @@ class BaseDetDataset(BaseDataset):
             proposals = proposals_list[file_name]
             data_info['proposals'] = proposals
 
+    def build_cat_index(self) -> None:
+        """Build the category index of the images in CSR layout.
+
+        The labels of the instances of the ``i``-th image are
+        ``img_labels[img_label_offsets[i]:img_label_offsets[i + 1]]`` and the
+        indices of the images containing the ``c``-th category are
+        ``cat_img_inds[cat_img_offsets[c]:cat_img_offsets[c + 1]]``, in
+        ascending order. The arrays are built once from ``self.data_list``,
+        so that :meth:`get_cat_ids` and :meth:`get_cat2imgs` do not need to
+        deserialize the data information of every image.
+        """
+        num_labels = [
+            len(data_info.get('instances', [])) for data_info in self.data_list
+        ]
+        img_labels = np.array([
+            instance.get('bbox_label', -1) for data_info in self.data_list
+            for instance in data_info.get('instances', [])
+        ],
+                              dtype=np.int64)
+        self._set_img_labels(num_labels, img_labels)
+
+    def build_img_sizes(self) -> None:
+        """Gather the (width, height) of the images in ``img_sizes``, an
+        int64 array of shape (N, 2).
+
+        Images without ``width`` or ``height`` get a size of 0, e.g. those of
+        datasets which read the size from the image when loading it.
+        """
+        self.img_sizes = np.array(
+            [(data_info.get('width', 0), data_info.get('height', 0))
+             for data_info in self.data_list],
+            dtype=np.int64).reshape(-1, 2)
+
+    def _set_img_labels(self, num_labels: Sequence[int],
+                        img_labels: np.ndarray) -> None:
+        """Set the labels of the images and build the inverted index."""
+        num_imgs = len(num_labels)
+        self.img_labels = img_labels
+        self.img_label_offsets = np.zeros(num_imgs + 1, dtype=np.int64)
+        np.cumsum(num_labels, out=self.img_label_offsets[1:])
+
+        classes = self.metainfo.get('classes', None)
+        if classes is not None:
+            num_classes = len(classes)
+        else:
+            num_classes = int(img_labels.max()) + 1 if len(img_labels) else 0
+        img_inds = np.repeat(np.arange(num_imgs, dtype=np.int64), num_labels)
+        valid = (img_labels >= 0) & (img_labels < num_classes)
+        # unique (label, image) pairs, sorted by label then image index
+        pairs = np.unique(img_labels[valid] * num_imgs + img_inds[valid])
+        cat_labels = pairs // max(num_imgs, 1)
+        self.cat_img_inds = pairs - cat_labels * num_imgs
+        self.cat_img_offsets = np.zeros(num_classes + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(cat_labels, minlength=num_classes),
+            out=self.cat_img_offsets[1:])
+
+    def get_subset(self, indices: Union[Sequence[int],
+                                        int]) -> 'BaseDetDataset':
+        """Return a subset of dataset with its own category index and image
+        sizes.
+
+        Args:
+            indices (int or Sequence[int]): See
+                :meth:`mmengine.dataset.BaseDataset.get_subset`.
+
+        Returns:
+            BaseDetDataset: A subset of dataset.
+        """
+        sub_dataset = super().get_subset(indices)
+        sub_dataset._select_index(indices)
+        return sub_dataset
+
+    def get_subset_(self, indices: Union[Sequence[int], int]) -> None:
+        """The in-place version of :meth:`get_subset`, which also selects the
+        category index and image sizes of the subset.
+
+        Args:
+            indices (int or Sequence[int]): See
+                :meth:`mmengine.dataset.BaseDataset.get_subset_`.
+        """
+        super().get_subset_(indices)
+        self._select_index(indices)
+
+    def _select_index(self, indices: Union[Sequence[int], int]) -> None:
+        """Keep the category index and image sizes of the images selected by
+        ``indices``, given as in :meth:`get_subset`."""
+        img_sizes = getattr(self, 'img_sizes', None)
+        img_labels = getattr(self, 'img_labels', None)
+        if img_sizes is None and img_labels is None:
+            return
+        if img_sizes is not None:
+            num_imgs = len(img_sizes)
+        else:
+            num_imgs = len(self.img_label_offsets) - 1
+        if isinstance(indices, int):
+            inds = np.arange(num_imgs)
+            inds = inds[:indices] if indices >= 0 else inds[indices:]
+        else:
+            inds = np.array(indices, dtype=np.int64).reshape(-1)
+            inds[inds < 0] += num_imgs
+        if img_sizes is not None:
+            self.img_sizes = img_sizes[inds]
+        if img_labels is not None:
+            starts = self.img_label_offsets[inds]
+            num_labels = self.img_label_offsets[inds + 1] - starts
+            # gather the label slices of the selected images
+            label_inds = np.repeat(starts - np.cumsum(num_labels) + num_labels,
+                                   num_labels) + np.arange(num_labels.sum())
+            self._set_img_labels(num_labels, img_labels[label_inds])
+
+    @force_full_init
     def get_cat_ids(self, idx: int) -> List[int]:
         """Get COCO category ids by index.
 
@@ -120,5 +245,46 @@ class BaseDetDataset(BaseDataset):
         Returns:
             List[int]: All categories in the image of specified index.
         """
-        instances = self.get_data_info(idx)['instances']
-        return [instance['bbox_label'] for instance in instances]
+        if getattr(self, 'img_labels', None) is None:
+            instances = self.get_data_info(idx)['instances']
+            return [instance['bbox_label'] for instance in instances]
+        if idx < 0:
+            idx += len(self)
+        return self.img_labels[self.img_label_offsets[idx]:self.
+                               img_label_offsets[idx + 1]].tolist()
+
+    @force_full_init
+    def get_img_sizes(self) -> np.ndarray:
+        """Get the (width, height) of all images.
+
+        Returns:
+            np.ndarray: An int64 array of shape (N, 2).
+        """
+        if getattr(self, 'img_sizes', None) is None:
+            data_infos = (self.get_data_info(i) for i in range(len(self)))
+            self.img_sizes = np.array(
+                [(data_info.get('width', 0), data_info.get('height', 0))
+                 for data_info in data_infos],
+                dtype=np.int64).reshape(-1, 2)
+        return self.img_sizes
+
+    @force_full_init
+    def get_cat2imgs(self) -> Dict[int, np.ndarray]:
+        """Get a dict with label as key and indices of the images containing
+        the label as values.
+
+        Returns:
+            dict[int, np.ndarray]: The indices of the images of each label,
+            in ascending order.
+        """
+        if getattr(self, 'cat_img_inds', None) is None:
+            cat2imgs = {i: [] for i in range(len(self.metainfo['classes']))}
+            for i in range(len(self)):
+                for cat in set(self.get_cat_ids(i)):
+                    cat2imgs[cat].append(i)
+            return {i: np.array(inds) for i, inds in cat2imgs.items()}
+        offsets = self.cat_img_offsets
+        return {
+            i: self.cat_img_inds[offsets[i]:offsets[i + 1]]
+            for i in range(len(offsets) - 1)
+        }
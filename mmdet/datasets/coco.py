@@ -1,18 +1,37 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import logging
 import os.path as osp
-from typing import List, Union
+from typing import List, Optional, Sequence, Union
 
+import numpy as np
+from mmengine.dataset.base_dataset import force_full_init
 from mmengine.fileio import get_local_path
+from mmengine.logging import print_log
 
 from mmdet.registry import DATASETS
 from .api_wrappers import COCO
 from .base_det_dataset import BaseDetDataset
+from .data_list_cache import (ColumnarDataList, dump_data_list_cache,
+                              get_data_list_cache_path, hash_file,
+                              is_data_list_cacheable, load_data_list_cache)
 
 
 @DATASETS.register_module()
 class CocoDataset(BaseDetDataset):
-    """Dataset for COCO."""
+    """Dataset for COCO.
+
+    Args:
+        ann_cache_dir (str, optional): Directory of the on-disk cache of the
+            parsed ``data_list``. If set, the parsed annotations are stored
+            there in a memory-mappable columnar layout keyed by the
+            annotation file content and ``metainfo``, and later launches
+            load them from the cache instead of parsing the annotation file
+            again. A dataset loaded from the cache keeps the memory-mapped
+            arrays instead of serializing ``data_list`` and builds the data
+            information of an image in :meth:`get_data_info`.
+            Defaults to None.
+    """
 
     METAINFO = {
         'classes':
@@ -34,12 +53,23 @@ class CocoDataset(BaseDetDataset):
     # ann_id is unique in coco dataset.
     ANN_ID_UNIQUE = True
 
+    def __init__(self,
+                 *args,
+                 ann_cache_dir: Optional[str] = None,
+                 **kwargs) -> None:
+        self.ann_cache_dir = ann_cache_dir
+        super().__init__(*args, **kwargs)
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_dir is not None:
+            data_list = self._load_data_list_cache()
+            if data_list is not None:
+                return data_list
 
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
@@ -52,7 +82,7 @@ class CocoDataset(BaseDetDataset):
         self.cat_img_map = copy.deepcopy(self.coco.cat_img_map)
 
         img_ids = self.coco.get_img_ids()
-        data_list = []
+        raw_data_infos = []
         total_ann_ids = []
 
         for img_id in img_ids:
@@ -63,13 +93,11 @@ class CocoDataset(BaseDetDataset):
             raw_ann_info = self.coco.load_anns(ann_ids)
             total_ann_ids.extend(ann_ids)
 
-            parsed_data_info = self.parse_data_info({
-                'raw_ann_info':
-                raw_ann_info,
-                'raw_img_info':
-                raw_img_info
+            raw_data_infos.append({
+                'raw_ann_info': raw_ann_info,
+                'raw_img_info': raw_img_info
             })
-            data_list.append(parsed_data_info)
+        data_list = self.parse_data_list(raw_data_infos)
         if self.ANN_ID_UNIQUE:
             assert len(set(total_ann_ids)) == len(
                 total_ann_ids
@@ -77,19 +105,85 @@ class CocoDataset(BaseDetDataset):
 
         del self.coco
 
+        if self.ann_cache_dir is not None:
+            self._dump_data_list_cache(data_list)
         return data_list
 
-    def parse_data_info(self, raw_data_info: dict) -> Union[dict, List[dict]]:
-        """Parse raw annotation to target format.
+    def _get_ann_cache_path(self) -> str:
+        """Get the cache directory of the current annotation settings."""
+        if getattr(self, '_ann_cache_path', None) is None:
+            extra_key = dict(
+                dataset_type=type(self).__name__,
+                classes=list(self.metainfo['classes']),
+                data_prefix=self.data_prefix,
+                seg_map_suffix=self.seg_map_suffix)
+            self._ann_cache_path = get_data_list_cache_path(
+                self.ann_cache_dir,
+                hash_file(self.ann_file, backend_args=self.backend_args),
+                extra_key)
+        return self._ann_cache_path
+
+    def _load_data_list_cache(
+            self) -> Optional[Union[ColumnarDataList, List[dict]]]:
+        """Load ``data_list`` from ``self.ann_cache_dir`` if it exists.
+
+        The cached data list is kept as a :class:`ColumnarDataList`, which is
+        not serialized since its arrays are already shared between
+        processes. It is only converted to a list of dicts when proposals
+        are to be added to the data information.
+
+        Returns:
+            ColumnarDataList or List[dict], optional: The cached data list,
+            or None if there is no valid cache for the current settings.
+        """
+        cached = load_data_list_cache(self._get_ann_cache_path())
+        if cached is None:
+            return None
+        data_list, meta, cat_img_map = cached
+        self.cat_ids = meta['cat_ids']
+        self.cat2label = {cat_id: i for i, cat_id in enumerate(self.cat_ids)}
+        self.cat_img_map = cat_img_map
+        if self.return_classes:
+            data_list.extra_info = dict(
+                text=self.metainfo['classes'], custom_entities=True)
+        if self.proposal_file is not None:
+            data_list = list(data_list)
+        else:
+            self.serialize_data = False
+        print_log(
+            f'Loaded {len(data_list)} images from annotation cache '
+            f'{self._get_ann_cache_path()}',
+            logger='current')
+        return data_list
+
+    def _dump_data_list_cache(self, data_list: List[dict]) -> None:
+        """Dump ``data_list`` to ``self.ann_cache_dir``.
+
+        Data lists holding fields that the columnar layout cannot represent
+        (e.g. from a customized ``parse_data_info``) are not cached.
+        """
+        if not is_data_list_cacheable(data_list):
+            print_log(
+                f'{type(self).__name__} produces fields that are not '
+                'supported by the annotation cache, skip caching.',
+                logger='current',
+                level=logging.WARNING)
+            return
+        dump_data_list_cache(
+            self._get_ann_cache_path(),
+            data_list,
+            meta=dict(cat_ids=self.cat_ids),
+            cat_img_map=self.cat_img_map)
+
+    def _parse_img_info(self, img_info: dict) -> dict:
+        """Parse the image level fields of a raw annotation.
 
         Args:
-            raw_data_info (dict): Raw data information load from ``ann_file``
+            img_info (dict): Raw image information load from ``ann_file``.
 
         Returns:
-            Union[dict, List[dict]]: Parsed annotation.
+            dict: Parsed image information without ``instances``.
         """
-        img_info = raw_data_info['raw_img_info']
-        ann_info = raw_data_info['raw_ann_info']
         data_info = {}
 
         # TODO: need to change data_prefix['img'] to data_prefix['img_path']
@@ -109,6 +203,110 @@ class CocoDataset(BaseDetDataset):
         if self.return_classes:
             data_info['text'] = self.metainfo['classes']
             data_info['custom_entities'] = True
+        return data_info
+
+    def parse_data_list(self, raw_data_infos: List[dict]) -> List[dict]:
+        """Parse raw annotations of all images to target format.
+
+        The bbox checks and the category mapping done by
+        :meth:`parse_data_info` are computed with NumPy over the annotations
+        of all images at once, which gives the same instances. It falls back
+        to calling :meth:`parse_data_info` per image if a subclass overrides
+        it or the annotations hold fields the batched parser can not handle.
+
+        Args:
+            raw_data_infos (List[dict]): Raw data information of all images,
+                each of which is the input of :meth:`parse_data_info`.
+
+        Returns:
+            List[dict]: Parsed annotations.
+        """
+        if type(self).parse_data_info is not CocoDataset.parse_data_info:
+            return [self.parse_data_info(info) for info in raw_data_infos]
+
+        anns = [ann for info in raw_data_infos for ann in info['raw_ann_info']]
+        try:
+            bboxes = np.array([ann['bbox'] for ann in anns],
+                              dtype=np.float64).reshape(len(anns), 4)
+            areas = np.array([ann['area'] for ann in anns], dtype=np.float64)
+            cat_ids = np.array([ann['category_id'] for ann in anns],
+                               dtype=np.int64)
+        except (KeyError, TypeError, ValueError):
+            return [self.parse_data_info(info) for info in raw_data_infos]
+        ignores = np.array([bool(ann.get('ignore', False)) for ann in anns],
+                           dtype=bool)
+        iscrowds = np.array([bool(ann.get('iscrowd', False)) for ann in anns],
+                            dtype=np.int64)
+
+        img_infos = [info['raw_img_info'] for info in raw_data_infos]
+        num_anns = [len(info['raw_ann_info']) for info in raw_data_infos]
+        img_widths = np.repeat(
+            np.array([info['width'] for info in img_infos], dtype=np.float64),
+            num_anns)
+        img_heights = np.repeat(
+            np.array([info['height'] for info in img_infos], dtype=np.float64),
+            num_anns)
+
+        x1, y1, w, h = bboxes.T
+        inter_w = np.maximum(
+            np.minimum(x1 + w, img_widths) - np.maximum(x1, 0), 0)
+        inter_h = np.maximum(
+            np.minimum(y1 + h, img_heights) - np.maximum(y1, 0), 0)
+        valid = ~ignores & (inter_w * inter_h != 0)
+        valid &= (areas > 0) & (w >= 1) & (h >= 1)
+
+        # map category ids to labels with a sorted lookup instead of
+        # ``cat_id in self.cat_ids`` for each annotation
+        label_cat_ids = np.array(self.cat_ids, dtype=np.int64)
+        sorter = np.argsort(label_cat_ids, kind='stable')
+        pos = np.searchsorted(label_cat_ids[sorter], cat_ids)
+        pos = np.clip(pos, 0, max(len(sorter) - 1, 0))
+        if len(sorter) > 0:
+            valid &= label_cat_ids[sorter][pos] == cat_ids
+            labels = sorter[pos]
+        else:
+            valid[:] = False
+            labels = pos
+
+        keep_inds = np.flatnonzero(valid)
+        img_offsets = np.searchsorted(
+            keep_inds, np.concatenate([[0], np.cumsum(num_anns)]))
+        keep_bboxes = np.stack([x1, y1, x1 + w, y1 + h],
+                               axis=1)[keep_inds].tolist()
+        keep_labels = labels[keep_inds].tolist()
+        keep_ignore_flags = iscrowds[keep_inds].tolist()
+        keep_inds = keep_inds.tolist()
+
+        data_list = []
+        for i, raw_data_info in enumerate(raw_data_infos):
+            data_info = self._parse_img_info(raw_data_info['raw_img_info'])
+            instances = []
+            for j in range(img_offsets[i], img_offsets[i + 1]):
+                instance = {
+                    'ignore_flag': keep_ignore_flags[j],
+                    'bbox': keep_bboxes[j],
+                    'bbox_label': keep_labels[j]
+                }
+                segmentation = anns[keep_inds[j]].get('segmentation', None)
+                if segmentation:
+                    instance['mask'] = segmentation
+                instances.append(instance)
+            data_info['instances'] = instances
+            data_list.append(data_info)
+        return data_list
+
+    def parse_data_info(self, raw_data_info: dict) -> Union[dict, List[dict]]:
+        """Parse raw annotation to target format.
+
+        Args:
+            raw_data_info (dict): Raw data information load from ``ann_file``
+
+        Returns:
+            Union[dict, List[dict]]: Parsed annotation.
+        """
+        img_info = raw_data_info['raw_img_info']
+        ann_info = raw_data_info['raw_ann_info']
+        data_info = self._parse_img_info(img_info)
 
         instances = []
         for i, ann in enumerate(ann_info):
@@ -144,6 +342,12 @@ class CocoDataset(BaseDetDataset):
     def filter_data(self) -> List[dict]:
         """Filter annotations according to filter_cfg.
 
+        The images are selected with the category index and image sizes,
+        which are cut to the selected images as well. Images whose
+        annotations of the required categories are all dropped by
+        :meth:`parse_data_info` have no ground truth and are filtered by
+        ``filter_empty_gt``.
+
         Returns:
             List[dict]: Filtered results.
         """
@@ -156,24 +360,63 @@ class CocoDataset(BaseDetDataset):
         filter_empty_gt = self.filter_cfg.get('filter_empty_gt', False)
         min_size = self.filter_cfg.get('min_size', 0)
 
-        # obtain images that contain annotation
-        ids_with_ann = set(data_info['img_id'] for data_info in self.data_list)
-        # obtain images that contain annotations of the required categories
-        ids_in_cat = set()
-        for i, class_id in enumerate(self.cat_ids):
-            ids_in_cat |= set(self.cat_img_map[class_id])
-        # merge the image id sets of the two conditions and use the merged set
-        # to filter out images if self.filter_empty_gt=True
-        ids_in_cat &= ids_with_ann
-
-        valid_data_infos = []
-        for i, data_info in enumerate(self.data_list):
-            img_id = data_info['img_id']
-            width = data_info['width']
-            height = data_info['height']
-            if filter_empty_gt and img_id not in ids_in_cat:
-                continue
-            if min(width, height) >= min_size:
-                valid_data_infos.append(data_info)
+        valid = self.img_sizes.min(axis=1) >= min_size
+        if filter_empty_gt:
+            # obtain images that contain annotations of the required
+            # categories
+            has_gt = np.zeros(len(valid), dtype=bool)
+            has_gt[self.cat_img_inds] = True
+            valid &= has_gt
+
+        valid_inds = np.flatnonzero(valid).tolist()
+        self._select_index(valid_inds)
+        return self._get_unserialized_subset(valid_inds)
+
+    def build_cat_index(self) -> None:
+        """Build the category index of the images, from the columns of the
+        cache if ``data_list`` is loaded from ``ann_cache_dir``."""
+        if not isinstance(self.data_list, ColumnarDataList):
+            return super().build_cat_index()
+        num_labels, img_labels = self.data_list.instance_labels()
+        self._set_img_labels(num_labels, img_labels)
+
+    def build_img_sizes(self) -> None:
+        """Gather the (width, height) of the images, from the columns of the
+        cache if ``data_list`` is loaded from ``ann_cache_dir``."""
+        if not isinstance(self.data_list, ColumnarDataList):
+            return super().build_img_sizes()
+        self.img_sizes = np.stack([
+            self.data_list.column('widths'),
+            self.data_list.column('heights')
+        ],
+                                  axis=1).astype(np.int64)
+
+    @force_full_init
+    def get_data_info(self, idx: int) -> dict:
+        """Get annotation by index.
+
+        The data information of a ``data_list`` loaded from
+        ``ann_cache_dir`` is built from the cache on each call, so it is
+        not copied.
+
+        Args:
+            idx (int): The index of data.
+
+        Returns:
+            dict: The idx-th annotation of the dataset.
+        """
+        if not isinstance(getattr(self, 'data_list', None), ColumnarDataList):
+            return super().get_data_info(idx)
+        data_info = self.data_list[idx]
+        data_info['sample_idx'] = idx if idx >= 0 else len(self) + idx
+        return data_info
 
-        return valid_data_infos
+    def _get_unserialized_subset(
+        self, indices: Union[Sequence[int],
+                             int]) -> Union[ColumnarDataList, List[dict]]:
+        """Get subset of data information list, as a view if ``data_list``
+        is loaded from ``ann_cache_dir``."""
+        if not isinstance(self.data_list, ColumnarDataList) or isinstance(
+                indices, int):
+            return super()._get_unserialized_subset(indices)
+        return self.data_list.subset(indices)
@@ -0,0 +1,347 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+"""On-disk columnar cache of parsed ``data_list`` for detection datasets.
+
+The cache stores the output of ``load_data_list`` as a directory of ``.npy``
+files (flat per-image and per-instance arrays plus CSR style offsets) so that
+later launches can memory-map it instead of re-parsing the annotation file,
+and build the data information of an image only when it is accessed.
+"""
+import hashlib
+import json
+import os
+import os.path as osp
+import shutil
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from mmengine.fileio import get_local_path
+
+# Bump this when the layout of the cache changes.
+DATA_LIST_CACHE_VERSION = 1
+
+# Keys that the columnar layout knows how to store. ``text`` and
+# ``custom_entities`` are derived from the metainfo and are not stored.
+_IMG_KEYS = {'img_path', 'img_id', 'seg_map_path', 'height', 'width'}
+_DERIVED_IMG_KEYS = {'text', 'custom_entities'}
+_INSTANCE_KEYS = {'bbox', 'bbox_label', 'ignore_flag', 'mask'}
+
+
+def hash_file(file_path: str,
+              backend_args: Optional[dict] = None,
+              chunk_size: int = 1 << 20) -> str:
+    """Compute the sha1 hex digest of a (possibly remote) file.
+
+    Args:
+        file_path (str): Path of the file.
+        backend_args (dict, optional): Arguments to instantiate the
+            corresponding backend. Defaults to None.
+        chunk_size (int): Number of bytes read at a time. Defaults to 1MB.
+
+    Returns:
+        str: The hex digest of the file content.
+    """
+    sha1 = hashlib.sha1()
+    with get_local_path(file_path, backend_args=backend_args) as local_path:
+        with open(local_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def get_data_list_cache_path(cache_dir: str, file_hash: str,
+                             extra_key: dict) -> str:
+    """Get the cache directory of a parsed annotation file.
+
+    Args:
+        cache_dir (str): Root directory of all caches.
+        file_hash (str): Hash of the annotation file content.
+        extra_key (dict): JSON serializable settings which affect parsing,
+            e.g. the dataset type, classes and data prefix.
+
+    Returns:
+        str: Path of the cache directory.
+    """
+    key = json.dumps(
+        dict(version=DATA_LIST_CACHE_VERSION, ann=file_hash, **extra_key),
+        sort_keys=True,
+        default=str)
+    return osp.join(cache_dir, hashlib.sha1(key.encode()).hexdigest())
+
+
+def _pack_strings(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into a flat uint8 buffer and int64 offsets."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in encoded], out=offsets[1:])
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return buffer, offsets
+
+
+def is_data_list_cacheable(data_list: List[dict]) -> bool:
+    """Whether ``data_list`` only holds fields the columnar cache supports.
+
+    Args:
+        data_list (List[dict]): Parsed data list.
+
+    Returns:
+        bool: True if the data list can be cached without losing fields.
+    """
+    for data_info in data_list:
+        if not set(data_info) <= _IMG_KEYS | _DERIVED_IMG_KEYS | {'instances'}:
+            return False
+        if not isinstance(data_info.get('img_id'), int):
+            return False
+        for instance in data_info.get('instances', []):
+            if not set(instance) <= _INSTANCE_KEYS:
+                return False
+    return True
+
+
+def dump_data_list_cache(
+        cache_path: str,
+        data_list: List[dict],
+        meta: Optional[dict] = None,
+        cat_img_map: Optional[Dict[int, list]] = None) -> None:
+    """Dump a parsed data list to a columnar cache directory.
+
+    The cache is written to a temporary directory first and then atomically
+    renamed, so that concurrent writers from several ranks are safe.
+
+    Args:
+        cache_path (str): Cache directory, usually obtained by
+            :func:`get_data_list_cache_path`.
+        data_list (List[dict]): Parsed data list. Must satisfy
+            :func:`is_data_list_cacheable`.
+        meta (dict, optional): Extra JSON serializable information to store,
+            e.g. ``cat_ids``. Defaults to None.
+        cat_img_map (Dict[int, list], optional): Mapping from category id to
+            image ids, stored in CSR layout. Defaults to None.
+    """
+    num_imgs = len(data_list)
+    instances = [
+        instance for data_info in data_list
+        for instance in data_info.get('instances', [])
+    ]
+    inst_offsets = np.zeros(num_imgs + 1, dtype=np.int64)
+    np.cumsum([len(data_info.get('instances', [])) for data_info in data_list],
+              out=inst_offsets[1:])
+
+    seg_map_paths = [data_info.get('seg_map_path') for data_info in data_list]
+    masks = [
+        json.dumps(instance['mask']) if 'mask' in instance else ''
+        for instance in instances
+    ]
+    img_path_buffer, img_path_offsets = _pack_strings(
+        [data_info['img_path'] for data_info in data_list])
+    seg_map_buffer, seg_map_offsets = _pack_strings(
+        [p if p is not None else '' for p in seg_map_paths])
+    mask_buffer, mask_offsets = _pack_strings(masks)
+
+    arrays = dict(
+        img_ids=np.array([d['img_id'] for d in data_list], dtype=np.int64),
+        heights=np.array([d['height'] for d in data_list], dtype=np.int64),
+        widths=np.array([d['width'] for d in data_list], dtype=np.int64),
+        img_path_buffer=img_path_buffer,
+        img_path_offsets=img_path_offsets,
+        seg_map_valid=np.array([p is not None for p in seg_map_paths],
+                               dtype=np.bool_),
+        seg_map_buffer=seg_map_buffer,
+        seg_map_offsets=seg_map_offsets,
+        inst_offsets=inst_offsets,
+        bboxes=np.array([instance['bbox'] for instance in instances],
+                        dtype=np.float64).reshape(-1, 4),
+        bbox_labels=np.array(
+            [instance['bbox_label'] for instance in instances],
+            dtype=np.int64),
+        ignore_flags=np.array(
+            [instance['ignore_flag'] for instance in instances],
+            dtype=np.int8),
+        has_mask=np.array([bool(m) for m in masks], dtype=np.bool_),
+        mask_buffer=mask_buffer,
+        mask_offsets=mask_offsets)
+
+    if cat_img_map is not None:
+        cat_ids = list(cat_img_map.keys())
+        cat_img_offsets = np.zeros(len(cat_ids) + 1, dtype=np.int64)
+        np.cumsum([len(cat_img_map[c]) for c in cat_ids],
+                  out=cat_img_offsets[1:])
+        arrays['cat_img_cat_ids'] = np.array(cat_ids, dtype=np.int64)
+        arrays['cat_img_offsets'] = cat_img_offsets
+        arrays['cat_img_img_ids'] = np.array(
+            [img_id for c in cat_ids for img_id in cat_img_map[c]],
+            dtype=np.int64)
+
+    cache_root = osp.dirname(osp.abspath(cache_path))
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_path = f'{cache_path}.tmp{os.getpid()}'
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(osp.join(tmp_path, f'{name}.npy'), array)
+    with open(osp.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(dict(version=DATA_LIST_CACHE_VERSION, meta=meta or {}), f)
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        # Another process has written the same cache in the meantime.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+class ColumnarDataList(Sequence):
+    """A lazily decoded view of a data list dumped by
+    :func:`dump_data_list_cache`.
+
+    The arrays of the cache are memory-mapped and the data information of an
+    image is only built when it is indexed, so that ranks and dataloader
+    workers on the same node share the page cache of the cache files
+    instead of holding their own Python objects of the whole data list.
+
+    Args:
+        cache_path (str): Cache directory.
+        inds (np.ndarray, optional): Indices of the images of the cache in
+            the view. Defaults to None, i.e. all the images.
+        extra_info (dict, optional): Fields added to the data information of
+            every image, e.g. ``text``. Defaults to None.
+    """
+
+    def __init__(self,
+                 cache_path: str,
+                 inds: Optional[np.ndarray] = None,
+                 extra_info: Optional[dict] = None) -> None:
+        self.cache_path = cache_path
+        self.inds = inds
+        self.extra_info = extra_info or {}
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getstate__(self) -> dict:
+        # reopen the memory maps instead of pickling their content
+        state = self.__dict__.copy()
+        state['_arrays'] = {}
+        return state
+
+    def _load(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = np.load(
+                osp.join(self.cache_path, f'{name}.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    def __len__(self) -> int:
+        if self.inds is None:
+            return len(self._load('img_ids'))
+        return len(self.inds)
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a per-image array of the view.
+
+        Args:
+            name (str): One of ``img_ids``, ``heights`` and ``widths``.
+
+        Returns:
+            np.ndarray: The values of the images in the view.
+        """
+        array = self._load(name)
+        return array if self.inds is None else array[self.inds]
+
+    def instance_labels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the instance labels of the images in the view.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The number of instances of each
+            image and the concatenated labels of the instances.
+        """
+        offsets = self._load('inst_offsets')
+        labels = self._load('bbox_labels')
+        if self.inds is None:
+            return np.diff(offsets), np.asarray(labels)
+        starts = offsets[self.inds]
+        num_instances = offsets[self.inds + 1] - starts
+        # gather the label slices of the selected images
+        label_inds = np.repeat(
+            starts - np.cumsum(num_instances) + num_instances,
+            num_instances) + np.arange(num_instances.sum())
+        return num_instances, labels[label_inds]
+
+    def subset(self, inds: Sequence[int]) -> 'ColumnarDataList':
+        """Get a view of the given images of this view."""
+        inds = np.asarray(inds, dtype=np.int64)
+        if self.inds is not None:
+            inds = self.inds[inds]
+        return ColumnarDataList(self.cache_path, inds, self.extra_info)
+
+    def _get_string(self, name: str, idx: int) -> str:
+        offsets = self._load(f'{name}_offsets')
+        return self._load(f'{name}_buffer'
+                          )[offsets[idx]:offsets[idx +
+                                                 1]].tobytes().decode('utf-8')
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.subset(np.arange(len(self))[idx])
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('data list index out of range')
+        if self.inds is not None:
+            idx = int(self.inds[idx])
+
+        start, end = self._load('inst_offsets')[idx:idx + 2].tolist()
+        instances = []
+        for j, (bbox, bbox_label, ignore_flag, has_mask) in enumerate(
+                zip(
+                    self._load('bboxes')[start:end].tolist(),
+                    self._load('bbox_labels')[start:end].tolist(),
+                    self._load('ignore_flags')[start:end].tolist(),
+                    self._load('has_mask')[start:end].tolist()), start):
+            instance = dict(
+                ignore_flag=ignore_flag, bbox=bbox, bbox_label=bbox_label)
+            if has_mask:
+                instance['mask'] = json.loads(self._get_string('mask', j))
+            instances.append(instance)
+
+        seg_map_path = None
+        if self._load('seg_map_valid')[idx]:
+            seg_map_path = self._get_string('seg_map', idx)
+        data_info = dict(
+            img_path=self._get_string('img_path', idx),
+            img_id=int(self._load('img_ids')[idx]),
+            seg_map_path=seg_map_path,
+            height=int(self._load('heights')[idx]),
+            width=int(self._load('widths')[idx]))
+        data_info.update(self.extra_info)
+        data_info['instances'] = instances
+        return data_info
+
+
+def load_data_list_cache(
+    cache_path: str
+) -> Optional[Tuple[ColumnarDataList, dict, Optional[Dict[int, list]]]]:
+    """Load a data list dumped by :func:`dump_data_list_cache`.
+
+    Args:
+        cache_path (str): Cache directory.
+
+    Returns:
+        tuple or None: ``(data_list, meta, cat_img_map)`` or None if the
+        cache does not exist or is of an incompatible version. The
+        ``data_list`` is a :class:`ColumnarDataList` over the
+        memory-mapped arrays of the cache.
+    """
+    meta_file = osp.join(cache_path, 'meta.json')
+    if not osp.isfile(meta_file):
+        return None
+    with open(meta_file) as f:
+        meta = json.load(f)
+    if meta.get('version') != DATA_LIST_CACHE_VERSION:
+        return None
+
+    data_list = ColumnarDataList(cache_path)
+    cat_img_map = None
+    if osp.isfile(osp.join(cache_path, 'cat_img_cat_ids.npy')):
+        cat_ids = data_list._load('cat_img_cat_ids').tolist()
+        offsets = data_list._load('cat_img_offsets').tolist()
+        cat_img_ids = data_list._load('cat_img_img_ids')
+        cat_img_map = defaultdict(list)
+        for i, cat_id in enumerate(cat_ids):
+            cat_img_map[cat_id] = cat_img_ids[offsets[i]:offsets[i +
+                                                                 1]].tolist()
+    return data_list, meta['meta'], cat_img_map
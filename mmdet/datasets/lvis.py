@@ -276,6 +276,11 @@ class LVISV05Dataset(CocoDataset):
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_dir is not None:
+            data_list = self._load_data_list_cache()
+            if data_list is not None:
+                return data_list
+
         try:
             import lvis
             if getattr(lvis, '__version__', '0') >= '10.5.3':
@@ -295,7 +300,7 @@ class LVISV05Dataset(CocoDataset):
         self.cat_img_map = copy.deepcopy(self.lvis.cat_img_map)
 
         img_ids = self.lvis.get_img_ids()
-        data_list = []
+        raw_data_infos = []
         total_ann_ids = []
         for img_id in img_ids:
             raw_img_info = self.lvis.load_imgs([img_id])[0]
@@ -310,13 +315,11 @@ class LVISV05Dataset(CocoDataset):
             raw_ann_info = self.lvis.load_anns(ann_ids)
             total_ann_ids.extend(ann_ids)
 
-            parsed_data_info = self.parse_data_info({
-                'raw_ann_info':
-                raw_ann_info,
-                'raw_img_info':
-                raw_img_info
+            raw_data_infos.append({
+                'raw_ann_info': raw_ann_info,
+                'raw_img_info': raw_img_info
             })
-            data_list.append(parsed_data_info)
+        data_list = self.parse_data_list(raw_data_infos)
         if self.ANN_ID_UNIQUE:
             assert len(set(total_ann_ids)) == len(
                 total_ann_ids
@@ -324,6 +327,8 @@ class LVISV05Dataset(CocoDataset):
 
         del self.lvis
 
+        if self.ann_cache_dir is not None:
+            self._dump_data_list_cache(data_list)
         return data_list
 
 
@@ -589,6 +594,11 @@ class LVISV1Dataset(LVISDataset):
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_dir is not None:
+            data_list = self._load_data_list_cache()
+            if data_list is not None:
+                return data_list
+
         try:
             import lvis
             if getattr(lvis, '__version__', '0') >= '10.5.3':
@@ -608,7 +618,7 @@ class LVISV1Dataset(LVISDataset):
         self.cat_img_map = copy.deepcopy(self.lvis.cat_img_map)
 
         img_ids = self.lvis.get_img_ids()
-        data_list = []
+        raw_data_infos = []
         total_ann_ids = []
         for img_id in img_ids:
             raw_img_info = self.lvis.load_imgs([img_id])[0]
@@ -621,13 +631,11 @@ class LVISV1Dataset(LVISDataset):
             ann_ids = self.lvis.get_ann_ids(img_ids=[img_id])
             raw_ann_info = self.lvis.load_anns(ann_ids)
             total_ann_ids.extend(ann_ids)
-            parsed_data_info = self.parse_data_info({
-                'raw_ann_info':
-                raw_ann_info,
-                'raw_img_info':
-                raw_img_info
+            raw_data_infos.append({
+                'raw_ann_info': raw_ann_info,
+                'raw_img_info': raw_img_info
             })
-            data_list.append(parsed_data_info)
+        data_list = self.parse_data_list(raw_data_infos)
         if self.ANN_ID_UNIQUE:
             assert len(set(total_ann_ids)) == len(
                 total_ann_ids
@@ -635,4 +643,6 @@ class LVISV1Dataset(LVISDataset):
 
         del self.lvis
 
+        if self.ann_cache_dir is not None:
+            self._dump_data_list_cache(data_list)
         return data_list
@@ -104,6 +104,11 @@ class Objects365V1Dataset(CocoDataset):
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_dir is not None:
+            data_list = self._load_data_list_cache()
+            if data_list is not None:
+                return data_list
+
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
             self.coco = self.COCOAPI(local_path)
@@ -124,7 +129,7 @@ class Objects365V1Dataset(CocoDataset):
         self.cat_img_map = copy.deepcopy(self.coco.cat_img_map)
 
         img_ids = self.coco.get_img_ids()
-        data_list = []
+        raw_data_infos = []
         total_ann_ids = []
         for img_id in img_ids:
             raw_img_info = self.coco.load_imgs([img_id])[0]
@@ -134,13 +139,11 @@ class Objects365V1Dataset(CocoDataset):
             raw_ann_info = self.coco.load_anns(ann_ids)
             total_ann_ids.extend(ann_ids)
 
-            parsed_data_info = self.parse_data_info({
-                'raw_ann_info':
-                raw_ann_info,
-                'raw_img_info':
-                raw_img_info
+            raw_data_infos.append({
+                'raw_ann_info': raw_ann_info,
+                'raw_img_info': raw_img_info
             })
-            data_list.append(parsed_data_info)
+        data_list = self.parse_data_list(raw_data_infos)
         if self.ANN_ID_UNIQUE:
             assert len(set(total_ann_ids)) == len(
                 total_ann_ids
@@ -148,6 +151,8 @@ class Objects365V1Dataset(CocoDataset):
 
         del self.coco
 
+        if self.ann_cache_dir is not None:
+            self._dump_data_list_cache(data_list)
         return data_list
 
 
@@ -237,6 +242,11 @@ class Objects365V2Dataset(CocoDataset):
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_dir is not None:
+            data_list = self._load_data_list_cache()
+            if data_list is not None:
+                return data_list
+
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
             self.coco = self.COCOAPI(local_path)
@@ -248,7 +258,7 @@ class Objects365V2Dataset(CocoDataset):
         self.cat_img_map = copy.deepcopy(self.coco.cat_img_map)
 
         img_ids = self.coco.get_img_ids()
-        data_list = []
+        raw_data_infos = []
         total_ann_ids = []
         for img_id in img_ids:
             raw_img_info = self.coco.load_imgs([img_id])[0]
@@ -267,13 +277,11 @@ class Objects365V2Dataset(CocoDataset):
                 continue
 
             raw_img_info['file_name'] = file_name
-            parsed_data_info = self.parse_data_info({
-                'raw_ann_info':
-                raw_ann_info,
-                'raw_img_info':
-                raw_img_info
+            raw_data_infos.append({
+                'raw_ann_info': raw_ann_info,
+                'raw_img_info': raw_img_info
             })
-            data_list.append(parsed_data_info)
+        data_list = self.parse_data_list(raw_data_infos)
         if self.ANN_ID_UNIQUE:
             assert len(set(total_ann_ids)) == len(
                 total_ann_ids
@@ -281,4 +289,6 @@ class Objects365V2Dataset(CocoDataset):
 
         del self.coco
 
+        if self.ann_cache_dir is not None:
+            self._dump_data_list_cache(data_list)
         return data_list
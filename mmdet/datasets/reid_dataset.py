@@ -1,7 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
 import os.path as osp
-from collections import defaultdict
 from typing import Any, Dict, List
 
 import numpy as np
@@ -50,15 +49,32 @@ class ReIDDataset(BaseDataset):
         return data_list
 
     def _parse_ann_info(self, data_list: List[dict]):
-        """Parse person id annotations."""
-        index_tmp_dic = defaultdict(list)  # pid->[idx1,...,idxN]
+        """Parse person id annotations.
+
+        The sample indices of each person id are stored in a CSR layout, i.e.
+        the indices of the ``i``-th id of ``self.pids`` are
+        ``self._pid_idxs[self._pid_offsets[i]:self._pid_offsets[i + 1]]``.
+        The image paths and labels are kept in arrays to assemble triplet
+        batches without copying the data infos.
+        """
+        self._gt_labels = np.array(
+            [int(info['gt_label']) for info in data_list], dtype=np.int64)
+        self._img_paths = np.array([info['img_path'] for info in data_list],
+                                   dtype=str)
+        self.pids, pid_inds = np.unique(self._gt_labels, return_inverse=True)
+        self._pid_idxs = np.argsort(pid_inds, kind='stable')
+        self._pid_offsets = np.zeros(len(self.pids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(pid_inds, minlength=len(self.pids)),
+            out=self._pid_offsets[1:])
+        self._pid_to_ind = {
+            pid: ind
+            for ind, pid in enumerate(self.pids.tolist())
+        }
         self.index_dic = dict()  # pid->array([idx1,...,idxN])
-        for idx, info in enumerate(data_list):
-            pid = info['gt_label']
-            index_tmp_dic[int(pid)].append(idx)
-        for pid, idxs in index_tmp_dic.items():
-            self.index_dic[pid] = np.asarray(idxs, dtype=np.int64)
-        self.pids = np.asarray(list(self.index_dic.keys()), dtype=np.int64)
+        for ind, pid in enumerate(self.pids.tolist()):
+            self.index_dic[pid] = self._pid_idxs[self._pid_offsets[ind]:self.
+                                                 _pid_offsets[ind + 1]]
 
     def prepare_data(self, idx: int) -> Any:
         """Get data processed by ''self.pipeline''.
@@ -71,9 +87,9 @@ class ReIDDataset(BaseDataset):
         """
         data_info = self.get_data_info(idx)
         if self.triplet_sampler is not None:
-            img_info = self.triplet_sampling(data_info['gt_label'],
-                                             **self.triplet_sampler)
-            data_info = copy.deepcopy(img_info)  # triplet -> list
+            # triplet -> dict of list, built from new lists
+            data_info = self.triplet_sampling(data_info['gt_label'],
+                                              **self.triplet_sampler)
         else:
             data_info = copy.deepcopy(data_info)  # no triplet -> dict
         return self.pipeline(data_info)
@@ -100,28 +116,37 @@ class ReIDDataset(BaseDataset):
             'The number of person ids in the training set must ' \
             'be greater than the number of person ids in the sample.'
 
-        pos_idxs = self.index_dic[int(
-            pos_pid)]  # all positive idxs for pos_pid
-        idxs_list = []
-        # select positive samplers
-        idxs_list.extend(pos_idxs[np.random.choice(
-            pos_idxs.shape[0], ins_per_id, replace=True)])
-        # select negative ids
-        neg_pids = np.random.choice(
-            [i for i, _ in enumerate(self.pids) if i != pos_pid],
-            num_ids - 1,
-            replace=False)
-        # select negative samplers for each negative id
-        for neg_pid in neg_pids:
-            neg_idxs = self.index_dic[neg_pid]
-            idxs_list.extend(neg_idxs[np.random.choice(
-                neg_idxs.shape[0], ins_per_id, replace=True)])
-        # return the final triplet batch
-        triplet_img_infos = []
-        for idx in idxs_list:
-            triplet_img_infos.append(copy.deepcopy(self.get_data_info(idx)))
-        # Collect data_list scatters (list of dict -> dict of list)
-        out = dict()
-        for key in triplet_img_infos[0].keys():
-            out[key] = [_info[key] for _info in triplet_img_infos]
-        return out
+        pos_ind = self._pid_to_ind[int(pos_pid)]
+        # select negative ids, which are uniformly sampled from the ids
+        # other than pos_pid
+        neg_inds = _random_subset(len(self.pids) - 1, num_ids - 1)
+        neg_inds += neg_inds >= pos_ind
+        pid_inds = np.concatenate([[pos_ind], neg_inds])
+        # select ins_per_id samplers for each id with replacement
+        starts = self._pid_offsets[pid_inds]
+        counts = self._pid_offsets[pid_inds + 1] - starts
+        offsets = np.random.randint(
+            0, counts[:, None], size=(num_ids, ins_per_id))
+        idxs = self._pid_idxs[(starts[:, None] + offsets).reshape(-1)]
+        # return the final triplet batch as a dict of list
+        return dict(
+            img_prefix=[dict(self.data_prefix) for _ in idxs],
+            img_path=self._img_paths[idxs].tolist(),
+            gt_label=list(self._gt_labels[idxs]),
+            sample_idx=idxs.tolist())
+
+
+def _random_subset(n: int, k: int) -> np.ndarray:
+    """Sample ``k`` distinct integers of ``[0, n)`` in a random order.
+
+    Floyd's algorithm draws ``k`` random numbers instead of shuffling all the
+    ``n`` candidates like ``np.random.choice(n, k, replace=False)``, with the
+    same distribution.
+    """
+    selected = set()
+    for j in range(n - k, n):
+        t = np.random.randint(0, j + 1)
+        selected.add(j if t in selected else t)
+    selected = np.fromiter(selected, dtype=np.int64, count=k)
+    np.random.shuffle(selected)
+    return selected
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .batch_sampler import (AspectRatioBatchSampler,
+from .batch_sampler import (AspectRatioBatchSampler, SizeBucketBatchSampler,
                             TrackAspectRatioBatchSampler)
 from .class_aware_sampler import ClassAwareSampler
 from .multi_source_sampler import GroupMultiSourceSampler, MultiSourceSampler
@@ -8,5 +8,5 @@ from .track_img_sampler import TrackImgSampler
 __all__ = [
     'ClassAwareSampler', 'AspectRatioBatchSampler', 'MultiSourceSampler',
     'GroupMultiSourceSampler', 'TrackImgSampler',
-    'TrackAspectRatioBatchSampler'
+    'TrackAspectRatioBatchSampler', 'SizeBucketBatchSampler'
 ]
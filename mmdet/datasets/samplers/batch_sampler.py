@@ -1,6 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Sequence
+import math
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
+import torch
+from mmengine.dist import all_reduce, get_world_size
+from mmengine.logging import print_log
 from torch.utils.data import BatchSampler, Sampler
 
 from mmdet.datasets.samplers.track_img_sampler import TrackImgSampler
@@ -114,3 +120,241 @@ class TrackAspectRatioBatchSampler(AspectRatioBatchSampler):
             else:
                 yield left_data[:self.batch_size]
                 left_data = left_data[self.batch_size:]
+
+
+@DATA_SAMPLERS.register_module()
+class SizeBucketBatchSampler(BatchSampler):
+    """A sampler wrapper for grouping images of similar shapes after resizing
+    into a same batch, to reduce the padding of the batch inputs.
+
+    The images are resized to ``scale`` keeping their aspect ratio, like
+    ``Resize`` with ``keep_ratio=True``, and bucketed by their resized
+    shape quantized to ``bucket_size``. A batch is yielded once a bucket
+    holds ``batch_size`` images or, if ``max_pixels`` is set, once adding
+    the next image would make the padded batch exceed ``max_pixels``
+    pixels, so that batches of small images hold more images. The rest
+    images are sorted by their shapes and split into batches at the end of
+    an epoch.
+
+    The sizes of the images are read once from
+    ``dataset.get_img_sizes()`` if the dataset has it, or else from the
+    data information of every image. The base sampler is wrapped as is, so
+    the sharding and the seeding of every epoch of ``DefaultSampler`` or
+    ``InfiniteSampler`` are kept.
+
+    Note:
+        With ``max_pixels``, the number of batches of every rank is synced
+        to the maximum one over the ranks by splitting the largest batches.
+        The batches of an epoch are built once and shared by ``__len__``
+        and ``__iter__``, so ``__len__`` returns the number of batches of
+        the current epoch of the base sampler, before the syncing if it is
+        called before the iteration. The base sampler must be finite in this
+        case.
+
+    Args:
+        sampler (Sampler): Base sampler.
+        batch_size (int): Size of mini-batch. It is the maximum size of
+            mini-batch if ``max_pixels`` is set.
+        drop_last (bool): If ``True``, the sampler will drop the last batch if
+            its size would be less than ``batch_size``. Only used when
+            ``max_pixels`` is None. Defaults to False.
+        scale (Tuple[int, int], optional): Target scale of ``Resize``. If
+            None, the original sizes are used. Defaults to (1333, 800).
+        bucket_size (int): The resized height and width are rounded up to
+            multiples of ``bucket_size`` to form the buckets.
+            Defaults to 64.
+        pad_size_divisor (int): Size divisor of the padding of the data
+            preprocessor, used by the padding statistics. Defaults to 32.
+        max_pixels (int, optional): Maximum number of pixels of a padded
+            batch. Defaults to None.
+    """
+
+    def __init__(self,
+                 sampler: Sampler,
+                 batch_size: int,
+                 drop_last: bool = False,
+                 scale: Optional[Tuple[int, int]] = (1333, 800),
+                 bucket_size: int = 64,
+                 pad_size_divisor: int = 32,
+                 max_pixels: Optional[int] = None) -> None:
+        if not isinstance(sampler, Sampler):
+            raise TypeError('sampler should be an instance of ``Sampler``, '
+                            f'but got {sampler}')
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError('batch_size should be a positive integer value, '
+                             f'but got batch_size={batch_size}')
+        assert bucket_size > 0 and pad_size_divisor > 0
+        assert max_pixels is None or max_pixels > 0
+        self.sampler = sampler
+        self.batch_size = batch_size
+        self.drop_last = drop_last
+        self.bucket_size = bucket_size
+        self.pad_size_divisor = pad_size_divisor
+        self.max_pixels = max_pixels
+
+        dataset = sampler.dataset
+        if hasattr(dataset, 'get_img_sizes'):
+            sizes = dataset.get_img_sizes()
+        else:
+            data_infos = (
+                dataset.get_data_info(i) for i in range(len(dataset)))
+            sizes = np.array([(data_info['width'], data_info['height'])
+                              for data_info in data_infos]).reshape(-1, 2)
+        widths, heights = sizes[:, 0].astype(np.float64), sizes[:, 1]
+        if scale is not None:
+            # the same rescaling as `mmcv.rescale_size` with a tuple scale
+            long_edge, short_edge = max(scale), min(scale)
+            scale_factor = np.minimum(
+                long_edge / np.maximum(np.maximum(widths, heights), 1),
+                short_edge / np.maximum(np.minimum(widths, heights), 1))
+            widths = np.floor(widths * scale_factor + 0.5)
+            heights = np.floor(heights * scale_factor + 0.5)
+        # resized (height, width) of the images
+        self.img_shapes = np.stack([heights, widths], axis=1).astype(np.int64)
+        self.bucket_ids = self._bucket_ids(self.img_shapes)
+
+        self.num_batches = None
+        # epoch of the base sampler and the batches built for it
+        self._epoch = None
+        self._batches = None
+        # number of batches, images, pixels of images and of padded batches
+        self._stats = [0, 0, 0, 0]
+
+    def _bucket_ids(self, img_shapes: np.ndarray) -> np.ndarray:
+        """Map the quantized shapes to ids of buckets."""
+        quantized = -(-img_shapes // self.bucket_size)
+        _, bucket_ids = np.unique(quantized, axis=0, return_inverse=True)
+        return bucket_ids.reshape(-1)
+
+    def _padded_pixels(self, max_height: int, max_width: int,
+                       num_imgs: int) -> int:
+        divisor = self.pad_size_divisor
+        return (num_imgs * math.ceil(max_height / divisor) * divisor *
+                math.ceil(max_width / divisor) * divisor)
+
+    def _make_batches(self, indices: Iterable[int]) -> Iterator[List[int]]:
+        """Group the indices of an epoch into batches."""
+        buckets = defaultdict(list)
+        # max (height, width) in each bucket
+        bucket_shapes = defaultdict(lambda: (0, 0))
+        for idx in indices:
+            bucket_id = self.bucket_ids[idx]
+            bucket = buckets[bucket_id]
+            if self.max_pixels is not None and len(bucket) > 0:
+                height, width = np.maximum(bucket_shapes[bucket_id],
+                                           self.img_shapes[idx])
+                if self._padded_pixels(height, width,
+                                       len(bucket) + 1) > self.max_pixels:
+                    yield bucket[:]
+                    del bucket[:]
+                    bucket_shapes[bucket_id] = (0, 0)
+            bucket.append(idx)
+            bucket_shapes[bucket_id] = tuple(
+                np.maximum(bucket_shapes[bucket_id], self.img_shapes[idx]))
+            if len(bucket) == self.batch_size:
+                yield bucket[:]
+                del bucket[:]
+                bucket_shapes[bucket_id] = (0, 0)
+
+        # split the rest data sorted by shapes into batches
+        left_data = [idx for bucket in buckets.values() for idx in bucket]
+        left_data.sort(key=lambda idx: tuple(self.img_shapes[idx]))
+        batch = []
+        for idx in left_data:
+            if self.max_pixels is not None and len(batch) > 0:
+                height, width = self.img_shapes[batch + [idx]].max(axis=0)
+                if self._padded_pixels(height, width,
+                                       len(batch) + 1) > self.max_pixels:
+                    yield batch
+                    batch = []
+            batch.append(idx)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if len(batch) > 0 and (self.max_pixels is not None
+                               or not self.drop_last):
+            yield batch
+
+    def _epoch_batches(self) -> List[List[int]]:
+        """Get the batches of the current epoch of the base sampler, which
+        are built only once per epoch."""
+        epoch = getattr(self.sampler, 'epoch', None)
+        if self._batches is None or epoch != self._epoch:
+            self._batches = list(self._make_batches(self.sampler))
+            self._epoch = epoch
+            self.num_batches = len(self._batches)
+        return self._batches
+
+    def _sync_num_batches(self, batches: List[List[int]]) -> List[List[int]]:
+        """Split the largest batches until every rank has the same number of
+        batches."""
+        num_batches = torch.tensor(len(batches))
+        all_reduce(num_batches, op='max')
+        num_batches = int(num_batches)
+        if len(batches) == 0 and num_batches > 0:
+            # no image on this rank, repeat the first image of the dataset
+            # so that all ranks run the same number of iterations
+            batches = [[0]]
+        while len(batches) < num_batches:
+            i = max(range(len(batches)), key=lambda i: len(batches[i]))
+            batch = batches[i]
+            if len(batch) == 1:
+                # all batches have one image, repeat the first one
+                batches.append(batches[0][:])
+                continue
+            batches[i:i +
+                    1] = [batch[:len(batch) // 2], batch[len(batch) // 2:]]
+        return batches
+
+    def get_stats(self) -> dict:
+        """Get the padding statistics of the batches yielded in the current
+        or the last epoch.
+
+        Returns:
+            dict: ``num_batches``, ``mean_batch_size`` and
+            ``padding_efficiency``, the ratio of the pixels of the resized
+            images to the pixels of the padded batches.
+        """
+        num_batches, num_imgs, useful_pixels, padded_pixels = self._stats
+        return dict(
+            num_batches=num_batches,
+            mean_batch_size=num_imgs / max(num_batches, 1),
+            padding_efficiency=useful_pixels / max(padded_pixels, 1))
+
+    def __iter__(self) -> Sequence[int]:
+        if self.max_pixels is not None:
+            if getattr(self.sampler, 'epoch', None) is None:
+                # the order of a base sampler without epochs may change
+                self._batches = None
+            # the cached batches of the epoch are not modified by the syncing
+            batches = [batch[:] for batch in self._epoch_batches()]
+            if get_world_size() > 1:
+                batches = self._sync_num_batches(batches)
+            self.num_batches = len(batches)
+        else:
+            batches = self._make_batches(self.sampler)
+        self._stats = [0, 0, 0, 0]
+        for batch in batches:
+            img_shapes = self.img_shapes[batch]
+            self._stats[0] += 1
+            self._stats[1] += len(batch)
+            self._stats[2] += int(img_shapes.prod(axis=1).sum())
+            self._stats[3] += self._padded_pixels(*img_shapes.max(axis=0),
+                                                  len(batch))
+            yield batch
+
+        stats = self.get_stats()
+        print_log(
+            f'{self.__class__.__name__}: {stats["num_batches"]} batches of '
+            f'{stats["mean_batch_size"]:.2f} images on average, padding '
+            f'efficiency {stats["padding_efficiency"]:.3f}',
+            logger='current')
+
+    def __len__(self) -> int:
+        if self.max_pixels is not None:
+            self._epoch_batches()
+            return self.num_batches
+        if self.drop_last:
+            return len(self.sampler) // self.batch_size
+        else:
+            return (len(self.sampler) + self.batch_size - 1) // self.batch_size
@@ -78,6 +78,12 @@ class ClassAwareSampler(Sampler):
         classes = self.dataset.metainfo.get('classes', None)
         if classes is None:
             raise ValueError('dataset metainfo must contain `classes`')
+        if hasattr(self.dataset, 'get_cat2imgs'):
+            # use the category index built by the dataset
+            return {
+                cat: inds.tolist()
+                for cat, inds in self.dataset.get_cat2imgs().items()
+            }
         # sort the label index
         cat2imgs = {i: [] for i in range(len(classes))}
         for i in range(len(self.dataset)):
@@ -14,7 +14,7 @@ from mmengine.structures import BaseDataElement
 from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import get_box_type
 from mmdet.structures.bbox.box_type import autocast_box_type
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, PolygonMasks, RLEMasks
 
 
 @TRANSFORMS.register_module()
@@ -223,7 +223,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
 
     - gt_bboxes (BaseBoxes[torch.float32])
     - gt_bboxes_labels (np.int64)
-    - gt_masks (BitmapMasks | PolygonMasks)
+    - gt_masks (BitmapMasks | PolygonMasks | RLEMasks)
     - gt_seg_map (np.uint8)
     - gt_ignore_flags (bool)
 
@@ -237,6 +237,10 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         with_seg (bool): Whether to parse and load the semantic segmentation
             annotation. Defaults to False.
         poly2mask (bool): Whether to convert mask to bitmap. Default: True.
+        poly2rle (bool): Whether to keep the converted masks run-length
+            encoded as :obj:`RLEMasks` instead of decoding them to
+            :obj:`BitmapMasks`, which saves memory in the data pipeline. Only
+            valid when ``poly2mask`` is True. Defaults to False.
         box_type (str): The box type used to wrap the bboxes. If ``box_type``
             is None, gt_bboxes will keep being np.ndarray. Defaults to 'hbox'.
         reduce_zero_label (bool): Whether reduce all label value
@@ -256,6 +260,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
             self,
             with_mask: bool = False,
             poly2mask: bool = True,
+            poly2rle: bool = False,
             box_type: str = 'hbox',
             # use for semseg
             reduce_zero_label: bool = False,
@@ -264,6 +269,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         super(LoadAnnotations, self).__init__(**kwargs)
         self.with_mask = with_mask
         self.poly2mask = poly2mask
+        self.poly2rle = poly2rle
         self.box_type = box_type
         self.reduce_zero_label = reduce_zero_label
         self.ignore_index = ignore_index
@@ -318,7 +324,21 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         Returns:
             np.ndarray: The decode bitmap mask of shape (img_h, img_w).
         """
+        return maskUtils.decode(self._poly2rle(mask_ann, img_h, img_w))
+
+    def _poly2rle(self, mask_ann: Union[list, dict], img_h: int,
+                  img_w: int) -> dict:
+        """Private function to convert masks represented with polygon to
+        COCO RLE.
+
+        Args:
+            mask_ann (list | dict): Polygon mask annotation input.
+            img_h (int): The height of output mask.
+            img_w (int): The width of output mask.
 
+        Returns:
+            dict: The RLE of the mask.
+        """
         if isinstance(mask_ann, list):
             # polygon -- a single object might consist of multiple parts
             # we merge all parts into one mask rle code
@@ -330,8 +350,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         else:
             # rle
             rle = mask_ann
-        mask = maskUtils.decode(rle)
-        return mask
+        return rle
 
     def _process_masks(self, results: dict) -> list:
         """Process gt_masks and filter invalid polygons.
@@ -384,7 +403,10 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         """
         h, w = results['ori_shape']
         gt_masks = self._process_masks(results)
-        if self.poly2mask:
+        if self.poly2mask and self.poly2rle:
+            gt_masks = RLEMasks.from_coco_rles(
+                [self._poly2rle(mask, h, w) for mask in gt_masks], h, w)
+        elif self.poly2mask:
             gt_masks = BitmapMasks(
                 [self._poly2mask(mask, h, w) for mask in gt_masks], h, w)
         else:
@@ -456,6 +478,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         repr_str += f'with_mask={self.with_mask}, '
         repr_str += f'with_seg={self.with_seg}, '
         repr_str += f'poly2mask={self.poly2mask}, '
+        repr_str += f'poly2rle={self.poly2rle}, '
         repr_str += f"imdecode_backend='{self.imdecode_backend}', "
         repr_str += f'backend_args={self.backend_args})'
         return repr_str
@@ -0,0 +1,250 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import multiprocessing
+import os
+import time
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    resource_tracker = None
+    shared_memory = None
+
+# Image dtypes which can be cached, the index is stored in the slot meta.
+_IMG_DTYPES = (np.uint8, np.float32, np.float64, np.uint16, np.int16, np.int32)
+# Fields of the meta of a slot.
+_SEQ, _HEIGHT, _WIDTH, _CHANNELS, _DTYPE, _NUM_INSTANCES = range(6)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+class SharedResultsCache:
+    """Results cache in a shared-memory ring buffer.
+
+    The cache is used by :class:`CachedMosaic` and :class:`CachedMixUp` to
+    share the cached results of all dataloader workers, instead of keeping a
+    private cache in every worker. The segment holds ``max_cached_images``
+    fixed-size slots, each of which stores an image of at most
+    ``max_img_shape`` and at most ``max_num_instances`` bboxes, labels and
+    ignore flags. Results are written in place without deep copying them.
+
+    Writers are serialized by a lock. Readers do not lock but check the
+    sequence number of a slot, which is odd while the slot is written, and
+    retry with a backoff if the slot changed while it was copied. A slot
+    which stays unreadable, e.g. because its writer died in the middle of a
+    write, is reported as a cache miss after ``max_read_retries`` retries.
+
+    The segment is created by the process which builds the cache and is
+    inherited by forked workers or attached by spawned ones. It is unlinked
+    when the cache of the creating process is garbage collected.
+
+    Args:
+        max_cached_images (int): Number of slots.
+        max_img_shape (Tuple[int, int]): Maximum (height, width) of the
+            cached images. Larger images are not cached.
+        max_num_instances (int): Maximum number of instances of a cached
+            result. Results with more instances are not cached.
+            Defaults to 512.
+        max_channels (int): Maximum number of channels of the cached images.
+            Defaults to 3.
+        max_read_retries (int): Maximum number of retries to read a slot
+            being written. The backoff between retries grows from 1 us to
+            1 ms, so a read gives up after about 0.1 s by default.
+            Defaults to 100.
+    """
+
+    def __init__(self,
+                 max_cached_images: int,
+                 max_img_shape: Tuple[int, int],
+                 max_num_instances: int = 512,
+                 max_channels: int = 3,
+                 max_read_retries: int = 100) -> None:
+        if shared_memory is None:
+            raise RuntimeError('The shared results cache requires '
+                               'multiprocessing.shared_memory (Python>=3.8).')
+        self.max_cached_images = max_cached_images
+        self.max_img_shape = tuple(max_img_shape)
+        self.max_num_instances = max_num_instances
+        self.max_channels = max_channels
+        self.max_read_retries = max_read_retries
+        # A slot holds a uint8 image of the maximum shape, images of wider
+        # dtypes fit if they are smaller.
+        self.slot_bytes = max_img_shape[0] * max_img_shape[1] * max_channels
+
+        self._layout = self._compute_layout()
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self._layout['size'])
+        self._owner_pid = os.getpid()
+        self._lock = multiprocessing.Lock()
+        self._init_views()
+        self._counter[0] = 0
+        self._meta[:] = 0
+        self._warned = False
+
+    def _compute_layout(self) -> dict:
+        n, k = self.max_cached_images, self.max_num_instances
+        layout = dict()
+        offset = 0
+        fields = [
+            ('counter', np.int64, (1, )),
+            ('meta', np.int64, (n, 6)),
+            ('bboxes', np.float32, (n, k, 4)),
+            ('labels', np.int64, (n, k)),
+            ('ignore_flags', np.bool_, (n, k)),
+            ('imgs', np.uint8, (n, self.slot_bytes)),
+        ]
+        for name, dtype, shape in fields:
+            layout[name] = (offset, dtype, shape)
+            offset = _align(offset +
+                            int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        layout['size'] = offset
+        return layout
+
+    def _init_views(self) -> None:
+        for name in ('counter', 'meta', 'bboxes', 'labels', 'ignore_flags',
+                     'imgs'):
+            offset, dtype, shape = self._layout[name]
+            setattr(
+                self, f'_{name}',
+                np.ndarray(
+                    shape, dtype=dtype, buffer=self._shm.buf, offset=offset))
+
+    def __len__(self) -> int:
+        return int(min(self._counter[0], self.max_cached_images))
+
+    def append(self, results: dict, random_pop: bool = True) -> None:
+        """Write a result into a free slot, or replace a cached one when the
+        cache is full.
+
+        Args:
+            results (dict): Result dict with ``img``, ``gt_bboxes``,
+                ``gt_bboxes_labels`` and ``gt_ignore_flags``.
+            random_pop (bool): Whether to replace a random result when the
+                cache is full. If set to False, replace the oldest one.
+                Defaults to True.
+        """
+        img = results['img']
+        bboxes = results['gt_bboxes']
+        if not isinstance(bboxes, np.ndarray):
+            bboxes = bboxes.numpy()
+        num_instances = len(bboxes)
+        channels = img.shape[2] if img.ndim == 3 else 1
+        if (img.dtype not in _IMG_DTYPES or img.nbytes > self.slot_bytes
+                or img.shape[0] > self.max_img_shape[0]
+                or img.shape[1] > self.max_img_shape[1]
+                or channels > self.max_channels
+                or num_instances > self.max_num_instances
+                or bboxes.shape[-1] != 4):
+            if not self._warned:
+                warnings.warn('Results which do not fit in the slots of the '
+                              'shared results cache are not cached, e.g. an '
+                              f'image of shape {img.shape} with '
+                              f'{num_instances} instances.')
+                self._warned = True
+            return
+
+        with self._lock:
+            count = int(self._counter[0])
+            if count < self.max_cached_images:
+                slot = count
+            elif random_pop:
+                slot = np.random.randint(0, self.max_cached_images)
+            else:
+                slot = count % self.max_cached_images
+            meta = self._meta[slot]
+            meta[_SEQ] += 1
+            meta[_HEIGHT], meta[_WIDTH] = img.shape[:2]
+            meta[_CHANNELS] = img.shape[2] if img.ndim == 3 else 0
+            meta[_DTYPE] = _IMG_DTYPES.index(img.dtype.type)
+            meta[_NUM_INSTANCES] = num_instances
+            self._imgs[slot, :img.nbytes] = np.ascontiguousarray(img).view(
+                np.uint8).reshape(-1)
+            self._bboxes[slot, :num_instances] = bboxes
+            self._labels[slot, :num_instances] = results['gt_bboxes_labels']
+            self._ignore_flags[slot, :num_instances] = \
+                results['gt_ignore_flags']
+            meta[_SEQ] += 1
+            self._counter[0] = count + 1
+
+    def num_instances(self, index: int) -> int:
+        """Number of instances of a cached result."""
+        return int(self._meta[index, _NUM_INSTANCES])
+
+    def __getitem__(self, index: int) -> Optional[dict]:
+        """Copy a cached result out of the shared memory.
+
+        Returns:
+            dict, optional: A result dict with ``img``, ``img_shape``,
+            ``gt_bboxes`` (np.ndarray), ``gt_bboxes_labels`` and
+            ``gt_ignore_flags``, or None if the slot could not be read
+            within ``max_read_retries`` retries.
+        """
+        meta = self._meta[index]
+        for retry in range(self.max_read_retries + 1):
+            if retry > 0:
+                time.sleep(min(1e-6 * 2**(retry - 1), 1e-3))
+            seq = int(meta[_SEQ])
+            if seq % 2 == 1:
+                # the slot is being written
+                continue
+            height, width, channels, dtype, num = (
+                int(x) for x in meta[_HEIGHT:])
+            shape = (height, width, channels) if channels else (height, width)
+            dtype = np.dtype(_IMG_DTYPES[dtype])
+            nbytes = int(np.prod(shape)) * dtype.itemsize
+            img = self._imgs[index, :nbytes].copy().view(dtype).reshape(shape)
+            results = dict(
+                img=img,
+                img_shape=img.shape[:2],
+                gt_bboxes=self._bboxes[index, :num].copy(),
+                gt_bboxes_labels=self._labels[index, :num].copy(),
+                gt_ignore_flags=self._ignore_flags[index, :num].copy())
+            if int(meta[_SEQ]) == seq:
+                return results
+        if not self._warned:
+            warnings.warn(f'Slot {index} of the shared results cache is '
+                          'still being written after '
+                          f'{self.max_read_retries} retries, it is treated '
+                          'as a cache miss.')
+            self._warned = True
+        return None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_shm_name'] = self._shm.name
+        for name in ('_shm', '_counter', '_meta', '_bboxes', '_labels',
+                     '_ignore_flags', '_imgs'):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        shm_name = state.pop('_shm_name')
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=shm_name)
+        # Only the creating process owns the segment, do not let the
+        # resource tracker of this process unlink it on exit.
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self._init_views()
+
+    def __deepcopy__(self, memo: dict) -> 'SharedResultsCache':
+        # Copies share the same cache.
+        return self
+
+    def __del__(self) -> None:
+        shm = self.__dict__.get('_shm')
+        if shm is None:
+            return
+        for name in ('_counter', '_meta', '_bboxes', '_labels',
+                     '_ignore_flags', '_imgs'):
+            self.__dict__.pop(name, None)
+        try:
+            shm.close()
+            if self._owner_pid == os.getpid():
+                shm.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
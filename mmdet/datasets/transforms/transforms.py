@@ -22,8 +22,9 @@ from numpy import random
 
 from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import HorizontalBoxes, autocast_box_type
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, PolygonMasks, RLEMasks
 from mmdet.utils import log_img_scale
+from .shared_cache import SharedResultsCache
 
 try:
     from imagecorruptions import corrupt
@@ -2988,7 +2989,7 @@ class CopyPaste(BaseTransform):
     - gt_bboxes (BaseBoxes[torch.float32]) (optional)
     - gt_bboxes_labels (np.int64) (optional)
     - gt_ignore_flags (bool) (optional)
-    - gt_masks (BitmapMasks) (optional)
+    - gt_masks (BitmapMasks | RLEMasks) (optional)
 
     Modified Keys:
 
@@ -3065,7 +3066,7 @@ class CopyPaste(BaseTransform):
         num_pasted = np.random.randint(0, max_num_pasted)
         return np.random.choice(num_bboxes, size=num_pasted, replace=False)
 
-    def get_gt_masks(self, results: dict) -> BitmapMasks:
+    def get_gt_masks(self, results: dict) -> Union[BitmapMasks, RLEMasks]:
         """Get gt_masks originally or generated based on bboxes.
 
         If gt_masks is not contained in results,
@@ -3073,7 +3074,8 @@ class CopyPaste(BaseTransform):
         Args:
             results (dict): Result dict.
         Returns:
-            BitmapMasks: gt_masks, originally or generated based on bboxes.
+            BitmapMasks or RLEMasks: gt_masks, originally or generated based
+            on bboxes.
         """
         if results.get('gt_masks', None) is not None:
             if self.paste_by_box:
@@ -3129,6 +3131,14 @@ class CopyPaste(BaseTransform):
         if len(src_bboxes) == 0:
             return dst_results
 
+        # the masks are composed densely, RLEMasks are encoded again after
+        # pasting
+        dst_is_rle = isinstance(dst_masks, RLEMasks)
+        if dst_is_rle:
+            dst_masks = dst_masks.to_bitmap()
+        if isinstance(src_masks, RLEMasks):
+            src_masks = src_masks.to_bitmap()
+
         # update masks and generate bboxes from updated masks
         composed_mask = np.where(np.any(src_masks.masks, axis=0), 1, 0)
         updated_dst_masks = self._get_updated_masks(dst_masks, composed_mask)
@@ -3156,8 +3166,12 @@ class CopyPaste(BaseTransform):
         dst_results['img'] = img
         dst_results['gt_bboxes'] = bboxes
         dst_results['gt_bboxes_labels'] = labels
-        dst_results['gt_masks'] = BitmapMasks(masks, masks.shape[1],
-                                              masks.shape[2])
+        if dst_is_rle:
+            dst_results['gt_masks'] = RLEMasks.from_bitmaps(
+                masks, masks.shape[1], masks.shape[2])
+        else:
+            dst_results['gt_masks'] = BitmapMasks(masks, masks.shape[1],
+                                                  masks.shape[2])
         dst_results['gt_ignore_flags'] = ignore_flags
 
         return dst_results
@@ -3194,7 +3208,7 @@ class RandomErasing(BaseTransform):
     - gt_bboxes (HorizontalBoxes[torch.float32]) (optional)
     - gt_bboxes_labels (np.int64) (optional)
     - gt_ignore_flags (bool) (optional)
-    - gt_masks (BitmapMasks) (optional)
+    - gt_masks (BitmapMasks | RLEMasks) (optional)
 
     Modified Keys:
     - img
@@ -3302,11 +3316,21 @@ class RandomErasing(BaseTransform):
             results['gt_masks'] = results['gt_masks'][valid_inds]
 
     def _transform_masks(self, results: dict, patches: List[list]) -> None:
-        """Random erasing the masks."""
+        """Random erasing the masks.
+
+        :obj:`RLEMasks` are decoded to be erased and encoded again.
+        """
+        masks = results['gt_masks']
+        is_rle = isinstance(masks, RLEMasks)
+        if is_rle:
+            masks = masks.to_bitmap()
         for patch in patches:
             px1, py1, px2, py2 = patch
-            results['gt_masks'].masks[:, py1:py2,
-                                      px1:px2] = self.mask_border_value
+            masks.masks[:, py1:py2, px1:px2] = self.mask_border_value
+        if is_rle:
+            masks = RLEMasks.from_bitmaps(masks.masks, masks.height,
+                                          masks.width)
+        results['gt_masks'] = masks
 
     def _transform_seg(self, results: dict, patches: List[list]) -> None:
         """Random erasing the segmentation map."""
@@ -3408,12 +3432,18 @@ class CachedMosaic(Mosaic):
         random_pop (bool): Whether to randomly pop a result from the cache
             when the cache is full. If set to False, use FIFO popping method.
             Defaults to True.
+        shared_cache (bool): Whether to keep the cache in shared memory,
+            which is shared by all dataloader workers, instead of a list in
+            every worker. Images larger than ``2 * img_scale`` or results
+            with masks are not supported by the shared cache.
+            Defaults to False.
     """
 
     def __init__(self,
                  *args,
                  max_cached_images: int = 40,
                  random_pop: bool = True,
+                 shared_cache: bool = False,
                  **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.results_cache = []
@@ -3421,6 +3451,11 @@ class CachedMosaic(Mosaic):
         assert max_cached_images >= 4, 'The length of cache must >= 4, ' \
                                        f'but got {max_cached_images}.'
         self.max_cached_images = max_cached_images
+        self.shared_cache = shared_cache
+        if shared_cache:
+            self.results_cache = SharedResultsCache(
+                max_cached_images,
+                (int(self.img_scale[1] * 2), int(self.img_scale[0] * 2)))
 
     @cache_randomness
     def get_indexes(self, cache: list) -> list:
@@ -3447,13 +3482,18 @@ class CachedMosaic(Mosaic):
             dict: Updated result dict.
         """
         # cache and pop images
-        self.results_cache.append(copy.deepcopy(results))
-        if len(self.results_cache) > self.max_cached_images:
-            if self.random_pop:
-                index = random.randint(0, len(self.results_cache) - 1)
-            else:
-                index = 0
-            self.results_cache.pop(index)
+        if self.shared_cache:
+            assert 'gt_masks' not in results, \
+                'The shared cache does not support gt_masks.'
+            self.results_cache.append(results, self.random_pop)
+        else:
+            self.results_cache.append(copy.deepcopy(results))
+            if len(self.results_cache) > self.max_cached_images:
+                if self.random_pop:
+                    index = random.randint(0, len(self.results_cache) - 1)
+                else:
+                    index = 0
+                self.results_cache.pop(index)
 
         if len(self.results_cache) <= 4:
             return results
@@ -3461,7 +3501,19 @@ class CachedMosaic(Mosaic):
         if random.uniform(0, 1) > self.prob:
             return results
         indices = self.get_indexes(self.results_cache)
-        mix_results = [copy.deepcopy(self.results_cache[i]) for i in indices]
+        if self.shared_cache:
+            # results read from the shared cache are already copies
+            mix_results = [self.results_cache[i] for i in indices]
+            if any(res is None for res in mix_results):
+                # a slot could not be read, skip the mosaic like a miss
+                return results
+            for res in mix_results:
+                res['gt_bboxes'] = type(results['gt_bboxes'])(
+                    res['gt_bboxes'], clone=False)
+        else:
+            mix_results = [
+                copy.deepcopy(self.results_cache[i]) for i in indices
+            ]
 
         # TODO: refactor mosaic to reuse these code.
         mosaic_bboxes = []
@@ -3493,7 +3545,8 @@ class CachedMosaic(Mosaic):
             if loc == 'top_left':
                 results_patch = copy.deepcopy(results)
             else:
-                results_patch = copy.deepcopy(mix_results[i - 1])
+                # mix_results are copies of the cache, modify them in place
+                results_patch = mix_results[i - 1]
 
             img_i = results_patch['img']
             h_i, w_i = img_i.shape[:2]
@@ -3570,7 +3623,8 @@ class CachedMosaic(Mosaic):
         repr_str += f'pad_val={self.pad_val}, '
         repr_str += f'prob={self.prob}, '
         repr_str += f'max_cached_images={self.max_cached_images}, '
-        repr_str += f'random_pop={self.random_pop})'
+        repr_str += f'random_pop={self.random_pop}, '
+        repr_str += f'shared_cache={self.shared_cache})'
         return repr_str
 
 
@@ -3644,6 +3698,11 @@ class CachedMixUp(BaseTransform):
             Defaults to True.
         prob (float): Probability of applying this transformation.
             Defaults to 1.0.
+        shared_cache (bool): Whether to keep the cache in shared memory,
+            which is shared by all dataloader workers, instead of a list in
+            every worker. Images larger than ``2 * img_scale`` or results
+            with masks are not supported by the shared cache.
+            Defaults to False.
     """
 
     def __init__(self,
@@ -3655,7 +3714,8 @@ class CachedMixUp(BaseTransform):
                  bbox_clip_border: bool = True,
                  max_cached_images: int = 20,
                  random_pop: bool = True,
-                 prob: float = 1.0) -> None:
+                 prob: float = 1.0,
+                 shared_cache: bool = False) -> None:
         assert isinstance(img_scale, tuple)
         assert max_cached_images >= 2, 'The length of cache must >= 2, ' \
                                        f'but got {max_cached_images}.'
@@ -3672,13 +3732,18 @@ class CachedMixUp(BaseTransform):
         self.max_cached_images = max_cached_images
         self.random_pop = random_pop
         self.prob = prob
+        self.shared_cache = shared_cache
+        if shared_cache:
+            self.results_cache = SharedResultsCache(
+                max_cached_images,
+                (int(img_scale[1] * 2), int(img_scale[0] * 2)))
 
     @cache_randomness
-    def get_indexes(self, cache: list) -> int:
+    def get_indexes(self, cache: Union[list, SharedResultsCache]) -> int:
         """Call function to collect indexes.
 
         Args:
-            cache (list): The result cache.
+            cache (list | :obj:`SharedResultsCache`): The result cache.
 
         Returns:
             int: index.
@@ -3686,8 +3751,11 @@ class CachedMixUp(BaseTransform):
 
         for i in range(self.max_iters):
             index = random.randint(0, len(cache) - 1)
-            gt_bboxes_i = cache[index]['gt_bboxes']
-            if len(gt_bboxes_i) != 0:
+            if isinstance(cache, SharedResultsCache):
+                num_gts = cache.num_instances(index)
+            else:
+                num_gts = len(cache[index]['gt_bboxes'])
+            if num_gts != 0:
                 break
         return index
 
@@ -3702,13 +3770,18 @@ class CachedMixUp(BaseTransform):
             dict: Updated result dict.
         """
         # cache and pop images
-        self.results_cache.append(copy.deepcopy(results))
-        if len(self.results_cache) > self.max_cached_images:
-            if self.random_pop:
-                index = random.randint(0, len(self.results_cache) - 1)
-            else:
-                index = 0
-            self.results_cache.pop(index)
+        if self.shared_cache:
+            assert 'gt_masks' not in results, \
+                'The shared cache does not support gt_masks.'
+            self.results_cache.append(results, self.random_pop)
+        else:
+            self.results_cache.append(copy.deepcopy(results))
+            if len(self.results_cache) > self.max_cached_images:
+                if self.random_pop:
+                    index = random.randint(0, len(self.results_cache) - 1)
+                else:
+                    index = 0
+                self.results_cache.pop(index)
 
         if len(self.results_cache) <= 1:
             return results
@@ -3717,7 +3790,16 @@ class CachedMixUp(BaseTransform):
             return results
 
         index = self.get_indexes(self.results_cache)
-        retrieve_results = copy.deepcopy(self.results_cache[index])
+        if self.shared_cache:
+            # results read from the shared cache are already copies
+            retrieve_results = self.results_cache[index]
+            if retrieve_results is None:
+                # the slot could not be read, skip the mixup like a miss
+                return results
+            retrieve_results['gt_bboxes'] = type(results['gt_bboxes'])(
+                retrieve_results['gt_bboxes'], clone=False)
+        else:
+            retrieve_results = copy.deepcopy(self.results_cache[index])
 
         # TODO: refactor mixup to reuse these code.
         if retrieve_results['gt_bboxes'].shape[0] == 0:
@@ -3851,5 +3933,6 @@ class CachedMixUp(BaseTransform):
         repr_str += f'bbox_clip_border={self.bbox_clip_border}, '
         repr_str += f'max_cached_images={self.max_cached_images}, '
         repr_str += f'random_pop={self.random_pop}, '
-        repr_str += f'prob={self.prob})'
+        repr_str += f'prob={self.prob}, '
+        repr_str += f'shared_cache={self.shared_cache})'
         return repr_str
@@ -6,6 +6,7 @@ from .num_class_check_hook import NumClassCheckHook
 from .pipeline_switch_hook import PipelineSwitchHook
 from .set_epoch_info_hook import SetEpochInfoHook
 from .sync_norm_hook import SyncNormHook
+from .telemetry_hook import TelemetryHook
 from .utils import trigger_visualization_hook
 from .visualization_hook import DetVisualizationHook, TrackVisualizationHook
 from .yolox_mode_switch_hook import YOLOXModeSwitchHook
@@ -14,5 +15,5 @@ __all__ = [
     'YOLOXModeSwitchHook', 'SyncNormHook', 'CheckInvalidLossHook',
     'SetEpochInfoHook', 'MemoryProfilerHook', 'DetVisualizationHook',
     'NumClassCheckHook', 'MeanTeacherHook', 'trigger_visualization_hook',
-    'PipelineSwitchHook', 'TrackVisualizationHook'
+    'PipelineSwitchHook', 'TrackVisualizationHook', 'TelemetryHook'
 ]
@@ -6,6 +6,7 @@ from mmengine.hooks import Hook
 from mmengine.model import is_model_wrapper
 from mmengine.runner import Runner
 
+from mmdet.models.layers import MultiTensorEMA
 from mmdet.registry import HOOKS
 
 
@@ -33,6 +34,11 @@ class MeanTeacherHook(Hook):
         skip_buffers (bool): Whether to skip the model buffers, such as
             batchnorm running stats (running_mean, running_var), it does not
             perform the ema operation. Default to True.
+
+    Note:
+        The update is fused by :class:`MultiTensorEMA`, which is built at the
+        first update of a model and references the tensors of the teacher
+        and the student, instead of collecting them at every update.
     """
 
     def __init__(self,
@@ -43,6 +49,8 @@ class MeanTeacherHook(Hook):
         self.momentum = momentum
         self.interval = interval
         self.skip_buffers = skip_buffer
+        self._ema = None
+        self._ema_model_id = None
 
     def before_train(self, runner: Runner) -> None:
         """To check that teacher model and student model exist."""
@@ -71,17 +79,16 @@ class MeanTeacherHook(Hook):
     def momentum_update(self, model: nn.Module, momentum: float) -> None:
         """Compute the moving average of the parameters using exponential
         moving average."""
-        if self.skip_buffers:
-            for (src_name, src_parm), (dst_name, dst_parm) in zip(
-                    model.student.named_parameters(),
-                    model.teacher.named_parameters()):
-                dst_parm.data.mul_(1 - momentum).add_(
-                    src_parm.data, alpha=momentum)
-        else:
-            for (src_parm,
-                 dst_parm) in zip(model.student.state_dict().values(),
-                                  model.teacher.state_dict().values()):
+        if self._ema is None or self._ema_model_id != id(model):
+            if self.skip_buffers:
+                src_tensors = list(model.student.parameters())
+                dst_tensors = list(model.teacher.parameters())
+            else:
                 # exclude num_tracking
-                if dst_parm.dtype.is_floating_point:
-                    dst_parm.data.mul_(1 - momentum).add_(
-                        src_parm.data, alpha=momentum)
+                src_tensors = list(
+                    model.student.state_dict(keep_vars=True).values())
+                dst_tensors = list(
+                    model.teacher.state_dict(keep_vars=True).values())
+            self._ema = MultiTensorEMA(dst_tensors, src_tensors)
+            self._ema_model_id = id(model)
+        self._ema.update(momentum)
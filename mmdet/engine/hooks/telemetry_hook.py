@@ -0,0 +1,378 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import functools
+import os
+import os.path as osp
+import resource
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+from mmengine.dist import get_rank
+from mmengine.hooks import Hook
+from mmengine.model import is_model_wrapper
+from mmengine.optim import OptimWrapper, OptimWrapperDict
+from mmengine.runner import Runner
+from mmengine.utils import mkdir_or_exist
+
+from mmdet.registry import HOOKS
+
+# Columns recorded for each mode. Times are in ms and memory in MB.
+_MEMORY_COLUMNS = [
+    'rss', 'peak_rss', 'workers_rss', 'accelerator_memory',
+    'accelerator_peak_memory'
+]
+_COLUMNS = dict(
+    train=[
+        'iter', 'data_time', 'preprocess_time', 'forward_time', 'loss_time',
+        'backward_time', 'optim_step_time', 'iter_time', 'imgs_per_sec'
+    ] + _MEMORY_COLUMNS,
+    val=[
+        'iter', 'data_time', 'preprocess_time', 'forward_time',
+        'eval_process_time', 'iter_time', 'imgs_per_sec'
+    ] + _MEMORY_COLUMNS)
+_COLUMNS['test'] = _COLUMNS['val']
+# Phases timed by wrapping the methods of the model, the optim wrapper and
+# the evaluators. The forward time is the rest of the compute time.
+_PHASES = ('preprocess_time', 'loss_time', 'backward_time', 'optim_step_time',
+           'eval_process_time')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class _RingBuffer:
+    """A preallocated ring buffer of rows of float64 columns.
+
+    Args:
+        columns (List[str]): Names of the columns.
+        size (int): Number of rows kept in the buffer.
+    """
+
+    def __init__(self, columns: List[str], size: int) -> None:
+        self.columns = columns
+        self.data = np.full((size, len(columns)), np.nan)
+        self.count = 0
+        self.flushed = 0
+
+    def append(self, row: Dict[str, float]) -> None:
+        self.data[self.count % len(self.data)] = [
+            row.get(column, np.nan) for column in self.columns
+        ]
+        self.count += 1
+
+    def window(self) -> np.ndarray:
+        """The rows in the buffer, from the oldest to the newest."""
+        size = len(self.data)
+        if self.count <= size:
+            return self.data[:self.count]
+        return np.roll(self.data, -(self.count % size), axis=0)
+
+    def pop_unflushed(self) -> np.ndarray:
+        """The rows appended since the last call and still in the buffer,
+        from the oldest to the newest."""
+        window = self.window()
+        num_rows = min(self.count - self.flushed, len(window))
+        rows = window[len(window) - num_rows:]
+        self.flushed = self.count
+        return rows
+
+
+def _read_rss(pid: str = 'self') -> float:
+    """Resident set size of a process in MB, read from procfs."""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 / 1024
+    except (OSError, IndexError, ValueError):
+        return np.nan
+
+
+def _children_rss() -> float:
+    """Total resident set size of the child processes in MB, e.g. the
+    dataloader workers."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        rss = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss / 1024 / 1024
+    task_dir = f'/proc/{os.getpid()}/task'
+    if not osp.isdir(task_dir):
+        return np.nan
+    pids = set()
+    for tid in os.listdir(task_dir):
+        try:
+            with open(osp.join(task_dir, tid, 'children')) as f:
+                pids.update(f.read().split())
+        except OSError:
+            pass
+    return float(sum(np.nan_to_num(_read_rss(pid)) for pid in pids))
+
+
+def _num_imgs(data_batch: Optional[dict]) -> int:
+    """Number of images of a batch from the dataloader."""
+    if isinstance(data_batch, dict):
+        inputs = data_batch.get('inputs')
+        if isinstance(inputs, (list, tuple, torch.Tensor)):
+            return len(inputs)
+    return 0
+
+
+@HOOKS.register_module()
+class TelemetryHook(Hook):
+    """Telemetry hook recording structured timings and memory of every
+    iteration.
+
+    The time of every iteration is split into phases, namely the data wait
+    time since the previous iteration, the data preprocessing, the forward,
+    the loss parsing, the backward and the optimizer step in training, and
+    the processing of the evaluators in validation and testing. The phases
+    are timed by wrapping the methods of the model, the optim wrapper and
+    the evaluators, and the forward time is the rest of the iteration. The
+    images per second, the resident memory of the process and of the
+    dataloader workers, the peak resident memory of the process, and the
+    allocated and peak allocated CUDA memory are recorded as well.
+
+    The samples of each mode are written into a preallocated ring buffer and
+    flushed every ``flush_interval`` samples to the columnar files
+    ``{out_dir}/telemetry/{mode}_rank{rank}.csv`` or
+    ``{out_dir}/telemetry/{mode}_rank{rank}_{index}.npz``, and the
+    percentiles of the timings over the buffer are logged.
+
+    Note:
+        CUDA kernels run asynchronously, so that their time is counted in
+        the phase which waits for them, e.g. the loss parsing, unless
+        ``synchronize`` is True, which synchronizes at the boundaries of the
+        phases at the cost of some throughput.
+
+    Args:
+        interval (int): Record every ``interval`` iterations. Defaults to 1.
+        buffer_size (int): Number of samples of each mode kept in the ring
+            buffer, over which the percentiles are computed.
+            Defaults to 1000.
+        flush_interval (int): Number of samples of each mode between two
+            flushes, which must not exceed ``buffer_size``. Defaults to 100.
+        file_format (str): Format of the flushed files, 'csv' or 'npz'.
+            Defaults to 'csv'.
+        percentiles (Sequence[float]): Percentiles of the timings logged at
+            every flush. Defaults to (50, 90, 99).
+        synchronize (bool): Whether to synchronize CUDA when timing the
+            phases. Defaults to False.
+        out_dir (str, optional): Directory of the telemetry files. Defaults
+            to None, which means the log directory of the runner.
+    """
+
+    priority = 'VERY_LOW'
+
+    def __init__(self,
+                 interval: int = 1,
+                 buffer_size: int = 1000,
+                 flush_interval: int = 100,
+                 file_format: str = 'csv',
+                 percentiles: Sequence[float] = (50, 90, 99),
+                 synchronize: bool = False,
+                 out_dir: Optional[str] = None) -> None:
+        assert interval > 0
+        assert 0 < flush_interval <= buffer_size, \
+            'flush_interval must be in (0, buffer_size]'
+        assert file_format in ('csv', 'npz'), \
+            f'file_format must be csv or npz, but got {file_format}'
+        self.interval = interval
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.file_format = file_format
+        self.percentiles = percentiles
+        self.synchronize = synchronize
+        self.out_dir = out_dir
+
+        self._buffers = {
+            mode: _RingBuffer(columns, buffer_size)
+            for mode, columns in _COLUMNS.items()
+        }
+        self._num_files = dict.fromkeys(_COLUMNS, 0)
+        self._wrapped = []
+        self._phase_times = dict.fromkeys(_PHASES, 0.)
+        self._last_end = None
+        self._iter_start = None
+
+    def _now(self) -> float:
+        if self.synchronize and torch.cuda.is_available():
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _wrap(self, obj, name: str, phase: str) -> None:
+        """Accumulate the time of the method ``name`` of ``obj`` into
+        ``phase``, by setting a wrapper as an attribute of the instance."""
+        if obj is None or not hasattr(obj, name) or any(
+                o is obj and n == name for o, n, _ in self._wrapped):
+            return
+        func = getattr(obj, name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = self._now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._phase_times[phase] += self._now() - start
+
+        self._wrapped.append((obj, name, obj.__dict__.get(name)))
+        setattr(obj, name, wrapper)
+
+    def before_run(self, runner: Runner) -> None:
+        """Wrap the methods whose time is recorded."""
+        if self.out_dir is None:
+            self.out_dir = runner.log_dir
+        self.out_dir = osp.join(self.out_dir, 'telemetry')
+        model = runner.model
+        if is_model_wrapper(model):
+            model = model.module
+        self._wrap(
+            getattr(model, 'data_preprocessor', None), 'forward',
+            'preprocess_time')
+        self._wrap(model, 'parse_losses', 'loss_time')
+
+    def before_train(self, runner: Runner) -> None:
+        """Wrap the methods of the optim wrappers."""
+        optim_wrapper = runner.optim_wrapper
+        if isinstance(optim_wrapper, OptimWrapperDict):
+            optim_wrappers = list(optim_wrapper.values())
+        elif isinstance(optim_wrapper, OptimWrapper):
+            optim_wrappers = [optim_wrapper]
+        else:
+            optim_wrappers = []
+        for optim_wrapper in optim_wrappers:
+            self._wrap(optim_wrapper, 'backward', 'backward_time')
+            self._wrap(optim_wrapper, 'step', 'optim_step_time')
+            self._wrap(optim_wrapper, 'zero_grad', 'optim_step_time')
+
+    def before_val(self, runner: Runner) -> None:
+        """Wrap the process method of the evaluator."""
+        self._wrap(runner.val_loop.evaluator, 'process', 'eval_process_time')
+
+    def before_test(self, runner: Runner) -> None:
+        """Wrap the process method of the evaluator."""
+        self._wrap(runner.test_loop.evaluator, 'process', 'eval_process_time')
+
+    def _before_epoch(self, runner: Runner, mode: str = 'train') -> None:
+        # the data wait of the first iteration includes the start of the
+        # dataloader iterator
+        self._last_end = time.perf_counter()
+
+    def _after_epoch(self, runner: Runner, mode: str = 'train') -> None:
+        # the time spent after an epoch, e.g. by the evaluation, is not
+        # counted as the data wait of the next iteration
+        self._last_end = time.perf_counter()
+        self._flush(runner, mode)
+
+    def _before_iter(self,
+                     runner: Runner,
+                     batch_idx: int,
+                     data_batch: Optional[dict] = None,
+                     mode: str = 'train') -> None:
+        self._iter_start = self._now()
+        for phase in _PHASES:
+            self._phase_times[phase] = 0.
+
+    def _after_iter(self,
+                    runner: Runner,
+                    batch_idx: int,
+                    data_batch: Optional[dict] = None,
+                    outputs: Optional[Sequence] = None,
+                    mode: str = 'train') -> None:
+        end = self._now()
+        last_end, self._last_end = self._last_end, end
+        if self._iter_start is None or not self.every_n_inner_iters(
+                batch_idx, self.interval):
+            return
+        compute_time = end - self._iter_start
+        data_time = (
+            self._iter_start - last_end if last_end is not None else np.nan)
+        iter_time = compute_time + np.nan_to_num(data_time)
+        row = {
+            phase: phase_time * 1000
+            for phase, phase_time in self._phase_times.items()
+        }
+        row['forward_time'] = (compute_time -
+                               sum(self._phase_times.values())) * 1000
+        row['data_time'] = data_time * 1000
+        row['iter_time'] = iter_time * 1000
+        row['iter'] = runner.iter if mode == 'train' else batch_idx
+        num_imgs = _num_imgs(data_batch)
+        row['imgs_per_sec'] = num_imgs / iter_time if iter_time > 0 \
+            else np.nan
+        row.update(self._memory_stats())
+
+        buffer = self._buffers[mode]
+        buffer.append(row)
+        if buffer.count - buffer.flushed >= self.flush_interval:
+            self._flush(runner, mode)
+
+    def _memory_stats(self) -> Dict[str, float]:
+        # ru_maxrss is in KB on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        stats = dict(
+            rss=_read_rss(), peak_rss=peak_rss, workers_rss=_children_rss())
+        if torch.cuda.is_available():
+            stats['accelerator_memory'] = \
+                torch.cuda.memory_allocated() / 1024 / 1024
+            stats['accelerator_peak_memory'] = \
+                torch.cuda.max_memory_allocated() / 1024 / 1024
+        return stats
+
+    def _flush(self, runner: Runner, mode: str) -> None:
+        """Write the new samples of ``mode`` and log the percentiles of the
+        timings over the buffer."""
+        buffer = self._buffers[mode]
+        rows = buffer.pop_unflushed()
+        if len(rows) == 0:
+            return
+        mkdir_or_exist(self.out_dir)
+        filename = osp.join(self.out_dir, f'{mode}_rank{get_rank()}')
+        if self.file_format == 'csv':
+            filename += '.csv'
+            write_header = not osp.exists(filename)
+            with open(filename, 'a') as f:
+                np.savetxt(
+                    f,
+                    rows,
+                    fmt='%.6g',
+                    delimiter=',',
+                    header=','.join(buffer.columns) if write_header else '',
+                    comments='')
+        else:
+            filename += f'_{self._num_files[mode]:05d}.npz'
+            np.savez(
+                filename, **{
+                    column: rows[:, i]
+                    for i, column in enumerate(buffer.columns)
+                })
+        self._num_files[mode] += 1
+
+        window = buffer.window()
+        msgs = []
+        for i, column in enumerate(buffer.columns):
+            if not column.endswith('_time') or np.isnan(window[:, i]).all():
+                continue
+            values = np.nanpercentile(window[:, i], self.percentiles)
+            msgs.append(f'{column}: ' + '/'.join(f'{value:.1f}'
+                                                 for value in values))
+        percentiles = '/'.join(f'p{p:g}' for p in self.percentiles)
+        runner.logger.info(f'Telemetry ({mode}, last {len(window)} samples, '
+                           f'{percentiles} in ms) ' + ', '.join(msgs))
+
+    def after_run(self, runner: Runner) -> None:
+        """Flush the remaining samples and restore the wrapped methods."""
+        for mode in self._buffers:
+            self._flush(runner, mode)
+        for obj, name, attr in reversed(self._wrapped):
+            if attr is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, attr)
+        self._wrapped = []
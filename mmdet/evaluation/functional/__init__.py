@@ -1,14 +1,17 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .bbox_overlaps import bbox_overlaps
+from .bbox_overlaps import (batched_bbox_overlaps, batched_max_overlaps,
+                            bbox_overlaps)
 from .cityscapes_utils import evaluateImgLists
 from .class_names import (cityscapes_classes, coco_classes,
                           coco_panoptic_classes, dataset_aliases, get_classes,
                           imagenet_det_classes, imagenet_vid_classes,
                           objects365v1_classes, objects365v2_classes,
                           oid_challenge_classes, oid_v6_classes, voc_classes)
+from .det_analysis import (accumulate_confusion_matrix, concat_imgs,
+                           eval_map_per_img, get_img_gts, tpfp_multi_iou_thrs)
 from .mean_ap import average_precision, eval_map, print_map_summary
 from .panoptic_utils import (INSTANCE_OFFSET, pq_compute_multi_core,
-                             pq_compute_single_core)
+                             pq_compute_single_core, pq_compute_single_image)
 from .recall import (eval_recalls, plot_iou_recall, plot_num_recall,
                      print_recall_summary)
 from .ytvis import YTVIS
@@ -20,7 +23,10 @@ __all__ = [
     'average_precision', 'eval_map', 'print_map_summary', 'eval_recalls',
     'print_recall_summary', 'plot_num_recall', 'plot_iou_recall',
     'oid_v6_classes', 'oid_challenge_classes', 'INSTANCE_OFFSET',
-    'pq_compute_single_core', 'pq_compute_multi_core', 'bbox_overlaps',
-    'objects365v1_classes', 'objects365v2_classes', 'coco_panoptic_classes',
-    'evaluateImgLists', 'YTVIS', 'YTVISeval'
+    'pq_compute_single_core', 'pq_compute_multi_core',
+    'pq_compute_single_image', 'bbox_overlaps', 'objects365v1_classes',
+    'objects365v2_classes', 'coco_panoptic_classes', 'evaluateImgLists',
+    'YTVIS', 'YTVISeval', 'batched_bbox_overlaps',
+    'accumulate_confusion_matrix', 'tpfp_multi_iou_thrs', 'eval_map_per_img',
+    'batched_max_overlaps', 'get_img_gts', 'concat_imgs'
 ]
@@ -63,3 +63,116 @@ def bbox_overlaps(bboxes1,
     if exchange:
         ious = ious.T
     return ious
+
+
+def batched_bbox_overlaps(bboxes1,
+                          inds1,
+                          bboxes2,
+                          inds2,
+                          num_groups,
+                          mode='iou',
+                          eps=1e-6,
+                          use_legacy_coordinate=False):
+    """Calculate the ious between the bboxes of bboxes1 and bboxes2 which
+    are in the same group, e.g. the bboxes of the same image.
+
+    Instead of a dense (n, k) matrix, only the ious of the pairs in the same
+    group are computed, with the same float32 arithmetic as
+    :func:`bbox_overlaps`. The pairs are ordered by the index in bboxes1,
+    then by the index in bboxes2.
+
+    Args:
+        bboxes1 (ndarray): Shape (n, 4)
+        inds1 (ndarray): Group index of each bbox of bboxes1, shape (n, ).
+        bboxes2 (ndarray): Shape (k, 4), sorted by group index.
+        inds2 (ndarray): Group index of each bbox of bboxes2, shape (k, ).
+        num_groups (int): Number of groups.
+        mode (str): IOU (intersection over union) or IOF (intersection
+            over foreground)
+        use_legacy_coordinate (bool): Same as :func:`bbox_overlaps`.
+            Default: False.
+
+    Returns:
+        tuple[ndarray]: The index in bboxes1, the index in bboxes2 and the
+        iou of each pair, all of shape (num_pairs, ).
+    """
+    assert mode in ['iou', 'iof']
+    if not use_legacy_coordinate:
+        extra_length = 0.
+    else:
+        extra_length = 1.
+    counts2 = np.bincount(inds2, minlength=num_groups)
+    starts2 = np.cumsum(counts2) - counts2
+    pair_counts = counts2[inds1]
+    pair_starts = np.cumsum(pair_counts) - pair_counts
+    pair_inds1 = np.repeat(np.arange(len(bboxes1)), pair_counts)
+    pair_inds2 = np.arange(pair_counts.sum()) + np.repeat(
+        starts2[inds1] - pair_starts, pair_counts)
+
+    bboxes1 = bboxes1[:, :4].astype(np.float32)
+    bboxes2 = bboxes2[:, :4].astype(np.float32)
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0] + extra_length) * (
+        bboxes1[:, 3] - bboxes1[:, 1] + extra_length)
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0] + extra_length) * (
+        bboxes2[:, 3] - bboxes2[:, 1] + extra_length)
+    pair_bboxes1 = bboxes1[pair_inds1]
+    pair_bboxes2 = bboxes2[pair_inds2]
+    x_start = np.maximum(pair_bboxes1[:, 0], pair_bboxes2[:, 0])
+    y_start = np.maximum(pair_bboxes1[:, 1], pair_bboxes2[:, 1])
+    x_end = np.minimum(pair_bboxes1[:, 2], pair_bboxes2[:, 2])
+    y_end = np.minimum(pair_bboxes1[:, 3], pair_bboxes2[:, 3])
+    overlap = np.maximum(x_end - x_start + extra_length, 0) * np.maximum(
+        y_end - y_start + extra_length, 0)
+    if mode == 'iou':
+        union = area1[pair_inds1] + area2[pair_inds2] - overlap
+    else:
+        union = area1[pair_inds1]
+    ious = overlap / np.maximum(union, eps)
+    return pair_inds1, pair_inds2, ious
+
+
+def batched_max_overlaps(bboxes1,
+                         inds1,
+                         bboxes2,
+                         inds2,
+                         num_groups,
+                         use_legacy_coordinate=False):
+    """Find the max iou of each bbox of bboxes1 with the bboxes2 of the same
+    group, and the first bbox of bboxes2 reaching it.
+
+    This is the assignment of the greedy matching of detections to gts,
+    e.g. in :func:`tpfp_default`, for all groups at once.
+
+    Args:
+        bboxes1 (ndarray): Shape (n, 4)
+        inds1 (ndarray): Group index of each bbox of bboxes1, shape (n, ).
+        bboxes2 (ndarray): Shape (k, 4), sorted by group index.
+        inds2 (ndarray): Group index of each bbox of bboxes2, shape (k, ).
+        num_groups (int): Number of groups.
+        use_legacy_coordinate (bool): Same as :func:`bbox_overlaps`.
+            Default: False.
+
+    Returns:
+        tuple[ndarray]: The max iou of each bbox of bboxes1 and the index in
+        bboxes2 of its first bbox with this iou, both of shape (n, ). They
+        are -1 for the bboxes whose group has no bbox in bboxes2.
+    """
+    num_bboxes1 = len(bboxes1)
+    pair_inds1, pair_inds2, ious = batched_bbox_overlaps(
+        bboxes1,
+        inds1,
+        bboxes2,
+        inds2,
+        num_groups,
+        use_legacy_coordinate=use_legacy_coordinate)
+    pair_counts = np.bincount(pair_inds1, minlength=num_bboxes1)
+    has_pair = pair_counts > 0
+    ious_max = np.full(num_bboxes1, -1, dtype=np.float32)
+    argmax = np.full(num_bboxes1, -1, dtype=np.int64)
+    if len(ious) > 0:
+        seg_starts = (np.cumsum(pair_counts) - pair_counts)[has_pair]
+        ious_max[has_pair] = np.maximum.reduceat(ious, seg_starts)
+        is_max = ious == ious_max[pair_inds1]
+        argmax[has_pair] = np.minimum.reduceat(
+            np.where(is_max, pair_inds2, len(bboxes2)), seg_starts)
+    return ious_max, argmax
@@ -0,0 +1,285 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
+
+from .bbox_overlaps import batched_bbox_overlaps, batched_max_overlaps
+
+
+def get_img_gts(gts):
+    """Get the ground truths of an image.
+
+    Args:
+        gts (list[dict]): Instances with ``bbox`` and ``bbox_label``.
+
+    Returns:
+        tuple[ndarray]: Bboxes of shape (n, 4) and labels of shape (n, ).
+    """
+    gt_bboxes = np.array([gt['bbox'] for gt in gts],
+                         dtype=np.float32).reshape(-1, 4)
+    gt_labels = np.array([gt['bbox_label'] for gt in gts], dtype=np.int64)
+    return gt_bboxes, gt_labels
+
+
+def concat_imgs(img_items):
+    """Concatenate the bboxes and labels of images.
+
+    Args:
+        img_items (list[tuple[ndarray]]): Bboxes and labels of each image.
+
+    Returns:
+        tuple[ndarray]: Concatenated bboxes, labels and the image index of
+        each bbox.
+    """
+    bboxes, labels = zip(*img_items)
+    img_inds = np.repeat(np.arange(len(labels)), [len(x) for x in labels])
+    return np.concatenate(bboxes), np.concatenate(labels), img_inds
+
+
+def accumulate_confusion_matrix(confusion_matrix,
+                                det_bboxes,
+                                det_labels,
+                                det_img_inds,
+                                gt_bboxes,
+                                gt_labels,
+                                gt_img_inds,
+                                num_imgs,
+                                score_thr=0,
+                                tp_iou_thr=0.5):
+    """Accumulate the detections of a batch of images into a confusion
+    matrix.
+
+    A detection of class ``c`` whose score is at least ``score_thr`` counts
+    once for every gt of class ``g`` in its image with an IoU of at least
+    ``tp_iou_thr`` at ``[g, c]``, or once at ``[-1, c]`` (background) if it
+    overlaps no gt. A gt which is not overlapped by any detection of its own
+    class counts once at ``[g, -1]`` (missed).
+
+    Args:
+        confusion_matrix (ndarray): The confusion matrix to update in place,
+            of shape (num_classes + 1, num_classes + 1).
+        det_bboxes (ndarray): Detected bboxes of all images, of shape (m, 5)
+            with the scores in the last column.
+        det_labels (ndarray): Labels of the detected bboxes, of shape (m, ).
+        det_img_inds (ndarray): Image index of each detected bbox, of
+            shape (m, ).
+        gt_bboxes (ndarray): GT bboxes of all images, of shape (n, 4), sorted
+            by image index.
+        gt_labels (ndarray): Labels of the gt bboxes, of shape (n, ).
+        gt_img_inds (ndarray): Image index of each gt bbox, of shape (n, ).
+        num_imgs (int): Number of images.
+        score_thr (float): Score threshold to filter bboxes.
+            Defaults to 0.
+        tp_iou_thr (float): IoU threshold to be considered as matched.
+            Defaults to 0.5.
+
+    Returns:
+        ndarray: The updated confusion matrix.
+    """
+    num_bins = confusion_matrix.shape[0]
+    valid = det_bboxes[:, -1] >= score_thr
+    det_bboxes = det_bboxes[valid]
+    det_labels = det_labels[valid]
+    det_img_inds = det_img_inds[valid]
+
+    pair_det_inds, pair_gt_inds, ious = batched_bbox_overlaps(
+        det_bboxes, det_img_inds, gt_bboxes, gt_img_inds, num_imgs)
+    # compare in float64 like the scalar comparisons of the ious
+    hit = ious.astype(np.float64) >= tp_iou_thr
+    pair_det_inds = pair_det_inds[hit]
+    pair_gt_inds = pair_gt_inds[hit]
+    pair_det_labels = det_labels[pair_det_inds]
+    pair_gt_labels = gt_labels[pair_gt_inds]
+    confusion_matrix += np.bincount(
+        pair_gt_labels * num_bins + pair_det_labels,
+        minlength=num_bins * num_bins).reshape(num_bins, num_bins)
+
+    # background false positives
+    det_matched = np.zeros(len(det_bboxes), dtype=bool)
+    det_matched[pair_det_inds] = True
+    confusion_matrix[-1] += np.bincount(
+        det_labels[~det_matched], minlength=num_bins)
+    # false negatives
+    gt_detected = np.zeros(len(gt_bboxes), dtype=bool)
+    gt_detected[pair_gt_inds[pair_gt_labels == pair_det_labels]] = True
+    confusion_matrix[:, -1] += np.bincount(
+        gt_labels[~gt_detected], minlength=num_bins)
+    return confusion_matrix
+
+
+def tpfp_multi_iou_thrs(det_bboxes,
+                        det_group_inds,
+                        gt_bboxes,
+                        gt_group_inds,
+                        gt_ignore_inds,
+                        num_groups,
+                        iou_thrs,
+                        use_legacy_coordinate=False):
+    """Check if detected bboxes are true positive or false positive at
+    several IoU thresholds at once.
+
+    The detections of a group, e.g. an image and a class, are matched to the
+    gts of the same group with the greedy matching of
+    :func:`tpfp_default`. The IoUs and the best matched gt of the
+    detections are computed once for all thresholds. Detections of equal
+    scores are matched in their order.
+
+    Args:
+        det_bboxes (ndarray): Detected bboxes of all groups, of shape (m, 5).
+        det_group_inds (ndarray): Group index of each detected bbox, of
+            shape (m, ).
+        gt_bboxes (ndarray): GT bboxes of all groups, of shape (n, 4),
+            sorted by group index. Within a group, the ignored gts come after
+            the others.
+        gt_group_inds (ndarray): Group index of each gt bbox, of shape (n, ).
+        gt_ignore_inds (ndarray): Whether each gt bbox is ignored, of
+            shape (n, ).
+        num_groups (int): Number of groups.
+        iou_thrs (ndarray): IoU thresholds, of shape (num_thrs, ).
+        use_legacy_coordinate (bool): Same as :func:`tpfp_default`.
+            Defaults to False.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) of bool, each of shape (num_thrs, m).
+    """
+    # for each det, the max iou with all gts and the first gt reaching it
+    ious_max, matched_gt = batched_max_overlaps(
+        det_bboxes,
+        det_group_inds,
+        gt_bboxes,
+        gt_group_inds,
+        num_groups,
+        use_legacy_coordinate=use_legacy_coordinate)
+    has_gt = matched_gt >= 0
+
+    hit = ious_max.astype(np.float64) >= np.asarray(iou_thrs)[:, None]
+    fp = ~hit
+    tp = np.zeros_like(hit)
+
+    # among the dets hitting the same gt, the highest scored one covers it
+    # and the others are false positives
+    cand_inds = np.flatnonzero(has_gt)
+    cand_inds = cand_inds[~gt_ignore_inds[matched_gt[cand_inds]]]
+    order = np.lexsort((-det_bboxes[cand_inds, -1], matched_gt[cand_inds]))
+    cand_inds = cand_inds[order]
+    cand_gts = matched_gt[cand_inds]
+    group_start = np.ones(len(cand_inds), dtype=bool)
+    group_start[1:] = cand_gts[1:] != cand_gts[:-1]
+    cand_hit = hit[:, cand_inds]
+    num_hits = _group_cumsum(cand_hit, group_start)
+    first_hit = cand_hit & (num_hits == 1)
+    tp[:, cand_inds] = first_hit
+    fp[:, cand_inds] |= cand_hit & ~first_hit
+    return tp, fp
+
+
+def eval_map_per_img(det_bboxes,
+                     det_labels,
+                     det_img_inds,
+                     gt_bboxes,
+                     gt_labels,
+                     gt_img_inds,
+                     num_imgs,
+                     num_classes,
+                     iou_thrs=None,
+                     gt_ignore_inds=None,
+                     use_legacy_coordinate=False):
+    """Evaluate the mAP of every image of a batch at several IoU thresholds.
+
+    The result of an image at a threshold equals the mAP of
+    :func:`eval_map` with ``eval_mode='area'`` on this image alone, but
+    the detections of all images, classes and thresholds are matched in a
+    single pass by :func:`tpfp_multi_iou_thrs` and the APs are computed
+    without a loop.
+
+    Args:
+        det_bboxes (ndarray): Detected bboxes of all images, of shape (m, 5)
+            with the scores in the last column.
+        det_labels (ndarray): Labels of the detected bboxes, of shape (m, ).
+        det_img_inds (ndarray): Image index of each detected bbox, of
+            shape (m, ).
+        gt_bboxes (ndarray): GT bboxes of all images, of shape (n, 4).
+        gt_labels (ndarray): Labels of the gt bboxes, of shape (n, ).
+        gt_img_inds (ndarray): Image index of each gt bbox, of shape (n, ).
+        num_imgs (int): Number of images.
+        num_classes (int): Number of classes.
+        iou_thrs (ndarray, optional): IoU thresholds. Defaults to None,
+            which means 0.5:0.05:0.95.
+        gt_ignore_inds (ndarray, optional): Whether each gt bbox is ignored,
+            of shape (n, ). Defaults to None.
+        use_legacy_coordinate (bool): Same as :func:`eval_map`.
+            Defaults to False.
+
+    Returns:
+        ndarray: The mAP of each image at each threshold, of shape
+        (num_imgs, num_thrs).
+    """
+    if iou_thrs is None:
+        iou_thrs = np.linspace(0.5, 0.95, 10)
+    num_thrs = len(iou_thrs)
+    num_groups = num_imgs * num_classes
+    if gt_ignore_inds is None:
+        gt_ignore_inds = np.zeros(len(gt_bboxes), dtype=bool)
+    det_groups = det_img_inds * num_classes + det_labels
+    gt_groups = gt_img_inds * num_classes + gt_labels
+    gt_order = np.lexsort((gt_ignore_inds, gt_groups))
+    gt_bboxes = gt_bboxes[gt_order]
+    gt_groups = gt_groups[gt_order]
+    gt_ignore_inds = gt_ignore_inds[gt_order]
+    tp, fp = tpfp_multi_iou_thrs(det_bboxes, det_groups, gt_bboxes, gt_groups,
+                                 gt_ignore_inds, num_groups, iou_thrs,
+                                 use_legacy_coordinate)
+
+    # sort the dets by group and score, and accumulate tp and fp in groups
+    order = np.lexsort((-det_bboxes[:, -1], det_groups))
+    det_groups = det_groups[order]
+    group_start = np.ones(len(order), dtype=bool)
+    group_start[1:] = det_groups[1:] != det_groups[:-1]
+    tp = _group_cumsum(tp[:, order], group_start).astype(np.float32)
+    fp = _group_cumsum(fp[:, order], group_start).astype(np.float32)
+
+    # the same arithmetic as :func:`eval_map` and
+    # :func:`average_precision`
+    eps = np.finfo(np.float32).eps
+    num_gts = np.bincount(gt_groups[~gt_ignore_inds], minlength=num_groups)
+    recalls = tp / np.maximum(num_gts[det_groups], eps)
+    precisions = tp / np.maximum((tp + fp), eps)
+    prev_recalls = np.zeros_like(recalls)
+    prev_recalls[:, 1:] = recalls[:, :-1]
+    prev_recalls[:, group_start] = 0
+    # the max precision of a det and the following ones of its group, the
+    # precisions of each group are shifted above those of the next groups
+    # so that a running max does not cross groups
+    shifts = 2. * (group_start.sum() - np.cumsum(group_start))
+    max_precisions = np.maximum.accumulate(
+        (precisions + shifts)[:, ::-1], axis=1)[:, ::-1] - shifts
+    ap_terms = (recalls - prev_recalls) * max_precisions
+    # APs are float32 as in :func:`average_precision`
+    aps = np.stack([
+        np.bincount(det_groups, weights=terms, minlength=num_groups)
+        for terms in ap_terms
+    ]).astype(np.float32).reshape(num_thrs, num_imgs, num_classes)
+
+    # average over the classes with gts of each image
+    has_gts = (num_gts > 0).reshape(num_imgs, num_classes)
+    num_valid = np.maximum(has_gts.sum(axis=1), 1).astype(np.float32)
+    mean_aps = (aps * has_gts).sum(axis=2) / num_valid
+    return mean_aps.T
+
+
+def _group_cumsum(values, group_start):
+    """Cumulative sums along the last axis which restart at every group.
+
+    Args:
+        values (ndarray): Values of shape (k, m), whose columns are sorted by
+            group.
+        group_start (ndarray): Whether each column starts a group, of
+            shape (m, ).
+
+    Returns:
+        ndarray: Cumulative sums of shape (k, m), in int64 for bool values.
+    """
+    if values.dtype == bool:
+        values = values.astype(np.int64)
+    sums = np.cumsum(values, axis=1)
+    group_lens = np.diff(
+        np.append(np.flatnonzero(group_start), len(group_start)))
+    return sums - np.repeat((sums - values)[:, group_start], group_lens, 1)
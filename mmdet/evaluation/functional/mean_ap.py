@@ -6,7 +6,7 @@ from mmengine.logging import print_log
 from mmengine.utils import is_str
 from terminaltables import AsciiTable
 
-from .bbox_overlaps import bbox_overlaps
+from .bbox_overlaps import batched_max_overlaps, bbox_overlaps
 from .class_names import get_classes
 
 
@@ -474,6 +474,133 @@ def tpfp_openimages(det_bboxes,
         return tp, fp, det_bboxes
 
 
+def tpfp_default_batched(det_bboxes,
+                         det_img_inds,
+                         gt_bboxes,
+                         gt_img_inds,
+                         gt_ignore_inds,
+                         num_imgs,
+                         iou_thr=0.5,
+                         area_ranges=None,
+                         use_legacy_coordinate=False):
+    """Vectorized :func:`tpfp_default` over all images of a class.
+
+    The IoUs of all det-gt pairs from the same image are computed at once and
+    the greedy matching is done by keeping the highest scored detection of
+    each matched gt. The results are identical to calling
+    :func:`tpfp_default` on each image and concatenating the outputs.
+
+    Args:
+        det_bboxes (ndarray): Detected bboxes of all images, of shape (m, 5),
+            sorted by image index.
+        det_img_inds (ndarray): Image index of each detected bbox, of
+            shape (m, ).
+        gt_bboxes (ndarray): GT bboxes of all images, of shape (n, 4), sorted
+            by image index. Within an image, the ignored gts come after the
+            others.
+        gt_img_inds (ndarray): Image index of each gt bbox, of shape (n, ).
+        gt_ignore_inds (ndarray): Whether each gt bbox is ignored, of
+            shape (n, ).
+        num_imgs (int): Number of images.
+        iou_thr (float): IoU threshold to be considered as matched.
+            Defaults to 0.5.
+        area_ranges (list[tuple] | None): Range of bbox areas to be
+            evaluated, in the format [(min1, max1), (min2, max2), ...].
+            Defaults to None.
+        use_legacy_coordinate (bool): Whether to use coordinate system in
+            mmdet v1.x. which means width, height should be
+            calculated as 'x2 - x1 + 1` and 'y2 - y1 + 1' respectively.
+            Defaults to False.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
+        each array is (num_scales, m).
+    """
+    if not use_legacy_coordinate:
+        extra_length = 0.
+    else:
+        extra_length = 1.
+
+    num_dets = det_bboxes.shape[0]
+    if area_ranges is None:
+        area_ranges = [(None, None)]
+    num_scales = len(area_ranges)
+    tp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    fp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    if num_dets == 0:
+        return tp, fp
+
+    det_counts = np.bincount(det_img_inds, minlength=num_imgs)
+    # for each det, the max iou with all gts and the first gt reaching it
+    ious_max, matched_gt = batched_max_overlaps(
+        det_bboxes,
+        det_img_inds,
+        gt_bboxes,
+        gt_img_inds,
+        num_imgs,
+        use_legacy_coordinate=use_legacy_coordinate)
+    has_gt = matched_gt >= 0
+    # compare in float64 like the scalar comparison of ``tpfp_default``
+    matched = has_gt & (ious_max.astype(np.float64) >= iou_thr)
+
+    # among the dets matched to the same gt, only the first one in the
+    # per-image score order covers it
+    scores = det_bboxes[:, -1]
+    cand_inds = np.flatnonzero(matched)
+    order = np.lexsort((-scores[cand_inds], matched_gt[cand_inds]))
+    cand_inds = cand_inds[order]
+    cand_gts = matched_gt[cand_inds]
+    group_first = np.ones(len(cand_inds), dtype=bool)
+    group_first[1:] = cand_gts[1:] != cand_gts[:-1]
+    # ``tpfp_default`` sorts with ``np.argsort`` which does not keep the
+    # order of equal scores, so break such ties with the same call
+    tied = np.flatnonzero(~group_first[1:]
+                          & (scores[cand_inds[1:]] == scores[cand_inds[:-1]])
+                          & group_first[:-1])
+    if len(tied) > 0:
+        det_starts = np.cumsum(det_counts) - det_counts
+        for pos in tied:
+            gt_ind = cand_gts[pos]
+            group = cand_inds[(cand_gts == gt_ind)
+                              & (scores[cand_inds] == scores[cand_inds[pos]])]
+            img_ind = det_img_inds[group[0]]
+            start = det_starts[img_ind]
+            img_order = np.argsort(-det_bboxes[start:start +
+                                               det_counts[img_ind], -1])
+            ranks = np.empty_like(img_order)
+            ranks[img_order] = np.arange(len(img_order))
+            winner = group[np.argmin(ranks[group - start])]
+            group_first[pos] = cand_inds[pos] == winner
+            group_first[np.flatnonzero(cand_inds == winner)] = True
+    covers_gt = np.zeros(num_dets, dtype=bool)
+    covers_gt[cand_inds[group_first]] = True
+
+    # det areas of unmatched dets follow the scalar arithmetic of
+    # ``tpfp_default`` if the image has gts and the array one otherwise
+    det_w = det_bboxes[:, 2] - det_bboxes[:, 0]
+    det_h = det_bboxes[:, 3] - det_bboxes[:, 1]
+    scalar_dtype = (det_bboxes.dtype.type(0) + extra_length).dtype
+    det_areas = np.where(has_gt, (det_w.astype(scalar_dtype) + extra_length) *
+                         (det_h.astype(scalar_dtype) + extra_length),
+                         (det_w + extra_length) * (det_h + extra_length))
+    gt_areas = (gt_bboxes[:, 2] - gt_bboxes[:, 0] + extra_length) * (
+        gt_bboxes[:, 3] - gt_bboxes[:, 1] + extra_length)
+    for k, (min_area, max_area) in enumerate(area_ranges):
+        if min_area is None:
+            gt_ignore = gt_ignore_inds
+            fp[k, ~matched] = 1
+        else:
+            gt_ignore = gt_ignore_inds | (gt_areas < min_area) | (
+                gt_areas >= max_area)
+            fp[k, ~matched & (det_areas >= min_area)
+               & (det_areas < max_area)] = 1
+        valid = matched.copy()
+        valid[matched] = ~gt_ignore[matched_gt[matched]]
+        tp[k, valid & covers_gt] = 1
+        fp[k, valid & ~covers_gt] = 1
+    return tp, fp
+
+
 def get_cls_results(det_results, annotations, class_id):
     """Get det results and gt information of a certain class.
 
@@ -522,6 +649,36 @@ def get_cls_group_ofs(annotations, class_id):
     return gt_group_ofs
 
 
+def _concat_gts(annotations):
+    """Concatenate the gts of all images for :func:`tpfp_default_batched`.
+
+    Args:
+        annotations (list[dict]): Same as `eval_map()`.
+
+    Returns:
+        tuple[np.ndarray]: gt bboxes, labels, image indices and ignore flags.
+        Within each image, the ignored gts come after the others.
+    """
+    bboxes, labels, img_inds, ignore_inds = [], [], [], []
+    for j, ann in enumerate(annotations):
+        img_bboxes = [ann['bboxes']]
+        img_labels = [ann['labels']]
+        if ann.get('labels_ignore', None) is not None:
+            img_bboxes.append(ann['bboxes_ignore'])
+            img_labels.append(ann['labels_ignore'])
+        for k, (bbox, label) in enumerate(zip(img_bboxes, img_labels)):
+            bboxes.append(bbox.reshape(-1, 4))
+            labels.append(label)
+            img_inds.append(np.full(len(label), j, dtype=np.int64))
+            ignore_inds.append(np.full(len(label), k == 1, dtype=bool))
+    if len(bboxes) == 0:
+        return (np.zeros((0, 4),
+                         dtype=np.float32), np.zeros(0, dtype=np.int64),
+                np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool))
+    return (np.concatenate(bboxes), np.concatenate(labels),
+            np.concatenate(img_inds), np.concatenate(ignore_inds))
+
+
 def eval_map(det_results,
              annotations,
              scale_ranges=None,
@@ -533,7 +690,8 @@ def eval_map(det_results,
              nproc=4,
              use_legacy_coordinate=False,
              use_group_of=False,
-             eval_mode='area'):
+             eval_mode='area',
+             engine='pool'):
     """Evaluate mAP of a dataset.
 
     Args:
@@ -579,6 +737,12 @@ def eval_map(det_results,
             the average precision of recalls at [0, 0.1, ..., 1],
             PASCAL VOC2007 uses `11points` as default evaluate mode, while
             others are 'area'. Defaults to 'area'.
+        engine (str): How TP and FP are computed. 'pool' dispatches
+            ``tpfp_fn`` of each image to a ``multiprocessing.Pool`` of
+            ``nproc`` processes. 'numpy' runs in the current process: the
+            default matching is done for all images of a class at once by
+            :func:`tpfp_default_batched`, other ``tpfp_fn`` are called image
+            by image. Both give identical results. Defaults to 'pool'.
 
     Returns:
         tuple: (mAP, [dict, dict, ...])
@@ -587,6 +751,9 @@ def eval_map(det_results,
     assert eval_mode in ['area', '11points'], \
         f'Unrecognized {eval_mode} mode, only "area" and "11points" ' \
         'are supported'
+    assert engine in ['pool', 'numpy'], \
+        f'Unrecognized {engine} engine, only "pool" and "numpy" ' \
+        'are supported'
     if not use_legacy_coordinate:
         extra_length = 0.
     else:
@@ -600,16 +767,16 @@ def eval_map(det_results,
 
     # There is no need to use multi processes to process
     # when num_imgs = 1 .
-    if num_imgs > 1:
+    use_pool = engine == 'pool' and num_imgs > 1
+    if use_pool:
         assert nproc > 0, 'nproc must be at least one.'
         nproc = min(nproc, num_imgs)
         pool = Pool(nproc)
+    if engine == 'numpy':
+        all_gts = _concat_gts(annotations)
 
     eval_results = []
     for i in range(num_classes):
-        # get gt and det bboxes of this class
-        cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
-            det_results, annotations, i)
         # choose proper function according to datasets to compute tp and fp
         if tpfp_fn is None:
             if dataset in ['det', 'vid']:
@@ -622,8 +789,29 @@ def eval_map(det_results,
         if not callable(tpfp_fn):
             raise ValueError(
                 f'tpfp_fn has to be a function or None, but got {tpfp_fn}')
-
-        if num_imgs > 1:
+        batched = engine == 'numpy' and (tpfp_fn is tpfp_default or
+                                         (tpfp_fn is tpfp_openimages
+                                          and not use_group_of))
+
+        if batched:
+            cls_dets = [img_res[i] for img_res in det_results]
+            det_img_inds = np.repeat(
+                np.arange(num_imgs), [det.shape[0] for det in cls_dets])
+            cls_dets = [np.vstack(cls_dets)]
+            gt_bboxes, gt_labels, gt_img_inds, gt_ignore_inds = all_gts
+            gt_inds = gt_labels == i
+            cls_gts = [gt_bboxes[gt_inds & ~gt_ignore_inds]]
+            tpfp = [
+                tpfp_default_batched(cls_dets[0], det_img_inds,
+                                     gt_bboxes[gt_inds], gt_img_inds[gt_inds],
+                                     gt_ignore_inds[gt_inds], num_imgs,
+                                     iou_thr, area_ranges,
+                                     use_legacy_coordinate)
+            ]
+        elif use_pool:
+            # get gt and det bboxes of this class
+            cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
+                det_results, annotations, i)
             # compute tp and fp for each image with multiple processes
             args = []
             if use_group_of:
@@ -641,18 +829,23 @@ def eval_map(det_results,
                     [area_ranges for _ in range(num_imgs)],
                     [use_legacy_coordinate for _ in range(num_imgs)], *args))
         else:
-            tpfp = tpfp_fn(
-                cls_dets[0],
-                cls_gts[0],
-                cls_gts_ignore[0],
-                iou_thr,
-                area_ranges,
-                use_legacy_coordinate,
-                gt_bboxes_group_of=(get_cls_group_ofs(annotations, i)[0]
-                                    if use_group_of else None),
-                use_group_of=use_group_of,
-                ioa_thr=ioa_thr)
-            tpfp = [tpfp]
+            cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
+                det_results, annotations, i)
+            gt_group_ofs = (
+                get_cls_group_ofs(annotations, i) if use_group_of else [None] *
+                num_imgs)
+            tpfp = [
+                tpfp_fn(
+                    cls_dets[j],
+                    cls_gts[j],
+                    cls_gts_ignore[j],
+                    iou_thr,
+                    area_ranges,
+                    use_legacy_coordinate,
+                    gt_bboxes_group_of=gt_group_ofs[j],
+                    use_group_of=use_group_of,
+                    ioa_thr=ioa_thr) for j in range(num_imgs)
+            ]
 
         if use_group_of:
             tp, fp, cls_dets = tuple(zip(*tpfp))
@@ -696,7 +889,7 @@ def eval_map(det_results,
             'ap': ap
         })
 
-    if num_imgs > 1:
+    if use_pool:
         pool.close()
 
     if scale_ranges is not None:
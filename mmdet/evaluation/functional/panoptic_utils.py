@@ -27,6 +27,138 @@ except ImportError:
     OFFSET = 256 * 256 * 256
 
 
+def _lookup(ids, labels):
+    """Get the indices of ``labels`` in ``ids``, -1 for those not found."""
+    if len(ids) == 0:
+        return np.full(len(labels), -1, dtype=np.int64)
+    sorter = np.argsort(ids, kind='stable')
+    pos = np.searchsorted(ids, labels, sorter=sorter).clip(max=len(ids) - 1)
+    inds = sorter[pos]
+    return np.where(ids[inds] == labels, inds, -1)
+
+
+def pq_compute_single_image(pq_stat, pan_gt, pan_pred, gt_ann, pred_ann,
+                            categories):
+    """Accumulate the Panoptic Quality statistics of an image.
+
+    The statistics are the same as those of the image in
+    :func:`pq_compute_single_core`, but are computed from the panoptic id
+    maps in memory. The intersections of all pairs of gt and predicted
+    segments are counted by a single ``np.bincount`` and the segments are
+    matched with array operations.
+
+    Args:
+        pq_stat (PQStat): The statistics to accumulate to.
+        pan_gt (np.ndarray): Panoptic id map of the ground truth.
+        pan_pred (np.ndarray): Panoptic id map of the prediction, pixels of
+            ``VOID`` are not predicted.
+        gt_ann (dict): Annotation of the ground truth with ``image_id`` and
+            ``segments_info``, each segment has ``id``, ``category_id``,
+            ``iscrowd`` and ``area``.
+        pred_ann (dict): Annotation of the prediction with ``segments_info``,
+            each segment has ``id`` and ``category_id``.
+        categories (dict): The categories of the dataset.
+
+    Returns:
+        PQStat: ``pq_stat`` after the accumulation.
+    """
+    gt_segms = gt_ann['segments_info']
+    pred_segms = pred_ann['segments_info']
+    gt_ids = np.array([el['id'] for el in gt_segms], dtype=np.int64)
+    gt_cats = np.array([el['category_id'] for el in gt_segms], dtype=np.int64)
+    gt_crowd = np.array([el['iscrowd'] == 1 for el in gt_segms], dtype=bool)
+    gt_areas = np.array([el['area'] for el in gt_segms], dtype=np.float64)
+    pred_ids = np.array([el['id'] for el in pred_segms], dtype=np.int64)
+    pred_cats = np.array([el['category_id'] for el in pred_segms],
+                         dtype=np.int64)
+
+    # intersection table of the ids in the gt and predicted maps
+    gt_labels, gt_inv = np.unique(pan_gt, return_inverse=True)
+    pred_labels, pred_inv = np.unique(pan_pred, return_inverse=True)
+    num_gt_labels, num_pred_labels = len(gt_labels), len(pred_labels)
+    table = np.bincount(
+        gt_inv.reshape(-1) * num_pred_labels + pred_inv.reshape(-1),
+        minlength=num_gt_labels * num_pred_labels).reshape(
+            num_gt_labels, num_pred_labels)
+
+    # predicted segments area calculation + prediction sanity checks
+    pred_cols = _lookup(pred_ids, pred_labels.astype(np.int64))
+    unknown = pred_labels[(pred_cols < 0) & (pred_labels != VOID)]
+    if len(unknown) > 0:
+        raise KeyError('In the image with ID {} segment with ID {} is '
+                       'presented in PNG and not presented in JSON.'.format(
+                           gt_ann['image_id'], unknown[0]))
+    pred_areas = np.zeros(len(pred_ids), dtype=np.float64)
+    pred_areas[pred_cols[pred_cols >= 0]] = table.sum(axis=0)[pred_cols >= 0]
+    missing = np.ones(len(pred_ids), dtype=bool)
+    missing[pred_cols[pred_cols >= 0]] = False
+    if missing.any():
+        raise KeyError(
+            'In the image with ID {} the following segment IDs {} '
+            'are presented in JSON and not presented in PNG.'.format(
+                gt_ann['image_id'], pred_ids[missing].tolist()))
+    for segm in pred_segms:
+        if segm['category_id'] not in categories:
+            raise KeyError('In the image with ID {} segment with ID {} has '
+                           'unknown category_id {}.'.format(
+                               gt_ann['image_id'], segm['id'],
+                               segm['category_id']))
+
+    # intersections of the gt and predicted segments, and of the predicted
+    # segments with VOID
+    gt_rows = _lookup(gt_ids, gt_labels.astype(np.int64))
+    intersections = np.zeros((len(gt_ids), len(pred_ids)), dtype=np.float64)
+    intersections[np.ix_(gt_rows[gt_rows >= 0],
+                         pred_cols[pred_cols >= 0])] = table[np.ix_(
+                             gt_rows >= 0, pred_cols >= 0)]
+    void_intersections = np.zeros(len(pred_ids), dtype=np.float64)
+    if num_gt_labels > 0 and gt_labels[0] == VOID:
+        void_intersections[pred_cols[pred_cols >= 0]] = table[0][
+            pred_cols >= 0]
+
+    # count all matched pairs
+    unions = (
+        pred_areas[None] + gt_areas[:, None] - intersections -
+        void_intersections[None])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ious = intersections / unions
+    matched = ((intersections > 0) & ~gt_crowd[:, None] &
+               (gt_cats[:, None] == pred_cats[None]) & (ious > 0.5))
+    gt_inds, pred_inds = np.nonzero(matched)
+    gt_matched = np.zeros(len(gt_ids), dtype=bool)
+    gt_matched[gt_inds] = True
+    pred_matched = np.zeros(len(pred_ids), dtype=bool)
+    pred_matched[pred_inds] = True
+
+    # count false negatives, crowd segments are ignored
+    fn_cats = gt_cats[~gt_matched & ~gt_crowd]
+
+    # count false positives
+    # the last crowd segment of each category
+    crowd_rows = {gt_cats[i]: i for i in np.flatnonzero(gt_crowd)}
+    crowd_inds = _lookup(
+        np.array(list(crowd_rows.keys()), dtype=np.int64), pred_cats)
+    crowd_rows = np.array(list(crowd_rows.values()), dtype=np.int64)
+    ignored = void_intersections.copy()
+    has_crowd = np.flatnonzero(crowd_inds >= 0)
+    ignored[has_crowd] += intersections[crowd_rows[crowd_inds[has_crowd]],
+                                        has_crowd]
+    # predicted segment is ignored if more than half of the segment
+    # correspond to VOID and CROWD regions
+    fp_cats = pred_cats[~pred_matched & (ignored / pred_areas <= 0.5)]
+
+    tp_cats = gt_cats[gt_inds]
+    tp_ious = ious[gt_inds, pred_inds]
+    for cat in np.unique(tp_cats).tolist():
+        pq_stat[cat].tp += int((tp_cats == cat).sum())
+        pq_stat[cat].iou += float(tp_ious[tp_cats == cat].sum())
+    for cat, num in zip(*np.unique(fn_cats, return_counts=True)):
+        pq_stat[int(cat)].fn += int(num)
+    for cat, num in zip(*np.unique(fp_cats, return_counts=True)):
+        pq_stat[int(cat)].fp += int(num)
+    return pq_stat
+
+
 def pq_compute_single_core(proc_id,
                            annotation_set,
                            gt_folder,
@@ -78,95 +210,8 @@ def pq_compute_single_core(proc_id,
             channel_order='rgb')
         pan_pred = rgb2id(pan_pred)
 
-        gt_segms = {el['id']: el for el in gt_ann['segments_info']}
-        pred_segms = {el['id']: el for el in pred_ann['segments_info']}
-
-        # predicted segments area calculation + prediction sanity checks
-        pred_labels_set = set(el['id'] for el in pred_ann['segments_info'])
-        labels, labels_cnt = np.unique(pan_pred, return_counts=True)
-        for label, label_cnt in zip(labels, labels_cnt):
-            if label not in pred_segms:
-                if label == VOID:
-                    continue
-                raise KeyError(
-                    'In the image with ID {} segment with ID {} is '
-                    'presented in PNG and not presented in JSON.'.format(
-                        gt_ann['image_id'], label))
-            pred_segms[label]['area'] = label_cnt
-            pred_labels_set.remove(label)
-            if pred_segms[label]['category_id'] not in categories:
-                raise KeyError(
-                    'In the image with ID {} segment with ID {} has '
-                    'unknown category_id {}.'.format(
-                        gt_ann['image_id'], label,
-                        pred_segms[label]['category_id']))
-        if len(pred_labels_set) != 0:
-            raise KeyError(
-                'In the image with ID {} the following segment IDs {} '
-                'are presented in JSON and not presented in PNG.'.format(
-                    gt_ann['image_id'], list(pred_labels_set)))
-
-        # confusion matrix calculation
-        pan_gt_pred = pan_gt.astype(np.uint64) * OFFSET + pan_pred.astype(
-            np.uint64)
-        gt_pred_map = {}
-        labels, labels_cnt = np.unique(pan_gt_pred, return_counts=True)
-        for label, intersection in zip(labels, labels_cnt):
-            gt_id = label // OFFSET
-            pred_id = label % OFFSET
-            gt_pred_map[(gt_id, pred_id)] = intersection
-
-        # count all matched pairs
-        gt_matched = set()
-        pred_matched = set()
-        for label_tuple, intersection in gt_pred_map.items():
-            gt_label, pred_label = label_tuple
-            if gt_label not in gt_segms:
-                continue
-            if pred_label not in pred_segms:
-                continue
-            if gt_segms[gt_label]['iscrowd'] == 1:
-                continue
-            if gt_segms[gt_label]['category_id'] != pred_segms[pred_label][
-                    'category_id']:
-                continue
-
-            union = pred_segms[pred_label]['area'] + gt_segms[gt_label][
-                'area'] - intersection - gt_pred_map.get((VOID, pred_label), 0)
-            iou = intersection / union
-            if iou > 0.5:
-                pq_stat[gt_segms[gt_label]['category_id']].tp += 1
-                pq_stat[gt_segms[gt_label]['category_id']].iou += iou
-                gt_matched.add(gt_label)
-                pred_matched.add(pred_label)
-
-        # count false positives
-        crowd_labels_dict = {}
-        for gt_label, gt_info in gt_segms.items():
-            if gt_label in gt_matched:
-                continue
-            # crowd segments are ignored
-            if gt_info['iscrowd'] == 1:
-                crowd_labels_dict[gt_info['category_id']] = gt_label
-                continue
-            pq_stat[gt_info['category_id']].fn += 1
-
-        # count false positives
-        for pred_label, pred_info in pred_segms.items():
-            if pred_label in pred_matched:
-                continue
-            # intersection of the segment with VOID
-            intersection = gt_pred_map.get((VOID, pred_label), 0)
-            # plus intersection with corresponding CROWD region if it exists
-            if pred_info['category_id'] in crowd_labels_dict:
-                intersection += gt_pred_map.get(
-                    (crowd_labels_dict[pred_info['category_id']], pred_label),
-                    0)
-            # predicted segment is ignored if more than half of
-            # the segment correspond to VOID and CROWD regions
-            if intersection / pred_info['area'] > 0.5:
-                continue
-            pq_stat[pred_info['category_id']].fp += 1
+        pq_compute_single_image(pq_stat, pan_gt, pan_pred, gt_ann, pred_ann,
+                                categories)
 
     if print_log:
         print('Core: {}, all {} images processed'.format(
@@ -13,6 +13,7 @@ from mmengine.evaluator import BaseMetric
 from mmengine.logging import MMLogger
 
 from mmdet.registry import METRICS
+from mmdet.structures.mask import decode_mask_results
 
 try:
     import cityscapesscripts.evaluation.evalInstanceLevelSemanticLabeling as CSEval  # noqa: E501
@@ -135,7 +136,11 @@ class CityScapesMetric(BaseMetric):
             pred_txt = osp.join(self.outfile_prefix, basename + '_pred.txt')
             result['pred_txt'] = pred_txt
             labels = pred['labels'].cpu().numpy()
-            masks = pred['masks'].cpu().numpy().astype(np.uint8)
+            if isinstance(pred['masks'], list):
+                masks = decode_mask_results(pred['masks'],
+                                            data_sample['ori_shape'])
+            else:
+                masks = pred['masks'].cpu().numpy().astype(np.uint8)
             if 'mask_scores' in pred:
                 # some detectors use different scores for bbox and mask
                 mask_scores = pred['mask_scores'].cpu().numpy()
@@ -1,12 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import copy
 import datetime
 import itertools
 import os.path as osp
 import tempfile
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from typing import Dict, List, Optional, Sequence, Union
 
 import numpy as np
+import pycocotools.mask as maskUtils
 import torch
 from mmengine.evaluator import BaseMetric
 from mmengine.fileio import dump, get_local_path, load
@@ -63,6 +65,13 @@ class CocoMetric(BaseMetric):
             will be used instead. Defaults to None.
         sort_categories (bool): Whether sort categories in annotations. Only
             used for `Objects365V1Dataset`. Defaults to False.
+        streaming (bool): Whether to match predictions with the ground truth
+            of ``ann_file`` image by image in :meth:`process`. Only the
+            compact per-image match arrays used by ``COCOeval.accumulate``
+            are kept, so the predictions are neither stored nor dumped to
+            json files. It gives the same results as the default mode but
+            does not support ``format_only`` and 'proposal_fast'.
+            Defaults to False.
     """
     default_prefix: Optional[str] = 'coco'
 
@@ -79,7 +88,8 @@ class CocoMetric(BaseMetric):
                  backend_args: dict = None,
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None,
-                 sort_categories: bool = False) -> None:
+                 sort_categories: bool = False,
+                 streaming: bool = False) -> None:
         super().__init__(collect_device=collect_device, prefix=prefix)
         # coco evaluation metrics
         self.metrics = metric if isinstance(metric, list) else [metric]
@@ -138,6 +148,17 @@ class CocoMetric(BaseMetric):
         else:
             self._coco_api = None
 
+        self.streaming = streaming
+        if self.streaming:
+            assert self._coco_api is not None, \
+                '`ann_file` is required when `streaming` is True'
+            assert not self.format_only and \
+                'proposal_fast' not in self.metrics, \
+                '`format_only` and `proposal_fast` are not supported ' \
+                'when `streaming` is True'
+        # per-metric ``COCOeval`` used to match predictions of one image
+        self._streaming_evals = dict()
+
         # handle dataset lazy init
         self.cat_ids = None
         self.img_ids = None
@@ -337,6 +358,164 @@ class CocoMetric(BaseMetric):
         dump(coco_json, converted_json_path)
         return converted_json_path
 
+    def _get_streaming_eval(self, metric: str) -> COCOeval:
+        """Get the ``COCOeval`` used to match predictions image by image.
+
+        Its params are normalized the same way as ``COCOeval.evaluate``.
+
+        Args:
+            metric (str): One of 'bbox', 'segm' and 'proposal'.
+
+        Returns:
+            COCOeval: The evaluator of ``metric``.
+        """
+        if metric not in self._streaming_evals:
+            iou_type = 'bbox' if metric == 'proposal' else metric
+            coco_eval = COCOeval(self._coco_api, iouType=iou_type)
+            p = coco_eval.params
+            p.catIds = self.cat_ids
+            p.imgIds = list(np.unique(self.img_ids))
+            p.maxDets = sorted(self.proposal_nums)
+            p.iouThrs = self.iou_thrs
+            if metric == 'proposal':
+                p.useCats = 0
+            else:
+                p.catIds = list(np.unique(p.catIds))
+            self._streaming_evals[metric] = coco_eval
+        return self._streaming_evals[metric]
+
+    def _pred2coco_dts(self, img_id: int, result: dict,
+                       iou_type: str) -> List[dict]:
+        """Convert the prediction of one image to the detections that
+        ``COCO.loadRes`` builds from the json file of :meth:`results2json`.
+
+        Args:
+            img_id (int): Image id of the prediction.
+            result (dict): Prediction with keys 'bboxes', 'scores', 'labels'
+                and optionally 'masks' and 'mask_scores'.
+            iou_type (str): 'bbox' or 'segm'.
+
+        Returns:
+            List[dict]: COCO style detections.
+        """
+        bboxes = result['bboxes']
+        scores = result['scores']
+        if iou_type == 'segm':
+            scores = result.get('mask_scores', scores)
+        dts = []
+        for i, label in enumerate(result['labels']):
+            dt = dict(
+                image_id=img_id,
+                category_id=self.cat_ids[label],
+                score=float(scores[i]),
+                iscrowd=0,
+                # ``COCOeval`` only requires the ids to be positive
+                id=i + 1)
+            if iou_type == 'bbox':
+                dt['bbox'] = self.xyxy2xywh(bboxes[i])
+                dt['area'] = dt['bbox'][2] * dt['bbox'][3]
+            else:
+                mask = result['masks'][i]
+                if isinstance(mask['counts'], bytes):
+                    mask['counts'] = mask['counts'].decode()
+                dt['segmentation'] = mask
+                dt['area'] = maskUtils.area(mask)
+                dt['bbox'] = maskUtils.toBbox(mask)
+            dts.append(dt)
+        return dts
+
+    def _evaluate_img(self, metric: str, img_id: int, dts: List[dict]) -> dict:
+        """Match the detections of one image with its ground truth.
+
+        It runs ``COCOeval.computeIoU`` and ``COCOeval.evaluateImg`` on the
+        given image only and keeps the arrays ``COCOeval.accumulate`` needs.
+
+        Args:
+            metric (str): One of 'bbox', 'segm' and 'proposal'.
+            img_id (int): Image id.
+            dts (List[dict]): COCO style detections of the image.
+
+        Returns:
+            dict: Mapping from (category index, area range index) to a tuple
+            of dtScores, dtMatches, dtIgnore and gtIgnore.
+        """
+        coco_eval = self._get_streaming_eval(metric)
+        p = coco_eval.params
+        if p.useCats:
+            ann_ids = self._coco_api.get_ann_ids(
+                img_ids=[img_id], cat_ids=p.catIds)
+        else:
+            ann_ids = self._coco_api.get_ann_ids(img_ids=[img_id])
+        # copy the annotations as ``COCOeval`` modifies them in place
+        gts = [dict(ann) for ann in self._coco_api.load_anns(ann_ids)]
+        for gt in gts:
+            if p.iouType == 'segm':
+                gt['segmentation'] = self._coco_api.annToRLE(gt)
+            gt['ignore'] = 'iscrowd' in gt and gt['iscrowd']
+
+        coco_eval._gts = defaultdict(list)
+        coco_eval._dts = defaultdict(list)
+        for gt in gts:
+            coco_eval._gts[img_id, gt['category_id']].append(gt)
+        for dt in dts:
+            coco_eval._dts[img_id, dt['category_id']].append(dt)
+
+        cat_ids = p.catIds if p.useCats else [-1]
+        coco_eval.ious = dict()
+        for cat_id in cat_ids:
+            ious = coco_eval.computeIoU(img_id, cat_id)
+            coco_eval.ious[img_id, cat_id] = ious
+        eval_imgs = dict()
+        for k, cat_id in enumerate(cat_ids):
+            for a, area_rng in enumerate(p.areaRng):
+                e = coco_eval.evaluateImg(img_id, cat_id, area_rng,
+                                          p.maxDets[-1])
+                if e is None:
+                    continue
+                eval_imgs[k, a] = (np.array(e['dtScores'], dtype=np.float64),
+                                   e['dtMatches'] != 0,
+                                   e['dtIgnore'].astype(bool),
+                                   np.array(e['gtIgnore'], dtype=bool))
+        return eval_imgs
+
+    def _streaming_evaluate(self, coco_eval: COCOeval, metric: str,
+                            preds: Sequence[dict]) -> None:
+        """Fill ``coco_eval.evalImgs`` with the per-image match arrays
+        computed in :meth:`process`, so that ``accumulate`` and
+        ``summarize`` can be called as after ``COCOeval.evaluate``.
+
+        Args:
+            coco_eval (COCOeval): Evaluator with params set.
+            metric (str): One of 'bbox', 'segm' and 'proposal'.
+            preds (Sequence[dict]): Processed per-image results.
+        """
+        p = coco_eval.params
+        p.imgIds = list(np.unique(p.imgIds))
+        if p.useCats:
+            p.catIds = list(np.unique(p.catIds))
+        p.maxDets = sorted(p.maxDets)
+        cat_ids = p.catIds if p.useCats else [-1]
+        num_imgs = len(p.imgIds)
+        num_areas = len(p.areaRng)
+
+        img_eval_imgs = {pred['img_id']: pred['eval_imgs'] for pred in preds}
+        eval_imgs = [None] * (len(cat_ids) * num_areas * num_imgs)
+        for i, img_id in enumerate(p.imgIds):
+            if img_id in img_eval_imgs:
+                img_eval = img_eval_imgs[img_id][metric]
+            else:
+                # ground truth of images without predictions is missed
+                img_eval = self._evaluate_img(metric, img_id, [])
+            for (k, a), arrays in img_eval.items():
+                dt_scores, dt_matches, dt_ignore, gt_ignore = arrays
+                eval_imgs[(k * num_areas + a) * num_imgs + i] = dict(
+                    dtScores=dt_scores,
+                    dtMatches=dt_matches,
+                    dtIgnore=dt_ignore,
+                    gtIgnore=gt_ignore)
+        coco_eval.evalImgs = eval_imgs
+        coco_eval._paramsEval = copy.deepcopy(p)
+
     # TODO: data_batch is no longer needed, consider adjusting the
     #  parameter position
     def process(self, data_batch: dict, data_samples: Sequence[dict]) -> None:
@@ -364,6 +543,8 @@ class CocoMetric(BaseMetric):
             # some detectors use different scores for bbox and mask
             if 'mask_scores' in pred:
                 result['mask_scores'] = pred['mask_scores'].cpu().numpy()
+            if self.streaming:
+                result = self._process_streaming(result)
 
             # parse gt
             gt = dict()
@@ -379,6 +560,36 @@ class CocoMetric(BaseMetric):
             # add converted result to the results list
             self.results.append((gt, result))
 
+    def _process_streaming(self, result: dict) -> dict:
+        """Match the prediction of one image with the ground truth and only
+        keep the compact match arrays.
+
+        Args:
+            result (dict): Prediction of one image.
+
+        Returns:
+            dict: Image id and the match arrays of each metric.
+        """
+        # handle lazy init
+        if self.cat_ids is None:
+            self.cat_ids = self._coco_api.get_cat_ids(
+                cat_names=self.dataset_meta['classes'])
+        if self.img_ids is None:
+            self.img_ids = self._coco_api.get_img_ids()
+        img_id = result['img_id']
+        assert img_id in self._coco_api.imgs, \
+            f'Image id {img_id} is not in the annotation file'
+        eval_imgs = dict()
+        for metric in self.metrics:
+            iou_type = 'bbox' if metric == 'proposal' else metric
+            if iou_type not in ('bbox', 'segm'):
+                continue
+            if iou_type == 'segm' and 'masks' not in result:
+                raise KeyError(f'{metric} is not in results')
+            dts = self._pred2coco_dts(img_id, result, iou_type)
+            eval_imgs[metric] = self._evaluate_img(metric, img_id, dts)
+        return dict(img_id=img_id, eval_imgs=eval_imgs)
+
     def compute_metrics(self, results: list) -> Dict[str, float]:
         """Compute the metrics from processed results.
 
@@ -416,7 +627,8 @@ class CocoMetric(BaseMetric):
             self.img_ids = self._coco_api.get_img_ids()
 
         # convert predictions to coco format and dump to json file
-        result_files = self.results2json(preds, outfile_prefix)
+        if not self.streaming:
+            result_files = self.results2json(preds, outfile_prefix)
 
         eval_results = OrderedDict()
         if self.format_only:
@@ -442,27 +654,30 @@ class CocoMetric(BaseMetric):
 
             # evaluate proposal, bbox and segm
             iou_type = 'bbox' if metric == 'proposal' else metric
-            if metric not in result_files:
-                raise KeyError(f'{metric} is not in results')
-            try:
-                predictions = load(result_files[metric])
-                if iou_type == 'segm':
-                    # Refer to https://github.com/cocodataset/cocoapi/blob/master/PythonAPI/pycocotools/coco.py#L331  # noqa
-                    # When evaluating mask AP, if the results contain bbox,
-                    # cocoapi will use the box area instead of the mask area
-                    # for calculating the instance area. Though the overall AP
-                    # is not affected, this leads to different
-                    # small/medium/large mask AP results.
-                    for x in predictions:
-                        x.pop('bbox')
-                coco_dt = self._coco_api.loadRes(predictions)
-
-            except IndexError:
-                logger.error(
-                    'The testing results of the whole dataset is empty.')
-                break
-
-            coco_eval = COCOeval(self._coco_api, coco_dt, iou_type)
+            if self.streaming:
+                coco_eval = COCOeval(self._coco_api, iouType=iou_type)
+            else:
+                if metric not in result_files:
+                    raise KeyError(f'{metric} is not in results')
+                try:
+                    predictions = load(result_files[metric])
+                    if iou_type == 'segm':
+                        # Refer to https://github.com/cocodataset/cocoapi/blob/master/PythonAPI/pycocotools/coco.py#L331  # noqa
+                        # When evaluating mask AP, if the results contain
+                        # bbox, cocoapi will use the box area instead of the
+                        # mask area for calculating the instance area. Though
+                        # the overall AP is not affected, this leads to
+                        # different small/medium/large mask AP results.
+                        for x in predictions:
+                            x.pop('bbox')
+                    coco_dt = self._coco_api.loadRes(predictions)
+
+                except IndexError:
+                    logger.error(
+                        'The testing results of the whole dataset is empty.')
+                    break
+
+                coco_eval = COCOeval(self._coco_api, coco_dt, iou_type)
 
             coco_eval.params.catIds = self.cat_ids
             coco_eval.params.imgIds = self.img_ids
@@ -493,7 +708,10 @@ class CocoMetric(BaseMetric):
 
             if metric == 'proposal':
                 coco_eval.params.useCats = 0
-                coco_eval.evaluate()
+                if self.streaming:
+                    self._streaming_evaluate(coco_eval, metric, preds)
+                else:
+                    coco_eval.evaluate()
                 coco_eval.accumulate()
                 coco_eval.summarize()
                 if metric_items is None:
@@ -507,7 +725,10 @@ class CocoMetric(BaseMetric):
                         f'{coco_eval.stats[coco_metric_names[item]]:.3f}')
                     eval_results[item] = val
             else:
-                coco_eval.evaluate()
+                if self.streaming:
+                    self._streaming_evaluate(coco_eval, metric, preds)
+                else:
+                    coco_eval.evaluate()
                 coco_eval.accumulate()
                 coco_eval.summarize()
                 if self.classwise:  # Compute per-category AP
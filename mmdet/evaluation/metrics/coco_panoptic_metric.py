@@ -8,14 +8,14 @@ from typing import Dict, Optional, Sequence, Tuple, Union
 import mmcv
 import numpy as np
 from mmengine.evaluator import BaseMetric
-from mmengine.fileio import dump, get_local_path, load
+from mmengine.fileio import dump, get, get_local_path, load
 from mmengine.logging import MMLogger, print_log
 from terminaltables import AsciiTable
 
 from mmdet.datasets.api_wrappers import COCOPanoptic
 from mmdet.registry import METRICS
 from ..functional import (INSTANCE_OFFSET, pq_compute_multi_core,
-                          pq_compute_single_core)
+                          pq_compute_single_image)
 
 try:
     import panopticapi
@@ -170,25 +170,8 @@ class CocoPanopticMetric(BaseMetric):
             pan_png = mmcv.imread(gt_dict['seg_map_path']).squeeze()
             pan_png = pan_png[:, :, ::-1]
             pan_png = rgb2id(pan_png)
-            segments_info = []
-            for segment_info in gt_dict['segments_info']:
-                id = segment_info['id']
-                label = segment_info['category']
-                mask = pan_png == id
-                isthing = categories[label]['isthing']
-                if isthing:
-                    iscrowd = 1 if not segment_info['is_thing'] else 0
-                else:
-                    iscrowd = 0
-
-                new_segment_info = {
-                    'id': id,
-                    'category_id': label,
-                    'isthing': isthing,
-                    'iscrowd': iscrowd,
-                    'area': mask.sum()
-                }
-                segments_info.append(new_segment_info)
+            segments_info = self._convert_gt_segments_info(
+                pan_png, gt_dict['segments_info'], categories)
 
             segm_file = image_info['file_name'].replace('jpg', 'png')
             annotation = dict(
@@ -213,6 +196,34 @@ class CocoPanopticMetric(BaseMetric):
         dump(coco_json, converted_json_path)
         return converted_json_path, gt_folder
 
+    @staticmethod
+    def _convert_gt_segments_info(pan_png: np.ndarray,
+                                  segments_info: Sequence[dict],
+                                  categories: Union[list, dict]) -> list:
+        """Convert the segments information of the dataset to coco panoptic
+        format, the areas are counted from the panoptic id map at once."""
+        ids, areas = np.unique(pan_png, return_counts=True)
+        id2area = dict(zip(ids.tolist(), areas.tolist()))
+        new_segments_info = []
+        for segment_info in segments_info:
+            id = segment_info['id']
+            label = segment_info['category']
+            isthing = categories[label]['isthing']
+            if isthing:
+                iscrowd = 1 if not segment_info['is_thing'] else 0
+            else:
+                iscrowd = 0
+
+            new_segment_info = {
+                'id': id,
+                'category_id': label,
+                'isthing': isthing,
+                'iscrowd': iscrowd,
+                'area': id2area.get(id, 0)
+            }
+            new_segments_info.append(new_segment_info)
+        return new_segments_info
+
     def result2json(self, results: Sequence[dict],
                     outfile_prefix: str) -> Tuple[str, str]:
         """Dump the panoptic results to a COCO style json file and a directory.
@@ -247,55 +258,70 @@ class CocoPanopticMetric(BaseMetric):
             self.seg_out_dir
             if self.tmp_dir is None else tempfile.gettempdir())
 
-    def _parse_predictions(self,
-                           pred: dict,
-                           img_id: int,
-                           segm_file: str,
-                           label2cat=None) -> dict:
-        """Parse panoptic segmentation predictions.
+    def _parse_panoptic_seg(
+            self,
+            pred: dict,
+            label2cat: Optional[dict] = None) -> Tuple[np.ndarray, list]:
+        """Get the panoptic id map and the segments of a prediction.
 
         Args:
             pred (dict): Panoptic segmentation predictions.
-            img_id (int): Image id.
-            segm_file (str): Segmentation file name.
             label2cat (dict): Mapping from label to category id.
                 Defaults to None.
 
         Returns:
-            dict: Parsed predictions.
+            Tuple[np.ndarray, list]: The panoptic id map of shape (H, W),
+            where the unlabeled pixels are ``VOID``, and the information of
+            the segments.
         """
-        result = dict()
-        result['img_id'] = img_id
         # shape (1, H, W) -> (H, W)
         pan = pred['pred_panoptic_seg']['sem_seg'].cpu().numpy()[0]
-        ignore_index = pred['pred_panoptic_seg'].get(
-            'ignore_index', len(self.dataset_meta['classes']))
-        pan_labels = np.unique(pan)
+        num_classes = len(self.dataset_meta['classes'])
+        ignore_index = pred['pred_panoptic_seg'].get('ignore_index',
+                                                     num_classes)
+        pan_labels, areas = np.unique(pan, return_counts=True)
         segments_info = []
-        for pan_label in pan_labels:
+        for pan_label, area in zip(pan_labels.tolist(), areas.tolist()):
             sem_label = pan_label % INSTANCE_OFFSET
             # We reserve the length of dataset_meta['classes']
             # and ignore_index for VOID label
-            if sem_label == len(
-                    self.dataset_meta['classes']) or sem_label == ignore_index:
+            if sem_label == num_classes or sem_label == ignore_index:
                 continue
-            mask = pan == pan_label
-            area = mask.sum()
             segments_info.append({
                 'id':
-                int(pan_label),
+                pan_label,
                 # when ann_file provided, sem_label should be cat_id, otherwise
                 # sem_label should be a continuous id, not the cat_id
                 # defined in dataset
                 'category_id':
                 label2cat[sem_label] if label2cat else sem_label,
                 'area':
-                int(area)
+                area
             })
         # evaluation script uses 0 for VOID label.
-        pan[pan % INSTANCE_OFFSET == len(self.dataset_meta['classes'])] = VOID
-        pan[pan % INSTANCE_OFFSET == ignore_index] = VOID
+        sem_seg = pan % INSTANCE_OFFSET
+        pan[(sem_seg == num_classes) | (sem_seg == ignore_index)] = VOID
+        return pan, segments_info
 
+    def _parse_predictions(self,
+                           pred: dict,
+                           img_id: int,
+                           segm_file: str,
+                           label2cat=None) -> dict:
+        """Parse panoptic segmentation predictions and save the panoptic
+        segmentation map to ``self.seg_out_dir``.
+
+        Args:
+            pred (dict): Panoptic segmentation predictions.
+            img_id (int): Image id.
+            segm_file (str): Segmentation file name.
+            label2cat (dict): Mapping from label to category id.
+                Defaults to None.
+
+        Returns:
+            dict: Parsed predictions.
+        """
+        pan, segments_info = self._parse_panoptic_seg(pred, label2cat)
         pan = id2rgb(pan).astype(np.uint8)
         mmcv.imwrite(pan[:, :, ::-1], osp.join(self.seg_out_dir, segm_file))
         result = {
@@ -310,8 +336,11 @@ class CocoPanopticMetric(BaseMetric):
         """Process gts and predictions when ``outfile_prefix`` is not set, gts
         are from dataset or a json file which is defined by ``ann_file``.
 
-        Intermediate results, ``pq_stats``, are computed here and put into
-        ``self.results``.
+        Intermediate results, ``pq_stats`` of each image, are computed here
+        and put into ``self.results``, so that the padded samples of the
+        distributed sampler can be dropped when collecting the results. The
+        predicted panoptic maps are evaluated in memory without being saved,
+        see :func:`pq_compute_single_image`.
         """
         if self._coco_api is None:
             categories = dict()
@@ -331,11 +360,13 @@ class CocoPanopticMetric(BaseMetric):
             img_id = data_sample['img_id']
             segm_file = osp.basename(data_sample['img_path']).replace(
                 'jpg', 'png')
-            result = self._parse_predictions(
-                pred=data_sample,
-                img_id=img_id,
-                segm_file=segm_file,
-                label2cat=label2cat)
+            pan_pred, segments_info = self._parse_panoptic_seg(
+                pred=data_sample, label2cat=label2cat)
+            result = {
+                'image_id': img_id,
+                'segments_info': segments_info,
+                'file_name': segm_file
+            }
 
             # parse gt
             gt = dict()
@@ -344,46 +375,26 @@ class CocoPanopticMetric(BaseMetric):
             gt['height'] = data_sample['ori_shape'][0]
             gt['file_name'] = segm_file
 
+            # The gt images can be on the local disk or `ceph`, so we use
+            # backend here.
+            img_bytes = get(
+                osp.join(self.seg_prefix, segm_file),
+                backend_args=self.backend_args)
+            pan_gt = rgb2id(
+                mmcv.imfrombytes(img_bytes, flag='color', channel_order='rgb'))
             if self._coco_api is None:
                 # get segments_info from data_sample
-                seg_map_path = osp.join(self.seg_prefix, segm_file)
-                pan_png = mmcv.imread(seg_map_path).squeeze()
-                pan_png = pan_png[:, :, ::-1]
-                pan_png = rgb2id(pan_png)
-                segments_info = []
-
-                for segment_info in data_sample['segments_info']:
-                    id = segment_info['id']
-                    label = segment_info['category']
-                    mask = pan_png == id
-                    isthing = categories[label]['isthing']
-                    if isthing:
-                        iscrowd = 1 if not segment_info['is_thing'] else 0
-                    else:
-                        iscrowd = 0
-
-                    new_segment_info = {
-                        'id': id,
-                        'category_id': label,
-                        'isthing': isthing,
-                        'iscrowd': iscrowd,
-                        'area': mask.sum()
-                    }
-                    segments_info.append(new_segment_info)
+                segments_info = self._convert_gt_segments_info(
+                    pan_gt, data_sample['segments_info'], categories)
             else:
                 # get segments_info from annotation file
                 segments_info = self._coco_api.imgToAnns[img_id]
 
             gt['segments_info'] = segments_info
 
-            pq_stats = pq_compute_single_core(
-                proc_id=0,
-                annotation_set=[(gt, result)],
-                gt_folder=self.seg_prefix,
-                pred_folder=self.seg_out_dir,
-                categories=categories,
-                backend_args=self.backend_args)
-
+            pq_stats = PQStat()
+            pq_compute_single_image(pq_stats, pan_gt, pan_pred, gt, result,
+                                    categories)
             self.results.append(pq_stats)
 
     def _process_gt_and_predictions(self, data_samples: Sequence[dict]):
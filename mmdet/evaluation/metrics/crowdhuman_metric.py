@@ -1,15 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-import copy
 import json
 import os.path as osp
-import tempfile
 from collections import OrderedDict
-from multiprocessing import Process, Queue
-from typing import Dict, List, Optional, Sequence, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 from mmengine.evaluator import BaseMetric
-from mmengine.fileio import dump, get_text, load
+from mmengine.fileio import dump, get_text
 from mmengine.logging import MMLogger
 from scipy.sparse import csr_matrix
 from scipy.sparse.csgraph import maximum_bipartite_matching
@@ -27,6 +24,10 @@ class CrowdHumanMetric(BaseMetric):
     Evaluate Average Precision (AP), Miss Rate (MR) and Jaccard Index (JI)
     for detection tasks.
 
+    The detections of every image are matched to the ground truth with IoU
+    and IoA matrices in :meth:`process`, and only the matching results are
+    kept until :meth:`compute_metrics`.
+
     Args:
         ann_file (str): Path to the annotation file.
         metric (str | List[str]): Metrics to be evaluated. Valid metrics
@@ -50,8 +51,8 @@ class CrowdHumanMetric(BaseMetric):
             If prefix is not provided in the argument, self.default_prefix
             will be used instead. Defaults to None.
         eval_mode (int): Select the mode of evaluate. Valid mode include
-            0(just body box), 1(just head box) and 2(both of them).
-            Defaults to 0.
+            0(just body box), 1(just head box) and 2(body box, ignored if
+            either the body or the head is ignored). Defaults to 0.
         iou_thres (float): IoU threshold. Defaults to 0.5.
         compare_matching_method (str, optional): Matching method to compare
             the detection results with the ground_truth when compute 'AP'
@@ -59,8 +60,8 @@ class CrowdHumanMetric(BaseMetric):
             None.
         mr_ref (str): Different parameter selection to calculate MR. Valid
             ref include CALTECH_-2 and CALTECH_-4. Defaults to CALTECH_-2.
-        num_ji_process (int): The number of processes to evaluation JI.
-            Defaults to 10.
+        num_ji_process (int): Deprecated, JI is computed in :meth:`process`
+            without extra processes. Defaults to 10.
     """
     default_prefix: Optional[str] = 'crowd_human'
 
@@ -116,9 +117,10 @@ class CrowdHumanMetric(BaseMetric):
         self.compare_matching_method = compare_matching_method
         self.mr_ref = mr_ref
         self.num_ji_process = num_ji_process
+        self._gt_records = None
 
     @staticmethod
-    def results2json(results: Sequence[dict], outfile_prefix: str) -> str:
+    def results2json(results: Sequence[tuple], outfile_prefix: str) -> str:
         """Dump the detection results to a json file."""
         result_file_path = f'{outfile_prefix}.json'
         bbox_json_results = []
@@ -142,6 +144,13 @@ class CrowdHumanMetric(BaseMetric):
         dump(bbox_json_results, result_file_path)
         return result_file_path
 
+    def load_gt_records(self) -> Dict[str, dict]:
+        """Load the annotations indexed by the image ID."""
+        gt_str = get_text(
+            self.ann_file, backend_args=self.backend_args).strip().split('\n')
+        gt_records = [json.loads(line) for line in gt_str]
+        return {record['ID']: record for record in gt_records}
+
     def process(self, data_batch: Sequence[dict],
                 data_samples: Sequence[dict]) -> None:
         """Process one batch of data samples and predictions. The processed
@@ -153,6 +162,8 @@ class CrowdHumanMetric(BaseMetric):
             data_samples (Sequence[dict]): A batch of data samples that
                 contain annotations and predictions.
         """
+        if self._gt_records is None and not self.format_only:
+            self._gt_records = self.load_gt_records()
         for data_sample in data_samples:
             ann = dict()
             ann['ID'] = data_sample['img_id']
@@ -164,7 +175,57 @@ class CrowdHumanMetric(BaseMetric):
             pred_bbox_scores = np.hstack(
                 [pred_bboxes, pred_scores.reshape((-1, 1))])
 
-            self.results.append((ann, pred_bbox_scores))
+            result = dict()
+            if self.outfile_prefix is not None:
+                result['dump'] = (ann, pred_bbox_scores)
+            if not self.format_only:
+                result.update(
+                    self.evaluate_image(ann, pred_bbox_scores,
+                                        self._gt_records[ann['ID']]))
+            self.results.append(result)
+
+    def evaluate_image(self, ann: dict, pred_bbox_scores: np.ndarray,
+                       gt_record: dict) -> dict:
+        """Match the detections of an image with the ground truth.
+
+        Args:
+            ann (dict): ``ID``, ``width`` and ``height`` of the image.
+            pred_bbox_scores (np.ndarray): Detections of shape (n, 5) in
+                (x1, y1, x2, y2, score) format.
+            gt_record (dict): The annotation of the image.
+
+        Returns:
+            dict: The results of the image, including:
+
+            - num_gts (int): Number of gt boxes which are not ignored.
+            - scores (np.ndarray): Scores of the detections which are not
+              ignored, in descending order.
+            - labels (np.ndarray): Whether the detections are true
+              positives.
+            - ji (np.ndarray): Number of matches, valid gts and valid
+              detections at the 10 score thresholds of JI, has shape (10, 3).
+        """
+        height, width = ann['height'], ann['width']
+        dt_boxes = pred_bbox_scores.astype(np.float64)
+        # the same precision as the boxes dumped in (x, y, w, h) format
+        dt_boxes[:, 2:4] = dt_boxes[:, :2] + (
+            dt_boxes[:, 2:4] - dt_boxes[:, :2])
+        dt_boxes[:, :4] = _clip_boxes(dt_boxes[:, :4], height, width)
+        gt_boxes, gt_tags = _load_gt_boxes(gt_record, self.eval_mode)
+        gt_boxes = _clip_boxes(gt_boxes, height, width)
+
+        result = dict(num_gts=int((gt_tags != -1).sum()))
+        if 'AP' in self.metrics or 'MR' in self.metrics:
+            if self.compare_matching_method == 'VOC':
+                scores, labels = self.compare_voc(dt_boxes, gt_boxes, gt_tags)
+            else:
+                scores, labels = self.compare_caltech(dt_boxes, gt_boxes,
+                                                      gt_tags)
+            result['scores'] = scores
+            result['labels'] = labels
+        if 'JI' in self.metrics:
+            result['ji'] = self.compute_ji(dt_boxes, gt_boxes, gt_tags)
+        return result
 
     def compute_metrics(self, results: list) -> Dict[str, float]:
         """Compute the metrics from processed results.
@@ -179,165 +240,152 @@ class CrowdHumanMetric(BaseMetric):
         """
         logger: MMLogger = MMLogger.get_current_instance()
 
-        tmp_dir = None
-        if self.outfile_prefix is None:
-            tmp_dir = tempfile.TemporaryDirectory()
-            outfile_prefix = osp.join(tmp_dir.name, 'result')
-        else:
-            outfile_prefix = self.outfile_prefix
-
-        # convert predictions to coco format and dump to json file
-        result_file = self.results2json(results, outfile_prefix)
         eval_results = OrderedDict()
+        if self.outfile_prefix is not None:
+            # convert predictions to coco format and dump to json file
+            self.results2json([result['dump'] for result in results],
+                              self.outfile_prefix)
         if self.format_only:
-            logger.info(f'results are saved in {osp.dirname(outfile_prefix)}')
+            logger.info(
+                f'results are saved in {osp.dirname(self.outfile_prefix)}')
             return eval_results
 
-        # load evaluation samples
-        eval_samples = self.load_eval_samples(result_file)
-
+        img_num = len(results)
         if 'AP' in self.metrics or 'MR' in self.metrics:
-            score_list = self.compare(eval_samples)
-            gt_num = sum([eval_samples[i].gt_num for i in eval_samples])
-            ign_num = sum([eval_samples[i].ign_num for i in eval_samples])
-            gt_num = gt_num - ign_num
-            img_num = len(eval_samples)
+            scores = np.concatenate([result['scores'] for result in results])
+            labels = np.concatenate([result['labels'] for result in results])
+            # In the descending sort of dtbox score.
+            labels = labels[np.argsort(-scores, kind='stable')]
+            gt_num = sum(result['num_gts'] for result in results)
 
         for metric in self.metrics:
             logger.info(f'Evaluating {metric}...')
             if metric == 'AP':
-                AP = self.eval_ap(score_list, gt_num, img_num)
+                AP = self.eval_ap(labels, gt_num, img_num)
                 eval_results['mAP'] = float(f'{round(AP, 4)}')
             if metric == 'MR':
-                MR = self.eval_mr(score_list, gt_num, img_num)
+                MR = self.eval_mr(labels, gt_num, img_num)
                 eval_results['mMR'] = float(f'{round(MR, 4)}')
             if metric == 'JI':
-                JI = self.eval_ji(eval_samples)
+                JI = self.eval_ji(
+                    np.stack([result['ji'] for result in results]))
                 eval_results['JI'] = float(f'{round(JI, 4)}')
-        if tmp_dir is not None:
-            tmp_dir.cleanup()
 
         return eval_results
 
-    def load_eval_samples(self, result_file):
-        """Load data from annotations file and detection results.
+    def compare_caltech(self, dt_boxes: np.ndarray, gt_boxes: np.ndarray,
+                        gt_tags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Match the detection results with the ground_truth by Caltech
+        matching strategy.
+
+        The detections are matched greedily in the descending order of their
+        scores to the unmatched gt with the largest IoU above ``iou_thres``.
+        Unmatched detections whose IoA with an ignored gt is above
+        ``iou_thres`` are ignored.
 
         Args:
-            result_file (str): The file path of the saved detection results.
+            dt_boxes (np.ndarray): Detections of shape (n, 5).
+            gt_boxes (np.ndarray): Gt boxes of shape (m, 4).
+            gt_tags (np.ndarray): Tags of the gt boxes, positive ones are
+                valid and others are ignored.
 
         Returns:
-            Dict[Image]: The detection result packaged by Image
+            Tuple[np.ndarray, np.ndarray]: Scores of the detections which are
+            not ignored in descending order, and whether they are true
+            positives.
         """
-        gt_str = get_text(
-            self.ann_file, backend_args=self.backend_args).strip().split('\n')
-        gt_records = [json.loads(line) for line in gt_str]
+        if len(dt_boxes) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int8)
+        dt_boxes = dt_boxes[np.argsort(-dt_boxes[:, 4], kind='stable')]
+        valid = gt_tags > 0
+        ious = bbox_overlaps(dt_boxes[:, :4], gt_boxes[valid])
+        ioas = bbox_overlaps(dt_boxes[:, :4], gt_boxes[~valid], mode='iof')
+        ignored = (ioas > self.iou_thres).any(axis=1)
+
+        labels = np.zeros(len(dt_boxes), dtype=np.int8)
+        gt_matched = np.zeros(valid.sum(), dtype=bool)
+        # only the detections overlapping with gts are matched one by one
+        for i in np.flatnonzero((ious > self.iou_thres).any(axis=1)):
+            overlaps = np.where(gt_matched, -1, ious[i])
+            j = overlaps.argmax()
+            if overlaps[j] > self.iou_thres:
+                gt_matched[j] = True
+                labels[i] = 1
+        keep = (labels == 1) | ~ignored
+        return dt_boxes[keep, 4], labels[keep]
+
+    def compare_voc(self, dt_boxes: np.ndarray, gt_boxes: np.ndarray,
+                    gt_tags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Match the detection results with the ground_truth by VOC.
 
-        pred_records = load(result_file, backend_args=self.backend_args)
-        eval_samples = dict()
-        for gt_record, pred_record in zip(gt_records, pred_records):
-            assert gt_record['ID'] == pred_record['ID'], \
-                'please set val_dataloader.sampler.shuffle=False and try again'
-            eval_samples[pred_record['ID']] = Image(self.eval_mode)
-            eval_samples[pred_record['ID']].load(gt_record, 'box', None,
-                                                 PERSON_CLASSES, True)
-            eval_samples[pred_record['ID']].load(pred_record, 'box', None,
-                                                 PERSON_CLASSES, False)
-            eval_samples[pred_record['ID']].clip_all_boader()
-        return eval_samples
-
-    def compare(self, samples):
-        """Match the detection results with the ground_truth.
+        Every detection takes the gt with the largest IoU above
+        ``iou_thres``. It is ignored if the gt is ignored, and is a true
+        positive if the gt is not matched by a detection of higher score.
 
         Args:
-            samples (dict[Image]): The detection result packaged by Image.
+            dt_boxes (np.ndarray): Detections of shape (n, 5).
+            gt_boxes (np.ndarray): Gt boxes of shape (m, 4).
+            gt_tags (np.ndarray): Tags of the gt boxes, positive ones are
+                valid and others are ignored.
 
         Returns:
-            score_list(list[tuple[ndarray, int, str]]): Matching result.
-            a list of tuples (dtbox, label, imgID) in the descending
-            sort of dtbox.score.
+            Tuple[np.ndarray, np.ndarray]: Scores of the detections which are
+            not ignored in descending order, and whether they are true
+            positives.
         """
-        score_list = list()
-        for id in samples:
-            if self.compare_matching_method == 'VOC':
-                result = samples[id].compare_voc(self.iou_thres)
-            else:
-                result = samples[id].compare_caltech(self.iou_thres)
-            score_list.extend(result)
-        # In the descending sort of dtbox score.
-        score_list.sort(key=lambda x: x[0][-1], reverse=True)
-        return score_list
+        if len(dt_boxes) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int8)
+        dt_boxes = dt_boxes[np.argsort(-dt_boxes[:, 4], kind='stable')]
+        gt_order = np.argsort(-gt_tags, kind='stable')
+        gt_boxes, gt_tags = gt_boxes[gt_order], gt_tags[gt_order]
+        labels = np.zeros(len(dt_boxes), dtype=np.int8)
+        keep = np.ones(len(dt_boxes), dtype=bool)
+        if len(gt_boxes) > 0:
+            ious = bbox_overlaps(dt_boxes[:, :4], gt_boxes)
+            max_inds = ious.argmax(axis=1)
+            overlapped = ious.max(axis=1) > self.iou_thres
+            keep = ~overlapped | (gt_tags[max_inds] > 0)
+            gt_matched = np.zeros(len(gt_boxes), dtype=bool)
+            for i in np.flatnonzero(overlapped & keep):
+                if not gt_matched[max_inds[i]]:
+                    gt_matched[max_inds[i]] = True
+                    labels[i] = 1
+        return dt_boxes[keep, 4], labels[keep]
 
     @staticmethod
-    def eval_ap(score_list, gt_num, img_num):
+    def eval_ap(labels: np.ndarray, gt_num: int, img_num: int) -> float:
         """Evaluate by average precision.
 
         Args:
-            score_list(list[tuple[ndarray, int, str]]): Matching result.
-                a list of tuples (dtbox, label, imgID) in the descending
-                sort of dtbox.score.
+            labels (np.ndarray): Whether the detections are true positives,
+                in the descending sort of their scores.
             gt_num(int): The number of gt boxes in the entire dataset.
             img_num(int)： The number of images in the entire dataset.
 
         Returns:
             ap(float): result of average precision.
         """
-
-        # calculate general ap score
-        def _calculate_map(_recall, _precision):
-            assert len(_recall) == len(_precision)
-            area = 0
-            for k in range(1, len(_recall)):
-                delta_h = (_precision[k - 1] + _precision[k]) / 2
-                delta_w = _recall[k] - _recall[k - 1]
-                area += delta_w * delta_h
-            return area
-
-        tp, fp = 0.0, 0.0
-        rpX, rpY = list(), list()
-
-        fpn = []
-        recalln = []
-        thr = []
-        fppi = []
-        for i, item in enumerate(score_list):
-            if item[1] == 1:
-                tp += 1.0
-            elif item[1] == 0:
-                fp += 1.0
-            fn = gt_num - tp
-            recall = tp / (tp + fn)
-            precision = tp / (tp + fp)
-            rpX.append(recall)
-            rpY.append(precision)
-            fpn.append(fp)
-            recalln.append(tp)
-            thr.append(item[0][-1])
-            fppi.append(fp / img_num)
-
-        ap = _calculate_map(rpX, rpY)
-        return ap
-
-    def eval_mr(self, score_list, gt_num, img_num):
+        tp = np.cumsum(labels == 1, dtype=np.float64)
+        fp = np.cumsum(labels == 0, dtype=np.float64)
+        recall = tp / gt_num
+        precision = tp / (tp + fp)
+        # area under the precision-recall curve by the trapezoidal rule
+        delta_h = (precision[:-1] + precision[1:]) / 2
+        delta_w = recall[1:] - recall[:-1]
+        return float(np.sum(delta_w * delta_h))
+
+    def eval_mr(self, labels: np.ndarray, gt_num: int, img_num: int) -> float:
         """Evaluate by Caltech-style log-average miss rate.
 
         Args:
-            score_list(list[tuple[ndarray, int, str]]): Matching result.
-                a list of tuples (dtbox, label, imgID) in the descending
-                sort of dtbox.score.
+            labels (np.ndarray): Whether the detections are true positives,
+                in the descending sort of their scores.
             gt_num(int): The number of gt boxes in the entire dataset.
             img_num(int): The number of image in the entire dataset.
 
         Returns:
             mr(float): result of miss rate.
         """
-
-        # find greater_than
-        def _find_gt(lst, target):
-            for idx, _item in enumerate(lst):
-                if _item >= target:
-                    return idx
-            return len(lst) - 1
-
         if self.mr_ref == 'CALTECH_-2':
             # CALTECH_MRREF_2: anchor points (from 10^-2 to 1) as in
             # P.Dollar's paper
@@ -353,472 +401,132 @@ class CrowdHumanMetric(BaseMetric):
                 0.3162, 1.000
             ]
 
-        tp, fp = 0.0, 0.0
-        fppiX, fppiY = list(), list()
-        for i, item in enumerate(score_list):
-            if item[1] == 1:
-                tp += 1.0
-            elif item[1] == 0:
-                fp += 1.0
-
-            fn = gt_num - tp
-            recall = tp / (tp + fn)
-            missrate = 1.0 - recall
-            fppi = fp / img_num
-            fppiX.append(fppi)
-            fppiY.append(missrate)
-
-        score = list()
-        for pos in ref:
-            argmin = _find_gt(fppiX, pos)
-            if argmin >= 0:
-                score.append(fppiY[argmin])
-        score = np.array(score)
+        tp = np.cumsum(labels == 1, dtype=np.float64)
+        fp = np.cumsum(labels == 0, dtype=np.float64)
+        missrate = 1.0 - tp / gt_num
+        fppi = fp / img_num
+        # the first point whose fppi reaches the anchor, or the last one
+        inds = np.searchsorted(fppi, ref).clip(max=len(fppi) - 1)
+        score = missrate[inds[inds >= 0]]
         mr = np.exp(np.log(score).mean())
         return mr
 
-    def eval_ji(self, samples):
-        """Evaluate by JI using multi_process.
+    def compute_ji(self, dt_boxes: np.ndarray, gt_boxes: np.ndarray,
+                   gt_tags: np.ndarray) -> np.ndarray:
+        """Compute the statistics of JI of an image at the score thresholds
+        0, 0.1, ..., 0.9.
+
+        The IoU and IoA matrices are computed once and sliced by the score
+        thresholds.
 
         Args:
-            samples(Dict[str, Image]): The detection result packaged by Image.
+            dt_boxes (np.ndarray): Detections of shape (n, 5).
+            gt_boxes (np.ndarray): Gt boxes of shape (m, 4).
+            gt_tags (np.ndarray): Tags of the gt boxes, the ones of -1 are
+                ignored.
 
         Returns:
-            ji(float): result of jaccard index.
+            np.ndarray: Number of matches, valid gts and valid detections at
+            each score threshold, has shape (10, 3).
         """
-        import math
-        res_line = []
-        res_ji = []
+        valid = gt_tags != -1
+        valid_gts, ignored_gts = gt_boxes[valid], gt_boxes[~valid]
+        ious = bbox_overlaps(dt_boxes[:, :4], valid_gts, mode='iou')
+        if len(ignored_gts) > 0:
+            dt_ignored = bbox_overlaps(
+                dt_boxes[:, :4], ignored_gts,
+                mode='iof').max(axis=1) > self.iou_thres
+            gt_ignored = bbox_overlaps(
+                valid_gts, ignored_gts,
+                mode='iof').max(axis=1) > self.iou_thres
+        else:
+            dt_ignored = np.zeros(len(dt_boxes), dtype=bool)
+            gt_ignored = np.zeros(len(valid_gts), dtype=bool)
+
+        stats = np.zeros((10, 3), dtype=np.int64)
         for i in range(10):
             score_thr = 1e-1 * i
-            total = len(samples)
-            stride = math.ceil(total / self.num_ji_process)
-            result_queue = Queue(10000)
-            results, procs = [], []
-            records = list(samples.items())
-            for i in range(self.num_ji_process):
-                start = i * stride
-                end = np.min([start + stride, total])
-                sample_data = dict(records[start:end])
-                p = Process(
-                    target=self.compute_ji_with_ignore,
-                    args=(result_queue, sample_data, score_thr))
-                p.start()
-                procs.append(p)
-            for i in range(total):
-                t = result_queue.get()
-                results.append(t)
-            for p in procs:
-                p.join()
-            line, mean_ratio = self.gather(results)
-            line = 'score_thr:{:.1f}, {}'.format(score_thr, line)
-            res_line.append(line)
-            res_ji.append(mean_ratio)
-        return max(res_ji)
-
-    def compute_ji_with_ignore(self, result_queue, dt_result, score_thr):
-        """Compute JI with ignore.
-
-        Args:
-            result_queue(Queue): The Queue for save compute result when
-                multi_process.
-            dt_result(dict[Image]): Detection result packaged by Image.
-            score_thr(float): The threshold of detection score.
-        Returns:
-            dict: compute result.
-        """
-        for ID, record in dt_result.items():
-            gt_boxes = record.gt_boxes
-            dt_boxes = record.dt_boxes
             keep = dt_boxes[:, -1] > score_thr
-            dt_boxes = dt_boxes[keep][:, :-1]
-
-            gt_tag = np.array(gt_boxes[:, -1] != -1)
-            matches = self.compute_ji_matching(dt_boxes, gt_boxes[gt_tag, :4])
-            # get the unmatched_indices
-            matched_indices = np.array([j for (j, _) in matches])
-            unmatched_indices = list(
-                set(np.arange(dt_boxes.shape[0])) - set(matched_indices))
-            num_ignore_dt = self.get_ignores(dt_boxes[unmatched_indices],
-                                             gt_boxes[~gt_tag, :4])
-            matched_indices = np.array([j for (_, j) in matches])
-            unmatched_indices = list(
-                set(np.arange(gt_boxes[gt_tag].shape[0])) -
-                set(matched_indices))
-            num_ignore_gt = self.get_ignores(
-                gt_boxes[gt_tag][unmatched_indices], gt_boxes[~gt_tag, :4])
-            # compute results
-            eps = 1e-6
-            k = len(matches)
-            m = gt_tag.sum() - num_ignore_gt
-            n = dt_boxes.shape[0] - num_ignore_dt
-            ratio = k / (m + n - k + eps)
-            recall = k / (m + eps)
-            cover = k / (n + eps)
-            noise = 1 - cover
-            result_dict = dict(
-                ratio=ratio,
-                recall=recall,
-                cover=cover,
-                noise=noise,
-                k=k,
-                m=m,
-                n=n)
-            result_queue.put_nowait(result_dict)
+            dt_matched = np.zeros(keep.sum(), dtype=bool)
+            gt_matched = np.zeros(len(valid_gts), dtype=bool)
+            if keep.sum() > 0 and len(valid_gts) > 0:
+                input_ = ious[keep]
+                input_[input_ < self.iou_thres] = 0
+                match_scipy = maximum_bipartite_matching(
+                    csr_matrix(input_), perm_type='column')
+                dt_matched = match_scipy != -1
+                gt_matched[match_scipy[dt_matched]] = True
+            k = dt_matched.sum()
+            m = len(valid_gts) - (gt_ignored & ~gt_matched).sum()
+            n = keep.sum() - (dt_ignored[keep] & ~dt_matched).sum()
+            stats[i] = (k, m, n)
+        return stats
 
     @staticmethod
-    def gather(results):
-        """Integrate test results."""
-        assert len(results)
-        img_num = 0
-        for result in results:
-            if result['n'] != 0 or result['m'] != 0:
-                img_num += 1
-        mean_ratio = np.sum([rb['ratio'] for rb in results]) / img_num
-        valids = np.sum([rb['k'] for rb in results])
-        total = np.sum([rb['n'] for rb in results])
-        gtn = np.sum([rb['m'] for rb in results])
-        line = 'mean_ratio:{:.4f}, valids:{}, total:{}, gtn:{}'\
-            .format(mean_ratio, valids, total, gtn)
-        return line, mean_ratio
-
-    def compute_ji_matching(self, dt_boxes, gt_boxes):
-        """Match the annotation box for each detection box.
+    def eval_ji(ji_stats: np.ndarray) -> float:
+        """Evaluate by JI.
 
         Args:
-            dt_boxes(ndarray): Detection boxes.
-            gt_boxes(ndarray): Ground_truth boxes.
+            ji_stats (np.ndarray): Number of matches, valid gts and valid
+                detections of every image at each score threshold, has shape
+                (num_imgs, 10, 3).
 
         Returns:
-            matches_(list[tuple[int, int]]): Match result.
+            ji(float): result of jaccard index.
         """
-        assert dt_boxes.shape[-1] > 3 and gt_boxes.shape[-1] > 3
-        if dt_boxes.shape[0] < 1 or gt_boxes.shape[0] < 1:
-            return list()
-
-        ious = bbox_overlaps(dt_boxes, gt_boxes, mode='iou')
-        input_ = copy.deepcopy(ious)
-        input_[input_ < self.iou_thres] = 0
-        match_scipy = maximum_bipartite_matching(
-            csr_matrix(input_), perm_type='column')
-        matches_ = []
-        for i in range(len(match_scipy)):
-            if match_scipy[i] != -1:
-                matches_.append((i, int(match_scipy[i])))
-        return matches_
-
-    def get_ignores(self, dt_boxes, gt_boxes):
-        """Get the number of ignore bboxes."""
-        if gt_boxes.size:
-            ioas = bbox_overlaps(dt_boxes, gt_boxes, mode='iof')
-            ioas = np.max(ioas, axis=1)
-            rows = np.where(ioas > self.iou_thres)[0]
-            return len(rows)
-        else:
-            return 0
-
-
-class Image(object):
-    """Data structure for evaluation of CrowdHuman.
-
-    Note:
-        This implementation is modified from https://github.com/Purkialo/
-        CrowdDet/blob/master/lib/evaluate/APMRToolkits/image.py
-
-    Args:
-        mode (int): Select the mode of evaluate. Valid mode include
-            0(just body box), 1(just head box) and 2(both of them).
-            Defaults to 0.
+        eps = 1e-6
+        k, m, n = ji_stats[..., 0], ji_stats[..., 1], ji_stats[..., 2]
+        ratio = k / (m + n - k + eps)
+        img_num = ((n != 0) | (m != 0)).sum(axis=0)
+        mean_ratio = ratio.sum(axis=0) / img_num
+        return float(mean_ratio.max())
+
+
+def _load_gt_boxes(record: dict,
+                   eval_mode: int,
+                   class_names: Sequence[str] = PERSON_CLASSES
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """Load the gt boxes of a record and transform [x, y, w, h] to [x1, y1,
+    x2, y2].
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The boxes of shape (n, 4) and their
+        tags, which are the indices in ``class_names`` or -1 for ignored
+        boxes.
     """
-
-    def __init__(self, mode):
-        self.ID = None
-        self.width = None
-        self.height = None
-        self.dt_boxes = None
-        self.gt_boxes = None
-        self.eval_mode = mode
-
-        self.ign_num = None
-        self.gt_num = None
-        self.dt_num = None
-
-    def load(self, record, body_key, head_key, class_names, gt_flag):
-        """Loading information for evaluation.
-
-        Args:
-            record (dict): Label information or test results.
-                The format might look something like this:
-                {
-                    'ID': '273271,c9db000d5146c15',
-                    'gtboxes': [
-                        {'fbox': [72, 202, 163, 503], 'tag': 'person', ...},
-                        {'fbox': [199, 180, 144, 499], 'tag': 'person', ...},
-                        ...
-                    ]
-                }
-                or:
-                {
-                    'ID': '273271,c9db000d5146c15',
-                    'width': 800,
-                    'height': 1067,
-                    'dtboxes': [
-                        {
-                            'box': [306.22, 205.95, 164.05, 394.04],
-                            'score': 0.99,
-                            'tag': 1
-                        },
-                        {
-                            'box': [403.60, 178.66, 157.15, 421.33],
-                            'score': 0.99,
-                            'tag': 1
-                        },
-                        ...
-                    ]
-                }
-            body_key (str, None): key of detection body box.
-                Valid when loading detection results and self.eval_mode!=1.
-            head_key (str, None): key of detection head box.
-                Valid when loading detection results and self.eval_mode!=0.
-            class_names (list[str]):class names of data set.
-                Defaults to ['background', 'person'].
-            gt_flag (bool): Indicate whether record is ground truth
-                or predicting the outcome.
-        """
-        if 'ID' in record and self.ID is None:
-            self.ID = record['ID']
-        if 'width' in record and self.width is None:
-            self.width = record['width']
-        if 'height' in record and self.height is None:
-            self.height = record['height']
-        if gt_flag:
-            self.gt_num = len(record['gtboxes'])
-            body_bbox, head_bbox = self.load_gt_boxes(record, 'gtboxes',
-                                                      class_names)
-            if self.eval_mode == 0:
-                self.gt_boxes = body_bbox
-                self.ign_num = (body_bbox[:, -1] == -1).sum()
-            elif self.eval_mode == 1:
-                self.gt_boxes = head_bbox
-                self.ign_num = (head_bbox[:, -1] == -1).sum()
-            else:
-                gt_tag = np.array([
-                    body_bbox[i, -1] != -1 and head_bbox[i, -1] != -1
-                    for i in range(len(body_bbox))
-                ])
-                self.ign_num = (gt_tag == 0).sum()
-                self.gt_boxes = np.hstack(
-                    (body_bbox[:, :-1], head_bbox[:, :-1],
-                     gt_tag.reshape(-1, 1)))
-
-        if not gt_flag:
-            self.dt_num = len(record['dtboxes'])
-            if self.eval_mode == 0:
-                self.dt_boxes = self.load_det_boxes(record, 'dtboxes',
-                                                    body_key, 'score')
-            elif self.eval_mode == 1:
-                self.dt_boxes = self.load_det_boxes(record, 'dtboxes',
-                                                    head_key, 'score')
-            else:
-                body_dtboxes = self.load_det_boxes(record, 'dtboxes', body_key,
-                                                   'score')
-                head_dtboxes = self.load_det_boxes(record, 'dtboxes', head_key,
-                                                   'score')
-                self.dt_boxes = np.hstack((body_dtboxes, head_dtboxes))
-
-    @staticmethod
-    def load_gt_boxes(dict_input, key_name, class_names):
-        """load ground_truth and transform [x, y, w, h] to [x1, y1, x2, y2]"""
-        assert key_name in dict_input
-        if len(dict_input[key_name]) < 1:
-            return np.empty([0, 5])
-        head_bbox = []
-        body_bbox = []
-        for rb in dict_input[key_name]:
-            if rb['tag'] in class_names:
-                body_tag = class_names.index(rb['tag'])
-                head_tag = copy.deepcopy(body_tag)
-            else:
-                body_tag = -1
-                head_tag = -1
-            if 'extra' in rb:
-                if 'ignore' in rb['extra']:
-                    if rb['extra']['ignore'] != 0:
-                        body_tag = -1
-                        head_tag = -1
-            if 'head_attr' in rb:
-                if 'ignore' in rb['head_attr']:
-                    if rb['head_attr']['ignore'] != 0:
-                        head_tag = -1
-            head_bbox.append(np.hstack((rb['hbox'], head_tag)))
-            body_bbox.append(np.hstack((rb['fbox'], body_tag)))
-        head_bbox = np.array(head_bbox)
-        head_bbox[:, 2:4] += head_bbox[:, :2]
-        body_bbox = np.array(body_bbox)
-        body_bbox[:, 2:4] += body_bbox[:, :2]
-        return body_bbox, head_bbox
-
-    @staticmethod
-    def load_det_boxes(dict_input, key_name, key_box, key_score, key_tag=None):
-        """load detection boxes."""
-        assert key_name in dict_input
-        if len(dict_input[key_name]) < 1:
-            return np.empty([0, 5])
+    gtboxes = record['gtboxes']
+    body_tags = np.array([
+        class_names.index(rb['tag']) if rb['tag'] in class_names
+        and rb.get('extra', {}).get('ignore', 0) == 0 else -1 for rb in gtboxes
+    ],
+                         dtype=np.int64)
+    if eval_mode == 0:
+        boxes = np.array([rb['fbox'] for rb in gtboxes], dtype=np.float64)
+        tags = body_tags
+    else:
+        head_tags = np.array([
+            -1 if rb.get('head_attr', {}).get('ignore', 0) != 0 else 0
+            for rb in gtboxes
+        ],
+                             dtype=np.int64)
+        head_tags = np.where(head_tags == -1, -1, body_tags)
+        if eval_mode == 1:
+            boxes = np.array([rb['hbox'] for rb in gtboxes], dtype=np.float64)
+            tags = head_tags
         else:
-            assert key_box in dict_input[key_name][0]
-            if key_score:
-                assert key_score in dict_input[key_name][0]
-            if key_tag:
-                assert key_tag in dict_input[key_name][0]
-        if key_score:
-            if key_tag:
-                bboxes = np.vstack([
-                    np.hstack((rb[key_box], rb[key_score], rb[key_tag]))
-                    for rb in dict_input[key_name]
-                ])
-            else:
-                bboxes = np.vstack([
-                    np.hstack((rb[key_box], rb[key_score]))
-                    for rb in dict_input[key_name]
-                ])
-        else:
-            if key_tag:
-                bboxes = np.vstack([
-                    np.hstack((rb[key_box], rb[key_tag]))
-                    for rb in dict_input[key_name]
-                ])
-            else:
-                bboxes = np.vstack(
-                    [rb[key_box] for rb in dict_input[key_name]])
-        bboxes[:, 2:4] += bboxes[:, :2]
-        return bboxes
-
-    def clip_all_boader(self):
-        """Make sure boxes are within the image range."""
-
-        def _clip_boundary(boxes, height, width):
-            assert boxes.shape[-1] >= 4
-            boxes[:, 0] = np.minimum(np.maximum(boxes[:, 0], 0), width - 1)
-            boxes[:, 1] = np.minimum(np.maximum(boxes[:, 1], 0), height - 1)
-            boxes[:, 2] = np.maximum(np.minimum(boxes[:, 2], width), 0)
-            boxes[:, 3] = np.maximum(np.minimum(boxes[:, 3], height), 0)
-            return boxes
-
-        assert self.dt_boxes.shape[-1] >= 4
-        assert self.gt_boxes.shape[-1] >= 4
-        assert self.width is not None and self.height is not None
-        if self.eval_mode == 2:
-            self.dt_boxes[:, :4] = _clip_boundary(self.dt_boxes[:, :4],
-                                                  self.height, self.width)
-            self.gt_boxes[:, :4] = _clip_boundary(self.gt_boxes[:, :4],
-                                                  self.height, self.width)
-            self.dt_boxes[:, 4:8] = _clip_boundary(self.dt_boxes[:, 4:8],
-                                                   self.height, self.width)
-            self.gt_boxes[:, 4:8] = _clip_boundary(self.gt_boxes[:, 4:8],
-                                                   self.height, self.width)
-        else:
-            self.dt_boxes = _clip_boundary(self.dt_boxes, self.height,
-                                           self.width)
-            self.gt_boxes = _clip_boundary(self.gt_boxes, self.height,
-                                           self.width)
-
-    def compare_voc(self, thres):
-        """Match the detection results with the ground_truth by VOC.
-
-        Args:
-            thres (float): IOU threshold.
-
-        Returns:
-            score_list(list[tuple[ndarray, int, str]]): Matching result.
-            a list of tuples (dtbox, label, imgID) in the descending
-            sort of dtbox.score.
-        """
-        if self.dt_boxes is None:
-            return list()
-        dtboxes = self.dt_boxes
-        gtboxes = self.gt_boxes if self.gt_boxes is not None else list()
-        dtboxes.sort(key=lambda x: x.score, reverse=True)
-        gtboxes.sort(key=lambda x: x.ign)
-
-        score_list = list()
-        for i, dt in enumerate(dtboxes):
-            maxpos = -1
-            maxiou = thres
-
-            for j, gt in enumerate(gtboxes):
-                overlap = dt.iou(gt)
-                if overlap > maxiou:
-                    maxiou = overlap
-                    maxpos = j
-
-            if maxpos >= 0:
-                if gtboxes[maxpos].ign == 0:
-                    gtboxes[maxpos].matched = 1
-                    dtboxes[i].matched = 1
-                    score_list.append((dt, self.ID))
-                else:
-                    dtboxes[i].matched = -1
-            else:
-                dtboxes[i].matched = 0
-                score_list.append((dt, self.ID))
-        return score_list
-
-    def compare_caltech(self, thres):
-        """Match the detection results with the ground_truth by Caltech
-        matching strategy.
-
-        Args:
-            thres (float): IOU threshold.
-
-        Returns:
-            score_list(list[tuple[ndarray, int, str]]): Matching result.
-            a list of tuples (dtbox, label, imgID) in the descending
-            sort of dtbox.score.
-        """
-        if self.dt_boxes is None or self.gt_boxes is None:
-            return list()
-
-        dtboxes = self.dt_boxes if self.dt_boxes is not None else list()
-        gtboxes = self.gt_boxes if self.gt_boxes is not None else list()
-        dt_matched = np.zeros(dtboxes.shape[0])
-        gt_matched = np.zeros(gtboxes.shape[0])
-
-        dtboxes = np.array(sorted(dtboxes, key=lambda x: x[-1], reverse=True))
-        gtboxes = np.array(sorted(gtboxes, key=lambda x: x[-1], reverse=True))
-        if len(dtboxes):
-            overlap_iou = bbox_overlaps(dtboxes, gtboxes, mode='iou')
-            overlap_ioa = bbox_overlaps(dtboxes, gtboxes, mode='iof')
-        else:
-            return list()
-
-        score_list = list()
-        for i, dt in enumerate(dtboxes):
-            maxpos = -1
-            maxiou = thres
-            for j, gt in enumerate(gtboxes):
-                if gt_matched[j] == 1:
-                    continue
-                if gt[-1] > 0:
-                    overlap = overlap_iou[i][j]
-                    if overlap > maxiou:
-                        maxiou = overlap
-                        maxpos = j
-                else:
-                    if maxpos >= 0:
-                        break
-                    else:
-                        overlap = overlap_ioa[i][j]
-                        if overlap > thres:
-                            maxiou = overlap
-                            maxpos = j
-            if maxpos >= 0:
-                if gtboxes[maxpos, -1] > 0:
-                    gt_matched[maxpos] = 1
-                    dt_matched[i] = 1
-                    score_list.append((dt, 1, self.ID))
-                else:
-                    dt_matched[i] = -1
-            else:
-                dt_matched[i] = 0
-                score_list.append((dt, 0, self.ID))
-        return score_list
+            boxes = np.array([rb['fbox'] for rb in gtboxes], dtype=np.float64)
+            tags = np.where((body_tags == -1) | (head_tags == -1), -1,
+                            body_tags)
+    boxes = boxes.reshape(-1, 4)
+    boxes[:, 2:4] += boxes[:, :2]
+    return boxes, tags
+
+
+def _clip_boxes(boxes: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Make sure boxes are within the image range."""
+    boxes = boxes.copy()
+    boxes[:, 0] = np.minimum(np.maximum(boxes[:, 0], 0), width - 1)
+    boxes[:, 1] = np.minimum(np.maximum(boxes[:, 1], 0), height - 1)
+    boxes[:, 2] = np.maximum(np.minimum(boxes[:, 2], width), 0)
+    boxes[:, 3] = np.maximum(np.minimum(boxes[:, 3], height), 0)
+    return boxes
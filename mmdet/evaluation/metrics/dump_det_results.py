@@ -2,6 +2,7 @@
 import warnings
 from typing import Sequence
 
+import torch
 from mmengine.evaluator import DumpResults
 from mmengine.evaluator.metric import _to_cpu
 
@@ -37,7 +38,9 @@ class DumpDetResults(DumpResults):
                 pred = data_sample['pred_instances']
                 # encode mask to RLE
                 if 'masks' in pred:
-                    pred['masks'] = encode_mask_results(pred['masks'].numpy())
+                    pred['masks'] = encode_mask_results(
+                        pred['masks'].numpy() if isinstance(
+                            pred['masks'], torch.Tensor) else pred['masks'])
             if 'pred_panoptic_seg' in data_sample:
                 warnings.warn(
                     'Panoptic segmentation map will not be compressed. '
@@ -31,6 +31,8 @@ class OpenImagesMetric(BaseMetric):
             current class. Default: True.
         filter_labels (bool): Whether filter unannotated classes.
             Default: True.
+        eval_engine (str): Engine used by :func:`eval_map` to compute TP and
+            FP, 'pool' or 'numpy'. Defaults to 'pool'.
         collect_device (str): Device name used for collecting results from
             different ranks during distributed training. Must be 'cpu' or
             'gpu'. Defaults to 'cpu'.
@@ -48,6 +50,7 @@ class OpenImagesMetric(BaseMetric):
                  use_group_of: bool = True,
                  get_supercategory: bool = True,
                  filter_labels: bool = True,
+                 eval_engine: str = 'pool',
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None) -> None:
         super().__init__(collect_device=collect_device, prefix=prefix)
@@ -62,6 +65,9 @@ class OpenImagesMetric(BaseMetric):
         self.use_group_of = use_group_of
         self.get_supercategory = get_supercategory
         self.filter_labels = filter_labels
+        assert eval_engine in ['pool', 'numpy'], \
+            'Unrecognized engine, only "pool" and "numpy" are supported'
+        self.eval_engine = eval_engine
 
     def _get_supercategory_ann(self, instances: List[dict]) -> List[dict]:
         """Get parent classes's annotation of the corresponding class.
@@ -229,7 +235,8 @@ class OpenImagesMetric(BaseMetric):
                 ioa_thr=ioa_thr,
                 dataset=dataset_type,
                 logger=logger,
-                use_group_of=self.use_group_of)
+                use_group_of=self.use_group_of,
+                engine=self.eval_engine)
 
             mean_aps.append(mean_ap)
             eval_results[f'AP{int(iou_thr * 100):02d}'] = round(mean_ap, 3)
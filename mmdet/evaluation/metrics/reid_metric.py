@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Sequence, Union
+from typing import Optional, Sequence, Tuple, Union
 
 import numpy as np
 import torch
@@ -17,6 +17,9 @@ class ReIDMetrics(BaseMetric):
             Default value is `mAP`.
         metric_options: (dict, optional): Options for calculating metrics.
             Allowed keys are 'rank_list' and 'max_rank'. Defaults to None.
+        chunk_size (int): Number of queries whose distances to the gallery
+            are computed at once, which bounds the memory to
+            ``chunk_size x n`` distances. Defaults to 256.
         collect_device (str): Device name used for collecting results from
             different ranks during distributed training. Must be 'cpu' or
             'gpu'. Defaults to 'cpu'.
@@ -31,6 +34,7 @@ class ReIDMetrics(BaseMetric):
     def __init__(self,
                  metric: Union[str, Sequence[str]] = 'mAP',
                  metric_options: Optional[dict] = None,
+                 chunk_size: int = 256,
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None) -> None:
         super().__init__(collect_device, prefix)
@@ -50,6 +54,8 @@ class ReIDMetrics(BaseMetric):
             rank_list=[1, 5, 10, 20], max_rank=20)
         for rank in self.metric_options['rank_list']:
             assert 1 <= rank <= self.metric_options['max_rank']
+        assert chunk_size > 0
+        self.chunk_size = chunk_size
 
     def process(self, data_batch: dict, data_samples: Sequence[dict]) -> None:
         """Process one batch of data samples and predictions.
@@ -85,49 +91,26 @@ class ReIDMetrics(BaseMetric):
         # NOTICE: don't access `self.results` from the method.
         metrics = {}
 
-        pids = torch.cat([result['gt_label'] for result in results]).numpy()
+        pids = torch.cat([result['gt_label'] for result in results])
         features = torch.stack([result['pred_feature'] for result in results])
 
-        n, c = features.size()
-        mat = torch.pow(features, 2).sum(dim=1, keepdim=True).expand(n, n)
-        distmat = mat + mat.t()
-        distmat.addmm_(features, features.t(), beta=1, alpha=-2)
-        distmat = distmat.numpy()
-
-        indices = np.argsort(distmat, axis=1)
-        matches = (pids[indices] == pids[:, np.newaxis]).astype(np.int32)
-
-        all_cmc = []
-        all_AP = []
-        num_valid_q = 0.
-        for q_idx in range(n):
-            # remove self
-            raw_cmc = matches[q_idx][1:]
-            if not np.any(raw_cmc):
-                # this condition is true when query identity
-                # does not appear in gallery
-                continue
-
-            cmc = raw_cmc.cumsum()
-            cmc[cmc > 1] = 1
-
-            all_cmc.append(cmc[:self.metric_options['max_rank']])
-            num_valid_q += 1.
-
-            # compute average precision
-            num_rel = raw_cmc.sum()
-            tmp_cmc = raw_cmc.cumsum()
-            tmp_cmc = [x / (i + 1.) for i, x in enumerate(tmp_cmc)]
-            tmp_cmc = np.asarray(tmp_cmc) * raw_cmc
-            AP = tmp_cmc.sum() / num_rel
-            all_AP.append(AP)
+        max_rank = self.metric_options['max_rank']
+        all_cmc = torch.zeros(max_rank, dtype=torch.float64)
+        sum_AP = 0.
+        num_valid_q = 0
+        sq_norms = torch.pow(features, 2).sum(dim=1)
+        for start in range(0, features.size(0), self.chunk_size):
+            queries = slice(start, start + self.chunk_size)
+            cmc, AP = self._rank_positives(features, sq_norms, pids, queries)
+            all_cmc += cmc.sum(0)
+            sum_AP += AP.sum().item()
+            num_valid_q += len(AP)
 
         assert num_valid_q > 0, \
             'Error: all query identities do not appear in gallery'
 
-        all_cmc = np.asarray(all_cmc)
-        all_cmc = all_cmc.sum(0) / num_valid_q
-        mAP = np.mean(all_AP)
+        all_cmc = (all_cmc / num_valid_q).numpy()
+        mAP = sum_AP / num_valid_q
 
         if 'mAP' in self.metrics:
             metrics['mAP'] = np.around(mAP, decimals=3)
@@ -136,3 +119,67 @@ class ReIDMetrics(BaseMetric):
                 metrics[f'R{rank}'] = np.around(all_cmc[rank - 1], decimals=3)
 
         return metrics
+
+    def _rank_positives(self, features: torch.Tensor, sq_norms: torch.Tensor,
+                        pids: torch.Tensor,
+                        queries: slice) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Compute the CMC and AP of a chunk of queries against all samples.
+
+        Instead of sorting the whole gallery, only the distances of the
+        positives of each query are sorted, and the rank of every positive
+        is obtained by counting the negatives which are closer. Ties are
+        broken pessimistically, the negatives at the same distance as a
+        positive are ranked before it, so that duplicated features do not
+        inflate the metrics.
+
+        Args:
+            features (torch.Tensor): Features of all samples, of shape
+                (n, c).
+            sq_norms (torch.Tensor): Squared norms of the features, of
+                shape (n, ).
+            pids (torch.Tensor): Identities of all samples, of shape (n, ).
+            queries (slice): The samples used as queries.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: The CMC of shape
+            (num_valid_q, max_rank) and the AP of shape (num_valid_q, ) of
+            the queries whose identity appears in the gallery.
+        """
+        q_features, q_pids = features[queries], pids[queries]
+        distmat = sq_norms[queries, None] + sq_norms[None]
+        distmat.addmm_(q_features, features.t(), beta=1, alpha=-2)
+        num_q = distmat.size(0)
+
+        # remove self
+        in_gallery = torch.ones_like(distmat, dtype=torch.bool)
+        in_gallery[torch.arange(num_q),
+                   torch.arange(features.size(0))[queries]] = False
+        matches = (pids[None] == q_pids[:, None]) & in_gallery
+        num_rel = matches.sum(dim=1)
+        # skip the queries whose identity does not appear in gallery
+        valid = num_rel > 0
+        distmat, matches = distmat[valid], matches[valid]
+        in_gallery, num_rel = in_gallery[valid], num_rel[valid]
+        max_rank = self.metric_options['max_rank']
+        if len(num_rel) == 0:
+            return (torch.zeros((0, max_rank), dtype=torch.bool),
+                    torch.zeros(0, dtype=torch.float64))
+
+        # the sorted distances of the positives of each query, padded by inf
+        max_rel = int(num_rel.max())
+        pos_dists = distmat.masked_fill(~matches, float('inf'))
+        pos_dists = pos_dists.topk(max_rel, dim=1, largest=False).values
+        # the k-th positive is preceded by the negatives not farther than
+        # it, i.e. those with less than k positives closer than them
+        num_pos_before = torch.searchsorted(pos_dists.contiguous(), distmat)
+        is_neg = (in_gallery & ~matches).long()
+        num_neg_before = is_neg.new_zeros((len(num_rel), max_rel + 1))
+        num_neg_before.scatter_add_(1, num_pos_before, is_neg)
+        num_neg_before = num_neg_before.cumsum(dim=1)
+        pos_inds = torch.arange(1, max_rel + 1, dtype=torch.float64)
+        ranks = num_neg_before[:, :max_rel] + pos_inds
+
+        cmc = ranks[:, :1] <= torch.arange(1, max_rank + 1)
+        is_rel = pos_inds <= num_rel[:, None]
+        AP = (pos_inds / ranks * is_rel).sum(dim=1) / num_rel
+        return cmc, AP
@@ -32,6 +32,10 @@ class VOCMetric(BaseMetric):
             the average precision of recalls at [0, 0.1, ..., 1].
             The PASCAL VOC2007 defaults to use '11points', while PASCAL
             VOC2012 defaults to use 'area'.
+        eval_engine (str): Engine used by :func:`eval_map` to compute TP and
+            FP, 'pool' or 'numpy'. 'numpy' matches all images of a class at
+            once in the current process, which is usually faster and does
+            not spawn worker processes. Defaults to 'pool'.
         collect_device (str): Device name used for collecting results from
             different ranks during distributed training. Must be 'cpu' or
             'gpu'. Defaults to 'cpu'.
@@ -49,6 +53,7 @@ class VOCMetric(BaseMetric):
                  metric: Union[str, List[str]] = 'mAP',
                  proposal_nums: Sequence[int] = (100, 300, 1000),
                  eval_mode: str = '11points',
+                 eval_engine: str = 'pool',
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None) -> None:
         super().__init__(collect_device=collect_device, prefix=prefix)
@@ -68,6 +73,9 @@ class VOCMetric(BaseMetric):
         assert eval_mode in ['area', '11points'], \
             'Unrecognized mode, only "area" and "11points" are supported'
         self.eval_mode = eval_mode
+        assert eval_engine in ['pool', 'numpy'], \
+            'Unrecognized engine, only "pool" and "numpy" are supported'
+        self.eval_engine = eval_engine
 
     # TODO: data_batch is no longer needed, consider adjusting the
     #  parameter position
@@ -151,7 +159,8 @@ class VOCMetric(BaseMetric):
                     dataset=dataset_name,
                     logger=logger,
                     eval_mode=self.eval_mode,
-                    use_legacy_coordinate=True)
+                    use_legacy_coordinate=True,
+                    engine=self.eval_engine)
                 mean_aps.append(mean_ap)
                 eval_results[f'AP{int(iou_thr * 100):02d}'] = round(mean_ap, 3)
             eval_results['mAP'] = sum(mean_aps) / len(mean_aps)
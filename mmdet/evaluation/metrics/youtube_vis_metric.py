@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import mmengine
 import numpy as np
+import torch
 from mmengine.dist import (all_gather_object, barrier, broadcast_object_list,
                            is_main_process)
 from mmengine.logging import MMLogger
@@ -84,7 +85,8 @@ class YouTubeVISMetric(BaseVideoMetric):
             assert 'masks' in pred, \
                 'masks must exist in YouTube-VIS metric'
             result['masks'] = encode_mask_results(
-                pred['masks'].detach().cpu().numpy())
+                pred['masks'].detach().cpu().numpy()) if isinstance(
+                    pred['masks'], torch.Tensor) else pred['masks']
 
             # parse gt
             gt = dict()
@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import warnings
 from abc import ABCMeta, abstractmethod
 from inspect import signature
 from typing import List, Optional, Tuple
@@ -12,9 +13,11 @@ from mmengine.structures import InstanceData
 from torch import Tensor
 
 from mmdet.structures import SampleList
-from mmdet.structures.bbox import (cat_boxes, get_box_tensor, get_box_wh,
-                                   scale_boxes)
+from mmdet.structures.bbox import (BaseBoxes, cat_boxes, get_box_tensor,
+                                   get_box_wh, scale_boxes)
 from mmdet.utils import InstanceList, OptMultiConfig
+from ..task_modules.coders import (DeltaXYWHBBoxCoder, DistancePointBBoxCoder,
+                                   TBLRBBoxCoder)
 from ..test_time_augs import merge_aug_results
 from ..utils import (filter_scores_and_topk, select_single_mlvl,
                      unpack_gt_instances)
@@ -55,6 +58,10 @@ class BaseDenseHead(BaseModule, metaclass=ABCMeta):
     .. code:: text
 
     loss_and_predict(): forward() -> loss_by_feat() -> predict_by_feat()
+
+    5. Setting ``batched_predict=True`` in ``test_cfg`` makes
+    ``predict_by_feat`` post-process all images of a batch at once, see
+    ``_predict_by_feat_batch``.
     """
 
     def __init__(self, init_cfg: OptMultiConfig = None) -> None:
@@ -262,6 +269,22 @@ class BaseDenseHead(BaseModule, metaclass=ABCMeta):
             dtype=cls_scores[0].dtype,
             device=cls_scores[0].device)
 
+        test_cfg = self.test_cfg if cfg is None else cfg
+        if test_cfg is not None and test_cfg.get('batched_predict', False):
+            if self._supports_batched_predict():
+                return self._predict_by_feat_batch(
+                    cls_scores=cls_scores,
+                    bbox_preds=bbox_preds,
+                    score_factors=score_factors,
+                    mlvl_priors=mlvl_priors,
+                    batch_img_metas=batch_img_metas,
+                    cfg=test_cfg,
+                    rescale=rescale,
+                    with_nms=with_nms)
+            warnings.warn(f'{type(self).__name__} does not support '
+                          '`batched_predict`, fall back to post-processing '
+                          'the images one by one.')
+
         result_list = []
 
         for img_id in range(len(batch_img_metas)):
@@ -421,6 +444,180 @@ class BaseDenseHead(BaseModule, metaclass=ABCMeta):
             with_nms=with_nms,
             img_meta=img_meta)
 
+    def _supports_batched_predict(self) -> bool:
+        """Whether the head post-processes images with the methods of
+        :class:`BaseDenseHead` and a bbox coder which clips the boxes at the
+        end of decoding, so that ``_predict_by_feat_batch`` gives the same
+        results."""
+        head_type = type(self)
+        return (
+            head_type._predict_by_feat_single is
+            BaseDenseHead._predict_by_feat_single and
+            head_type._bbox_post_process is BaseDenseHead._bbox_post_process
+            and isinstance(
+                getattr(self, 'bbox_coder', None),
+                (DeltaXYWHBBoxCoder, DistancePointBBoxCoder, TBLRBBoxCoder)))
+
+    def _predict_by_feat_batch(self,
+                               cls_scores: List[Tensor],
+                               bbox_preds: List[Tensor],
+                               score_factors: Optional[List[Tensor]],
+                               mlvl_priors: List[Tensor],
+                               batch_img_metas: List[dict],
+                               cfg: ConfigDict,
+                               rescale: bool = False,
+                               with_nms: bool = True) -> InstanceList:
+        """Transform a batch of output features extracted from the head into
+        bbox results, processing all images at once.
+
+        The candidates of all images are filtered by ``score_thr`` and the
+        top ``nms_pre`` ones of every image and level are selected with two
+        stable sorts, then they are decoded, rescaled and filtered by size
+        together. Only NMS is run image by image, since offsetting the boxes
+        of different images in one NMS would round their coordinates. The
+        results are the same as ``_predict_by_feat_single`` up to the order
+        of equal scores, except that on CPU the vectorized activations may
+        round a few scores differently in the last bit.
+
+        Args:
+            cls_scores (list[Tensor]): Classification scores for all
+                scale levels, each is a 4D-tensor, has shape
+                (batch_size, num_priors * num_classes, H, W).
+            bbox_preds (list[Tensor]): Box energies / deltas for all
+                scale levels, each is a 4D-tensor, has shape
+                (batch_size, num_priors * 4, H, W).
+            score_factors (list[Tensor], optional): Score factor for
+                all scale level, each is a 4D-tensor, has shape
+                (batch_size, num_priors * 1, H, W).
+            mlvl_priors (list[Tensor]): Each element in the list is
+                the priors of a single level in feature pyramid.
+            batch_img_metas (list[dict]): Batch image meta info.
+            cfg (ConfigDict): Test / postprocessing configuration.
+            rescale (bool): If True, return boxes in original image space.
+                Defaults to False.
+            with_nms (bool): If True, do nms before return boxes.
+                Defaults to True.
+
+        Returns:
+            list[:obj:`InstanceData`]: Object detection results of each image
+            after the post process.
+        """
+        num_imgs = len(batch_img_metas)
+        score_thr = cfg.get('score_thr', 0)
+        nms_pre = cfg.get('nms_pre', -1)
+
+        mlvl_img_ids = []
+        mlvl_bbox_preds = []
+        mlvl_valid_priors = []
+        mlvl_scores = []
+        mlvl_labels = []
+        mlvl_score_factors = []
+        for level_idx in range(len(cls_scores)):
+            cls_score = cls_scores[level_idx].detach()
+            bbox_pred = bbox_preds[level_idx].detach()
+            assert cls_score.size()[-2:] == bbox_pred.size()[-2:]
+
+            dim = self.bbox_coder.encode_size
+            bbox_pred = bbox_pred.permute(0, 2, 3,
+                                          1).reshape(num_imgs, -1, dim)
+            cls_score = cls_score.permute(0, 2, 3,
+                                          1).reshape(num_imgs, -1,
+                                                     self.cls_out_channels)
+            if self.use_sigmoid_cls:
+                scores = cls_score.sigmoid()
+            else:
+                scores = cls_score.softmax(-1)[..., :-1]
+
+            valid_mask = scores > score_thr
+            valid_idxs = torch.nonzero(valid_mask)
+            scores = scores[valid_mask]
+            # sort the candidates by score, then group them by image
+            scores, idxs = scores.sort(descending=True, stable=True)
+            img_ids, inds = valid_idxs[idxs, 0].sort(stable=True)
+            scores = scores[inds]
+            valid_idxs = valid_idxs[idxs[inds]]
+
+            # rank of the candidates in their image
+            counts = torch.bincount(img_ids, minlength=num_imgs)
+            ranks = torch.arange(
+                len(img_ids),
+                device=img_ids.device) - (counts.cumsum(0) - counts)[img_ids]
+            # the same number of candidates as slicing the sorted scores
+            # by `min(nms_pre, num_valid)`
+            if nms_pre >= 0:
+                keep = ranks < nms_pre
+            else:
+                keep = ranks < (counts + nms_pre)[img_ids]
+            img_ids = img_ids[keep]
+            _, keep_idxs, labels = valid_idxs[keep].unbind(dim=1)
+
+            mlvl_img_ids.append(img_ids)
+            mlvl_bbox_preds.append(bbox_pred[img_ids, keep_idxs])
+            mlvl_valid_priors.append(mlvl_priors[level_idx][keep_idxs])
+            mlvl_scores.append(scores[keep])
+            mlvl_labels.append(labels)
+            if score_factors is not None:
+                score_factor = score_factors[level_idx].detach().permute(
+                    0, 2, 3, 1).reshape(num_imgs, -1)
+                mlvl_score_factors.append(score_factor[img_ids,
+                                                       keep_idxs].sigmoid())
+
+        # group the candidates of all levels by image
+        img_ids, inds = torch.cat(mlvl_img_ids).sort(stable=True)
+        bbox_pred = torch.cat(mlvl_bbox_preds)[inds]
+        priors = cat_boxes(mlvl_valid_priors)[inds]
+        scores = torch.cat(mlvl_scores)[inds]
+        labels = torch.cat(mlvl_labels)[inds]
+
+        bboxes = self.bbox_coder.decode(priors, bbox_pred)
+        box_type = type(bboxes) if isinstance(bboxes, BaseBoxes) else None
+        bboxes = get_box_tensor(bboxes)
+        if self.bbox_coder.clip_border:
+            max_xy = bboxes.new_tensor(
+                [meta['img_shape'][1::-1] for meta in batch_img_metas])
+            bboxes = torch.minimum(
+                bboxes.clamp(min=0),
+                max_xy.repeat(1, 2)[img_ids])
+
+        if rescale:
+            for meta in batch_img_metas:
+                assert meta.get('scale_factor') is not None
+            scale_factors = bboxes.new_tensor(
+                [[1 / s for s in meta['scale_factor']]
+                 for meta in batch_img_metas])
+            bboxes = bboxes * scale_factors.repeat(1, 2)[img_ids]
+        if score_factors is not None:
+            scores = scores * torch.cat(mlvl_score_factors)[inds]
+
+        # filter small size bboxes
+        if cfg.get('min_bbox_size', -1) >= 0:
+            w, h = get_box_wh(bboxes)
+            valid_mask = (w > cfg.min_bbox_size) & (h > cfg.min_bbox_size)
+            bboxes = bboxes[valid_mask]
+            scores = scores[valid_mask]
+            labels = labels[valid_mask]
+            img_ids = img_ids[valid_mask]
+
+        result_list = []
+        counts = torch.bincount(img_ids, minlength=num_imgs).tolist()
+        for img_bboxes, img_scores, img_labels in zip(
+                bboxes.split(counts), scores.split(counts),
+                labels.split(counts)):
+            results = InstanceData()
+            results.bboxes = img_bboxes if box_type is None else box_type(
+                img_bboxes)
+            results.scores = img_scores
+            results.labels = img_labels
+            if with_nms and results.bboxes.numel() > 0:
+                det_bboxes, keep_idxs = batched_nms(img_bboxes, img_scores,
+                                                    img_labels, cfg.nms)
+                results = results[keep_idxs]
+                # some nms would reweight the score, such as softnms
+                results.scores = det_bboxes[:, -1]
+                results = results[:cfg.max_per_img]
+            result_list.append(results)
+        return result_list
+
     def _bbox_post_process(self,
                            results: InstanceData,
                            cfg: ConfigDict,
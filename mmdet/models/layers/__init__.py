@@ -5,7 +5,7 @@ from .brick_wrappers import AdaptiveAvgPool2d, adaptive_avg_pool2d
 from .conv_upsample import ConvUpsample
 from .csp_layer import CSPLayer
 from .dropblock import DropBlock
-from .ema import ExpMomentumEMA
+from .ema import ExpMomentumEMA, MultiTensorEMA
 from .inverted_residual import InvertedResidual
 from .matrix_nms import mask_matrix_nms
 from .msdeformattn_pixel_decoder import MSDeformAttnPixelDecoder
@@ -59,5 +59,5 @@ __all__ = [
     'ConditionalDetrTransformerDecoderLayer', 'DinoTransformerDecoder',
     'CdnQueryGenerator', 'Mask2FormerTransformerEncoder',
     'Mask2FormerTransformerDecoderLayer', 'Mask2FormerTransformerDecoder',
-    'SinePositionalEncoding3D'
+    'SinePositionalEncoding3D', 'MultiTensorEMA'
 ]
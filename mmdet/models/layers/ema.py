@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import math
-from typing import Optional
+from collections import defaultdict
+from typing import Optional, Sequence
 
 import torch
 import torch.nn as nn
@@ -10,6 +11,62 @@ from torch import Tensor
 from mmdet.registry import MODELS
 
 
+class MultiTensorEMA:
+    """Fused exponential moving average of a list of tensors.
+
+    The pairs of averaged and source tensors are grouped by device and dtype
+    once, then every update issues a multi-tensor ``torch._foreach`` kernel
+    per group and operation, instead of a ``mul_`` and an ``add_`` kernel per
+    tensor. Tensors on CPU are still updated one by one. The averaged
+    tensors are updated in place with the formula
+    `averaged = (1-momentum) * averaged + momentum * source`, like the
+    per-tensor update up to the rounding of reduced precision dtypes.
+    Averaged tensors which are not floating point, e.g.
+    ``num_batches_tracked`` of BN, are skipped.
+
+    The given tensors, e.g. parameters and buffers, are referenced rather
+    than copied, so that the update follows in-place changes of the models.
+
+    Args:
+        averaged_tensors (Sequence[Tensor]): The averaged tensors.
+        source_tensors (Sequence[Tensor]): The source tensors, paired with
+            ``averaged_tensors``.
+    """
+
+    def __init__(self, averaged_tensors: Sequence[Tensor],
+                 source_tensors: Sequence[Tensor]) -> None:
+        assert len(averaged_tensors) == len(source_tensors)
+        groups = defaultdict(lambda: ([], []))
+        for averaged, source in zip(averaged_tensors, source_tensors):
+            if not averaged.dtype.is_floating_point:
+                continue
+            key = (averaged.device, averaged.dtype, source.device,
+                   source.dtype)
+            groups[key][0].append(averaged)
+            groups[key][1].append(source)
+        self.groups = list(groups.values())
+
+    @torch.no_grad()
+    def update(self, momentum: float) -> None:
+        """Update the averaged tensors with the source tensors.
+
+        Args:
+            momentum (float): The momentum of the update.
+        """
+        for averaged, source in self.groups:
+            device = averaged[0].device
+            if source[0].device != device:
+                source = [src.to(device) for src in source]
+            if device.type == 'cpu':
+                # the multi-tensor ops are not fused on CPU, updating the
+                # tensors one by one keeps each of them in cache
+                for avg, src in zip(averaged, source):
+                    avg.mul_(1 - momentum).add_(src, alpha=momentum)
+            else:
+                torch._foreach_mul_(averaged, 1 - momentum)
+                torch._foreach_add_(averaged, source, alpha=momentum)
+
+
 @MODELS.register_module()
 class ExpMomentumEMA(ExponentialMovingAverage):
     """Exponential moving average (EMA) with exponential momentum strategy,
@@ -49,6 +106,13 @@ class ExpMomentumEMA(ExponentialMovingAverage):
             update_buffers=update_buffers)
         assert gamma > 0, f'gamma must be greater than 0, but got {gamma}'
         self.gamma = gamma
+        # the fused update of the parameters of the last source model
+        self._fused_ema = None
+        self._fused_src_id = None
+
+    def _get_momentum(self, steps: int) -> float:
+        return (1 - self.momentum) * math.exp(
+            -float(1 + steps) / self.gamma) + self.momentum
 
     def avg_func(self, averaged_param: Tensor, source_param: Tensor,
                  steps: int) -> None:
@@ -61,6 +125,34 @@ class ExpMomentumEMA(ExponentialMovingAverage):
             steps (int): The number of times the parameters have been
                 updated.
         """
-        momentum = (1 - self.momentum) * math.exp(
-            -float(1 + steps) / self.gamma) + self.momentum
+        momentum = self._get_momentum(steps)
         averaged_param.mul_(1 - momentum).add_(source_param, alpha=momentum)
+
+    def update_parameters(self, model: nn.Module) -> None:
+        """Update the parameters of the model.
+
+        The averaging steps are fused by :class:`MultiTensorEMA`, which is
+        built once for the source model instead of collecting its parameters
+        at every step. The other steps are done by the parent class.
+
+        Args:
+            model (nn.Module): The model whose parameters will be averaged.
+        """
+        if self.steps == 0 or self.steps % self.interval != 0:
+            super().update_parameters(model)
+            return
+        if self._fused_ema is None or self._fused_src_id != id(model):
+            src_parameters = (
+                model.state_dict(keep_vars=True)
+                if self.update_buffers else dict(model.named_parameters()))
+            self._fused_ema = MultiTensorEMA(
+                list(self.avg_parameters.values()),
+                [src_parameters[k] for k in self.avg_parameters])
+            self._fused_src_id = id(model)
+        self._fused_ema.update(self._get_momentum(self.steps))
+        if not self.update_buffers:
+            # If not update the buffers,
+            # keep the buffers in sync with the source model.
+            for b_avg, b_src in zip(self.module.buffers(), model.buffers()):
+                b_avg.data.copy_(b_src.data.to(b_avg.device))
+        self.steps += 1
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 import numpy as np
 import torch
@@ -16,7 +16,7 @@ from torch.nn.modules.utils import _pair
 from mmdet.models.task_modules.samplers import SamplingResult
 from mmdet.models.utils import empty_instances
 from mmdet.registry import MODELS
-from mmdet.structures.mask import mask_target
+from mmdet.structures.mask import encode_cropped_mask, mask_target
 from mmdet.utils import ConfigType, InstanceList, OptConfigType, OptMultiConfig
 
 BYTES_PER_FLOAT = 4
@@ -248,7 +248,9 @@ class FCNMaskHead(BaseModule):
                   (num_instances, ).
                 - bboxes (Tensor): Has a shape (num_instances, 4),
                   the last dimension 4 arrange as (x1, y1, x2, y2).
-                - masks (Tensor): Has a shape (num_instances, H, W).
+                - masks (Tensor or list[dict]): Has a shape
+                  (num_instances, H, W), or RLE encoded masks if
+                  ``rcnn_test_cfg.mask_format`` is ``'rle'``.
         """
         assert len(mask_preds) == len(results_list) == len(batch_img_metas)
 
@@ -275,16 +277,21 @@ class FCNMaskHead(BaseModule):
                 results.masks = im_mask
         return results_list
 
-    def _predict_by_feat_single(self,
-                                mask_preds: Tensor,
-                                bboxes: Tensor,
-                                labels: Tensor,
-                                img_meta: dict,
-                                rcnn_test_cfg: ConfigDict,
-                                rescale: bool = False,
-                                activate_map: bool = False) -> Tensor:
+    def _predict_by_feat_single(
+            self,
+            mask_preds: Tensor,
+            bboxes: Tensor,
+            labels: Tensor,
+            img_meta: dict,
+            rcnn_test_cfg: ConfigDict,
+            rescale: bool = False,
+            activate_map: bool = False) -> Union[Tensor, List[dict]]:
         """Get segmentation masks from mask_preds and bboxes.
 
+        If ``rcnn_test_cfg.mask_format`` is ``'rle'``, the masks are pasted
+        in windows around their boxes and encoded to RLE from the windows,
+        without allocating the masks of the whole image.
+
         Args:
             mask_preds (Tensor): Predicted foreground masks, has shape
                 (n, num_classes, h, w).
@@ -300,7 +307,9 @@ class FCNMaskHead(BaseModule):
                 Defaults to False.
 
         Returns:
-            Tensor: Encoded masks, has shape (n, img_w, img_h)
+            Tensor or list[dict]: Encoded masks, has shape (n, img_w, img_h),
+            or a list of n RLE encoded masks if ``rcnn_test_cfg.mask_format``
+            is ``'rle'``.
 
         Example:
             >>> from mmengine.config import Config
@@ -346,6 +355,16 @@ class FCNMaskHead(BaseModule):
             img_w = np.round(img_w * w_scale.item()).astype(np.int32)
 
         N = len(mask_preds)
+        threshold = rcnn_test_cfg.mask_thr_binary
+        if not self.class_agnostic:
+            mask_preds = mask_preds[range(N), labels][:, None]
+
+        if rcnn_test_cfg.get('mask_format', 'bitmap') == 'rle':
+            assert threshold >= 0, \
+                'RLE encoded masks require a non-negative mask_thr_binary.'
+            return _paste_masks_to_rle(mask_preds, bboxes, int(img_h),
+                                       int(img_w), threshold)
+
         # The actual implementation split the input into chunks,
         # and paste them chunk by chunk.
         if device.type == 'cpu':
@@ -368,7 +387,6 @@ class FCNMaskHead(BaseModule):
                     N), 'Default GPU_MEM_LIMIT is too small; try increasing it'
         chunks = torch.chunk(torch.arange(N, device=device), num_chunks)
 
-        threshold = rcnn_test_cfg.mask_thr_binary
         im_mask = torch.zeros(
             N,
             img_h,
@@ -376,9 +394,6 @@ class FCNMaskHead(BaseModule):
             device=device,
             dtype=torch.bool if threshold >= 0 else torch.uint8)
 
-        if not self.class_agnostic:
-            mask_preds = mask_preds[range(N), labels][:, None]
-
         for inds in chunks:
             masks_chunk, spatial_inds = _do_paste_mask(
                 mask_preds[inds],
@@ -472,3 +487,77 @@ def _do_paste_mask(masks: Tensor,
         return img_masks[:, 0], (slice(y0_int, y1_int), slice(x0_int, x1_int))
     else:
         return img_masks[:, 0], ()
+
+
+def _paste_masks_to_rle(masks: Tensor, boxes: Tensor, img_h: int, img_w: int,
+                        threshold: float) -> List[dict]:
+    """Paste instance masks in windows around their boxes and encode them to
+    the RLE of the image.
+
+    The result is the same as encoding the masks pasted in the whole image
+    by :func:`_do_paste_mask`, while the memory is proportional to the sizes
+    of the boxes instead of the image.
+
+    Args:
+        masks (Tensor): N, 1, H, W
+        boxes (Tensor): N, 4
+        img_h (int): Height of the image to be pasted.
+        img_w (int): Width of the image to be pasted.
+        threshold (float): Threshold of the binary masks.
+
+    Returns:
+        list[dict]: RLE encoded masks.
+    """
+    N = masks.shape[0]
+    mask_h, mask_w = masks.shape[-2:]
+    x0, y0, x1, y1 = boxes.unbind(dim=1)
+    # Bilinear sampling spreads a mask half of its pixel beyond the box, the
+    # image pixels outside the windows are zeros.
+    pad_x = (x1 - x0).abs() / (2 * mask_w) + 1
+    pad_y = (y1 - y0).abs() / (2 * mask_h) + 1
+    win_x0 = (x0 - pad_x).floor().clamp(min=0, max=img_w)
+    win_y0 = (y0 - pad_y).floor().clamp(min=0, max=img_h)
+    win_x1 = torch.maximum((x1 + pad_x).ceil().clamp(max=img_w), win_x0)
+    win_y1 = torch.maximum((y1 + pad_y).ceil().clamp(max=img_h), win_y0)
+    windows = torch.stack([win_x0, win_y0, win_x1, win_y1], dim=1).long()
+
+    if masks.device.type == 'cpu':
+        # paste one by one to skip the padding of the windows
+        num_chunks = N
+    else:
+        max_win_h = int((windows[:, 3] - windows[:, 1]).max())
+        max_win_w = int((windows[:, 2] - windows[:, 0]).max())
+        num_chunks = min(
+            int(
+                np.ceil(N * max_win_h * max_win_w * BYTES_PER_FLOAT /
+                        GPU_MEM_LIMIT)), N)
+    chunks = torch.chunk(torch.arange(N, device=masks.device), num_chunks)
+
+    windows_cpu = windows.cpu().numpy()
+    rles = []
+    for inds in chunks:
+        chunk_windows = windows[inds]
+        win_h = max(int((chunk_windows[:, 3] - chunk_windows[:, 1]).max()), 1)
+        win_w = max(int((chunk_windows[:, 2] - chunk_windows[:, 0]).max()), 1)
+        img_y = chunk_windows[:, 1:2] + torch.arange(
+            win_h, device=masks.device)
+        img_x = chunk_windows[:, 0:1] + torch.arange(
+            win_w, device=masks.device)
+        img_y = (img_y.float() + 0.5 -
+                 y0[inds, None]) / (y1[inds, None] - y0[inds, None]) * 2 - 1
+        img_x = (img_x.float() + 0.5 -
+                 x0[inds, None]) / (x1[inds, None] - x0[inds, None]) * 2 - 1
+        img_y[torch.isinf(img_y)] = 0
+        img_x[torch.isinf(img_x)] = 0
+        gx = img_x[:, None, :].expand(len(inds), win_h, win_w)
+        gy = img_y[:, :, None].expand(len(inds), win_h, win_w)
+        grid = torch.stack([gx, gy], dim=3)
+        crops = F.grid_sample(
+            masks[inds].to(dtype=torch.float32), grid, align_corners=False)
+        crops = (crops[:, 0] >= threshold).cpu().numpy()
+        for crop, (x0_int, y0_int, x1_int,
+                   y1_int) in zip(crops, windows_cpu[inds.cpu().numpy()]):
+            rles.append(
+                encode_cropped_mask(crop[:y1_int - y0_int, :x1_int - x0_int],
+                                    (x0_int, y0_int), (img_h, img_w)))
+    return rles
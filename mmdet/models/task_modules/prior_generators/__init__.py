@@ -2,10 +2,10 @@
 from .anchor_generator import (AnchorGenerator, LegacyAnchorGenerator,
                                SSDAnchorGenerator, YOLOAnchorGenerator)
 from .point_generator import MlvlPointGenerator, PointGenerator
-from .utils import anchor_inside_flags, calc_region
+from .utils import PriorCache, anchor_inside_flags, calc_region
 
 __all__ = [
     'AnchorGenerator', 'LegacyAnchorGenerator', 'anchor_inside_flags',
     'PointGenerator', 'calc_region', 'YOLOAnchorGenerator',
-    'MlvlPointGenerator', 'SSDAnchorGenerator'
+    'MlvlPointGenerator', 'SSDAnchorGenerator', 'PriorCache'
 ]
@@ -7,6 +7,7 @@ from torch import Tensor
 from torch.nn.modules.utils import _pair
 
 from mmdet.registry import TASK_UTILS
+from .utils import PriorCache
 
 DeviceType = Union[str, torch.device]
 
@@ -98,13 +99,18 @@ class MlvlPointGenerator:
             in multiple feature levels in order (w, h).
         offset (float): The offset of points, the value is normalized with
             corresponding stride. Defaults to 0.5.
+        cache_size (int): Maximum number of grid priors and valid flags of
+            different feature map sizes cached by :class:`PriorCache`.
+            0 disables the cache. Defaults to 16.
     """
 
     def __init__(self,
                  strides: Union[List[int], List[Tuple[int, int]]],
-                 offset: float = 0.5) -> None:
+                 offset: float = 0.5,
+                 cache_size: int = 16) -> None:
         self.strides = [_pair(stride) for stride in strides]
         self.offset = offset
+        self.prior_cache = PriorCache(cache_size)
 
     @property
     def num_levels(self) -> int:
@@ -159,16 +165,22 @@ class MlvlPointGenerator:
         """
 
         assert self.num_levels == len(featmap_sizes)
-        multi_level_priors = []
-        for i in range(self.num_levels):
-            priors = self.single_level_grid_priors(
-                featmap_sizes[i],
-                level_idx=i,
-                dtype=dtype,
-                device=device,
-                with_stride=with_stride)
-            multi_level_priors.append(priors)
-        return multi_level_priors
+
+        def generate():
+            multi_level_priors = []
+            for i in range(self.num_levels):
+                priors = self.single_level_grid_priors(
+                    featmap_sizes[i],
+                    level_idx=i,
+                    dtype=dtype,
+                    device=device,
+                    with_stride=with_stride)
+                multi_level_priors.append(priors)
+            return multi_level_priors
+
+        key = ('grid_priors', tuple(map(tuple, featmap_sizes)), dtype,
+               torch.device(device), with_stride)
+        return list(self.prior_cache.get(key, generate))
 
     def single_level_grid_priors(self,
                                  featmap_size: Tuple[int],
@@ -247,18 +259,24 @@ class MlvlPointGenerator:
             list(torch.Tensor): Valid flags of points of multiple levels.
         """
         assert self.num_levels == len(featmap_sizes)
-        multi_level_flags = []
-        for i in range(self.num_levels):
-            point_stride = self.strides[i]
-            feat_h, feat_w = featmap_sizes[i]
-            h, w = pad_shape[:2]
-            valid_feat_h = min(int(np.ceil(h / point_stride[1])), feat_h)
-            valid_feat_w = min(int(np.ceil(w / point_stride[0])), feat_w)
-            flags = self.single_level_valid_flags((feat_h, feat_w),
-                                                  (valid_feat_h, valid_feat_w),
-                                                  device=device)
-            multi_level_flags.append(flags)
-        return multi_level_flags
+
+        def generate():
+            multi_level_flags = []
+            for i in range(self.num_levels):
+                point_stride = self.strides[i]
+                feat_h, feat_w = featmap_sizes[i]
+                h, w = pad_shape[:2]
+                valid_feat_h = min(int(np.ceil(h / point_stride[1])), feat_h)
+                valid_feat_w = min(int(np.ceil(w / point_stride[0])), feat_w)
+                flags = self.single_level_valid_flags(
+                    (feat_h, feat_w), (valid_feat_h, valid_feat_w),
+                    device=device)
+                multi_level_flags.append(flags)
+            return multi_level_flags
+
+        key = ('valid_flags', tuple(map(tuple, featmap_sizes)),
+               tuple(pad_shape[:2]), torch.device(device))
+        return list(self.prior_cache.get(key, generate))
 
     def single_level_valid_flags(self,
                                  featmap_size: Tuple[int, int],
@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
 
 import torch
 from torch import Tensor
@@ -68,3 +69,78 @@ def calc_region(bbox: Tensor,
         x2 = x2.clamp(min=0, max=featmap_size[1])
         y2 = y2.clamp(min=0, max=featmap_size[0])
     return (x1, y1, x2, y2)
+
+
+class PriorCache:
+    """A bounded LRU cache of the priors and valid flags of prior
+    generators.
+
+    The priors of a generator only depend on the feature map sizes and on
+    the dtype and device they are created with, so the ones of repeated
+    input sizes, e.g. at inference with a fixed input size or in training
+    with a few bucketed sizes, are generated once and reused. The cached
+    tensors are shared by the callers and should not be modified in place.
+
+    The lookups are bypassed while tracing or exporting to ONNX, so that
+    the priors are still recorded in the graph.
+
+    Args:
+        maxsize (int): Maximum number of cached entries, the least recently
+            used entry is dropped when it is exceeded. 0 disables the cache.
+            Defaults to 16.
+    """
+
+    def __init__(self, maxsize: int = 16) -> None:
+        assert maxsize >= 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        """bool: Whether the lookups are cached in the current context."""
+        return self.maxsize > 0 and not torch.jit.is_tracing() and \
+            not torch.onnx.is_in_onnx_export()
+
+    def get(self, key: Hashable, generate: Callable[[], Any]) -> Any:
+        """Get the entry of ``key``, and generate it on a miss.
+
+        Args:
+            key (Hashable): The key of the entry. It should identify all the
+                arguments of ``generate``, including the dtype and device
+                of the generated tensors.
+            generate (Callable): Function generating the entry.
+
+        Returns:
+            Any: The cached or generated entry.
+        """
+        if not self.enabled:
+            return generate()
+        # tensors created in inference mode cannot be used by autograd
+        key = (key, torch.is_inference_mode_enabled())
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = generate()
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        """Drop all the entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(maxsize={self.maxsize}, '
+                f'currsize={len(self)}, hits={self.hits}, '
+                f'misses={self.misses})')
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Tuple
+from typing import Tuple, Union
 
 import numpy as np
 import torch
@@ -241,10 +241,152 @@ class KalmanFilter:
         squared_maha = np.sum(z * z, axis=0)
         return squared_maha
 
+    def multi_predict(self, mean: np.array,
+                      covariance: np.array) -> Tuple[np.array, np.array]:
+        """Run Kalman filter prediction step for a batch of tracks.
+
+        Args:
+            mean (ndarray): The Nx8 dimensional mean vectors of the object
+                states at the previous time step.
+            covariance (ndarray): The Nx8x8 dimensional covariance matrices
+                of the object states at the previous time step.
+
+        Returns:
+            (ndarray, ndarray): Returns the mean vectors and covariance
+                matrices of the predicted states.
+        """
+        std_pos = self._std_weight_position * mean[:, 3]
+        std_vel = self._std_weight_velocity * mean[:, 3]
+        std = [
+            std_pos, std_pos,
+            np.full_like(std_pos, 1e-2), std_pos, std_vel, std_vel,
+            np.full_like(std_vel, 1e-5), std_vel
+        ]
+        motion_cov = _batched_diag(np.square(np.stack(std, axis=1)))
+
+        mean = np.dot(mean, self._motion_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._motion_mat, covariance),
+            self._motion_mat.T) + motion_cov
+        return mean, covariance
+
+    def multi_project(
+            self,
+            mean: np.array,
+            covariance: np.array,
+            bbox_score: Union[float,
+                              np.array] = 0.) -> Tuple[np.array, np.array]:
+        """Project state distributions of a batch of tracks to measurement
+        space.
+
+        Args:
+            mean (ndarray): The states' mean vectors (Nx8 dimensional).
+            covariance (ndarray): The states' covariance matrices (Nx8x8
+                dimensional).
+            bbox_score (float | ndarray): The confidence scores of the bboxes,
+                a scalar or an array of length N. Defaults to 0.
+
+        Returns:
+            (ndarray, ndarray): Returns the projected mean vectors (Nx4) and
+            covariance matrices (Nx4x4) of the given state estimates.
+        """
+        std_pos = self._std_weight_position * mean[:, 3]
+        std = np.stack(
+            [std_pos, std_pos,
+             np.full_like(std_pos, 1e-1), std_pos], axis=1)
+        if self.use_nsa:
+            std = (1 - np.reshape(bbox_score, (-1, 1))) * std
+        innovation_cov = _batched_diag(np.square(std))
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._update_mat, covariance), self._update_mat.T)
+        return mean, covariance + innovation_cov
+
+    def multi_update(
+            self,
+            mean: np.array,
+            covariance: np.array,
+            measurement: np.array,
+            bbox_score: Union[float,
+                              np.array] = 0.) -> Tuple[np.array, np.array]:
+        """Run Kalman filter correction step for a batch of tracks.
+
+        Args:
+            mean (ndarray): The predicted states' mean vectors (Nx8
+                dimensional).
+            covariance (ndarray): The states' covariance matrices (Nx8x8
+                dimensional).
+            measurement (ndarray): The Nx4 dimensional measurement vectors
+                (x, y, a, h), where (x, y) is the center position, a the
+                aspect ratio, and h the height of the bounding box.
+            bbox_score (float | ndarray): The confidence scores of the bboxes,
+                a scalar or an array of length N. Defaults to 0.
+
+        Returns:
+             (ndarray, ndarray): Returns the measurement-corrected state
+             distributions.
+        """
+        projected_mean, projected_cov = self.multi_project(
+            mean, covariance, bbox_score)
+
+        # K = P H^T S^-1, solved as S K^T = H P^T since S is symmetric.
+        kalman_gain = np.linalg.solve(
+            projected_cov,
+            np.matmul(self._update_mat,
+                      covariance.transpose(0, 2, 1))).transpose(0, 2, 1)
+        innovation = measurement - projected_mean
+
+        new_mean = mean + np.matmul(kalman_gain, innovation[..., None])[..., 0]
+        new_covariance = covariance - np.matmul(
+            np.matmul(kalman_gain, projected_cov),
+            kalman_gain.transpose(0, 2, 1))
+        return new_mean, new_covariance
+
+    def multi_gating_distance(self,
+                              mean: np.array,
+                              covariance: np.array,
+                              measurements: np.array,
+                              only_position: bool = False) -> np.array:
+        """Compute gating distances between a batch of state distributions
+        and measurements.
+
+        Args:
+            mean (ndarray): Mean vectors over the state distributions (Nx8
+                dimensional).
+            covariance (ndarray): Covariances of the state distributions
+                (Nx8x8 dimensional).
+            measurements (ndarray): An Mx4 dimensional matrix of M
+                measurements, each in format (x, y, a, h) where (x, y) is the
+                bounding box center position, a the aspect ratio, and h the
+                height.
+            only_position (bool, optional): If True, distance computation is
+                done with respect to the bounding box center position only.
+                Defaults to False.
+
+        Returns:
+            ndarray: Returns an NxM array, where the element (i, j) contains
+            the squared Mahalanobis distance between the i-th state
+            distribution and `measurements[j]`.
+        """
+        mean, covariance = self.multi_project(mean, covariance)
+        if only_position:
+            mean, covariance = mean[:, :2], covariance[:, :2, :2]
+            measurements = measurements[:, :2]
+
+        cholesky_factor = np.linalg.cholesky(covariance)
+        d = measurements[None] - mean[:, None]
+        z = np.linalg.solve(cholesky_factor, d.transpose(0, 2, 1))
+        squared_maha = np.sum(z * z, axis=1)
+        return squared_maha
+
     def track(self, tracks: dict,
               bboxes: torch.Tensor) -> Tuple[dict, np.array]:
         """Track forward.
 
+        The prediction step and the gating distances of all tracks are
+        computed in a batch.
+
         Args:
             tracks (dict[int:dict]): Track buffer.
             bboxes (Tensor): Detected bounding boxes.
@@ -252,16 +394,25 @@ class KalmanFilter:
         Returns:
             (dict[int:dict], ndarray): Updated tracks and bboxes.
         """
-        costs = []
-        for id, track in tracks.items():
-            track.mean, track.covariance = self.predict(
-                track.mean, track.covariance)
-            gating_distance = self.gating_distance(track.mean,
-                                                   track.covariance,
-                                                   bboxes.cpu().numpy(),
-                                                   self.center_only)
-            costs.append(gating_distance)
-
-        costs = np.stack(costs, 0)
+        measurements = bboxes.cpu().numpy()
+        if len(tracks) == 0:
+            return tracks, np.zeros((0, measurements.shape[0]))
+
+        mean = np.stack([track.mean for track in tracks.values()])
+        covariance = np.stack([track.covariance for track in tracks.values()])
+        mean, covariance = self.multi_predict(mean, covariance)
+        for i, track in enumerate(tracks.values()):
+            track.mean, track.covariance = mean[i], covariance[i]
+
+        costs = self.multi_gating_distance(mean, covariance, measurements,
+                                           self.center_only)
         costs[costs > self.gating_threshold] = np.nan
         return tracks, costs
+
+
+def _batched_diag(diagonals: np.array) -> np.array:
+    """Build a batch of diagonal matrices from an NxD array."""
+    num, dim = diagonals.shape
+    matrices = np.zeros((num, dim, dim), dtype=diagonals.dtype)
+    matrices[:, np.arange(dim), np.arange(dim)] = diagonals
+    return matrices
@@ -1,6 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from collections import OrderedDict
 from typing import List, Tuple
 
+import numpy as np
+import pycocotools.mask as mask_util
 import torch
 from mmcv.ops import batched_nms
 from mmengine.model import BaseTTAModel
@@ -10,6 +13,7 @@ from torch import Tensor
 
 from mmdet.structures import DetDataSample
 from mmdet.structures.bbox import bbox_flip
+from mmdet.structures.mask import encode_cropped_mask
 
 
 @MODELS.register_module()
@@ -17,6 +21,13 @@ class DetTTAModel(BaseTTAModel):
     """Merge augmented detection results, only bboxes corresponding score under
     flipping and multi-scale resizing can be processed now.
 
+    The views whose images have the same shapes, e.g. the flipped and the
+    original image of a scale, are stacked into one forward, since they are
+    padded the same as forwarding them separately. The predictions of all
+    views are flipped back in one step, then merged by ``batched_nms`` image
+    by image. Instance masks are flipped back and kept for the merged
+    instances, masks encoded as RLE are flipped within their bounding boxes.
+
     Examples:
         >>> tta_model = dict(
         >>>     type='DetTTAModel',
@@ -81,6 +92,41 @@ class DetTTAModel(BaseTTAModel):
             scores = torch.cat(aug_scores, dim=0)
             return bboxes, scores
 
+    def test_step(self, data):
+        """Get predictions of each enhanced data, a multiple predictions.
+
+        Args:
+            data (DataBatch): Enhanced data batch sampled from dataloader.
+
+        Returns:
+            MergedDataSamples: Merged prediction.
+        """
+        if not isinstance(data, dict):
+            return super().test_step(data)
+        num_augs = len(data[next(iter(data))])
+        data_list = [{key: value[idx]
+                      for key, value in data.items()}
+                     for idx in range(num_augs)]
+
+        # group the views by the shapes of their images
+        groups = OrderedDict()
+        for idx, aug_data in enumerate(data_list):
+            shapes = tuple(tuple(img.shape) for img in aug_data['inputs'])
+            groups.setdefault(shapes, []).append(idx)
+
+        predictions = [None] * num_augs
+        for aug_idxs in groups.values():
+            batch = {
+                key:
+                [item for idx in aug_idxs for item in data_list[idx][key]]
+                for key in data
+            }
+            outputs = self.module.test_step(batch)
+            num_imgs = len(outputs) // len(aug_idxs)
+            for i, idx in enumerate(aug_idxs):
+                predictions[idx] = outputs[i * num_imgs:(i + 1) * num_imgs]
+        return self.merge_preds(list(zip(*predictions)))
+
     def merge_preds(self, data_samples_list: List[List[DetDataSample]]):
         """Merge batch predictions of enhanced data.
 
@@ -92,53 +138,139 @@ class DetTTAModel(BaseTTAModel):
         Returns:
             List[DetDataSample]: Merged batch prediction.
         """
+        views = [
+            data_sample for data_samples in data_samples_list
+            for data_sample in data_samples
+        ]
+        num_views = [len(data_samples) for data_samples in data_samples_list]
+        counts = [len(view.pred_instances) for view in views]
+        bboxes = torch.cat([view.pred_instances.bboxes for view in views])
+        if bboxes.numel() == 0:
+            return [data_samples[0] for data_samples in data_samples_list]
+        device = bboxes.device
+        scores = torch.cat([view.pred_instances.scores for view in views])
+        labels = torch.cat([view.pred_instances.labels for view in views])
+        view_ids = torch.arange(
+            len(views), device=device).repeat_interleave(
+                torch.tensor(counts, device=device))
+        bboxes = self.flip_back_bboxes(bboxes, view_ids,
+                                       [view.metainfo for view in views])
+
+        # NMS runs image by image, offsetting the boxes of all images in one
+        # call would lose float precision on large coordinates
+        offsets = np.cumsum([0] + counts)
+        img_offsets = offsets[np.cumsum([0] + num_views)].tolist()
+        has_masks = 'masks' in views[0].pred_instances
         merged_data_samples = []
-        for data_samples in data_samples_list:
-            merged_data_samples.append(self._merge_single_sample(data_samples))
+        for img_id, data_samples in enumerate(data_samples_list):
+            start, end = img_offsets[img_id], img_offsets[img_id + 1]
+            if sum(
+                    len(data_sample.pred_instances)
+                    for data_sample in data_samples) == 0:
+                merged_data_samples.append(data_samples[0])
+                continue
+            img_det_bboxes, img_keep_idxs = batched_nms(
+                bboxes[start:end], scores[start:end], labels[start:end],
+                self.tta_cfg.nms)
+            img_det_bboxes = img_det_bboxes[:self.tta_cfg.max_per_img]
+            img_keep_idxs = img_keep_idxs[:self.tta_cfg.max_per_img] + start
+
+            results = InstanceData()
+            results.bboxes = img_det_bboxes[:, :-1]
+            results.scores = img_det_bboxes[:, -1]
+            results.labels = labels[img_keep_idxs]
+            if has_masks:
+                img_view_ids = view_ids[img_keep_idxs]
+                local_idxs = img_keep_idxs - img_view_ids.new_tensor(
+                    offsets)[img_view_ids]
+                results.masks = self.merge_aug_masks(views, img_view_ids,
+                                                     local_idxs)
+            det_results = data_samples[0]
+            det_results.pred_instances = results
+            merged_data_samples.append(det_results)
         return merged_data_samples
 
-    def _merge_single_sample(
-            self, data_samples: List[DetDataSample]) -> DetDataSample:
-        """Merge predictions which come form the different views of one image
-        to one prediction.
+    @staticmethod
+    def flip_back_bboxes(bboxes: Tensor, view_ids: Tensor,
+                         img_metas: List[dict]) -> Tensor:
+        """Flip the bboxes of all views back to the original images.
+
+        Args:
+            bboxes (Tensor): Bboxes of all views, has shape (n, 4).
+            view_ids (Tensor): Indices of the views of the bboxes.
+            img_metas (list[dict]): Meta information of the views.
+
+        Returns:
+            Tensor: The recovered bboxes.
+        """
+        hflip, vflip, sizes = [], [], []
+        for img_meta in img_metas:
+            direction = img_meta['flip_direction'] if img_meta['flip'] \
+                else None
+            hflip.append(direction in ('horizontal', 'diagonal'))
+            vflip.append(direction in ('vertical', 'diagonal'))
+            sizes.append(img_meta['ori_shape'][1::-1])
+        hflip = torch.tensor(hflip, device=bboxes.device)[view_ids]
+        vflip = torch.tensor(vflip, device=bboxes.device)[view_ids]
+        sizes = bboxes.new_tensor(sizes)[view_ids].repeat(1, 2)
+        flip = torch.stack([hflip, vflip, hflip, vflip], dim=1)
+        flipped = (sizes - bboxes)[:, [2, 3, 0, 1]]
+        return torch.where(flip, flipped, bboxes)
+
+    @staticmethod
+    def merge_aug_masks(views: List[DetDataSample], view_ids: Tensor,
+                        local_idxs: Tensor) -> Tensor:
+        """Gather the masks of the merged instances from their views and flip
+        them back.
 
         Args:
-            data_samples (List[DetDataSample]): List of predictions
-            of enhanced data which come form one image.
+            views (List[DetDataSample]): Predictions of all views.
+            view_ids (Tensor): Indices of the views of the merged instances.
+            local_idxs (Tensor): Indices of the merged instances in their
+                views.
+
         Returns:
-            List[DetDataSample]: Merged prediction.
+            Tensor or list[dict]: Bitmap masks of shape (n, h, w), or RLE
+            encoded masks if the views give RLE encoded masks.
         """
-        aug_bboxes = []
-        aug_scores = []
-        aug_labels = []
-        img_metas = []
-        # TODO: support instance segmentation TTA
-        assert data_samples[0].pred_instances.get('masks', None) is None, \
-            'TTA of instance segmentation does not support now.'
-        for data_sample in data_samples:
-            aug_bboxes.append(data_sample.pred_instances.bboxes)
-            aug_scores.append(data_sample.pred_instances.scores)
-            aug_labels.append(data_sample.pred_instances.labels)
-            img_metas.append(data_sample.metainfo)
-
-        merged_bboxes, merged_scores = self.merge_aug_bboxes(
-            aug_bboxes, aug_scores, img_metas)
-        merged_labels = torch.cat(aug_labels, dim=0)
-
-        if merged_bboxes.numel() == 0:
-            return data_samples[0]
-
-        det_bboxes, keep_idxs = batched_nms(merged_bboxes, merged_scores,
-                                            merged_labels, self.tta_cfg.nms)
-
-        det_bboxes = det_bboxes[:self.tta_cfg.max_per_img]
-        det_labels = merged_labels[keep_idxs][:self.tta_cfg.max_per_img]
-
-        results = InstanceData()
-        _det_bboxes = det_bboxes.clone()
-        results.bboxes = _det_bboxes[:, :-1]
-        results.scores = _det_bboxes[:, -1]
-        results.labels = det_labels
-        det_results = data_samples[0]
-        det_results.pred_instances = results
-        return det_results
+        view_ids = view_ids.tolist()
+        local_idxs = local_idxs.tolist()
+        masks = [None] * len(view_ids)
+        for view_id in set(view_ids):
+            view = views[view_id]
+            view_masks = view.pred_instances.masks
+            positions = [i for i, v in enumerate(view_ids) if v == view_id]
+            direction = view.flip_direction if view.flip else None
+            if isinstance(view_masks, Tensor):
+                selected = view_masks[[local_idxs[i] for i in positions]]
+                if direction is not None:
+                    dims = dict(
+                        horizontal=[-1], vertical=[-2], diagonal=[-2, -1])
+                    selected = selected.flip(dims[direction])
+                for i, mask in zip(positions, selected):
+                    masks[i] = mask
+            else:
+                for i in positions:
+                    masks[i] = _flip_rle(view_masks[local_idxs[i]], direction)
+        if len(masks) > 0 and isinstance(masks[0], Tensor):
+            return torch.stack(masks)
+        if len(masks) == 0 and isinstance(views[0].pred_instances.masks,
+                                          Tensor):
+            return views[0].pred_instances.masks[:0]
+        return masks
+
+
+def _flip_rle(rle: dict, direction: str) -> dict:
+    """Flip a RLE encoded mask within its bounding box."""
+    if direction is None:
+        return rle
+    img_h, img_w = rle['size']
+    x, y, w, h = mask_util.toBbox(rle).astype(np.int64)
+    crop = mask_util.decode(rle)[y:y + h, x:x + w]
+    if direction in ('horizontal', 'diagonal'):
+        crop = crop[:, ::-1]
+        x = img_w - x - w
+    if direction in ('vertical', 'diagonal'):
+        crop = crop[::-1]
+        y = img_h - y - h
+    return encode_cropped_mask(crop, (x, y), (img_h, img_w))
@@ -1,11 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from abc import ABCMeta, abstractmethod
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 import torch.nn.functional as F
 from addict import Dict
 
+from mmdet.structures.bbox import bbox_xyxy_to_cxcyah
+from .track_store import History, TrackStore
+
 
 class BaseTracker(metaclass=ABCMeta):
     """Base tracker model.
@@ -17,23 +21,42 @@ class BaseTracker(metaclass=ABCMeta):
         num_frames_retain (int, optional). If a track is disappeared more than
             `num_frames_retain` frames, it will be deleted in the memo.
              Defaults to 10.
+        history_size (int, optional): Number of the most recent values kept
+            for every item of a track. The histories of all tracks are ring
+            buffers in preallocated tensors, so the memory does not grow
+            with the length of the video. Unlike the unbounded lists used
+            before, only the latest `history_size` values of a track are
+            kept, e.g. `len(self.tracks[id]['bboxes'])` and the samples of
+            :meth:`get` are at most `history_size`. Defaults to None, which
+            means the max of `num_frames_retain` and `min_history_size`.
+        min_history_size (int): Minimum number of the values of a track the
+            tracker relies on, e.g. the number of frames to confirm a track.
+            Defaults to 1.
     """
 
     def __init__(self,
                  momentums: Optional[dict] = None,
-                 num_frames_retain: int = 10) -> None:
+                 num_frames_retain: int = 10,
+                 history_size: Optional[int] = None,
+                 min_history_size: int = 1) -> None:
         super().__init__()
         if momentums is not None:
             assert isinstance(momentums, dict), 'momentums must be a dict'
         self.momentums = momentums
         self.num_frames_retain = num_frames_retain
+        if history_size is None:
+            history_size = max(num_frames_retain, min_history_size, 1)
+        assert history_size >= max(min_history_size, 1), \
+            f'history_size must be at least {max(min_history_size, 1)}'
+        self.history_size = history_size
 
         self.reset()
 
     def reset(self) -> None:
         """Reset the buffer of the tracker."""
         self.num_tracks = 0
-        self.tracks = dict()
+        self.tracks = TrackStore(self.history_size)
+        self._ids_cache = dict()
 
     @property
     def empty(self) -> bool:
@@ -80,24 +103,69 @@ class BaseTracker(metaclass=ABCMeta):
             if len(v) != num_objs:
                 raise ValueError('kwargs value must both equal')
 
+        update_ids, update_objs = [], []
         for obj in zip(*kwargs.values()):
             id = int(obj[id_indice])
             if id in self.tracks:
-                self.update_track(id, obj)
+                update_ids.append(id)
+                update_objs.append(obj)
             else:
                 self.init_track(id, obj)
+        self.update_tracks(update_ids, update_objs)
 
         self.pop_invalid_tracks(frame_id)
+        # the states of the tracks may have been changed in place
+        self.tracks.version += 1
+
+    def last_frame_ids(self, ids: Optional[list] = None) -> np.ndarray:
+        """Get the last frame id of the tracks.
+
+        Args:
+            ids (list[int], optional): The demanded ids. Defaults to None.
+
+        Returns:
+            ndarray: The last frame id of each track.
+        """
+        if ids is None:
+            ids = self.ids
+        if len(ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if self.tracks.has_history(ids, 'frame_ids'):
+            frame_ids = self.tracks.buffers['frame_ids'].latest(
+                self.tracks.slots(ids))
+        else:
+            frame_ids = torch.cat(
+                [self.tracks[id]['frame_ids'][-1] for id in ids])
+        return frame_ids.cpu().numpy().reshape(-1)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            if frame_id - v['frame_ids'][-1] >= self.num_frames_retain:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
+        ids = self.ids
+        invalid = frame_id - self.last_frame_ids(ids) >= \
+            self.num_frames_retain
+        for invalid_id in np.array(ids)[invalid].tolist():
             self.tracks.pop(invalid_id)
 
+    def cached_ids(self, key: str, cond: Callable[[Dict], bool]) -> list:
+        """Get ids of the tracks satisfying a condition.
+
+        The result is cached until the tracks are changed by
+        :meth:`update` or :meth:`reset`.
+
+        Args:
+            key (str): Name of the cached result.
+            cond (Callable): Whether a track satisfies the condition.
+
+        Returns:
+            list[int]: The ids in the order of the tracks.
+        """
+        cached = self._ids_cache.get(key)
+        if cached is None or cached[0] != self.tracks.version:
+            ids = [id for id, track in self.tracks.items() if cond(track)]
+            cached = (self.tracks.version, ids)
+            self._ids_cache[key] = cached
+        return list(cached[1])
+
     def update_track(self, id: int, obj: Tuple[torch.Tensor]):
         """Update a track."""
         for k, v in zip(self.memo_items, obj):
@@ -108,35 +176,53 @@ class BaseTracker(metaclass=ABCMeta):
             else:
                 self.tracks[id][k].append(v)
 
+    def update_tracks(self, ids: List[int],
+                      objs: List[Tuple[torch.Tensor]]) -> None:
+        """Update the tracks matched in a frame.
+
+        Trackers can override it to update the states of all the matched
+        tracks at once.
+        """
+        for id, obj in zip(ids, objs):
+            self.update_track(id, obj)
+
+    def update_kf_states(self,
+                         ids: List[int],
+                         bbox_scores: Union[float, np.ndarray] = 0.) -> None:
+        """Correct the Kalman filter states of tracks with their last bboxes
+        in a batch.
+
+        It is shared by the trackers with a Kalman filter ``self.kf``, whose
+        tracks keep their states in ``mean`` and ``covariance``.
+        """
+        if len(ids) == 0:
+            return
+        bboxes = bbox_xyxy_to_cxcyah(
+            torch.cat([self.tracks[id].bboxes[-1] for id in ids]))
+        mean, covariance = self.kf.multi_update(
+            np.stack([self.tracks[id].mean for id in ids]),
+            np.stack([self.tracks[id].covariance for id in ids]),
+            bboxes.cpu().numpy(), bbox_scores)
+        for i, id in enumerate(ids):
+            self.tracks[id].mean = mean[i]
+            self.tracks[id].covariance = covariance[i]
+
     def init_track(self, id: int, obj: Tuple[torch.Tensor]):
         """Initialize a track."""
-        self.tracks[id] = Dict()
+        track = self.tracks.new_track(id)
         for k, v in zip(self.memo_items, obj):
             v = v[None]
             if self.momentums is not None and k in self.momentums:
-                self.tracks[id][k] = v
+                track[k] = v
             else:
-                self.tracks[id][k] = [v]
+                track[k] = self.tracks.history(id, k, v)
 
     @property
     def memo(self) -> dict:
         """Return all buffers in the tracker."""
         outs = Dict()
         for k in self.memo_items:
-            outs[k] = []
-
-        for id, objs in self.tracks.items():
-            for k, v in objs.items():
-                if k not in outs:
-                    continue
-                if self.momentums is not None and k in self.momentums:
-                    v = v
-                else:
-                    v = v[-1]
-                outs[k].append(v)
-
-        for k, v in outs.items():
-            outs[k] = torch.cat(v, dim=0)
+            outs[k] = self.get(k)
         return outs
 
     def get(self,
@@ -159,11 +245,28 @@ class BaseTracker(metaclass=ABCMeta):
         """
         if ids is None:
             ids = self.ids
+        if len(ids) > 0 and self.tracks.has_history(ids, item):
+            buffers = self.tracks.buffers[item]
+            slots = self.tracks.slots(ids)
+            if num_samples is None:
+                return buffers.latest(slots)
+            # each track uses its latest `num_samples` values, the
+            # histories can be gathered at once if they are equally long
+            nums = np.minimum(buffers.lengths[slots],
+                              min(num_samples, buffers.size))
+            if (nums == nums[0]).all():
+                out = buffers.recent(slots, int(nums[0]))
+                if behavior == 'mean':
+                    return out.mean(dim=1)
+                elif behavior is None:
+                    return out
+                else:
+                    raise NotImplementedError()
 
         outs = []
         for id in ids:
             out = self.tracks[id][item]
-            if isinstance(out, list):
+            if isinstance(out, (list, History)):
                 if num_samples is not None:
                     out = out[-num_samples:]
                     out = torch.cat(out, dim=0)
@@ -47,7 +47,8 @@ class ByteTracker(BaseTracker):
                  match_iou_thrs: dict = dict(high=0.1, low=0.5, tentative=0.3),
                  num_tentatives: int = 3,
                  **kwargs):
-        super().__init__(**kwargs)
+        # the histories must hold the frames confirming a track
+        super().__init__(min_history_size=num_tentatives, **kwargs)
 
         if lap is None:
             raise RuntimeError('lap is not installed,\
@@ -66,14 +67,12 @@ class ByteTracker(BaseTracker):
     @property
     def confirmed_ids(self) -> List:
         """Confirmed ids in the tracker."""
-        ids = [id for id, track in self.tracks.items() if not track.tentative]
-        return ids
+        return self.cached_ids('confirmed', lambda track: not track.tentative)
 
     @property
     def unconfirmed_ids(self) -> List:
         """Unconfirmed ids in the tracker."""
-        ids = [id for id, track in self.tracks.items() if track.tentative]
-        return ids
+        return self.cached_ids('unconfirmed', lambda track: track.tentative)
 
     def init_track(self, id: int, obj: Tuple[torch.Tensor]) -> None:
         """Initialize a track."""
@@ -90,31 +89,33 @@ class ByteTracker(BaseTracker):
 
     def update_track(self, id: int, obj: Tuple[torch.Tensor]) -> None:
         """Update a track."""
-        super().update_track(id, obj)
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        track_label = self.tracks[id]['labels'][-1]
+        self.update_tracks([id], [obj])
+
+    def update_tracks(self, ids: List[int],
+                      objs: List[Tuple[torch.Tensor]]) -> None:
+        """Update the tracks matched in a frame."""
         label_idx = self.memo_items.index('labels')
-        obj_label = obj[label_idx]
-        assert obj_label == track_label
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+        for id, obj in zip(ids, objs):
+            super().update_track(id, obj)
+            if self.tracks[id].tentative:
+                if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+                    self.tracks[id].tentative = False
+            track_label = self.tracks[id]['labels'][-1]
+            obj_label = obj[label_idx]
+            assert obj_label == track_label
+        self.update_kf_states(ids)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
+        ids = self.ids
+        last_frame_ids = self.last_frame_ids(ids)
+        tentative = np.array([self.tracks[id].tentative for id in ids],
+                             dtype=bool)
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        case2 = tentative & (last_frame_ids != frame_id)
+        for invalid_id in np.array(ids)[case1 | case2].tolist():
             self.tracks.pop(invalid_id)
 
     def assign_ids(
@@ -234,9 +235,13 @@ class ByteTracker(BaseTracker):
                 # track is lost in previous frame
                 if self.tracks[id].frame_ids[-1] != frame_id - 1:
                     self.tracks[id].mean[7] = 0
-                (self.tracks[id].mean,
-                 self.tracks[id].covariance) = self.kf.predict(
-                     self.tracks[id].mean, self.tracks[id].covariance)
+            tracks = [self.tracks[id] for id in self.confirmed_ids]
+            if len(tracks) > 0:
+                mean, covariance = self.kf.multi_predict(
+                    np.stack([track.mean for track in tracks]),
+                    np.stack([track.covariance for track in tracks]))
+                for i, track in enumerate(tracks):
+                    track.mean, track.covariance = mean[i], covariance[i]
 
             # 2. first match
             first_match_track_inds, first_match_det_inds = self.assign_ids(
@@ -54,7 +54,8 @@ class OCSORTTracker(SORTTracker):
         if lap is None:
             raise RuntimeError('lap is not installed,\
                  please install it by: pip install lap')
-        super().__init__(motion=motion, **kwargs)
+        super().__init__(
+            motion=motion, num_tentatives=num_tentatives, **kwargs)
         self.obj_score_thr = obj_score_thr
         self.init_track_thr = init_track_thr
 
@@ -68,8 +69,7 @@ class OCSORTTracker(SORTTracker):
     @property
     def unconfirmed_ids(self):
         """Unconfirmed ids in the tracker."""
-        ids = [id for id, track in self.tracks.items() if track.tentative]
-        return ids
+        return self.cached_ids('unconfirmed', lambda track: track.tentative)
 
     def init_track(self, id: int, obj: Tuple[torch.Tensor]):
         """Initialize a track."""
@@ -94,25 +94,20 @@ class OCSORTTracker(SORTTracker):
         self.tracks[id].velocity = torch.tensor(
             (-1, -1)).to(obj[bbox_id].device)  # placeholder
 
-    def update_track(self, id: int, obj: Tuple[torch.Tensor]):
-        """Update a track."""
-        super().update_track(id, obj)
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
-        self.tracks[id].tracked = True
+    def update_tracks(self, ids: List[int],
+                      objs: List[Tuple[torch.Tensor]]) -> None:
+        """Update the tracks matched in a frame."""
+        super().update_tracks(ids, objs)
+        self.update_kf_states(ids)
         bbox_id = self.memo_items.index('bboxes')
-        self.tracks[id].obs.append(obj[bbox_id])
+        for id, obj in zip(ids, objs):
+            self.tracks[id].tracked = True
+            self.tracks[id].obs.append(obj[bbox_id])
 
-        bbox1 = self.k_step_observation(self.tracks[id])
-        bbox2 = obj[bbox_id]
-        self.tracks[id].velocity = self.vel_direction(bbox1, bbox2).to(
-            obj[bbox_id].device)
+            bbox1 = self.k_step_observation(self.tracks[id])
+            bbox2 = obj[bbox_id]
+            self.tracks[id].velocity = self.vel_direction(bbox1, bbox2).to(
+                obj[bbox_id].device)
 
     def vel_direction(self, bbox1: torch.Tensor, bbox2: torch.Tensor):
         """Estimate the direction vector between two boxes."""
@@ -381,9 +376,13 @@ class OCSORTTracker(SORTTracker):
                     self.tracks[id].saved_attr.mean = self.tracks[id].mean
                     self.tracks[id].saved_attr.covariance = self.tracks[
                         id].covariance
-                (self.tracks[id].mean,
-                 self.tracks[id].covariance) = self.kf.predict(
-                     self.tracks[id].mean, self.tracks[id].covariance)
+            tracks = [self.tracks[id] for id in self.confirmed_ids]
+            if len(tracks) > 0:
+                mean, covariance = self.kf.multi_predict(
+                    np.stack([track.mean for track in tracks]),
+                    np.stack([track.covariance for track in tracks]))
+                for i, track in enumerate(tracks):
+                    track.mean, track.covariance = mean[i], covariance[i]
 
             # 2. match detections and tracks' predicted locations
             match_track_inds, raw_match_det_inds = self.ocm_assign_ids(
@@ -57,7 +57,11 @@ class SORTTracker(BaseTracker):
         if motmetrics is None:
             raise RuntimeError('motmetrics is not installed,\
                  please install it by: pip install motmetrics')
-        super().__init__(**kwargs)
+        # the histories must hold the frames confirming a track and the
+        # samples of the ReID embeddings
+        num_samples = reid.get('num_samples', None) if reid else None
+        super().__init__(
+            min_history_size=max(num_tentatives, num_samples or 1), **kwargs)
         if motion is not None:
             self.motion = TASK_UTILS.build(motion)
             assert self.motion is not None, 'SORT/Deep SORT need KalmanFilter'
@@ -69,8 +73,7 @@ class SORTTracker(BaseTracker):
     @property
     def confirmed_ids(self) -> List:
         """Confirmed ids in the tracker."""
-        ids = [id for id, track in self.tracks.items() if not track.tentative]
-        return ids
+        return self.cached_ids('confirmed', lambda track: not track.tentative)
 
     def init_track(self, id: int, obj: Tuple[Tensor]) -> None:
         """Initialize a track."""
@@ -84,27 +87,28 @@ class SORTTracker(BaseTracker):
 
     def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
         """Update a track."""
-        super().update_track(id, obj)
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+        self.update_tracks([id], [obj])
+
+    def update_tracks(self, ids: List[int], objs: List[Tuple[Tensor]]) -> None:
+        """Update the tracks matched in a frame."""
+        for id, obj in zip(ids, objs):
+            super().update_track(id, obj)
+            if self.tracks[id].tentative:
+                if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+                    self.tracks[id].tentative = False
+        self.update_kf_states(ids)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
+        ids = self.ids
+        last_frame_ids = self.last_frame_ids(ids)
+        tentative = np.array([self.tracks[id].tentative for id in ids],
+                             dtype=bool)
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        case2 = tentative & (last_frame_ids != frame_id)
+        for invalid_id in np.array(ids)[case1 | case2].tolist():
             self.tracks.pop(invalid_id)
 
     def track(self,
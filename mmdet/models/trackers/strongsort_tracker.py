@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import torch
@@ -81,25 +81,23 @@ class StrongSORTTracker(SORTTracker):
         super().__init__(motion, obj_score_thr, reid, match_iou_thr,
                          num_tentatives, **kwargs)
 
-    def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
-        """Update a track."""
-        for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                m = self.momentums[k]
-                self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
-            else:
-                self.tracks[id][k].append(v)
-
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        score = float(self.tracks[id].scores[-1].cpu())
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox, score)
+    def update_tracks(self, ids: List[int], objs: List[Tuple[Tensor]]) -> None:
+        """Update the tracks matched in a frame."""
+        for id, obj in zip(ids, objs):
+            for k, v in zip(self.memo_items, obj):
+                v = v[None]
+                if self.momentums is not None and k in self.momentums:
+                    m = self.momentums[k]
+                    self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
+                else:
+                    self.tracks[id][k].append(v)
+
+            if self.tracks[id].tentative:
+                if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+                    self.tracks[id].tentative = False
+        scores = np.array(
+            [float(self.tracks[id].scores[-1].cpu()) for id in ids])
+        self.update_kf_states(ids, scores)
 
     def track(self,
               model: torch.nn.Module,
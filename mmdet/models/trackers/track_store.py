@@ -0,0 +1,252 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import Any, Iterator, List, Sequence, Union
+
+import numpy as np
+import torch
+from addict import Dict
+
+
+class HistoryBuffers:
+    """Ring buffers holding the recent values of one item of all tracks.
+
+    The values of all tracks are stored in a single preallocated tensor of
+    shape (num_slots, size, \\*value_shape), where every track owns a slot.
+    Appending to a full ring buffer overwrites its oldest value.
+
+    Args:
+        size (int): Number of recent values kept for each track.
+    """
+
+    def __init__(self, size: int) -> None:
+        assert size > 0, 'size must be positive.'
+        self.size = size
+        self.data = None
+        self.lengths = np.zeros(0, dtype=np.int64)
+
+    @property
+    def num_slots(self) -> int:
+        return len(self.lengths)
+
+    def reserve(self, num_slots: int) -> None:
+        """Make sure there are at least ``num_slots`` slots."""
+        if num_slots <= self.num_slots:
+            return
+        lengths = np.zeros(num_slots, dtype=np.int64)
+        lengths[:self.num_slots] = self.lengths
+        if self.data is not None:
+            data = self.data.new_zeros((num_slots, ) + self.data.shape[1:])
+            data[:self.num_slots] = self.data
+            self.data = data
+        self.lengths = lengths
+
+    def clear(self, slot: int) -> None:
+        """Drop the values of a slot."""
+        self.lengths[slot] = 0
+
+    def accepts(self, value: Any) -> bool:
+        """Whether a value of shape (1, \\*value_shape) can be stored."""
+        if not isinstance(value, torch.Tensor) or value.dim() == 0:
+            return False
+        return self.data is None or (value.shape[1:] == self.data.shape[2:]
+                                     and value.dtype == self.data.dtype
+                                     and value.device == self.data.device)
+
+    def append(self, slot: int, value: torch.Tensor) -> None:
+        """Append a value of shape (1, \\*value_shape) to a slot."""
+        if self.data is None:
+            self.data = value.new_zeros((self.num_slots, self.size) +
+                                        value.shape[1:])
+        self.data[slot, self.lengths[slot] % self.size] = value[0]
+        self.lengths[slot] += 1
+
+    def __len__(self) -> int:
+        return self.num_slots
+
+    def length(self, slot: int) -> int:
+        """Number of values kept in a slot."""
+        return min(int(self.lengths[slot]), self.size)
+
+    def position(self, slot: int, index: int) -> int:
+        """Position in the ring buffer of the ``index``-th kept value."""
+        length = self.length(slot)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('history index out of range')
+        return (int(self.lengths[slot]) - length + index) % self.size
+
+    def latest(self, slots: Sequence[int]) -> torch.Tensor:
+        """Gather the latest value of each slot.
+
+        Args:
+            slots (Sequence[int]): Slots to gather, all of which must be
+                non-empty.
+
+        Returns:
+            Tensor: Values of shape (len(slots), \\*value_shape).
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        positions = (self.lengths[slots] - 1) % self.size
+        return self.data[torch.from_numpy(slots).to(self.data.device),
+                         torch.from_numpy(positions).to(self.data.device)]
+
+    def recent(self, slots: Sequence[int], num: int) -> torch.Tensor:
+        """Gather the ``num`` latest values of each slot in time order.
+
+        Args:
+            slots (Sequence[int]): Slots to gather, each of which must hold
+                at least ``num`` values.
+            num (int): Number of values of each slot.
+
+        Returns:
+            Tensor: Values of shape (len(slots), num, \\*value_shape).
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        positions = (self.lengths[slots, None] - num +
+                     np.arange(num)) % self.size
+        return self.data[torch.from_numpy(slots[:, None]).to(self.data.device),
+                         torch.from_numpy(positions).to(self.data.device)]
+
+
+class History:
+    """List-like view of the history of one item of a track.
+
+    It supports ``append``, ``len``, iteration and indexing like the list it
+    replaces. Indexing returns views of shape (1, \\*value_shape).
+
+    Args:
+        buffers (:obj:`HistoryBuffers`): Ring buffers of the item.
+        slot (int): Slot of the track.
+    """
+
+    def __init__(self, buffers: HistoryBuffers, slot: int) -> None:
+        self.buffers = buffers
+        self.slot = slot
+
+    def append(self, value: torch.Tensor) -> None:
+        self.buffers.append(self.slot, value)
+
+    def __len__(self) -> int:
+        return self.buffers.length(self.slot)
+
+    def __getitem__(
+            self,
+            index: Union[int,
+                         slice]) -> Union[torch.Tensor, List[torch.Tensor]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        position = self.buffers.position(self.slot, index)
+        return self.buffers.data[self.slot, position:position + 1]
+
+    def __iter__(self) -> Iterator[torch.Tensor]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class TrackStore(dict):
+    """Track buffer keeping the history of the memo items in arrays.
+
+    It is a ``dict`` mapping track ids to the :obj:`addict.Dict` of each
+    track, so trackers can keep reading and writing their own fields.
+    Tracks created by :meth:`new_track` additionally own a slot in the ring
+    buffers of every memo item, and the item of the track is a
+    :obj:`History` view of it. Slots of removed tracks are reused.
+
+    Args:
+        history_size (int): Number of recent values kept for each memo item
+            of a track.
+    """
+
+    def __init__(self, history_size: int) -> None:
+        super().__init__()
+        self.history_size = history_size
+        self.buffers = dict()
+        self.id2slot = dict()
+        self.free_slots = []
+        self.num_slots = 0
+        self.capacity = 16
+        # Incremented on every change of the tracks, used to cache results
+        # derived from the tracks.
+        self.version = 0
+
+    def new_track(self, id: int) -> Dict:
+        """Create an empty track which owns a slot."""
+        if id in self:
+            self.pop(id)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.num_slots
+            self.num_slots += 1
+            if self.num_slots > self.capacity:
+                self.capacity *= 2
+                for buffers in self.buffers.values():
+                    buffers.reserve(self.capacity)
+        self.id2slot[id] = slot
+        track = Dict()
+        self[id] = track
+        return track
+
+    def history(self, id: int, item: str,
+                value: Any) -> Union[History, List[Any]]:
+        """Get the history of an item of a track, starting with ``value``.
+
+        The history is a :obj:`History` view of the ring buffers of the item
+        if ``value`` is a tensor of the same shape, dtype and device as the
+        values in the ring buffers, otherwise a list.
+        """
+        if item not in self.buffers:
+            buffers = HistoryBuffers(self.history_size)
+            buffers.reserve(self.capacity)
+            self.buffers[item] = buffers
+        if not self.buffers[item].accepts(value):
+            return [value]
+        history = History(self.buffers[item], self.id2slot[id])
+        history.append(value)
+        return history
+
+    def has_history(self, ids: Sequence[int], item: str) -> bool:
+        """Whether ``item`` of all ``ids`` is kept in the ring buffers."""
+        if item not in self.buffers:
+            return False
+        return all(
+            id in self.id2slot and isinstance(self[id].get(item), History)
+            for id in ids)
+
+    def slots(self, ids: Sequence[int]) -> List[int]:
+        return [self.id2slot[id] for id in ids]
+
+    def _release(self, id: Any) -> None:
+        slot = self.id2slot.pop(id, None)
+        if slot is not None:
+            for buffers in self.buffers.values():
+                buffers.clear(slot)
+            self.free_slots.append(slot)
+
+    def __setitem__(self, id: Any, track: Any) -> None:
+        if id in self and self[id] is not track:
+            self._release(id)
+        super().__setitem__(id, track)
+        self.version += 1
+
+    def __delitem__(self, id: Any) -> None:
+        super().__delitem__(id)
+        self._release(id)
+        self.version += 1
+
+    def pop(self, id: Any, *args) -> Any:
+        if id not in self:
+            return super().pop(id, *args)
+        track = super().pop(id)
+        self._release(id)
+        self.version += 1
+        return track
+
+    def clear(self) -> None:
+        super().clear()
+        self.buffers = dict()
+        self.id2slot = dict()
+        self.free_slots = []
+        self.num_slots = 0
+        self.capacity = 16
+        self.version += 1
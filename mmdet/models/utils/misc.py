@@ -13,7 +13,7 @@ from torch.nn import functional as F
 
 from mmdet.structures import SampleList
 from mmdet.structures.bbox import BaseBoxes, get_box_type, stack_boxes
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, PolygonMasks, RLEMasks
 from mmdet.utils import OptInstanceList
 
 
@@ -237,12 +237,13 @@ def mask2ndarray(mask):
 
     Args:
         mask (:obj:`BitmapMasks` or :obj:`PolygonMasks` or
-        torch.Tensor or np.ndarray): The mask to be converted.
+        :obj:`RLEMasks` or torch.Tensor or np.ndarray): The mask to be
+        converted.
 
     Returns:
         np.ndarray: Ndarray mask of shape (n, h, w) that has been converted
     """
-    if isinstance(mask, (BitmapMasks, PolygonMasks)):
+    if isinstance(mask, (BitmapMasks, PolygonMasks, RLEMasks)):
         mask = mask.to_ndarray()
     elif isinstance(mask, torch.Tensor):
         mask = mask.detach().cpu().numpy()
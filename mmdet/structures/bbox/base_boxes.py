@@ -6,13 +6,14 @@ import numpy as np
 import torch
 from torch import BoolTensor, Tensor
 
-from mmdet.structures.mask.structures import BitmapMasks, PolygonMasks
+from mmdet.structures.mask.structures import (BitmapMasks, PolygonMasks,
+                                              RLEMasks)
 
 T = TypeVar('T')
 DeviceType = Union[str, torch.device]
 IndexType = Union[slice, int, list, torch.LongTensor, torch.cuda.LongTensor,
                   torch.BoolTensor, torch.cuda.BoolTensor, np.ndarray]
-MaskType = Union[BitmapMasks, PolygonMasks]
+MaskType = Union[BitmapMasks, PolygonMasks, RLEMasks]
 
 
 class BaseBoxes(metaclass=ABCMeta):
@@ -6,14 +6,15 @@ import numpy as np
 import torch
 from torch import BoolTensor, Tensor
 
-from mmdet.structures.mask.structures import BitmapMasks, PolygonMasks
+from mmdet.structures.mask.structures import (BitmapMasks, PolygonMasks,
+                                              RLEMasks)
 from .base_boxes import BaseBoxes
 from .bbox_overlaps import bbox_overlaps
 from .box_type import register_box
 
 T = TypeVar('T')
 DeviceType = Union[str, torch.device]
-MaskType = Union[BitmapMasks, PolygonMasks]
+MaskType = Union[BitmapMasks, PolygonMasks, RLEMasks]
 
 
 @register_box(name='hbox')
@@ -393,8 +394,8 @@ class HorizontalBoxes(BaseBoxes):
         """Create horizontal boxes from instance masks.
 
         Args:
-            masks (:obj:`BitmapMasks` or :obj:`PolygonMasks`): BitmapMasks or
-                PolygonMasks instance with length of n.
+            masks (:obj:`BitmapMasks`, :obj:`PolygonMasks` or
+                :obj:`RLEMasks`): Mask instance with length of n.
 
         Returns:
             :obj:`HorizontalBoxes`: Converted boxes with shape of (n, 4).
@@ -425,8 +426,20 @@ class HorizontalBoxes(BaseBoxes):
                     xy_max = np.maximum(xy_max, np.max(xy, axis=0))
                 boxes[idx, :2] = xy_min
                 boxes[idx, 2:] = xy_max
+        elif isinstance(masks, RLEMasks):
+            # the runs of the masks without foreground are skipped, so every
+            # segment of a non-empty mask ends at the start of the next one
+            non_empty = np.diff(masks.offsets) > 0
+            starts = masks.offsets[:-1][non_empty]
+            runs = masks.runs
+            if len(starts) > 0:
+                boxes[non_empty, 0] = np.minimum.reduceat(runs[:, 0], starts)
+                boxes[non_empty, 1] = np.minimum.reduceat(runs[:, 1], starts)
+                boxes[non_empty,
+                      2] = np.maximum.reduceat(runs[:, 0], starts) + 1
+                boxes[non_empty, 3] = np.maximum.reduceat(runs[:, 2], starts)
         else:
             raise TypeError(
-                '`masks` must be `BitmapMasks`  or `PolygonMasks`, '
+                '`masks` must be `BitmapMasks`, `PolygonMasks` or `RLEMasks`, '
                 f'but got {type(masks)}.')
         return HorizontalBoxes(boxes)
@@ -1,11 +1,13 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .mask_target import mask_target
 from .structures import (BaseInstanceMasks, BitmapMasks, PolygonMasks,
-                         bitmap_to_polygon, polygon_to_bitmap)
-from .utils import encode_mask_results, mask2bbox, split_combined_polys
+                         RLEMasks, bitmap_to_polygon, polygon_to_bitmap)
+from .utils import (decode_mask_results, encode_cropped_mask,
+                    encode_mask_results, mask2bbox, split_combined_polys)
 
 __all__ = [
     'split_combined_polys', 'mask_target', 'BaseInstanceMasks', 'BitmapMasks',
-    'PolygonMasks', 'encode_mask_results', 'mask2bbox', 'polygon_to_bitmap',
-    'bitmap_to_polygon'
+    'PolygonMasks', 'RLEMasks', 'encode_mask_results', 'mask2bbox',
+    'polygon_to_bitmap', 'bitmap_to_polygon', 'encode_cropped_mask',
+    'decode_mask_results'
 ]
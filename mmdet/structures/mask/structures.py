@@ -1146,6 +1146,427 @@ class PolygonMasks(BaseInstanceMasks):
         return cls(mask_list, masks[0].height, masks[0].width)
 
 
+class RLEMasks(BaseInstanceMasks):
+    """This class represents masks in the form of run-length encodings.
+
+    Every mask is stored as the runs of foreground pixels of its columns,
+    i.e. the column-major run-length encoding used by COCO. The runs of all
+    masks are kept in a single ``(M, 3)`` array of ``(x, y1, y2)``, where
+    ``[y1, y2)`` is a run in column ``x``, and the runs of the i-th mask are
+    ``runs[offsets[i]:offsets[i + 1]]``. The memory used by the masks thus
+    grows with the length of their contours instead of the image size.
+
+    Flipping, padding, cropping, expanding, integer translation, areas and
+    bboxes are computed on the runs. The other transforms decode the masks
+    one at a time and encode the results again, so that the dense masks of
+    all instances are never held at once. The masks are only decoded as a
+    whole by :meth:`to_ndarray` and :meth:`to_tensor`.
+
+    Args:
+        runs (ndarray): Runs of the masks in shape (M, 3), sorted by mask,
+            column and row.
+        offsets (ndarray): Start index of the runs of each mask in shape
+            (N + 1, ), where N is the number of objects.
+        height (int): height of masks
+        width (int): width of masks
+
+    Example:
+        >>> from mmdet.structures.mask import RLEMasks
+        >>> masks = np.zeros((2, 4, 4), dtype=np.uint8)
+        >>> masks[0, 1:3, 1:3] = 1
+        >>> self = RLEMasks.from_bitmaps(masks, 4, 4)
+        >>> self.runs
+        array([[1, 1, 3],
+               [2, 1, 3]], dtype=int32)
+        >>> self.areas
+        array([4, 0])
+    """
+
+    def __init__(self, runs, offsets, height, width):
+        self.height = height
+        self.width = width
+        self.runs = np.asarray(runs, dtype=np.int32).reshape(-1, 3)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        assert self.offsets.ndim == 1 and len(self.offsets) > 0
+        assert self.offsets[-1] == len(self.runs)
+
+    @classmethod
+    def from_bitmaps(cls, masks, height, width):
+        """Encode bitmap masks.
+
+        Args:
+            masks (ndarray): Masks in shape (N, H, W).
+            height (int): height of masks
+            width (int): width of masks
+
+        Returns:
+            RLEMasks: The encoded masks.
+        """
+        masks = np.asarray(masks).reshape(-1, height, width)
+        num_masks = len(masks)
+        # flatten the masks in column-major order with a background pixel
+        # at both ends, so that runs do not cross masks
+        flat = np.zeros((num_masks, height * width + 2), dtype=np.int8)
+        flat[:, 1:-1] = masks.transpose(0, 2, 1).reshape(
+            num_masks, height * width) != 0
+        diff = np.diff(flat, axis=1)
+        mask_ids, starts = np.nonzero(diff == 1)
+        ends = np.nonzero(diff == -1)[1]
+        return cls._from_flat_runs(mask_ids, starts, ends, num_masks, height,
+                                   width)
+
+    @classmethod
+    def from_coco_rles(cls, rles, height, width):
+        """Load masks from COCO run-length encodings without decoding them.
+
+        Args:
+            rles (list[dict]): Compressed or uncompressed COCO RLEs with
+                ``size`` and ``counts``.
+            height (int): height of masks
+            width (int): width of masks
+
+        Returns:
+            RLEMasks: The loaded masks.
+        """
+        all_ids, all_starts, all_ends = [], [], []
+        for i, rle in enumerate(rles):
+            assert tuple(rle['size']) == (height, width), \
+                f'RLE of size {rle["size"]} does not match the masks.'
+            bounds = np.cumsum(_decode_rle_counts(rle['counts']))
+            # the counts alternate between background and foreground,
+            # starting with background
+            ends = bounds[1::2]
+            all_starts.append(bounds[0::2][:len(ends)])
+            all_ends.append(ends)
+            all_ids.append(np.full(len(ends), i))
+        if len(rles) == 0:
+            all_ids = all_starts = all_ends = [np.zeros(0, dtype=np.int64)]
+        return cls._from_flat_runs(
+            np.concatenate(all_ids), np.concatenate(all_starts),
+            np.concatenate(all_ends), len(rles), height, width)
+
+    @classmethod
+    def _from_flat_runs(cls, mask_ids, starts, ends, num_masks, height, width):
+        """Build masks from runs of the column-major flattened masks, which
+        are sorted by mask and start."""
+        # drop empty runs and merge touching ones to keep the runs maximal
+        valid = ends > starts
+        mask_ids, starts, ends = mask_ids[valid], starts[valid], ends[valid]
+        if len(starts) > 0:
+            touch = (starts[1:] == ends[:-1]) & \
+                (mask_ids[1:] == mask_ids[:-1])
+            mask_ids = mask_ids[np.concatenate([[True], ~touch])]
+            starts = starts[np.concatenate([[True], ~touch])]
+            ends = ends[np.concatenate([~touch, [True]])]
+
+        # split the runs at column boundaries
+        first_col = starts // max(height, 1)
+        num_pieces = (ends - 1) // max(height, 1) - first_col + 1
+        src = np.repeat(np.arange(len(starts)), num_pieces)
+        piece_offsets = np.cumsum(num_pieces) - num_pieces
+        x = first_col[src] + np.arange(len(src)) - piece_offsets[src]
+        y1 = np.maximum(starts[src] - x * height, 0)
+        y2 = np.minimum(ends[src] - x * height, height)
+        runs = np.stack([x, y1, y2], axis=1)
+        return cls(runs, _run_offsets(mask_ids[src], num_masks), height, width)
+
+    @classmethod
+    def _from_unsorted_runs(cls, mask_ids, runs, num_masks, height, width):
+        """Build masks from runs which may be out of order."""
+        order = np.lexsort((runs[:, 1], runs[:, 0], mask_ids))
+        return cls(runs[order], _run_offsets(mask_ids, num_masks), height,
+                   width)
+
+    def _mask_ids(self):
+        """ndarray: The index of the mask of each run."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def _clip(self, x1, y1, x2, y2):
+        """Clip the runs to the region ``[x1, x2) x [y1, y2)`` and return
+        the clipped runs with the index of their masks."""
+        mask_ids = self._mask_ids()
+        runs = self.runs.copy()
+        runs[:, 1:] = np.clip(runs[:, 1:], y1, y2)
+        keep = (runs[:, 0] >= x1) & (runs[:, 0] < x2) & \
+            (runs[:, 2] > runs[:, 1])
+        return mask_ids[keep], runs[keep]
+
+    def _apply_bitmap(self, func):
+        """Apply a transform of :obj:`BitmapMasks` to one decoded mask at a
+        time and encode the results."""
+        if len(self) == 0:
+            empty = func(BitmapMasks([], self.height, self.width))
+            return RLEMasks.from_bitmaps(empty.masks, empty.height,
+                                         empty.width)
+        return RLEMasks.cat([
+            RLEMasks.from_bitmaps(out.masks, out.height, out.width)
+            for out in (func(self[[i]].to_bitmap()) for i in range(len(self)))
+        ])
+
+    def __getitem__(self, index):
+        """Index the RLEMasks.
+
+        Args:
+            index (int | ndarray): Indices in the format of integer or ndarray.
+
+        Returns:
+            :obj:`RLEMasks`: Indexed masks.
+        """
+        if isinstance(index, torch.Tensor):
+            index = index.cpu().numpy()
+        inds = np.atleast_1d(np.arange(len(self))[index])
+        lengths = np.diff(self.offsets)[inds]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        run_inds = np.repeat(self.offsets[inds] - offsets[:-1],
+                             lengths) + np.arange(offsets[-1])
+        return RLEMasks(self.runs[run_inds], offsets, self.height, self.width)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i].to_ndarray()[0]
+
+    def __repr__(self):
+        s = self.__class__.__name__ + '('
+        s += f'num_masks={len(self)}, '
+        s += f'height={self.height}, '
+        s += f'width={self.width})'
+        return s
+
+    def __len__(self):
+        """Number of masks."""
+        return len(self.offsets) - 1
+
+    def rescale(self, scale, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.rescale`."""
+        return self._apply_bitmap(
+            lambda m: m.rescale(scale, interpolation=interpolation))
+
+    def resize(self, out_shape, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.resize`."""
+        return self._apply_bitmap(
+            lambda m: m.resize(out_shape, interpolation=interpolation))
+
+    def flip(self, flip_direction='horizontal'):
+        """See :func:`BaseInstanceMasks.flip`."""
+        assert flip_direction in ('horizontal', 'vertical', 'diagonal')
+        runs = self.runs.copy()
+        if flip_direction in ('horizontal', 'diagonal'):
+            runs[:, 0] = self.width - 1 - runs[:, 0]
+        if flip_direction in ('vertical', 'diagonal'):
+            runs[:, 1] = self.height - self.runs[:, 2]
+            runs[:, 2] = self.height - self.runs[:, 1]
+        return self._from_unsorted_runs(self._mask_ids(), runs, len(self),
+                                        self.height, self.width)
+
+    def pad(self, out_shape, pad_val=0):
+        """See :func:`BaseInstanceMasks.pad`."""
+        if pad_val != 0:
+            return self._apply_bitmap(lambda m: m.pad(out_shape, pad_val))
+        return RLEMasks(self.runs, self.offsets, *out_shape)
+
+    def crop(self, bbox):
+        """See :func:`BaseInstanceMasks.crop`."""
+        assert isinstance(bbox, np.ndarray)
+        assert bbox.ndim == 1
+
+        # clip the boundary
+        bbox = bbox.copy()
+        bbox[0::2] = np.clip(bbox[0::2], 0, self.width)
+        bbox[1::2] = np.clip(bbox[1::2], 0, self.height)
+        x1, y1, x2, y2 = bbox
+        w = np.maximum(x2 - x1, 1)
+        h = np.maximum(y2 - y1, 1)
+
+        mask_ids, runs = self._clip(x1, y1, x1 + w, y1 + h)
+        runs -= np.array([x1, y1, y1], dtype=runs.dtype)
+        return self._from_unsorted_runs(mask_ids, runs, len(self), h, w)
+
+    def crop_and_resize(self,
+                        bboxes,
+                        out_shape,
+                        inds,
+                        device='cpu',
+                        interpolation='bilinear',
+                        binarize=True):
+        """See :func:`BaseInstanceMasks.crop_and_resize`.
+
+        Only the masks assigned to the bboxes are decoded. As the resized
+        masks are small, they are returned as :obj:`BitmapMasks`.
+        """
+        if isinstance(inds, torch.Tensor):
+            inds = inds.cpu().numpy()
+        unique_inds, inds = np.unique(inds, return_inverse=True)
+        return self[unique_inds].to_bitmap().crop_and_resize(
+            bboxes, out_shape, inds, device, interpolation, binarize)
+
+    def expand(self, expanded_h, expanded_w, top, left):
+        """See :func:`BaseInstanceMasks.expand`."""
+        runs = self.runs + np.array([left, top, top], dtype=np.int32)
+        return RLEMasks(runs, self.offsets, expanded_h, expanded_w)
+
+    def translate(self,
+                  out_shape,
+                  offset,
+                  direction='horizontal',
+                  border_value=0,
+                  interpolation='bilinear'):
+        """See :func:`BaseInstanceMasks.translate`.
+
+        Integer offsets with a zero border are applied on the runs, other
+        translations decode the masks.
+        """
+        if border_value != 0 or not float(offset).is_integer():
+            return self._apply_bitmap(lambda m: m.translate(
+                out_shape, offset, direction, border_value, interpolation))
+        h, w = out_shape
+        mask_ids, runs = self._clip(0, 0, w, h)
+        if direction == 'horizontal':
+            runs[:, 0] += int(offset)
+        else:
+            runs[:, 1:] += int(offset)
+        keep = (runs[:, 0] >= 0) & (runs[:, 0] < w)
+        runs[:, 1:] = np.clip(runs[:, 1:], 0, h)
+        keep &= runs[:, 2] > runs[:, 1]
+        return RLEMasks(runs[keep], _run_offsets(mask_ids[keep], len(self)), h,
+                        w)
+
+    def shear(self,
+              out_shape,
+              magnitude,
+              direction='horizontal',
+              border_value=0,
+              interpolation='bilinear'):
+        """See :func:`BaseInstanceMasks.shear`."""
+        return self._apply_bitmap(lambda m: m.shear(
+            out_shape, magnitude, direction, border_value, interpolation))
+
+    def rotate(self,
+               out_shape,
+               angle,
+               center=None,
+               scale=1.0,
+               border_value=0,
+               interpolation='bilinear'):
+        """See :func:`BaseInstanceMasks.rotate`."""
+        return self._apply_bitmap(lambda m: m.rotate(
+            out_shape, angle, center, scale, border_value, interpolation))
+
+    @property
+    def areas(self):
+        """See :py:attr:`BaseInstanceMasks.areas`."""
+        lengths = np.cumsum(self.runs[:, 2] - self.runs[:, 1])
+        lengths = np.concatenate([[0], lengths])
+        return lengths[self.offsets[1:]] - lengths[self.offsets[:-1]]
+
+    def to_bitmap(self):
+        """Convert masks to :obj:`BitmapMasks`."""
+        return BitmapMasks(self.to_ndarray(), self.height, self.width)
+
+    def to_ndarray(self):
+        """See :func:`BaseInstanceMasks.to_ndarray`."""
+        return self.to_tensor(torch.uint8, 'cpu').numpy()
+
+    def to_tensor(self, dtype, device):
+        """See :func:`BaseInstanceMasks.to_tensor`.
+
+        The runs are moved to ``device`` and decoded there.
+        """
+        runs = torch.from_numpy(self.runs).to(device=device, dtype=torch.long)
+        mask_ids = torch.from_numpy(self._mask_ids()).to(device)
+        # mark the start and the end of every run with 1 and -1 (255 in
+        # uint8), the prefix sums along the columns are the masks
+        masks = torch.zeros((len(self), self.height + 1, self.width),
+                            dtype=torch.uint8,
+                            device=device)
+        masks[mask_ids, runs[:, 1], runs[:, 0]] = 1
+        masks[mask_ids, runs[:, 2], runs[:, 0]] = 255
+        masks = masks.cumsum(1, dtype=torch.uint8)[:, :self.height]
+        return masks.to(dtype).contiguous()
+
+    @classmethod
+    def random(cls,
+               num_masks=3,
+               height=32,
+               width=32,
+               dtype=np.uint8,
+               rng=None):
+        """Generate random masks for demo / testing purposes.
+
+        Example:
+            >>> from mmdet.structures.mask import RLEMasks
+            >>> self = RLEMasks.random()
+            >>> print('self = {}'.format(self))
+            self = RLEMasks(num_masks=3, height=32, width=32)
+        """
+        bitmaps = BitmapMasks.random(num_masks, height, width, dtype, rng)
+        return cls.from_bitmaps(bitmaps.masks, height, width)
+
+    @classmethod
+    def cat(cls: Type[T], masks: Sequence[T]) -> T:
+        """Concatenate a sequence of masks into one single mask instance.
+
+        Args:
+            masks (Sequence[RLEMasks]): A sequence of mask instances.
+
+        Returns:
+            RLEMasks: Concatenated mask instance.
+        """
+        assert isinstance(masks, Sequence)
+        if len(masks) == 0:
+            raise ValueError('masks should not be an empty list.')
+        assert all(isinstance(m, cls) for m in masks)
+        assert all(m.height == masks[0].height and m.width == masks[0].width
+                   for m in masks)
+
+        runs = np.concatenate([m.runs for m in masks])
+        offsets = np.concatenate([[0]] + [
+            m.offsets[1:] + start for m, start in zip(
+                masks, np.cumsum([0] + [len(m.runs) for m in masks[:-1]]))
+        ])
+        return cls(runs, offsets, masks[0].height, masks[0].width)
+
+
+def _run_offsets(mask_ids, num_masks):
+    """Compute the start index of the runs of each mask from the sorted
+    index of the mask of each run."""
+    return np.concatenate([[0],
+                           np.cumsum(
+                               np.bincount(mask_ids, minlength=num_masks))])
+
+
+def _decode_rle_counts(counts):
+    """Decode the counts of a COCO RLE.
+
+    The compressed counts are a string of 6-bit chunks offset by 48, each
+    holding 5 bits of a signed value and a continuation bit. From the third
+    value on, the values are deltas to the value two positions before.
+    See ``rleFrString`` of the COCO API.
+
+    Args:
+        counts (list | str | bytes): Uncompressed or compressed counts.
+
+    Returns:
+        ndarray: The run lengths, alternating between background and
+        foreground.
+    """
+    if isinstance(counts, list):
+        return np.array(counts, dtype=np.int64)
+    if isinstance(counts, str):
+        counts = counts.encode()
+    chunks = np.frombuffer(counts, dtype=np.uint8).astype(np.int64) - 48
+    if len(chunks) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last = np.flatnonzero((chunks & 0x20) == 0)
+    first = np.concatenate([[0], last[:-1] + 1])
+    shift = 5 * (np.arange(len(chunks)) - np.repeat(first, last - first + 1))
+    values = np.add.reduceat((chunks & 0x1f) << shift, first)
+    negative = (chunks[last] & 0x10) != 0
+    values[negative] |= -1 << (shift[last[negative]] + 5)
+    values[1::2] = np.cumsum(values[1::2])
+    values[2::2] = np.cumsum(values[2::2])
+    return values
+
+
 def polygon_to_bitmap(polygons, height, width):
     """Convert masks from the form of polygons to bitmaps.
 
@@ -39,13 +39,17 @@ def encode_mask_results(mask_results):
     """Encode bitmap mask to RLE code.
 
     Args:
-        mask_results (list): bitmap mask results.
+        mask_results (list): bitmap mask results. Masks which are already
+            RLE encoded are kept as is.
 
     Returns:
         list | tuple: RLE encoded mask.
     """
     encoded_mask_results = []
     for mask in mask_results:
+        if isinstance(mask, dict):
+            encoded_mask_results.append(mask)
+            continue
         encoded_mask_results.append(
             mask_util.encode(
                 np.array(mask[:, :, np.newaxis], order='F',
@@ -53,6 +57,65 @@ def encode_mask_results(mask_results):
     return encoded_mask_results
 
 
+def decode_mask_results(mask_results, img_shape):
+    """Decode RLE codes to bitmap masks.
+
+    Args:
+        mask_results (list[dict]): RLE encoded masks.
+        img_shape (tuple[int, int]): (height, width) of the masks, used
+            when there is no mask.
+
+    Returns:
+        np.ndarray: Bitmap masks of shape (n, height, width) and dtype uint8.
+    """
+    if len(mask_results) == 0:
+        return np.zeros((0, *img_shape[:2]), dtype=np.uint8)
+    return mask_util.decode(list(mask_results)).transpose(2, 0, 1)
+
+
+def encode_cropped_mask(mask, offset, img_shape):
+    """Encode a bitmap mask cropped from an image to the RLE code of the
+    image, without building the bitmap of the whole image.
+
+    Args:
+        mask (np.ndarray): Bitmap mask of the crop, has shape (h, w).
+        offset (tuple[int, int]): (x, y) of the top left corner of the crop
+            in the image.
+        img_shape (tuple[int, int]): (height, width) of the image. The part
+            of the crop outside of the image is ignored.
+
+    Returns:
+        dict: RLE encoded mask of the image, the same as
+        :func:`encode_mask_results` of the mask pasted in the image.
+    """
+    img_h, img_w = int(img_shape[0]), int(img_shape[1])
+    x0, y0 = int(offset[0]), int(offset[1])
+    mask = np.asarray(
+        mask, dtype=bool)[:max(img_h - y0, 0), :max(img_w - x0, 0)]
+    h, w = mask.shape
+    # Pad every column with zeros so that the runs of foreground in the
+    # column-major order start and end within their columns.
+    padded = np.zeros((w, h + 2), dtype=bool)
+    padded[:, 1:-1] = mask.T
+    padded = padded.reshape(-1)
+    changes = np.flatnonzero(padded[1:] != padded[:-1]) + 1
+    cols, rows = np.divmod(changes, h + 2)
+    # alternate starts and ends of the runs in the image
+    bounds = (x0 + cols) * img_h + y0 + rows - 1
+    # merge the runs continued in the next column of the image
+    starts, ends = bounds[0::2], bounds[1::2]
+    continued = np.flatnonzero(starts[1:] == ends[:-1])
+    starts = np.delete(starts, continued + 1)
+    ends = np.delete(ends, continued)
+    bounds = np.stack([starts, ends], axis=1).reshape(-1)
+    counts = np.diff(np.concatenate([[0], bounds, [img_h * img_w]]))
+    if len(counts) > 1 and counts[-1] == 0:
+        # the last run reaches the end of the image
+        counts = counts[:-1]
+    return mask_util.frPyObjects(
+        dict(counts=counts.tolist(), size=[img_h, img_w]), img_h, img_w)
+
+
 def mask2bbox(masks):
     """Obtain tight bounding boxes of binary masks.
 
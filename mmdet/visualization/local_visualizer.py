@@ -17,7 +17,8 @@ from mmengine.visualization import Visualizer
 from ..evaluation import INSTANCE_OFFSET
 from ..registry import VISUALIZERS
 from ..structures import DetDataSample
-from ..structures.mask import BitmapMasks, PolygonMasks, bitmap_to_polygon
+from ..structures.mask import (BitmapMasks, PolygonMasks, RLEMasks,
+                               bitmap_to_polygon, decode_mask_results)
 from .palette import _get_adaptive_scales, get_palette, jitter_color
 
 
@@ -173,8 +174,11 @@ class DetLocalVisualizer(Visualizer):
             masks = instances.masks
             if isinstance(masks, torch.Tensor):
                 masks = masks.numpy()
-            elif isinstance(masks, (PolygonMasks, BitmapMasks)):
+            elif isinstance(masks, (PolygonMasks, BitmapMasks, RLEMasks)):
                 masks = masks.to_ndarray()
+            elif isinstance(masks, list):
+                # RLE encoded masks
+                masks = decode_mask_results(masks, image.shape[:2])
 
             masks = masks.astype(bool)
 
@@ -615,6 +619,9 @@ class TrackLocalVisualizer(Visualizer):
         # draw masks
         if 'masks' in instances:
             masks = instances.masks
+            if isinstance(masks, list):
+                # RLE encoded masks
+                masks = decode_mask_results(masks, image.shape[:2])
             polygons = []
             for i, mask in enumerate(masks):
                 contours, _ = bitmap_to_polygon(mask)
@@ -1,4 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import json
 import os.path as osp
 import tempfile
 from unittest import TestCase, mock
@@ -12,7 +13,7 @@ from mmengine.structures import InstanceData
 from mmengine.utils import is_list_of
 from parameterized import parameterized
 
-from mmdet.apis import DetInferencer
+from mmdet.apis import DetInferencer, ShardedPredictionSink
 from mmdet.evaluation.functional import get_classes
 from mmdet.structures import DetDataSample
 
@@ -93,6 +94,100 @@ class TestDetInferencer(TestCase):
                                                 res_bs3['visualization']):
                 self.assertTrue(np.allclose(res_bs1_vis, res_bs3_vis))
 
+    @parameterized.expand(['thread', 'process'])
+    def test_call_with_workers(self, worker_type):
+        img_dir = 'tests/data/VOCdevkit/VOC2007/JPEGImages/'
+
+        mock_load = Mock(return_value=None)
+        with patch('mmengine.infer.infer._load_checkpoint', mock_load):
+            inferencer = DetInferencer('rtmdet-t')
+        res_serial = inferencer(img_dir, batch_size=2, return_vis=True)
+
+        inferencer.num_workers = 2
+        inferencer.worker_type = worker_type
+        res_pipelined = inferencer(img_dir, batch_size=2, return_vis=True)
+        # results are kept in the order of inputs
+        self.assert_predictions_equal(res_serial['predictions'],
+                                      res_pipelined['predictions'])
+        self.assertEqual(
+            len(res_serial['visualization']),
+            len(res_pipelined['visualization']))
+        for vis_serial, vis_pipelined in zip(res_serial['visualization'],
+                                             res_pipelined['visualization']):
+            self.assertTrue(np.allclose(vis_serial, vis_pipelined))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            inferencer(img_dir, out_dir=tmp_dir, no_save_pred=False)
+            for img_name in mmengine.list_dir_or_file(img_dir):
+                name = osp.splitext(img_name)[0]
+                self.assertTrue(
+                    osp.exists(osp.join(tmp_dir, 'preds', f'{name}.json')))
+                self.assertTrue(osp.exists(osp.join(tmp_dir, 'vis', img_name)))
+
+        with self.assertRaises(AssertionError):
+            with patch('mmengine.infer.infer._load_checkpoint', mock_load):
+                DetInferencer('rtmdet-t', num_workers=1, worker_type='gpu')
+
+    @parameterized.expand(['jsonl', 'npz'])
+    def test_stream(self, sink_format):
+        img_paths = [
+            'tests/data/color.jpg', 'tests/data/gray.jpg',
+            'tests/data/VOCdevkit/VOC2007/JPEGImages/000001.jpg'
+        ]
+
+        mock_load = Mock(return_value=None)
+        with patch('mmengine.infer.infer._load_checkpoint', mock_load):
+            inferencer = DetInferencer('rtmdet-t')
+        res = inferencer(img_paths, batch_size=2)
+
+        # a generator of inputs is consumed lazily
+        stream_preds = []
+        for batch_res in inferencer.stream(
+                iter(img_paths), batch_size=2, return_vis=True):
+            self.assertLessEqual(len(batch_res['predictions']), 2)
+            self.assertEqual(
+                len(batch_res['predictions']), len(batch_res['visualization']))
+            stream_preds.extend(batch_res['predictions'])
+        self.assertEqual(len(stream_preds), len(img_paths))
+        self.assert_predictions_equal(res['predictions'], stream_preds)
+
+        # frames of a video
+        frames = (mmcv.imread(img_path) for img_path in img_paths)
+        frame_preds = []
+        for batch_res in inferencer.stream(frames, batch_size=2):
+            frame_preds.extend(batch_res['predictions'])
+        self.assert_predictions_equal(res['predictions'], frame_preds)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with ShardedPredictionSink(
+                    tmp_dir, format=sink_format, shard_size=2) as sink:
+                for _ in inferencer.stream(img_paths, sink=sink):
+                    pass
+            self.assertEqual(sink.num_written, len(img_paths))
+            self.assertEqual(len(sink.shard_files), (len(img_paths) + 1) // 2)
+            if sink_format == 'jsonl':
+                records = []
+                for shard_file in sink.shard_files:
+                    records.extend(mmengine.list_from_file(shard_file))
+                records = [json.loads(record) for record in records]
+                self.assertEqual([r['index'] for r in records],
+                                 list(range(len(img_paths))))
+                self.assertEqual([r['img_path'] for r in records], img_paths)
+                self.assert_predictions_equal(res['predictions'], records)
+            else:
+                shard = np.load(sink.shard_files[0])
+                self.assertEqual(shard['index'].tolist(), [0, 1])
+                num_insts = len(res['predictions'][0]['labels'])
+                self.assertEqual(shard['inst_offsets'][1], num_insts)
+                self.assertTrue(
+                    np.allclose(shard['scores'][:num_insts],
+                                res['predictions'][0]['scores']))
+
+        with self.assertRaises(AssertionError):
+            next(
+                inferencer.stream(
+                    img_paths, return_datasample=True, sink=sink))
+
     @parameterized.expand([
         'rtmdet-t', 'mask-rcnn_r50_fpn_1x_coco', 'panoptic_fpn_r50_fpn_1x_coco'
     ])
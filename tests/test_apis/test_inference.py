@@ -5,8 +5,10 @@ import numpy as np
 import pytest
 import torch
 
-from mmdet.apis import inference_detector, init_detector
-from mmdet.structures import DetDataSample
+from mmdet.apis import (inference_detector, inference_mot,
+                        inference_mot_streams, init_detector,
+                        init_stream_trackers, init_track_model)
+from mmdet.structures import DetDataSample, TrackDataSample
 from mmdet.utils import register_all_modules
 
 # TODO: Waiting to fix multiple call error bug
@@ -74,3 +76,43 @@ def test_inference_detector(config, devices):
         assert isinstance(result, DetDataSample)
         result = inference_detector(model, [img1, img2])
         assert isinstance(result, list) and len(result) == 2
+
+
+@pytest.mark.parametrize('config', [
+    'configs/bytetrack/bytetrack_yolox_x_8xb4-80e_crowdhuman-'
+    'mot17halftrain_test-mot17halfval.py'
+])
+def test_inference_mot_streams(config):
+    project_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    project_dir = os.path.join(project_dir, '..')
+    config_file = os.path.join(project_dir, config)
+
+    rng = np.random.RandomState(0)
+    videos = [[
+        rng.randint(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(3)
+    ] for _ in range(2)]
+
+    # the weights are randomly initialized, fix them to get valid tracks
+    torch.manual_seed(0)
+    model = init_track_model(config_file, device='cpu')
+    trackers = init_stream_trackers(model, len(videos))
+    assert len(trackers) == 2 and trackers[0] is not trackers[1]
+
+    stream_results = [[] for _ in videos]
+    for frame_id in range(3):
+        results = inference_mot_streams(model, [v[frame_id] for v in videos],
+                                        [frame_id] * 2, [3] * 2, trackers)
+        assert len(results) == 2
+        for i, result in enumerate(results):
+            assert isinstance(result, TrackDataSample)
+            stream_results[i].append(result[0].pred_track_instances)
+
+    # every stream gets the same results as tracking it alone
+    for video, track_results in zip(videos, stream_results):
+        for frame_id, img in enumerate(video):
+            result = inference_mot(model, img, frame_id, 3)
+            expected = result[0].pred_track_instances
+            assert torch.equal(expected.instances_id,
+                               track_results[frame_id].instances_id)
+            assert torch.allclose(
+                expected.bboxes, track_results[frame_id].bboxes, atol=1e-3)
@@ -0,0 +1,105 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import base64
+import importlib.util
+import os.path as osp
+import sys
+import tempfile
+import types
+from unittest import TestCase
+from unittest.mock import patch
+
+import cv2
+import mmcv
+import numpy as np
+import torch
+from mmengine.config import Config
+
+from mmdet.apis import inference_detector
+from mmdet.registry import MODELS
+from mmdet.utils import register_all_modules
+
+PROJECT_DIR = osp.join(osp.dirname(__file__), '..', '..')
+
+
+class _StubBaseHandler:
+    """The part of ``ts.torch_handler.base_handler.BaseHandler`` used by the
+    handler, so that it can be tested without TorchServe."""
+
+    def handle(self, data, context):
+        return self.postprocess(self.inference(self.preprocess(data)))
+
+
+def _load_handler_module():
+    base_handler = types.ModuleType('ts.torch_handler.base_handler')
+    base_handler.BaseHandler = _StubBaseHandler
+    modules = {
+        'ts': types.ModuleType('ts'),
+        'ts.torch_handler': types.ModuleType('ts.torch_handler'),
+        'ts.torch_handler.base_handler': base_handler
+    }
+    with patch.dict(sys.modules, modules):
+        spec = importlib.util.spec_from_file_location(
+            'mmdet_handler',
+            osp.join(PROJECT_DIR, 'tools/deployment/mmdet_handler.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+class TestMMdetHandler(TestCase):
+
+    def setUp(self):
+        register_all_modules()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        cfg = Config.fromfile(
+            osp.join(PROJECT_DIR,
+                     'configs/retinanet/retinanet_r18_fpn_1x_coco.py'))
+        cfg.model.backbone.init_cfg = None
+        cfg.test_dataloader.dataset.pipeline[1].scale = (320, 320)
+        cfg.dump(osp.join(self.tmp_dir.name, 'config.py'))
+        torch.manual_seed(0)
+        model = MODELS.build(cfg.model)
+        torch.save(
+            dict(state_dict=model.state_dict()),
+            osp.join(self.tmp_dir.name, 'model.pth'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_handle(self):
+        module = _load_handler_module()
+        context = types.SimpleNamespace(
+            system_properties=dict(model_dir=self.tmp_dir.name, gpu_id=0),
+            manifest=dict(model=dict(serializedFile='model.pth')),
+            model_yaml_config=dict(
+                handler=dict(threshold=0.05, output_format='binary')))
+        handler = module.MMdetHandler()
+        handler.initialize(context)
+
+        img = mmcv.imread(osp.join(PROJECT_DIR, 'demo/demo.jpg'))
+        imgs = [img, mmcv.imflip(img), 255 - img]
+        encoded = [cv2.imencode('.png', x)[1].tobytes() for x in imgs]
+        rows = [
+            dict(data=encoded[0]),
+            dict(body=base64.b64encode(encoded[1]).decode()),
+            dict(data=encoded[2])
+        ]
+        with patch.object(
+                handler.model, 'test_step',
+                wraps=handler.model.test_step) as test_step:
+            outputs = handler.handle(rows, context)
+        # the images of a batch are forwarded at once
+        test_step.assert_called_once()
+
+        # one result per image, in the order of the requests
+        self.assertEqual(len(outputs), len(imgs))
+        for output, img in zip(outputs, imgs):
+            pred = module.decode_binary(output)
+            expected = inference_detector(handler.model, img).pred_instances
+            keep = expected.scores >= 0.05
+            np.testing.assert_allclose(
+                pred['scores'], expected.scores[keep].numpy(), atol=1e-5)
+            np.testing.assert_allclose(
+                pred['bboxes'], expected.bboxes[keep].numpy(), atol=1e-2)
+            np.testing.assert_array_equal(pred['labels'],
+                                          expected.labels[keep].numpy())
@@ -1,7 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import os
+import pickle
+import tempfile
 import unittest
 
+import numpy as np
+
 from mmdet.datasets import CocoDataset
+from mmdet.datasets.data_list_cache import ColumnarDataList
 
 
 class TestCocoDataset(unittest.TestCase):
@@ -46,3 +53,164 @@ class TestCocoDataset(unittest.TestCase):
                 ann_file='tests/data/coco_wrong_format_sample.json',
                 metainfo=metainfo,
                 pipeline=[])
+
+    def test_coco_dataset_ann_cache(self):
+        metainfo = dict(classes=('bus', 'car'), task_name='new_task')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            kwargs = dict(
+                data_prefix=dict(img='imgs'),
+                ann_file='tests/data/coco_sample.json',
+                metainfo=metainfo,
+                filter_cfg=dict(filter_empty_gt=True, min_size=32),
+                pipeline=[],
+                ann_cache_dir=tmp_dir)
+            dataset = CocoDataset(**kwargs)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+            cached_dataset = CocoDataset(**kwargs)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+            # the cached data list is kept in the memory-mapped arrays
+            self.assertIsInstance(cached_dataset.data_list, ColumnarDataList)
+            self.assertFalse(cached_dataset.serialize_data)
+            self.assertEqual(cached_dataset.cat_ids, dataset.cat_ids)
+            self.assertEqual(cached_dataset.cat2label, dataset.cat2label)
+            self.assertEqual(len(cached_dataset), len(dataset))
+            for idx in range(len(dataset)):
+                self.assertEqual(
+                    cached_dataset.get_data_info(idx),
+                    dataset.get_data_info(idx))
+                self.assertEqual(
+                    cached_dataset.get_cat_ids(idx), dataset.get_cat_ids(idx))
+            np.testing.assert_array_equal(cached_dataset.get_img_sizes(),
+                                          dataset.get_img_sizes())
+
+            # subsets and pickled datasets build the same data information
+            sub_dataset = cached_dataset.get_subset([1, 0])
+            self.assertIsInstance(sub_dataset.data_list, ColumnarDataList)
+            self.assertEqual(
+                sub_dataset.get_data_info(1)['img_id'],
+                dataset.get_data_info(0)['img_id'])
+            self.assertEqual(
+                sub_dataset.get_cat_ids(0), dataset.get_cat_ids(1))
+            self.assertEqual(
+                cached_dataset.get_subset(-1).get_data_info(0),
+                dataset.get_subset(-1).get_data_info(0))
+            pickled_dataset = pickle.loads(pickle.dumps(cached_dataset))
+            self.assertEqual(pickled_dataset.data_list._arrays, {})
+            self.assertEqual(
+                pickled_dataset.get_data_info(0), dataset.get_data_info(0))
+
+            # the cache does not depend on filter_cfg
+            kwargs['filter_cfg'] = None
+            unfiltered_dataset = CocoDataset(**kwargs)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+            self.assertGreater(len(unfiltered_dataset), len(dataset))
+
+            # different classes use a different cache
+            kwargs['metainfo'] = dict(classes=('car', ))
+            CocoDataset(**kwargs)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+    def test_coco_dataset_batched_parse(self):
+
+        class PerImageCocoDataset(CocoDataset):
+
+            def parse_data_info(self, raw_data_info):
+                return super().parse_data_info(raw_data_info)
+
+        for classes in [('bus', 'car'), ('car', ), ('bus', 'car', 'person')]:
+            kwargs = dict(
+                data_prefix=dict(img='imgs'),
+                ann_file='tests/data/coco_sample.json',
+                metainfo=dict(classes=classes),
+                pipeline=[],
+                serialize_data=False)
+            dataset = CocoDataset(**kwargs)
+            per_image_dataset = PerImageCocoDataset(**kwargs)
+            self.assertEqual(dataset.data_list, per_image_dataset.data_list)
+
+    def test_coco_dataset_cat_index(self):
+        for serialize_data in [True, False]:
+            dataset = CocoDataset(
+                data_prefix=dict(img='imgs'),
+                ann_file='tests/data/coco_sample.json',
+                metainfo=dict(classes=('bus', 'car', 'person')),
+                pipeline=[],
+                serialize_data=serialize_data)
+            cat2imgs = {i: [] for i in range(3)}
+            for idx in range(len(dataset)):
+                cat_ids = [
+                    instance['bbox_label']
+                    for instance in dataset.get_data_info(idx)['instances']
+                ]
+                self.assertEqual(dataset.get_cat_ids(idx), cat_ids)
+                for cat in set(cat_ids):
+                    cat2imgs[cat].append(idx)
+            self.assertEqual(
+                {k: v.tolist()
+                 for k, v in dataset.get_cat2imgs().items()}, cat2imgs)
+
+            # subsets have their own index
+            for indices in [2, -2, [3, 1], [-1]]:
+                subset = dataset.get_subset(indices)
+                self._check_index(subset)
+                subset = copy.deepcopy(dataset)
+                subset.get_subset_(indices)
+                self._check_index(subset)
+
+        # the index is built by the full initialization
+        dataset = CocoDataset(
+            data_prefix=dict(img='imgs'),
+            ann_file='tests/data/coco_sample.json',
+            metainfo=dict(classes=('bus', 'car', 'person')),
+            pipeline=[],
+            lazy_init=True)
+        self.assertFalse(dataset._fully_initialized)
+        lazy_cat2imgs = dataset.get_cat2imgs()
+        self.assertEqual({k: v.tolist()
+                          for k, v in lazy_cat2imgs.items()}, cat2imgs)
+        self.assertTrue(
+            np.shares_memory(lazy_cat2imgs[0], dataset.cat_img_inds))
+
+    def test_coco_dataset_filter_with_index(self):
+        # the filtering and `indices` select the images of the index
+        for indices in [None, 1, [1, 0]]:
+            dataset = CocoDataset(
+                data_prefix=dict(img='imgs'),
+                ann_file='tests/data/coco_sample.json',
+                metainfo=dict(classes=('bus', 'car')),
+                filter_cfg=dict(filter_empty_gt=True, min_size=32),
+                pipeline=[],
+                indices=indices)
+            self._check_index(dataset)
+            self.assertTrue(
+                all(
+                    len(dataset.get_cat_ids(idx)) > 0
+                    for idx in range(len(dataset))))
+
+        # `filter_data` selects the images by the index only
+        class NoCatImgMapCocoDataset(CocoDataset):
+
+            def load_data_list(self):
+                data_list = super().load_data_list()
+                self.cat_img_map = {}
+                return data_list
+
+        dataset = NoCatImgMapCocoDataset(
+            data_prefix=dict(img='imgs'),
+            ann_file='tests/data/coco_sample.json',
+            metainfo=dict(classes=('bus', 'car')),
+            filter_cfg=dict(filter_empty_gt=True, min_size=32),
+            pipeline=[])
+        self.assertEqual(len(dataset), 2)
+
+    def _check_index(self, dataset):
+        self.assertEqual(len(dataset.get_img_sizes()), len(dataset))
+        for idx in range(len(dataset)):
+            data_info = dataset.get_data_info(idx)
+            self.assertEqual(
+                dataset.get_cat_ids(idx), [
+                    instance['bbox_label']
+                    for instance in data_info['instances']
+                ])
+            self.assertEqual(dataset.get_img_sizes()[idx].tolist(),
+                             [data_info['width'], data_info['height']])
@@ -1,10 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os
+import tempfile
 import unittest
 
 from mmengine.fileio import dump
 
 from mmdet.datasets import LVISV1Dataset, LVISV05Dataset
+from mmdet.datasets.data_list_cache import ColumnarDataList
 
 try:
     import lvis
@@ -229,3 +231,27 @@ class TestLVISDataset(unittest.TestCase):
         # with all illegal annotations
         self.assertEqual(len(dataset), 4)
         self.assertEqual(len(dataset.load_data_list()), 4)
+
+    @unittest.skipIf(lvis is None, 'lvis is not installed.')
+    def test_lvis_dataset_ann_cache(self):
+        for dataset_type in (LVISV05Dataset, LVISV1Dataset):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                kwargs = dict(
+                    ann_file=self.json_name,
+                    data_prefix=dict(img='imgs'),
+                    metainfo=self.metainfo,
+                    filter_cfg=dict(filter_empty_gt=True, min_size=32),
+                    pipeline=[],
+                    ann_cache_dir=tmp_dir)
+                dataset = dataset_type(**kwargs)
+                self.assertEqual(len(os.listdir(tmp_dir)), 1)
+                cached_dataset = dataset_type(**kwargs)
+                self.assertEqual(len(os.listdir(tmp_dir)), 1)
+                self.assertIsInstance(cached_dataset.data_list,
+                                      ColumnarDataList)
+                self.assertEqual(cached_dataset.cat_ids, dataset.cat_ids)
+                self.assertEqual(len(cached_dataset), 2)
+                for idx in range(len(dataset)):
+                    self.assertEqual(
+                        cached_dataset.get_data_info(idx),
+                        dataset.get_data_info(idx))
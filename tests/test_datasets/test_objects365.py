@@ -1,7 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+import tempfile
 import unittest
 
 from mmdet.datasets import Objects365V1Dataset, Objects365V2Dataset
+from mmdet.datasets.data_list_cache import ColumnarDataList
 
 
 class TestObjects365V1Dataset(unittest.TestCase):
@@ -49,6 +52,10 @@ class TestObjects365V1Dataset(unittest.TestCase):
                 metainfo=metainfo,
                 pipeline=[])
 
+    def test_obj365v1_ann_cache(self):
+        _test_ann_cache(self, Objects365V1Dataset,
+                        'tests/data/Objects365/unsorted_obj365_sample.json')
+
 
 class TestObjects365V2Dataset(unittest.TestCase):
 
@@ -77,3 +84,31 @@ class TestObjects365V2Dataset(unittest.TestCase):
                 ann_file='tests/data/coco_wrong_format_sample.json',
                 metainfo=metainfo,
                 pipeline=[])
+
+    def test_obj365v2_ann_cache(self):
+        _test_ann_cache(self, Objects365V2Dataset,
+                        'tests/data/coco_sample.json')
+
+
+def _test_ann_cache(test_case, dataset_type, ann_file):
+    metainfo = dict(classes=('bus', 'car'), task_name='new_task')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        kwargs = dict(
+            data_prefix=dict(img='imgs'),
+            ann_file=ann_file,
+            metainfo=metainfo,
+            filter_cfg=dict(filter_empty_gt=True, min_size=32),
+            pipeline=[],
+            ann_cache_dir=tmp_dir)
+        dataset = dataset_type(**kwargs)
+        test_case.assertEqual(len(os.listdir(tmp_dir)), 1)
+        cached_dataset = dataset_type(**kwargs)
+        test_case.assertEqual(len(os.listdir(tmp_dir)), 1)
+        test_case.assertIsInstance(cached_dataset.data_list, ColumnarDataList)
+        test_case.assertEqual(cached_dataset.cat_ids, dataset.cat_ids)
+        test_case.assertEqual(len(cached_dataset), len(dataset))
+        for idx in range(len(dataset)):
+            test_case.assertEqual(
+                cached_dataset.get_data_info(idx), dataset.get_data_info(idx))
+            test_case.assertEqual(
+                cached_dataset.get_cat_ids(idx), dataset.get_cat_ids(idx))
@@ -2,6 +2,8 @@
 import os.path as osp
 from unittest import TestCase
 
+import numpy as np
+
 from mmdet.datasets import ReIDDataset
 
 PREFIX = osp.join(osp.dirname(__file__), '../data')
@@ -62,3 +64,31 @@ class TestReIDDataset(TestCase):
                 if (idx + 1) % self.ins_per_id != 0:
                     assert results['gt_label'][idx] == \
                            results['gt_label'][idx + 1]
+
+    def test_triplet_sampling(self):
+        dataset = self.dataset_triplet
+        np.random.seed(0)
+        for pos_pid in dataset.pids:
+            results = dataset.triplet_sampling(
+                pos_pid, num_ids=self.num_ids, ins_per_id=self.ins_per_id)
+            assert set(results) == {
+                'img_prefix', 'img_path', 'gt_label', 'sample_idx'
+            }
+            pids = np.array(results['gt_label']).reshape(
+                self.num_ids, self.ins_per_id)
+            # the first id is pos_pid, followed by distinct negative ids
+            assert (pids == pids[:, :1]).all()
+            assert pids[0, 0] == pos_pid
+            assert len(set(pids[:, 0].tolist())) == self.num_ids
+            for i, idx in enumerate(results['sample_idx']):
+                data_info = dataset.get_data_info(idx)
+                assert data_info['img_path'] == results['img_path'][i]
+                assert data_info['gt_label'] == results['gt_label'][i]
+
+        # all the other ids are sampled as negative ids
+        neg_pids = set()
+        for _ in range(100):
+            results = dataset.triplet_sampling(
+                dataset.pids[0], num_ids=2, ins_per_id=1)
+            neg_pids.add(int(results['gt_label'][1]))
+        assert neg_pids == set(dataset.pids[1:].tolist())
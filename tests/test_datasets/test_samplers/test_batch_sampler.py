@@ -7,7 +7,8 @@ import numpy as np
 from mmengine.dataset import DefaultSampler
 from torch.utils.data import Dataset
 
-from mmdet.datasets.samplers import AspectRatioBatchSampler
+from mmdet.datasets.samplers import (AspectRatioBatchSampler,
+                                     SizeBucketBatchSampler)
 
 
 class DummyDataset(Dataset):
@@ -78,3 +79,151 @@ class TestAspectRatioBatchSampler(TestCase):
             flag = batch[0][0] < batch[0][1]
             for i in range(1, batch_size):
                 self.assertEqual(batch[i][0] < batch[i][1], flag)
+
+
+class SizeDataset(DummyDataset):
+
+    def __init__(self, length):
+        self.length = length
+        rng = np.random.RandomState(0)
+        self.shapes = np.stack(
+            [rng.randint(100, 1000, length),
+             rng.randint(100, 1000, length)],
+            axis=1)
+
+
+class TestSizeBucketBatchSampler(TestCase):
+
+    @patch('mmengine.dist.get_dist_info', return_value=(0, 1))
+    def setUp(self, mock):
+        self.length = 100
+        self.dataset = SizeDataset(self.length)
+        self.sampler = DefaultSampler(self.dataset, shuffle=True, seed=0)
+
+    def test_invalid_inputs(self):
+        with self.assertRaisesRegex(
+                ValueError, 'batch_size should be a positive integer value'):
+            SizeBucketBatchSampler(self.sampler, batch_size=-1)
+
+        with self.assertRaisesRegex(
+                TypeError, 'sampler should be an instance of ``Sampler``'):
+            SizeBucketBatchSampler(None, batch_size=1)
+
+    def test_fixed_batch_size(self):
+        batch_size = 7
+        for drop_last in (False, True):
+            batch_sampler = SizeBucketBatchSampler(
+                self.sampler,
+                batch_size=batch_size,
+                drop_last=drop_last,
+                scale=None)
+            all_batch_idxs = list(batch_sampler)
+            self.assertEqual(len(batch_sampler), len(all_batch_idxs))
+            if drop_last:
+                self.assertEqual(
+                    len(all_batch_idxs), self.length // batch_size)
+            else:
+                self.assertEqual(
+                    sorted(sum(all_batch_idxs, [])), list(range(self.length)))
+            for batch_idxs in all_batch_idxs[:-1]:
+                self.assertEqual(len(batch_idxs), batch_size)
+
+        # the batches of a bucket have the same quantized shape
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=2, scale=None, bucket_size=1000)
+        all_batch_idxs = list(batch_sampler)
+        for batch_idxs in all_batch_idxs:
+            self.assertEqual(len(set(batch_sampler.bucket_ids[batch_idxs])), 1)
+
+        # grouping by sizes pads less than the default order
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=4, scale=None, bucket_size=128)
+        list(batch_sampler)
+        stats = batch_sampler.get_stats()
+        self.assertEqual(stats['num_batches'], len(batch_sampler))
+        self.assertAlmostEqual(stats['mean_batch_size'], 4)
+        padded = 0
+        img_shapes = batch_sampler.img_shapes
+        for i in range(0, self.length, 4):
+            padded += 4 * np.prod(
+                np.ceil(img_shapes[i:i + 4].max(axis=0) / 32) * 32)
+        efficiency = img_shapes.prod(axis=1).sum() / padded
+        self.assertGreater(stats['padding_efficiency'], efficiency)
+
+    def test_rescale(self):
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=2, scale=(1333, 800))
+        img_shapes = batch_sampler.img_shapes
+        self.assertTrue((img_shapes.max(axis=1) <= 1333).all())
+        self.assertTrue((img_shapes.min(axis=1) <= 800).all())
+        self.assertTrue(((img_shapes.max(axis=1) == 1333) |
+                         (img_shapes.min(axis=1) == 800)).all())
+        width, height = self.dataset.shapes[0]
+        scale_factor = min(1333 / max(width, height), 800 / min(width, height))
+        self.assertEqual(
+            tuple(img_shapes[0]), (int(height * scale_factor + 0.5),
+                                   int(width * scale_factor + 0.5)))
+
+    def test_max_pixels(self):
+        max_pixels = 4 * 512 * 512
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler,
+            batch_size=16,
+            scale=None,
+            bucket_size=128,
+            max_pixels=max_pixels)
+        num_batches = len(batch_sampler)
+        all_batch_idxs = list(batch_sampler)
+        self.assertEqual(len(all_batch_idxs), num_batches)
+        self.assertEqual(
+            sorted(sum(all_batch_idxs, [])), list(range(self.length)))
+        img_shapes = batch_sampler.img_shapes
+        for batch_idxs in all_batch_idxs:
+            self.assertLessEqual(len(batch_idxs), 16)
+            if len(batch_idxs) > 1:
+                height, width = np.ceil(
+                    img_shapes[batch_idxs].max(axis=0) / 32) * 32
+                self.assertLessEqual(
+                    len(batch_idxs) * height * width, max_pixels)
+        self.assertGreater(batch_sampler.get_stats()['mean_batch_size'], 1)
+
+    def test_sync_num_batches(self):
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=4, max_pixels=2**30)
+        with patch('mmdet.datasets.samplers.batch_sampler.all_reduce') as \
+                mock:
+            mock.side_effect = lambda tensor, op: tensor.fill_(7)
+            batches = batch_sampler._sync_num_batches([[0, 1, 2, 3], [4, 5]])
+        self.assertEqual(batches, [[0], [1], [2], [3], [4], [5], [0]])
+
+        # a rank without images repeats the first image of the dataset
+        with patch('mmdet.datasets.samplers.batch_sampler.all_reduce') as \
+                mock:
+            mock.side_effect = lambda tensor, op: tensor.fill_(3)
+            batches = batch_sampler._sync_num_batches([])
+        self.assertEqual(batches, [[0], [0], [0]])
+        with patch('mmdet.datasets.samplers.batch_sampler.all_reduce') as \
+                mock:
+            mock.side_effect = lambda tensor, op: tensor.fill_(0)
+            batches = batch_sampler._sync_num_batches([])
+        self.assertEqual(batches, [])
+
+    def test_epoch_batches(self):
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=16, scale=None, max_pixels=4 * 512 * 512)
+        with patch.object(
+                batch_sampler, '_make_batches',
+                wraps=batch_sampler._make_batches) as make_batches:
+            num_batches = len(batch_sampler)
+            self.assertEqual(len(batch_sampler), num_batches)
+            all_batch_idxs = list(batch_sampler)
+            self.assertEqual(len(all_batch_idxs), num_batches)
+            # the batches are built once per epoch
+            self.assertEqual(make_batches.call_count, 1)
+
+            self.sampler.set_epoch(1)
+            len(batch_sampler)
+            new_batch_idxs = list(batch_sampler)
+            self.assertEqual(make_batches.call_count, 2)
+        self.assertEqual(
+            sorted(sum(new_batch_idxs, [])), list(range(self.length)))
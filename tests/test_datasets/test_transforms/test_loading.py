@@ -15,7 +15,7 @@ from mmdet.datasets.transforms import (FilterAnnotations, LoadAnnotations,
                                        LoadMultiChannelImageFromFiles,
                                        LoadProposals, LoadTrackAnnotations)
 from mmdet.evaluation import INSTANCE_OFFSET
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, PolygonMasks, RLEMasks
 
 try:
     import panopticapi
@@ -110,6 +110,21 @@ class TestLoadAnnotations(unittest.TestCase):
         self.assertEqual(len(results['gt_masks']), 3)
         self.assertIsInstance(results['gt_masks'], BitmapMasks)
 
+    def test_load_mask_poly2rle(self):
+        transform = LoadAnnotations(
+            with_bbox=False,
+            with_label=False,
+            with_seg=False,
+            with_mask=True,
+            poly2mask=True,
+            poly2rle=True)
+        results = transform(copy.deepcopy(self.results))
+        self.assertIsInstance(results['gt_masks'], RLEMasks)
+        transform.poly2rle = False
+        bitmap_results = transform(copy.deepcopy(self.results))
+        np.testing.assert_array_equal(results['gt_masks'].to_ndarray(),
+                                      bitmap_results['gt_masks'].masks)
+
     def test_load_semseg(self):
         transform = LoadAnnotations(
             with_bbox=False, with_label=False, with_seg=True, with_mask=False)
@@ -143,6 +158,7 @@ class TestLoadAnnotations(unittest.TestCase):
             repr(transform), ('LoadAnnotations(with_bbox=True, '
                               'with_label=False, with_mask=False, '
                               'with_seg=False, poly2mask=True, '
+                              'poly2rle=False, '
                               "imdecode_backend='cv2', "
                               'backend_args=None)'))
 
@@ -0,0 +1,163 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from mmdet.datasets.transforms.shared_cache import SharedResultsCache
+from mmdet.registry import TRANSFORMS
+from mmdet.structures.bbox import HorizontalBoxes
+
+
+def _make_results(rng, num_gts=3, shape=(32, 48, 3)):
+    bboxes = rng.rand(num_gts, 4).astype(np.float32) * 10
+    bboxes[:, 2:] += bboxes[:, :2] + 1
+    return dict(
+        img=rng.randint(0, 255, shape, dtype=np.uint8),
+        img_shape=shape[:2],
+        gt_bboxes=bboxes,
+        gt_bboxes_labels=rng.randint(0, 5, num_gts).astype(np.int64),
+        gt_ignore_flags=rng.rand(num_gts) > 0.5)
+
+
+class TestSharedResultsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def assert_results_equal(self, cached, results):
+        np.testing.assert_array_equal(cached['img'], results['img'])
+        self.assertEqual(cached['img_shape'], results['img'].shape[:2])
+        for key in ('gt_bboxes', 'gt_bboxes_labels', 'gt_ignore_flags'):
+            np.testing.assert_array_equal(cached[key], results[key])
+            self.assertEqual(cached[key].dtype, results[key].dtype)
+
+    def test_append_and_get(self):
+        cache = SharedResultsCache(3, (64, 64), max_num_instances=8)
+        self.assertEqual(len(cache), 0)
+        all_results = [
+            _make_results(self.rng, i, shape)
+            for i, shape in enumerate([(32, 48, 3), (64, 20), (10, 10, 3)])
+        ]
+        all_results[1]['img'] = all_results[1]['img'].astype(np.float32)
+        for results in all_results:
+            cache.append(results)
+        self.assertEqual(len(cache), 3)
+        for i, results in enumerate(all_results):
+            self.assert_results_equal(cache[i], results)
+            self.assertEqual(cache.num_instances(i), i)
+
+        # FIFO popping replaces the oldest result
+        results = _make_results(self.rng)
+        cache.append(results, random_pop=False)
+        self.assertEqual(len(cache), 3)
+        self.assert_results_equal(cache[0], results)
+
+        # box type gt_bboxes
+        results = _make_results(self.rng)
+        box_results = copy.deepcopy(results)
+        box_results['gt_bboxes'] = HorizontalBoxes(results['gt_bboxes'])
+        cache.append(box_results, random_pop=False)
+        self.assert_results_equal(cache[1], results)
+
+    def test_skip_oversize(self):
+        cache = SharedResultsCache(2, (16, 16), max_num_instances=2)
+        with self.assertWarns(UserWarning):
+            cache.append(_make_results(self.rng, shape=(32, 8, 3)))
+        cache.append(_make_results(self.rng, num_gts=3, shape=(8, 8, 3)))
+        self.assertEqual(len(cache), 0)
+
+    def test_stuck_slot(self):
+        cache = SharedResultsCache(2, (64, 64), max_read_retries=5)
+        cache.append(_make_results(self.rng))
+        # a writer died in the middle of a write
+        cache._meta[0, 0] += 1
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(cache[0])
+        cache._meta[0, 0] += 1
+        self.assertIsNotNone(cache[0])
+
+    def test_share_across_processes(self):
+        cache = SharedResultsCache(4, (64, 64))
+        results = _make_results(self.rng)
+
+        # forked workers write to the same cache
+        ctx = multiprocessing.get_context()
+        process = ctx.Process(target=cache.append, args=(results, ))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(len(cache), 1)
+        self.assert_results_equal(cache[0], results)
+
+        # spawned workers attach to the segment when unpickling the cache
+        attached = SharedResultsCache.__new__(SharedResultsCache)
+        attached.__setstate__(cache.__getstate__())
+        attached.append(results)
+        self.assertEqual(len(cache), 2)
+        self.assert_results_equal(cache[1], results)
+        del attached
+        self.assert_results_equal(cache[1], results)
+
+        # deepcopy shares the cache
+        self.assertIs(copy.deepcopy(cache), cache)
+
+
+class TestSharedCachedTransforms(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.all_results = [_make_results(rng) for _ in range(6)]
+
+    def test_cached_mosaic(self):
+        transform = TRANSFORMS.build(
+            dict(
+                type='CachedMosaic',
+                img_scale=(24, 20),
+                max_cached_images=5,
+                shared_cache=True))
+        self.assertIn('shared_cache=True', repr(transform))
+        for results in self.all_results:
+            results = transform(copy.deepcopy(results))
+        self.assertEqual(len(transform.results_cache), 5)
+        self.assertEqual(results['img'].shape[:2], (40, 48))
+        self.assertEqual(results['img_shape'], results['img'].shape[:2])
+        self.assertEqual(results['gt_bboxes_labels'].shape[0],
+                         results['gt_bboxes'].shape[0])
+        self.assertEqual(results['gt_bboxes'].dtype, np.float32)
+        self.assertEqual(results['gt_bboxes_labels'].dtype, np.int64)
+        self.assertEqual(results['gt_ignore_flags'].dtype, bool)
+
+    def test_cached_mixup(self):
+        transform = TRANSFORMS.build(
+            dict(
+                type='CachedMixUp',
+                img_scale=(48, 32),
+                max_cached_images=2,
+                shared_cache=True))
+        self.assertIn('shared_cache=True', repr(transform))
+        for results in self.all_results:
+            results = transform(copy.deepcopy(results))
+        self.assertEqual(len(transform.results_cache), 2)
+        self.assertEqual(results['img'].shape[:2], (32, 48))
+        self.assertEqual(results['gt_bboxes_labels'].shape[0],
+                         results['gt_bboxes'].shape[0])
+        self.assertEqual(results['gt_bboxes'].dtype, np.float32)
+        self.assertEqual(results['gt_ignore_flags'].dtype, bool)
+
+    def test_stuck_slots(self):
+        for cfg in (dict(type='CachedMosaic', img_scale=(24, 20)),
+                    dict(type='CachedMixUp', img_scale=(48, 32))):
+            transform = TRANSFORMS.build(
+                dict(max_cached_images=5, shared_cache=True, **cfg))
+            for results in self.all_results[:4]:
+                transform(copy.deepcopy(results))
+            cache = transform.results_cache
+            cache.max_read_retries = 2
+            cache._meta[:, 0] += 1
+            # unreadable slots are treated as a cache miss
+            results = copy.deepcopy(self.all_results[4])
+            with self.assertWarns(UserWarning):
+                outputs = transform(results)
+            self.assertIs(outputs['img'], results['img'])
@@ -21,7 +21,7 @@ from mmdet.datasets.transforms import (CopyPaste, CutOut, Expand,
 from mmdet.evaluation import bbox_overlaps
 from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import HorizontalBoxes, bbox_project
-from mmdet.structures.mask import BitmapMasks
+from mmdet.structures.mask import BitmapMasks, RLEMasks
 from .utils import construct_toy_data, create_full_masks, create_random_bboxes
 
 try:
@@ -1464,6 +1464,28 @@ class TestCopyPaste(unittest.TestCase):
         self.assertEqual(results['img'].shape[:2],
                          self.dst_results['img'].shape[:2])
 
+    def test_transform_rle_masks(self):
+        transform = CopyPaste(selected=False)
+        results = copy.deepcopy(self.dst_results)
+        results['mix_results'] = [copy.deepcopy(self.src_results)]
+        expected = transform(results)
+
+        results = copy.deepcopy(self.dst_results)
+        src_results = copy.deepcopy(self.src_results)
+        for res in [results, src_results]:
+            masks = res['gt_masks']
+            res['gt_masks'] = RLEMasks.from_bitmaps(masks.masks, masks.height,
+                                                    masks.width)
+        results['mix_results'] = [src_results]
+        results = transform(results)
+        self.assertIsInstance(results['gt_masks'], RLEMasks)
+        self.assertTrue(
+            np.array_equal(results['gt_masks'].to_ndarray(),
+                           expected['gt_masks'].masks))
+        self.assertTrue(np.array_equal(results['img'], expected['img']))
+        self.assertTrue(
+            np.array_equal(results['gt_bboxes'], expected['gt_bboxes']))
+
     def test_transform_use_box_type(self):
         src_results = copy.deepcopy(self.src_results)
         src_results['gt_bboxes'] = HorizontalBoxes(src_results['gt_bboxes'])
@@ -1746,6 +1768,21 @@ class TestRandomErasing(unittest.TestCase):
         results = transform(copy.deepcopy(empty_results))
         self.assertTrue(results['img'].sum() > src_results['img'].sum())
 
+    def test_transform_rle_masks(self):
+        transform = RandomErasing(n_patches=(1, 5), ratio=(0.1, 0.3))
+        rle_results = copy.deepcopy(self.results)
+        masks = rle_results['gt_masks']
+        rle_results['gt_masks'] = RLEMasks.from_bitmaps(
+            masks.masks, masks.height, masks.width)
+        np.random.seed(0)
+        expected = transform(copy.deepcopy(self.results))
+        np.random.seed(0)
+        results = transform(rle_results)
+        self.assertIsInstance(results['gt_masks'], RLEMasks)
+        self.assertTrue(
+            np.array_equal(results['gt_masks'].to_ndarray(),
+                           expected['gt_masks'].masks))
+
     def test_repr(self):
         transform = RandomErasing(n_patches=(1, 5), ratio=(0, 0.2))
         self.assertEqual(
@@ -12,6 +12,7 @@ from mmengine.registry import MODEL_WRAPPERS
 from mmengine.runner import Runner
 from torch.utils.data import Dataset
 
+from mmdet.engine.hooks import MeanTeacherHook
 from mmdet.registry import DATASETS
 from mmdet.utils import register_all_modules
 
@@ -97,6 +98,29 @@ class TestMeanTeacherHook(TestCase):
     def tearDown(self):
         self.temp_dir.cleanup()
 
+    def test_momentum_update(self):
+        model = nn.Module()
+        model.student = nn.Sequential(nn.Linear(2, 3), nn.BatchNorm1d(3))
+        model.teacher = nn.Sequential(nn.Linear(2, 3), nn.BatchNorm1d(3))
+        model.student[1].running_mean.normal_()
+        model.student[1].num_batches_tracked.fill_(5)
+        for skip_buffer in (True, False):
+            hook = MeanTeacherHook(momentum=0.1, skip_buffer=skip_buffer)
+            student = model.student.state_dict()
+            teacher = {
+                k: v.clone()
+                for k, v in model.teacher.state_dict().items()
+            }
+            for _ in range(2):
+                hook.momentum_update(model, 0.1)
+                for k, v in teacher.items():
+                    if k.startswith('1.') and (skip_buffer
+                                               or not v.is_floating_point()):
+                        continue
+                    v.mul_(0.9).add_(student[k], alpha=0.1)
+            for k, v in model.teacher.state_dict().items():
+                self.assertTrue(torch.equal(v, teacher[k]), k)
+
     def test_mean_teacher_hook(self):
         device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
         model = ToyModel2().to(device)
@@ -0,0 +1,163 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import csv
+import glob
+import os.path as osp
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import torch
+import torch.nn as nn
+from mmengine.evaluator import BaseMetric
+from mmengine.model import BaseModel
+from mmengine.runner import Runner
+from torch.utils.data import Dataset
+
+from mmdet.engine.hooks import TelemetryHook
+from mmdet.utils import register_all_modules
+
+register_all_modules()
+
+
+class ToyModel(BaseModel):
+
+    def __init__(self):
+        super().__init__()
+        self.linear = nn.Linear(2, 1)
+
+    def forward(self, inputs, data_samples, mode='tensor'):
+        labels = torch.stack(data_samples)
+        inputs = torch.stack(inputs)
+        outputs = self.linear(inputs)
+        if mode == 'loss':
+            return dict(loss=(labels - outputs).sum())
+        return outputs
+
+
+class ToyDataset(Dataset):
+    METAINFO = dict()  # type: ignore
+    data = torch.randn(12, 2)
+    label = torch.ones(12)
+
+    @property
+    def metainfo(self):
+        return self.METAINFO
+
+    def __len__(self):
+        return self.data.size(0)
+
+    def __getitem__(self, index):
+        return dict(inputs=self.data[index], data_samples=self.label[index])
+
+
+class ToyMetric(BaseMetric):
+
+    def process(self, data_batch, predictions):
+        self.results.append(dict(acc=1))
+
+    def compute_metrics(self, results):
+        return dict(acc=1)
+
+
+class TestTelemetryHook(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _build_runner(self, hook_cfg, name):
+        return Runner(
+            model=ToyModel(),
+            train_dataloader=dict(
+                dataset=ToyDataset(),
+                sampler=dict(type='DefaultSampler', shuffle=True),
+                batch_size=3,
+                num_workers=0),
+            val_dataloader=dict(
+                dataset=ToyDataset(),
+                sampler=dict(type='DefaultSampler', shuffle=False),
+                batch_size=2,
+                num_workers=0),
+            val_evaluator=[ToyMetric()],
+            work_dir=self.temp_dir.name,
+            default_scope='mmdet',
+            optim_wrapper=dict(
+                optimizer=dict(type='SGD', lr=0.01, momentum=0.9)),
+            train_cfg=dict(by_epoch=True, max_epochs=3, val_interval=1),
+            val_cfg=dict(),
+            default_hooks=dict(logger=None),
+            custom_hooks=[hook_cfg],
+            experiment_name=name)
+
+    def test_init(self):
+        with self.assertRaises(AssertionError):
+            TelemetryHook(buffer_size=10, flush_interval=20)
+        with self.assertRaises(AssertionError):
+            TelemetryHook(file_format='txt')
+
+    def test_csv(self):
+        runner = self._build_runner(
+            dict(type='TelemetryHook', buffer_size=5, flush_interval=3),
+            'test_csv')
+        model = runner.model
+        runner.train()
+        out_dir = osp.join(runner.log_dir, 'telemetry')
+
+        with open(osp.join(out_dir, 'train_rank0.csv')) as f:
+            rows = list(csv.DictReader(f))
+        # 4 iterations in each of the 3 epochs
+        self.assertEqual(len(rows), 12)
+        self.assertEqual([int(float(row['iter'])) for row in rows],
+                         list(range(12)))
+        for row in rows:
+            for key in ('data_time', 'preprocess_time', 'forward_time',
+                        'loss_time', 'backward_time', 'optim_step_time',
+                        'iter_time', 'rss'):
+                self.assertGreaterEqual(float(row[key]), 0)
+            self.assertGreater(float(row['imgs_per_sec']), 0)
+            self.assertGreaterEqual(
+                float(row['iter_time']),
+                float(row['data_time']) + float(row['backward_time']))
+
+        with open(osp.join(out_dir, 'val_rank0.csv')) as f:
+            rows = list(csv.DictReader(f))
+        # 6 iterations in each of the 3 validations
+        self.assertEqual(len(rows), 18)
+        self.assertIn('eval_process_time', rows[0])
+        self.assertNotIn('backward_time', rows[0])
+
+        # the wrapped methods are restored
+        self.assertNotIn('forward', model.data_preprocessor.__dict__)
+        self.assertNotIn('parse_losses', model.__dict__)
+        self.assertNotIn('backward', runner.optim_wrapper.__dict__)
+
+    def test_npz(self):
+        runner = self._build_runner(
+            dict(
+                type='TelemetryHook',
+                interval=2,
+                buffer_size=4,
+                flush_interval=4,
+                file_format='npz'), 'test_npz')
+        runner.train()
+        files = sorted(
+            glob.glob(osp.join(runner.log_dir, 'telemetry', 'train_*.npz')))
+        # 2 samples in each of the 3 epochs
+        self.assertEqual(len(files), 3)
+        iters = np.concatenate([np.load(f)['iter'] for f in files])
+        np.testing.assert_array_equal(iters, [1, 3, 5, 7, 9, 11])
+
+    def test_ring_buffer(self):
+        hook = TelemetryHook(buffer_size=4, flush_interval=4)
+        buffer = hook._buffers['train']
+        for i in range(6):
+            buffer.append(dict(iter=i))
+        column = buffer.columns.index('iter')
+        np.testing.assert_array_equal(buffer.window()[:, column], [2, 3, 4, 5])
+        np.testing.assert_array_equal(buffer.pop_unflushed()[:, column],
+                                      [2, 3, 4, 5])
+        buffer.append(dict(iter=6))
+        np.testing.assert_array_equal(buffer.pop_unflushed()[:, column], [6])
+        self.assertEqual(len(buffer.pop_unflushed()), 0)
@@ -0,0 +1,219 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+
+from mmdet.evaluation.functional import (accumulate_confusion_matrix,
+                                         batched_bbox_overlaps,
+                                         batched_max_overlaps, bbox_overlaps,
+                                         concat_imgs, eval_map,
+                                         eval_map_per_img, get_img_gts)
+
+
+def _random_bboxes(rng, num):
+    xy = rng.uniform(0, 100, (num, 2))
+    wh = rng.uniform(1, 60, (num, 2))
+    return np.concatenate([xy, xy + wh], axis=1).astype(np.float32)
+
+
+def _random_imgs(rng, num_imgs, num_classes):
+    imgs = []
+    for _ in range(num_imgs):
+        num_dets = rng.integers(0, 30)
+        num_gts = rng.integers(0, 8)
+        scores = rng.uniform(0, 1, (num_dets, 1))
+        det_bboxes = np.concatenate([_random_bboxes(rng, num_dets), scores],
+                                    axis=1).astype(np.float32)
+        imgs.append(
+            dict(
+                det_bboxes=det_bboxes,
+                det_labels=rng.integers(0, num_classes, num_dets),
+                gt_bboxes=_random_bboxes(rng, num_gts),
+                gt_labels=rng.integers(0, num_classes, num_gts),
+                gt_ignore_inds=rng.uniform(0, 1, num_gts) < 0.2))
+    return imgs
+
+
+def _concat(imgs, prefix):
+    return concat_imgs([(img[f'{prefix}_bboxes'], img[f'{prefix}_labels'])
+                        for img in imgs])
+
+
+class TestBatchedBboxOverlaps(TestCase):
+
+    def test_batched_bbox_overlaps(self):
+        rng = np.random.default_rng(0)
+        bboxes1 = _random_bboxes(rng, 40)
+        inds1 = rng.integers(0, 5, 40)
+        bboxes2 = _random_bboxes(rng, 20)
+        inds2 = np.sort(rng.integers(0, 5, 20))
+        for mode in ('iou', 'iof'):
+            for use_legacy_coordinate in (False, True):
+                pair_inds1, pair_inds2, ious = batched_bbox_overlaps(
+                    bboxes1,
+                    inds1,
+                    bboxes2,
+                    inds2,
+                    5,
+                    mode=mode,
+                    use_legacy_coordinate=use_legacy_coordinate)
+                dense = bbox_overlaps(
+                    bboxes1,
+                    bboxes2,
+                    mode=mode,
+                    use_legacy_coordinate=use_legacy_coordinate)
+                same = np.nonzero(inds1[:, None] == inds2[None])
+                np.testing.assert_array_equal(pair_inds1, same[0])
+                np.testing.assert_array_equal(pair_inds2, same[1])
+                np.testing.assert_array_equal(ious, dense[same])
+
+        # empty inputs
+        pair_inds1, pair_inds2, ious = batched_bbox_overlaps(
+            bboxes1, inds1, np.zeros((0, 4), np.float32),
+            np.zeros(0, np.int64), 5)
+        self.assertEqual(len(pair_inds1), 0)
+        self.assertEqual(len(ious), 0)
+
+    def test_batched_max_overlaps(self):
+        rng = np.random.default_rng(0)
+        bboxes1 = _random_bboxes(rng, 40)
+        inds1 = rng.integers(0, 5, 40)
+        bboxes2 = _random_bboxes(rng, 20)
+        # duplicated bboxes tie, the first one is assigned
+        bboxes2[1] = bboxes2[0]
+        inds2 = np.sort(rng.integers(0, 6, 20))
+        ious_max, argmax = batched_max_overlaps(bboxes1, inds1, bboxes2, inds2,
+                                                6)
+        dense = bbox_overlaps(bboxes1, bboxes2)
+        for i in range(len(bboxes1)):
+            gt_inds = np.flatnonzero(inds2 == inds1[i])
+            if len(gt_inds) == 0:
+                self.assertEqual(ious_max[i], -1)
+                self.assertEqual(argmax[i], -1)
+            else:
+                self.assertEqual(ious_max[i], dense[i, gt_inds].max())
+                self.assertEqual(argmax[i], gt_inds[dense[i,
+                                                          gt_inds].argmax()])
+
+        # empty inputs
+        ious_max, argmax = batched_max_overlaps(bboxes1, inds1,
+                                                np.zeros((0, 4), np.float32),
+                                                np.zeros(0, np.int64), 5)
+        self.assertTrue((ious_max == -1).all())
+        self.assertTrue((argmax == -1).all())
+
+
+class TestAnalysisInputs(TestCase):
+
+    def test_get_img_gts(self):
+        gt_bboxes, gt_labels = get_img_gts([
+            dict(bbox=[0, 0, 10, 10], bbox_label=1),
+            dict(bbox=[5, 5, 20, 20], bbox_label=3)
+        ])
+        self.assertEqual(gt_bboxes.dtype, np.float32)
+        np.testing.assert_array_equal(gt_bboxes,
+                                      [[0, 0, 10, 10], [5, 5, 20, 20]])
+        np.testing.assert_array_equal(gt_labels, [1, 3])
+        gt_bboxes, gt_labels = get_img_gts([])
+        self.assertEqual(gt_bboxes.shape, (0, 4))
+        self.assertEqual(gt_labels.shape, (0, ))
+
+    def test_concat_imgs(self):
+        bboxes, labels, img_inds = concat_imgs([
+            get_img_gts([dict(bbox=[0, 0, 1, 1], bbox_label=0)]),
+            get_img_gts([]),
+            get_img_gts([
+                dict(bbox=[0, 0, 2, 2], bbox_label=1),
+                dict(bbox=[0, 0, 3, 3], bbox_label=2)
+            ])
+        ])
+        self.assertEqual(bboxes.shape, (3, 4))
+        np.testing.assert_array_equal(labels, [0, 1, 2])
+        np.testing.assert_array_equal(img_inds, [0, 2, 2])
+
+
+class TestEvalMapPerImg(TestCase):
+
+    def test_eval_map_per_img(self):
+        rng = np.random.default_rng(0)
+        num_imgs, num_classes = 20, 4
+        iou_thrs = np.linspace(0.5, 0.95, 10)
+        imgs = _random_imgs(rng, num_imgs, num_classes)
+        gt_ignore_inds = np.concatenate(
+            [img['gt_ignore_inds'] for img in imgs])
+        mean_aps = eval_map_per_img(
+            *_concat(imgs, 'det'),
+            *_concat(imgs, 'gt'),
+            num_imgs,
+            num_classes,
+            gt_ignore_inds=gt_ignore_inds)
+        self.assertEqual(mean_aps.shape, (num_imgs, len(iou_thrs)))
+
+        for img, img_aps in zip(imgs, mean_aps):
+            det_result = [
+                img['det_bboxes'][img['det_labels'] == i]
+                for i in range(num_classes)
+            ]
+            ignore = img['gt_ignore_inds']
+            annotation = dict(
+                bboxes=img['gt_bboxes'][~ignore],
+                labels=img['gt_labels'][~ignore],
+                bboxes_ignore=img['gt_bboxes'][ignore],
+                labels_ignore=img['gt_labels'][ignore])
+            expected = [
+                eval_map([det_result], [annotation],
+                         iou_thr=iou_thr,
+                         logger='silent',
+                         nproc=1)[0] for iou_thr in iou_thrs
+            ]
+            np.testing.assert_array_equal(img_aps, expected)
+
+    def test_empty(self):
+        mean_aps = eval_map_per_img(
+            np.zeros((0, 5), np.float32), np.zeros(0, np.int64),
+            np.zeros(0, np.int64), np.zeros((0, 4), np.float32),
+            np.zeros(0, np.int64), np.zeros(0, np.int64), 3, 2)
+        np.testing.assert_array_equal(mean_aps, np.zeros((3, 10)))
+
+
+class TestAccumulateConfusionMatrix(TestCase):
+
+    def _naive_confusion_matrix(self, imgs, num_classes, score_thr,
+                                tp_iou_thr):
+        confusion_matrix = np.zeros((num_classes + 1, num_classes + 1))
+        for img in imgs:
+            det_bboxes, det_labels = img['det_bboxes'], img['det_labels']
+            gt_bboxes, gt_labels = img['gt_bboxes'], img['gt_labels']
+            ious = bbox_overlaps(det_bboxes[:, :4], gt_bboxes)
+            true_positives = np.zeros(len(gt_bboxes))
+            for i, det_bbox in enumerate(det_bboxes):
+                if det_bbox[4] < score_thr:
+                    continue
+                det_match = 0
+                for j in range(len(gt_bboxes)):
+                    if ious[i, j] >= tp_iou_thr:
+                        det_match += 1
+                        if gt_labels[j] == det_labels[i]:
+                            true_positives[j] += 1
+                        confusion_matrix[gt_labels[j], det_labels[i]] += 1
+                if det_match == 0:
+                    confusion_matrix[-1, det_labels[i]] += 1
+            for num_tp, gt_label in zip(true_positives, gt_labels):
+                if num_tp == 0:
+                    confusion_matrix[gt_label, -1] += 1
+        return confusion_matrix
+
+    def test_accumulate_confusion_matrix(self):
+        rng = np.random.default_rng(0)
+        num_imgs, num_classes = 20, 4
+        imgs = _random_imgs(rng, num_imgs, num_classes)
+        for score_thr, tp_iou_thr in ((0, 0.5), (0.3, 0.3)):
+            confusion_matrix = np.zeros((num_classes + 1, num_classes + 1))
+            accumulate_confusion_matrix(confusion_matrix,
+                                        *_concat(imgs, 'det'),
+                                        *_concat(imgs, 'gt'), num_imgs,
+                                        score_thr, tp_iou_thr)
+            np.testing.assert_array_equal(
+                confusion_matrix,
+                self._naive_confusion_matrix(imgs, num_classes, score_thr,
+                                             tp_iou_thr))
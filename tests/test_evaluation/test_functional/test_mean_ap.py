@@ -0,0 +1,101 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+
+from mmdet.evaluation.functional import eval_map
+
+
+def _random_bboxes(rng, num, quantize=False):
+    xy = rng.uniform(0, 100, (num, 2))
+    wh = rng.uniform(1, 60, (num, 2))
+    bboxes = np.concatenate([xy, xy + wh], axis=1)
+    if quantize:
+        # coarse grid to produce duplicated boxes and IoU ties
+        bboxes = np.round(bboxes / 8) * 8
+    return bboxes.astype(np.float32)
+
+
+def _random_results(rng, num_imgs, num_classes, quantize=False):
+    det_results, annotations = [], []
+    for _ in range(num_imgs):
+        img_dets = []
+        for _ in range(num_classes):
+            num_dets = rng.integers(0, 20)
+            if quantize:
+                scores = rng.choice([0.5, 0.7, 0.9], num_dets)
+            else:
+                scores = rng.uniform(0, 1, num_dets)
+            img_dets.append(
+                np.concatenate(
+                    [_random_bboxes(rng, num_dets, quantize), scores[:, None]],
+                    axis=1).astype(np.float32))
+        det_results.append(img_dets)
+        num_gts = rng.integers(0, 8)
+        num_ignores = rng.integers(0, 3)
+        annotations.append(
+            dict(
+                bboxes=_random_bboxes(rng, num_gts, quantize),
+                labels=rng.integers(0, num_classes, num_gts),
+                bboxes_ignore=_random_bboxes(rng, num_ignores, quantize),
+                labels_ignore=rng.integers(0, num_classes, num_ignores)))
+    return det_results, annotations
+
+
+class TestEvalMap(TestCase):
+
+    def _assert_same(self, det_results, annotations, **kwargs):
+        map_pool, results_pool = eval_map(
+            det_results, annotations, nproc=2, logger='silent', **kwargs)
+        map_numpy, results_numpy = eval_map(
+            det_results,
+            annotations,
+            logger='silent',
+            engine='numpy',
+            **kwargs)
+        np.testing.assert_array_equal(map_pool, map_numpy)
+        for res_pool, res_numpy in zip(results_pool, results_numpy):
+            for key in res_pool:
+                np.testing.assert_array_equal(res_pool[key], res_numpy[key])
+
+    def test_numpy_engine(self):
+        rng = np.random.default_rng(0)
+        for quantize in (False, True):
+            det_results, annotations = _random_results(
+                rng, num_imgs=4, num_classes=3, quantize=quantize)
+            self._assert_same(det_results, annotations, iou_thr=0.3)
+            self._assert_same(
+                det_results,
+                annotations,
+                scale_ranges=[(0, 32), (32, 1e5)],
+                use_legacy_coordinate=True)
+            self._assert_same(
+                det_results,
+                annotations,
+                dataset='voc07',
+                eval_mode='11points')
+
+        # group-of matching falls back to per-image evaluation
+        det_results, annotations = _random_results(rng, 3, 2)
+        for ann in annotations:
+            ann.pop('bboxes_ignore')
+            ann.pop('labels_ignore')
+            ann['gt_is_group_ofs'] = rng.random(len(ann['labels'])) < 0.3
+        self._assert_same(
+            det_results, annotations, ioa_thr=0.5, use_group_of=True)
+
+        # a single image
+        det_results, annotations = _random_results(rng, 1, 2)
+        self._assert_same(det_results, annotations)
+
+        # an IoU of 0.7 in float32 is below the threshold in float64
+        det_results = [[np.array([[0, 0, 10, 7, 0.9]], dtype=np.float32)]]
+        annotations = [
+            dict(
+                bboxes=np.array([[0, 0, 10, 10]], dtype=np.float32),
+                labels=np.array([0]))
+        ]
+        self._assert_same(det_results, annotations, iou_thr=0.7)
+
+        with self.assertRaises(AssertionError):
+            eval_map(det_results, annotations, engine='torch')
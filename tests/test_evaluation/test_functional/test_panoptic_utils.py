@@ -0,0 +1,73 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import unittest
+from unittest import TestCase
+
+import numpy as np
+
+from mmdet.evaluation.functional import pq_compute_single_image
+from mmdet.evaluation.functional.panoptic_utils import PQStat
+
+
+class TestPQComputeSingleImage(TestCase):
+
+    def setUp(self):
+        self.categories = {i: dict(id=i, isthing=1) for i in range(3)}
+        self.pan_gt = np.array([[1, 1, 2, 2], [1, 1, 2, 2], [3, 3, 0, 0],
+                                [3, 3, 0, 0]])
+        self.gt_ann = dict(
+            image_id=0,
+            segments_info=[
+                dict(id=1, category_id=0, iscrowd=0, area=4),
+                dict(id=2, category_id=1, iscrowd=0, area=4),
+                dict(id=3, category_id=0, iscrowd=1, area=4),
+                # not in the map
+                dict(id=4, category_id=2, iscrowd=0, area=0)
+            ])
+        self.pan_pred = np.array([[5, 5, 6, 6], [5, 5, 6, 0], [7, 7, 8, 8],
+                                  [7, 7, 8, 8]])
+        self.pred_ann = dict(segments_info=[
+            dict(id=5, category_id=0),
+            dict(id=6, category_id=1),
+            dict(id=7, category_id=0),
+            dict(id=8, category_id=1)
+        ])
+
+    @unittest.skipIf(PQStat is None, 'panopticapi is not installed')
+    def test_pq_compute_single_image(self):
+        pq_stat = pq_compute_single_image(PQStat(), self.pan_gt, self.pan_pred,
+                                          self.gt_ann, self.pred_ann,
+                                          self.categories)
+        # segment 5 matches segment 1, segment 6 matches segment 2 with an
+        # IoU of 3 / 4, segment 7 lies in a crowd region and segment 8 in
+        # VOID, segment 4 is missed
+        self.assertEqual(pq_stat[0].tp, 1)
+        self.assertAlmostEqual(pq_stat[0].iou, 1.)
+        self.assertEqual(pq_stat[1].tp, 1)
+        self.assertAlmostEqual(pq_stat[1].iou, 0.75)
+        self.assertEqual([pq_stat[i].fp for i in range(3)], [0, 0, 0])
+        self.assertEqual([pq_stat[i].fn for i in range(3)], [0, 0, 1])
+
+        # crowd regions only ignore predictions of their category
+        self.pred_ann['segments_info'][2]['category_id'] = 1
+        pq_stat = pq_compute_single_image(PQStat(), self.pan_gt, self.pan_pred,
+                                          self.gt_ann, self.pred_ann,
+                                          self.categories)
+        self.assertEqual([pq_stat[i].fp for i in range(3)], [0, 1, 0])
+
+    def test_invalid_predictions(self):
+        pred_ann = dict(segments_info=self.pred_ann['segments_info'][:-1])
+        with self.assertRaisesRegex(KeyError, 'not presented in JSON'):
+            pq_compute_single_image(None, self.pan_gt, self.pan_pred,
+                                    self.gt_ann, pred_ann, self.categories)
+
+        pred_ann = dict(segments_info=self.pred_ann['segments_info'] +
+                        [dict(id=9, category_id=0)])
+        with self.assertRaisesRegex(KeyError, 'not presented in PNG'):
+            pq_compute_single_image(None, self.pan_gt, self.pan_pred,
+                                    self.gt_ann, pred_ann, self.categories)
+
+        self.pred_ann['segments_info'][0]['category_id'] = 3
+        with self.assertRaisesRegex(KeyError, 'unknown category_id'):
+            pq_compute_single_image(None, self.pan_gt, self.pan_pred,
+                                    self.gt_ann, self.pred_ann,
+                                    self.categories)
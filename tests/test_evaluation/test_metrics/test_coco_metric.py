@@ -1,3 +1,4 @@
+import copy
 import os.path as osp
 import tempfile
 from unittest import TestCase
@@ -5,7 +6,7 @@ from unittest import TestCase
 import numpy as np
 import pycocotools.mask as mask_util
 import torch
-from mmengine.fileio import dump
+from mmengine.fileio import dump, load
 
 from mmdet.evaluation import CocoMetric
 
@@ -195,6 +196,52 @@ class TestCocoMetric(TestCase):
         }
         self.assertDictEqual(eval_results, target)
 
+    def test_streaming_evaluate(self):
+        # create dummy data with a second image which is never predicted
+        fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
+        self._create_dummy_coco_json(fake_json_file)
+        fake_json = load(fake_json_file)
+        fake_json['images'].append(
+            dict(id=1, width=640, height=640, file_name='fake_name2.jpg'))
+        extra_ann = dict(fake_json['annotations'][0], id=5, image_id=1)
+        fake_json['annotations'].append(extra_ann)
+        dump(fake_json, fake_json_file)
+
+        dummy_pred = self._create_dummy_results()
+        offsets = torch.tensor([[0., 0., 4., 4.], [2., 3., 9., 1.],
+                                [0., 0., 0., 0.], [30., 10., 40., 0.]])
+        dummy_pred['bboxes'] = dummy_pred['bboxes'].float() + offsets
+        dummy_pred['scores'] = torch.tensor([0.5, 0.98, 0.3, 0.95])
+        dummy_pred['labels'] = torch.tensor([0, 1, 1, 0])
+
+        eval_results = []
+        for streaming in [False, True]:
+            coco_metric = CocoMetric(
+                ann_file=fake_json_file,
+                metric=['bbox', 'segm', 'proposal'],
+                classwise=True,
+                streaming=streaming)
+            coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+            coco_metric.process({}, [
+                dict(
+                    pred_instances=copy.deepcopy(dummy_pred),
+                    img_id=0,
+                    ori_shape=(640, 640))
+            ])
+            if streaming:
+                self.assertNotIn('bboxes', coco_metric.results[0][1])
+            eval_results.append(coco_metric.evaluate(size=1))
+        self.assertDictEqual(eval_results[0], eval_results[1])
+        self.assertLess(eval_results[1]['coco/bbox_mAP'], 1.0)
+
+        with self.assertRaisesRegex(AssertionError, '`ann_file` is required'):
+            CocoMetric(streaming=True)
+        with self.assertRaisesRegex(AssertionError, 'not supported'):
+            CocoMetric(
+                ann_file=fake_json_file,
+                metric='proposal_fast',
+                streaming=True)
+
     def test_classwise_evaluate(self):
         # create dummy data
         fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
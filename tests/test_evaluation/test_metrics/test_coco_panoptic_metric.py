@@ -204,6 +204,20 @@ class TestCocoPanopticMetric(unittest.TestCase):
         eval_results = metric.evaluate(size=1)
         self.assertDictEqual(eval_results, self.target)
 
+        # the results are kept per image, so that the samples padded by the
+        # distributed sampler are dropped
+        metric = CocoPanopticMetric(
+            ann_file=None,
+            seg_prefix=self.gt_seg_dir,
+            classwise=False,
+            nproc=1,
+            outfile_prefix=None)
+        metric.dataset_meta = self.dataset_meta
+        metric.process({}, deepcopy(self.data_samples * 2))
+        self.assertEqual(len(metric.results), 2)
+        eval_results = metric.evaluate(size=1)
+        self.assertDictEqual(eval_results, self.target)
+
         # without tmpfile and json
         outfile_prefix = f'{self.tmp_dir.name}/test'
         metric = CocoPanopticMetric(
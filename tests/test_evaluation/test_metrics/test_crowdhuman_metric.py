@@ -52,3 +52,25 @@ class TestCrowdHumanMetric(TestCase):
         }
         self.assertDictEqual(eval_results, target)
         self.assertTrue(osp.isfile(osp.join(self.tmp_dir.name, 'test.json')))
+
+    def test_evaluate_modes(self):
+        dummy_pred = self._create_dummy_results()
+        for eval_mode in (0, 1, 2):
+            for compare_matching_method in (None, 'VOC'):
+                crowdhuman_metric = CrowdHumanMetric(
+                    ann_file=self.ann_file_path[0],
+                    eval_mode=eval_mode,
+                    compare_matching_method=compare_matching_method)
+                crowdhuman_metric.process({}, [
+                    dict(
+                        pred_instances=dummy_pred,
+                        img_id='283554,35288000868e92d4',
+                        ori_shape=(1640, 1640))
+                ])
+                eval_results = crowdhuman_metric.evaluate(size=1)
+                self.assertEqual(
+                    set(eval_results),
+                    {'crowd_human/mAP', 'crowd_human/mMR', 'crowd_human/JI'})
+                if eval_mode != 1:
+                    # the predictions are the body boxes of the ground truth
+                    self.assertEqual(eval_results['crowd_human/JI'], 1.0)
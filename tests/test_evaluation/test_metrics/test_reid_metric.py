@@ -38,18 +38,61 @@ class TestReIDMetrics(TestCase):
         for idx in range(len(data_samples)):
             data_samples[idx] = {**data_samples[idx], **pred_batch[idx]}
 
+        prefix = 'reid-metric'
+        data_batch = dict(input=None, data_samples=None)
+        # the distances are computed in chunks of queries
+        for chunk_size in (256, 4, 1):
+            metric = METRICS.build(
+                dict(
+                    type='ReIDMetrics',
+                    metric=['mAP', 'CMC'],
+                    metric_options=dict(rank_list=[1, 5], max_rank=5),
+                    chunk_size=chunk_size))
+            metric.process(data_batch, data_samples)
+            results = metric.evaluate(6)
+            self.assertIsInstance(results, dict)
+            self.assertEqual(results[f'{prefix}/mAP'], 0.719)
+            self.assertEqual(results[f'{prefix}/R1'], 0.5)
+            self.assertEqual(results[f'{prefix}/R5'], 1.0)
+
+    def test_query_not_in_gallery(self):
+        data_samples = [
+            ReIDDataSample().set_gt_label(i).to_dict() for i in [0, 0, 1, 2]
+        ]
+        features = [[1., 0.], [.8, 0.], [.7, 0.], [0., 1.]]
+        for data_sample, feature in zip(data_samples, features):
+            data_sample['pred_feature'] = torch.tensor(feature)
         metric = METRICS.build(
             dict(
                 type='ReIDMetrics',
                 metric=['mAP', 'CMC'],
-                metric_options=dict(rank_list=[1, 5], max_rank=5),
-            ))
+                metric_options=dict(rank_list=[1, 2], max_rank=2),
+                chunk_size=3))
+        metric.process(dict(input=None, data_samples=None), data_samples)
+        # only the two queries of identity 0 are evaluated, the first one
+        # ranks [√, x], the second one [x, √]
+        results = metric.evaluate(4)
+        self.assertEqual(results['reid-metric/mAP'], 0.75)
+        self.assertEqual(results['reid-metric/R1'], 0.5)
+        self.assertEqual(results['reid-metric/R2'], 1.0)
 
-        prefix = 'reid-metric'
-        data_batch = dict(input=None, data_samples=None)
-        metric.process(data_batch, data_samples)
-        results = metric.evaluate(6)
-        self.assertIsInstance(results, dict)
-        self.assertEqual(results[f'{prefix}/mAP'], 0.719)
-        self.assertEqual(results[f'{prefix}/R1'], 0.5)
-        self.assertEqual(results[f'{prefix}/R5'], 1.0)
+    def test_duplicated_features(self):
+        # a collapsed model, all the samples have the same feature
+        data_samples = [
+            ReIDDataSample().set_gt_label(i).to_dict() for i in [0, 0, 1, 1]
+        ]
+        for data_sample in data_samples:
+            data_sample['pred_feature'] = torch.tensor([1., 0.])
+        metric = METRICS.build(
+            dict(
+                type='ReIDMetrics',
+                metric=['mAP', 'CMC'],
+                metric_options=dict(rank_list=[1, 3], max_rank=3),
+                chunk_size=3))
+        metric.process(dict(input=None, data_samples=None), data_samples)
+        # the negatives at the same distance are ranked first, every query
+        # ranks [x, x, √]
+        results = metric.evaluate(4)
+        self.assertEqual(results['reid-metric/mAP'], 0.333)
+        self.assertEqual(results['reid-metric/R1'], 0.0)
+        self.assertEqual(results['reid-metric/R3'], 1.0)
@@ -75,3 +75,49 @@ class TestAnchorHead(TestCase):
         onegt_box_loss = sum(one_gt_losses['loss_bbox'])
         assert onegt_cls_loss.item() > 0, 'cls loss should be non-zero'
         assert onegt_box_loss.item() > 0, 'box loss should be non-zero'
+
+    def test_anchor_head_batched_predict(self):
+        test_cfg = Config(
+            dict(
+                nms_pre=50,
+                min_bbox_size=0,
+                score_thr=0.4,
+                nms=dict(type='nms', iou_threshold=0.5),
+                max_per_img=30))
+        anchor_head = AnchorHead(
+            num_classes=4, in_channels=1, test_cfg=test_cfg)
+        img_metas = [{
+            'img_shape': (100 - 3 * i, 128 - 5 * i, 3),
+            'scale_factor': (0.5, 0.5)
+        } for i in range(3)]
+        torch.manual_seed(0)
+        feats = [
+            torch.randn(3, 1, 128 // (2**(i + 2)), 128 // (2**(i + 2)))
+            for i in range(len(anchor_head.prior_generator.strides))
+        ]
+        cls_scores, bbox_preds = anchor_head.forward(feats)
+        results = anchor_head.predict_by_feat(
+            cls_scores, bbox_preds, batch_img_metas=img_metas)
+        batched_cfg = Config(dict(test_cfg, batched_predict=True))
+        batched_results = anchor_head.predict_by_feat(
+            cls_scores, bbox_preds, batch_img_metas=img_metas, cfg=batched_cfg)
+        for result, batched_result in zip(results, batched_results):
+            self.assertGreater(len(result), 0)
+            self.assertTrue(torch.equal(result.labels, batched_result.labels))
+            self.assertTrue(
+                torch.allclose(result.scores, batched_result.scores))
+            self.assertTrue(
+                torch.allclose(result.bboxes, batched_result.bboxes))
+
+        # without nms
+        results = anchor_head.predict_by_feat(
+            cls_scores, bbox_preds, batch_img_metas=img_metas, with_nms=False)
+        batched_results = anchor_head.predict_by_feat(
+            cls_scores,
+            bbox_preds,
+            batch_img_metas=img_metas,
+            cfg=batched_cfg,
+            with_nms=False)
+        for result, batched_result in zip(results, batched_results):
+            self.assertEqual(len(result), len(batched_result))
+            self.assertTrue(torch.equal(result.labels, batched_result.labels))
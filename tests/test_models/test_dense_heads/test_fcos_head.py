@@ -2,6 +2,7 @@
 from unittest import TestCase
 
 import torch
+from mmengine import Config
 from mmengine.structures import InstanceData
 
 from mmdet.models.dense_heads import FCOSHead
@@ -95,3 +96,45 @@ class TestFCOSHead(TestCase):
         self.assertGreater(normbox_box_loss, 0, 'box loss should be non-zero')
         self.assertGreater(normbox_ctr_loss, 0,
                            'centerness loss should be non-zero')
+
+    def test_fcos_head_batched_predict(self):
+        test_cfg = Config(
+            dict(
+                nms_pre=100,
+                min_bbox_size=0,
+                score_thr=0.3,
+                nms=dict(type='nms', iou_threshold=0.5),
+                max_per_img=20))
+        fcos_head = FCOSHead(
+            num_classes=4,
+            in_channels=1,
+            feat_channels=1,
+            stacked_convs=1,
+            norm_cfg=None,
+            test_cfg=test_cfg)
+        img_metas = [{
+            'img_shape': (60 + i, 64 - 2 * i, 3),
+            'scale_factor': (0.5 + 0.1 * i, 0.6 + 0.1 * i)
+        } for i in range(4)]
+        torch.manual_seed(0)
+        feats = (
+            torch.randn(4, 1, 64 // stride[1], 64 // stride[0]) * 3
+            for stride in fcos_head.prior_generator.strides)
+        outs = fcos_head.forward(feats)
+
+        for rescale in (False, True):
+            results = fcos_head.predict_by_feat(
+                *outs, batch_img_metas=img_metas, rescale=rescale)
+            test_cfg.batched_predict = True
+            batched_results = fcos_head.predict_by_feat(
+                *outs, batch_img_metas=img_metas, rescale=rescale)
+            test_cfg.batched_predict = False
+            self.assertEqual(len(batched_results), 4)
+            for result, batched_result in zip(results, batched_results):
+                self.assertGreater(len(result), 0)
+                self.assertTrue(
+                    torch.equal(result.labels, batched_result.labels))
+                self.assertTrue(
+                    torch.allclose(result.scores, batched_result.scores))
+                self.assertTrue(
+                    torch.allclose(result.bboxes, batched_result.bboxes))
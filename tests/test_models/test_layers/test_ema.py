@@ -7,7 +7,7 @@ import torch
 import torch.nn as nn
 from mmengine.testing import assert_allclose
 
-from mmdet.models.layers import ExpMomentumEMA
+from mmdet.models.layers import ExpMomentumEMA, MultiTensorEMA
 
 
 class TestEMA(TestCase):
@@ -92,3 +92,34 @@ class TestEMA(TestCase):
         ]
         for p_target, p_ema in zip(averaged_params, ema_params):
             assert_allclose(p_target, p_ema)
+
+    def test_multi_tensor_ema(self):
+        averaged = [
+            torch.randn(3, 4),
+            torch.randn(5).half(),
+            torch.tensor(2),
+            torch.randn(2, 2)
+        ]
+        source = [
+            torch.randn(3, 4),
+            torch.randn(5).half(),
+            torch.tensor(7),
+            torch.randn(2, 2).double()
+        ]
+        expected = [
+            avg.clone().mul_(1 - 0.3).add_(src, alpha=0.3)
+            if avg.dtype.is_floating_point else avg.clone()
+            for avg, src in zip(averaged, source)
+        ]
+        ema = MultiTensorEMA(averaged, source)
+        # grouped by device and dtype, the int tensor is skipped
+        self.assertEqual(len(ema.groups), 3)
+        ema.update(0.3)
+        for avg, target in zip(averaged, expected):
+            self.assertEqual(avg.dtype, target.dtype)
+            assert_allclose(avg, target)
+
+        # the tensors are referenced, in-place changes are followed
+        source[0].fill_(1.)
+        ema.update(1.)
+        self.assertTrue(torch.equal(averaged[0], torch.ones(3, 4)))
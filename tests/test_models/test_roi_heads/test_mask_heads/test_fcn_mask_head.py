@@ -8,6 +8,8 @@ from mmengine.structures import InstanceData
 from parameterized import parameterized
 
 from mmdet.models.roi_heads.mask_heads import FCNMaskHead
+from mmdet.models.roi_heads.mask_heads.fcn_mask_head import _do_paste_mask
+from mmdet.structures.mask import encode_mask_results
 
 
 class TestFCNMaskHead(TestCase):
@@ -86,3 +88,54 @@ class TestFCNMaskHead(TestCase):
         self.assertIsInstance(result_list[0], InstanceData)
         self.assertEqual(len(result_list[0]), num_samples)
         self.assertEqual(result_list[0].masks.shape, (num_samples, s, s))
+
+    @parameterized.expand(['cpu', 'cuda'])
+    def test_get_seg_masks_rle(self, device):
+        if device == 'cuda':
+            if not torch.cuda.is_available():
+                return unittest.skip('test requires GPU and torch+cuda')
+        num_classes = 6
+        mask_head = FCNMaskHead(
+            num_convs=1,
+            in_channels=1,
+            conv_out_channels=1,
+            num_classes=num_classes).to(device)
+        img_h, img_w = 96, 128
+        img_metas = {
+            'img_shape': (img_h, img_w, 3),
+            'scale_factor': (1, 1),
+            'ori_shape': (img_h, img_w, 3)
+        }
+        num_samples = 8
+        mask_pred = torch.randn((num_samples, num_classes, 14, 14)).to(device)
+        # boxes of various sizes, some across the borders of the image
+        xy = torch.rand((num_samples, 2)) * 160 - 20
+        wh = torch.rand((num_samples, 2)) * 100 + 1
+        bboxes = torch.cat([xy, xy + wh], dim=1).to(device)
+        labels = torch.randint(num_classes, (num_samples, )).to(device)
+
+        for mask_thr_binary in (0.5, 0.2):
+            rcnn_test_cfg = ConfigDict(
+                mask_thr_binary=mask_thr_binary, mask_format='rle')
+            result = InstanceData(metainfo=img_metas)
+            result.bboxes = bboxes.clone()
+            result.labels = labels
+            result_list = mask_head.predict_by_feat(
+                mask_preds=(mask_pred, ),
+                results_list=[result],
+                batch_img_metas=[img_metas],
+                rcnn_test_cfg=rcnn_test_cfg)
+            masks = result_list[0].masks
+            self.assertIsInstance(masks, list)
+            self.assertEqual(len(masks), num_samples)
+
+            # the same as pasting the masks in the whole image
+            expected, _ = _do_paste_mask(
+                mask_pred[range(num_samples), labels][:, None].sigmoid(),
+                bboxes,
+                img_h,
+                img_w,
+                skip_empty=False)
+            expected = encode_mask_results(
+                (expected >= mask_thr_binary).cpu().numpy())
+            self.assertEqual(masks, expected)
@@ -769,3 +769,90 @@ def test_guided_anchor():
     anchors = ga_retina_head.square_anchor_generator.grid_anchors(
         featmap_sizes, device)
     assert len(anchors) == 5
+
+
+def test_prior_cache():
+    from mmdet.models.task_modules.prior_generators import (AnchorGenerator,
+                                                            MlvlPointGenerator,
+                                                            PriorCache)
+
+    # LRU eviction
+    cache = PriorCache(maxsize=2)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('b', lambda: 2) == 2
+    assert cache.get('a', lambda: -1) == 1
+    assert cache.get('c', lambda: 3) == 3
+    assert cache.get('b', lambda: -2) == -2
+    assert cache.get('a', lambda: -1) == -1
+    assert (cache.hits, cache.misses, len(cache)) == (1, 5, 2)
+    cache.clear()
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+
+    # disabled cache
+    cache = PriorCache(maxsize=0)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('a', lambda: 2) == 2
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+
+    featmap_sizes = [(4, 6), (2, 3)]
+    anchor_generator = AnchorGenerator(
+        strides=[8, 16], ratios=[0.5, 1.0, 2.0], scales=[4], cache_size=4)
+    uncached_generator = AnchorGenerator(
+        strides=[8, 16], ratios=[0.5, 1.0, 2.0], scales=[4], cache_size=0)
+    anchors = anchor_generator.grid_priors(featmap_sizes, device='cpu')
+    cached_anchors = anchor_generator.grid_priors(
+        [torch.Size(size) for size in featmap_sizes], device='cpu')
+    assert (anchor_generator.prior_cache.hits,
+            anchor_generator.prior_cache.misses) == (1, 1)
+    assert cached_anchors is not anchors
+    assert all(a is b for a, b in zip(anchors, cached_anchors))
+    expected_anchors = uncached_generator.grid_priors(
+        featmap_sizes, device='cpu')
+    for a, b in zip(anchors, expected_anchors):
+        assert torch.equal(a, b)
+
+    # the priors of different dtypes, e.g. under autocast, are cached apart
+    with torch.autocast('cpu', dtype=torch.bfloat16):
+        half_anchors = anchor_generator.grid_priors(
+            featmap_sizes, dtype=torch.bfloat16, device='cpu')
+        anchors = anchor_generator.grid_priors(featmap_sizes, device='cpu')
+    assert (anchor_generator.prior_cache.hits,
+            anchor_generator.prior_cache.misses) == (2, 2)
+    expected_half_anchors = uncached_generator.grid_priors(
+        featmap_sizes, dtype=torch.bfloat16, device='cpu')
+    for a, b in zip(half_anchors, expected_half_anchors):
+        assert a.dtype == torch.bfloat16
+        assert torch.equal(a, b)
+    for a, b in zip(anchors, expected_anchors):
+        assert torch.equal(a, b)
+
+    # the priors created in inference mode are not reused outside of it
+    with torch.inference_mode():
+        anchors = anchor_generator.grid_priors(featmap_sizes, device='cpu')
+    assert anchors[0].is_inference()
+    anchors = anchor_generator.grid_priors(featmap_sizes, device='cpu')
+    assert not anchors[0].is_inference()
+
+    # valid flags
+    flags = anchor_generator.valid_flags(featmap_sizes, (30, 40), 'cpu')
+    assert anchor_generator.valid_flags(featmap_sizes,
+                                        (30, 40, 3), 'cpu')[0] is flags[0]
+    other_flags = anchor_generator.valid_flags(featmap_sizes, (20, 40), 'cpu')
+    expected_flags = uncached_generator.valid_flags(featmap_sizes, (20, 40),
+                                                    'cpu')
+    for a, b in zip(other_flags, expected_flags):
+        assert torch.equal(a, b)
+    assert len(anchor_generator.prior_cache) == 4
+
+    point_generator = MlvlPointGenerator(strides=[8, 16], cache_size=4)
+    points = point_generator.grid_priors(featmap_sizes, device='cpu')
+    strided_points = point_generator.grid_priors(
+        featmap_sizes, device='cpu', with_stride=True)
+    assert points[0].shape == (24, 2)
+    assert strided_points[0].shape == (24, 4)
+    assert point_generator.grid_priors(
+        featmap_sizes, device='cpu')[0] is points[0]
+    assert point_generator.valid_flags(featmap_sizes, (30, 40),
+                                       'cpu')[0].shape == (24, )
+    assert (point_generator.prior_cache.hits,
+            point_generator.prior_cache.misses) == (1, 3)
@@ -35,3 +35,52 @@ class TestKalmanFilter(TestCase):
         mean, covariance = self.kf.update(mean, covariance, measurement, score)
         assert len(mean) == 8
         assert covariance.shape == (8, 8)
+
+    def _random_states(self, num_tracks):
+        states = [
+            self.kf.initiate(
+                np.array([
+                    np.random.uniform(0, 100),
+                    np.random.uniform(0, 100),
+                    np.random.uniform(0.3, 3),
+                    np.random.uniform(10, 100)
+                ])) for _ in range(num_tracks)
+        ]
+        mean = np.stack([state[0] for state in states])
+        covariance = np.stack([state[1] for state in states])
+        return mean, covariance
+
+    def test_multi_predict_update(self):
+        mean, covariance = self._random_states(5)
+        multi_mean, multi_cov = self.kf.multi_predict(mean, covariance)
+        for i in range(5):
+            single_mean, single_cov = self.kf.predict(mean[i], covariance[i])
+            np.testing.assert_allclose(multi_mean[i], single_mean)
+            np.testing.assert_allclose(multi_cov[i], single_cov)
+
+        measurement = multi_mean[:, :4] + np.random.randn(5, 4)
+        scores = np.random.uniform(0, 1, 5)
+        for use_nsa in (False, True):
+            kf = TASK_UTILS.build(dict(type='KalmanFilter', use_nsa=use_nsa))
+            new_mean, new_cov = kf.multi_update(multi_mean, multi_cov,
+                                                measurement, scores)
+            for i in range(5):
+                single_mean, single_cov = kf.update(multi_mean[i],
+                                                    multi_cov[i],
+                                                    measurement[i], scores[i])
+                np.testing.assert_allclose(new_mean[i], single_mean)
+                np.testing.assert_allclose(
+                    new_cov[i], single_cov, rtol=1e-6, atol=1e-8)
+
+    def test_multi_gating_distance(self):
+        mean, covariance = self._random_states(4)
+        measurements = mean[:3, :4] + np.random.randn(3, 4)
+        for only_position in (False, True):
+            dists = self.kf.multi_gating_distance(mean, covariance,
+                                                  measurements, only_position)
+            assert dists.shape == (4, 3)
+            for i in range(4):
+                np.testing.assert_allclose(
+                    dists[i],
+                    self.kf.gating_distance(mean[i], covariance[i],
+                                            measurements, only_position))
@@ -0,0 +1,91 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import torch
+
+from mmdet.models.trackers import BaseTracker
+from mmdet.models.trackers.track_store import History
+
+
+class DummyTracker(BaseTracker):
+
+    def track(self, *args, **kwargs):
+        pass
+
+
+class TestBaseTracker(TestCase):
+
+    def test_update(self):
+        tracker = DummyTracker(num_frames_retain=3, history_size=4)
+        all_bboxes = torch.rand(8, 5, 4)
+        for frame_id in range(8):
+            # track 4 disappears after frame 2
+            num_objs = 5 if frame_id < 3 else 4
+            tracker.update(
+                ids=torch.arange(num_objs),
+                bboxes=all_bboxes[frame_id, :num_objs],
+                frame_ids=frame_id)
+
+            # track 4 is removed 3 frames after it disappeared
+            self.assertEqual(tracker.ids,
+                             list(range(5 if frame_id < 5 else 4)))
+            memo = tracker.memo
+            self.assertTrue(
+                torch.equal(memo.bboxes[:num_objs],
+                            all_bboxes[frame_id, :num_objs]))
+            self.assertTrue(
+                torch.equal(memo.frame_ids[:num_objs],
+                            torch.full((num_objs, ), frame_id)))
+
+        # the history is kept in ring buffers of size 4
+        history = tracker.tracks[0].bboxes
+        self.assertIsInstance(history, History)
+        self.assertEqual(len(history), 4)
+        self.assertTrue(torch.equal(history[-1], all_bboxes[7, :1]))
+        self.assertTrue(
+            torch.equal(torch.cat(history[-2:]), all_bboxes[6:, 0]))
+        self.assertTrue(
+            torch.equal(torch.cat(list(history)), all_bboxes[4:, 0]))
+
+        # get the mean of the recent samples
+        out = tracker.get('bboxes', [0, 2], num_samples=3, behavior='mean')
+        self.assertTrue(torch.allclose(out, all_bboxes[5:, [0, 2]].mean(0)))
+        out = tracker.get('bboxes', [1], num_samples=10)
+        self.assertTrue(torch.equal(out, all_bboxes[None, 4:, 1]))
+
+        # tracks of different lengths
+        tracker.update(
+            ids=torch.tensor([0, 9]), bboxes=all_bboxes[0, :2], frame_ids=8)
+        out = tracker.get('bboxes', [0, 9], num_samples=2, behavior='mean')
+        self.assertTrue(
+            torch.allclose(
+                out,
+                torch.stack([(all_bboxes[7, 0] + all_bboxes[0, 0]) / 2,
+                             all_bboxes[0, 1]])))
+
+        # slots of removed tracks are reused
+        self.assertEqual(tracker.tracks.num_slots, 5)
+        self.assertEqual(len(tracker.tracks[9].bboxes), 1)
+
+        tracker.reset()
+        self.assertTrue(tracker.empty)
+
+    def test_momentums(self):
+        tracker = DummyTracker(momentums=dict(embeds=0.5))
+        tracker.update(
+            ids=torch.arange(2), embeds=torch.ones(2, 3), frame_ids=0)
+        tracker.update(
+            ids=torch.arange(2), embeds=torch.zeros(2, 3), frame_ids=1)
+        self.assertTrue(
+            torch.allclose(tracker.memo.embeds, torch.full((2, 3), 0.5)))
+        self.assertTrue(
+            torch.allclose(
+                tracker.get('embeds', [1]), torch.full((1, 3), 0.5)))
+
+    def test_history_size(self):
+        self.assertEqual(DummyTracker(num_frames_retain=5).history_size, 5)
+        # the histories hold at least the values the tracker relies on
+        tracker = DummyTracker(num_frames_retain=1, min_history_size=3)
+        self.assertEqual(tracker.history_size, 3)
+        with self.assertRaises(AssertionError):
+            DummyTracker(history_size=2, min_history_size=3)
@@ -1,9 +1,11 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from unittest import TestCase
 
+import numpy as np
 import torch
 
 from mmdet.registry import MODELS, TASK_UTILS
+from mmdet.structures.bbox import bbox_xyxy_to_cxcyah
 from mmdet.testing import demo_track_inputs, random_boxes
 from mmdet.utils import register_all_modules
 
@@ -27,6 +29,13 @@ class TestByteTracker(TestCase):
         cls.num_frames_retain = cfg['num_frames_retain']
         cls.num_objs = 30
 
+    def test_history_size(self):
+        # the tracks can be confirmed when they are retained for less frames
+        # than `num_tentatives`
+        tracker = MODELS.build(
+            dict(type='ByteTracker', num_tentatives=3, num_frames_retain=1))
+        self.assertEqual(tracker.history_size, 3)
+
     def test_init(self):
         bboxes = random_boxes(self.num_objs, 512)
         labels = torch.zeros(self.num_objs)
@@ -40,6 +49,32 @@ class TestByteTracker(TestCase):
             'ids', 'bboxes', 'scores', 'labels', 'frame_ids'
         ]
 
+    def test_update_tracks(self):
+        tracker = MODELS.build(dict(type='ByteTracker'))
+        tracker.kf = TASK_UTILS.build(dict(type='KalmanFilter'))
+        bboxes = random_boxes(4, 512)
+        kwargs = dict(
+            ids=torch.arange(4),
+            scores=torch.ones(4),
+            labels=torch.zeros(4),
+        )
+        tracker.update(bboxes=bboxes, frame_ids=0, **kwargs)
+        states = {
+            id: (track.mean, track.covariance)
+            for id, track in tracker.tracks.items()
+        }
+
+        # the matched tracks are corrected in a batch
+        new_bboxes = bboxes + 2
+        tracker.update(bboxes=new_bboxes, frame_ids=1, **kwargs)
+        for id, track in tracker.tracks.items():
+            mean, covariance = tracker.kf.update(
+                *states[id],
+                bbox_xyxy_to_cxcyah(new_bboxes[id:id + 1])[0].numpy())
+            np.testing.assert_allclose(track.mean, mean, rtol=1e-6)
+            np.testing.assert_allclose(
+                track.covariance, covariance, rtol=1e-6, atol=1e-9)
+
     def test_track(self):
 
         with torch.no_grad():
@@ -1,12 +1,17 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from unittest import TestCase
+from unittest import TestCase, mock
 
+import numpy as np
+import pycocotools.mask as mask_util
 import torch
+from mmcv.ops import batched_nms
 from mmengine import ConfigDict
+from mmengine.structures import InstanceData
 
 from mmdet.models import DetTTAModel
 from mmdet.registry import MODELS
 from mmdet.structures import DetDataSample
+from mmdet.structures.mask import encode_mask_results
 from mmdet.testing import get_detector_cfg
 from mmdet.utils import register_all_modules
 
@@ -46,3 +51,143 @@ class TestDetTTAModel(TestCase):
             ])
 
         model.test_step(dict(inputs=imgs, data_samples=data_samples))
+
+    def test_det_tta_batched_views(self):
+        detector_cfg = get_detector_cfg(
+            'retinanet/retinanet_r18_fpn_1x_coco.py')
+        cfg = ConfigDict(
+            type='DetTTAModel',
+            module=detector_cfg,
+            tta_cfg=dict(
+                nms=dict(type='nms', iou_threshold=0.5), max_per_img=100))
+        model: DetTTAModel = MODELS.build(cfg)
+        model.eval()
+
+        # two scales, each with an original and a flipped view
+        inputs, data_samples = [], []
+        for size in (64, 96):
+            for flip in (False, True):
+                inputs.append([
+                    torch.randint(0, 256, (3, size, size + 32 * i))
+                    for i in range(2)
+                ])
+                data_samples.append([
+                    DetDataSample(
+                        metainfo=dict(
+                            ori_shape=(64, 64 + 32 * i),
+                            img_shape=(size, size + 32 * i),
+                            scale_factor=(size / 64, size / 64),
+                            flip=flip,
+                            flip_direction='horizontal')) for i in range(2)
+                ])
+        with mock.patch.object(
+                model.module, 'test_step',
+                wraps=model.module.test_step) as test_step:
+            results = model.test_step(
+                dict(inputs=inputs, data_samples=data_samples))
+        # the views of the same scale are forwarded together
+        self.assertEqual(test_step.call_count, 2)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertLessEqual(len(result.pred_instances), 100)
+
+    def test_merge_masks(self):
+        model = DetTTAModel(
+            module=get_detector_cfg('retinanet/retinanet_r18_fpn_1x_coco.py'),
+            tta_cfg=ConfigDict(
+                nms=dict(type='nms', iou_threshold=0.5), max_per_img=10))
+
+        def make_views(rle):
+            masks = torch.zeros(2, 20, 30, dtype=torch.bool)
+            masks[0, 2:6, 3:10] = True
+            masks[1, 10:15, 20:28] = True
+            bboxes = torch.Tensor([[3, 2, 10, 6], [20, 10, 28, 15]])
+            views = []
+            for flip in (False, True):
+                view_masks = masks.flip(-1) if flip else masks
+                view_bboxes = bboxes.clone()
+                if flip:
+                    view_bboxes[:, 0::2] = 30 - bboxes[:, [2, 0]]
+                view = DetDataSample(
+                    metainfo=dict(
+                        ori_shape=(20, 30),
+                        flip=flip,
+                        flip_direction='horizontal'))
+                view.pred_instances = InstanceData(
+                    bboxes=view_bboxes,
+                    # the flipped view wins the second instance
+                    scores=torch.Tensor([0.9, 0.5])
+                    if not flip else torch.Tensor([0.8, 0.6]),
+                    labels=torch.LongTensor([0, 1]),
+                    masks=encode_mask_results(view_masks.numpy())
+                    if rle else view_masks)
+                views.append(view)
+            return views, masks
+
+        for rle in (False, True):
+            views, masks = make_views(rle)
+            result = model.merge_preds([views])[0].pred_instances
+            self.assertEqual(len(result), 2)
+            self.assertTrue(
+                torch.equal(result.scores, torch.Tensor([0.9, 0.6])))
+            merged_masks = result.masks
+            if rle:
+                self.assertIsInstance(merged_masks, list)
+                merged_masks = np.stack(
+                    [mask_util.decode(mask) for mask in merged_masks])
+                merged_masks = torch.from_numpy(merged_masks).bool()
+            self.assertTrue(torch.equal(merged_masks, masks))
+
+    def test_merge_preds_many_images(self):
+        model = DetTTAModel(
+            module=get_detector_cfg('retinanet/retinanet_r18_fpn_1x_coco.py'),
+            tta_cfg=ConfigDict(
+                nms=dict(type='nms', iou_threshold=0.5), max_per_img=100))
+
+        # overlapping boxes of many images and classes at large coordinates,
+        # offsetting them by image and class loses float precision, yet they
+        # must be merged exactly as image by image
+        rng = np.random.RandomState(0)
+        ori_shape = (30000, 30000)
+        data_samples_list = []
+        for _ in range(32):
+            views = []
+            for flip in (False, True):
+                num = rng.randint(0, 300)
+                xy = rng.uniform(29000, 29500, (num, 2))
+                wh = rng.uniform(20, 100, (num, 2))
+                view = DetDataSample(
+                    metainfo=dict(
+                        ori_shape=ori_shape,
+                        img_shape=ori_shape,
+                        scale_factor=(1., 1.),
+                        flip=flip,
+                        flip_direction='horizontal'))
+                view.pred_instances = InstanceData(
+                    bboxes=torch.from_numpy(
+                        np.concatenate([xy, xy + wh], axis=1)).float(),
+                    scores=torch.from_numpy(rng.rand(num)).float(),
+                    labels=torch.from_numpy(rng.randint(0, 80, num)))
+                views.append(view)
+            data_samples_list.append(views)
+
+        expected = []
+        for views in data_samples_list:
+            bboxes, scores = model.merge_aug_bboxes(
+                [view.pred_instances.bboxes for view in views],
+                [view.pred_instances.scores
+                 for view in views], [view.metainfo for view in views])
+            labels = torch.cat([view.pred_instances.labels for view in views])
+            det_bboxes, keep_idxs = batched_nms(bboxes, scores, labels,
+                                                model.tta_cfg.nms)
+            expected.append((det_bboxes[:100], labels[keep_idxs][:100]))
+
+        results = model.merge_preds(data_samples_list)
+        self.assertEqual(len(results), len(data_samples_list))
+        for result, (det_bboxes, labels) in zip(results, expected):
+            pred_instances = result.pred_instances
+            self.assertTrue(
+                torch.equal(pred_instances.bboxes, det_bboxes[:, :-1]))
+            self.assertTrue(
+                torch.equal(pred_instances.scores, det_bboxes[:, -1]))
+            self.assertTrue(torch.equal(pred_instances.labels, labels))
@@ -5,8 +5,9 @@ import torch
 from mmengine.structures import InstanceData
 
 from mmdet.models.utils import (empty_instances, filter_gt_instances,
-                                rename_loss_dict, reweight_loss_dict,
-                                unpack_gt_instances)
+                                mask2ndarray, rename_loss_dict,
+                                reweight_loss_dict, unpack_gt_instances)
+from mmdet.structures.mask import BitmapMasks, RLEMasks
 from mmdet.testing import demo_mm_inputs
 
 
@@ -108,3 +109,15 @@ def test_reweight_loss_dict():
     weighted_losses = reweight_loss_dict(copy.deepcopy(losses), weight)
     for name in losses.keys():
         assert weighted_losses[name] == losses[name] * weight
+
+
+def test_mask2ndarray():
+    bitmaps = BitmapMasks.random(num_masks=3, height=8, width=6)
+    for masks in [
+            bitmaps, bitmaps.masks,
+            torch.from_numpy(bitmaps.masks),
+            RLEMasks.from_bitmaps(bitmaps.masks, 8, 6)
+    ]:
+        assert (mask2ndarray(masks) == bitmaps.masks).all()
+    with pytest.raises(TypeError):
+        mask2ndarray(bitmaps.masks.tolist())
@@ -1,9 +1,11 @@
 from unittest import TestCase
 
 import numpy as np
+import pycocotools.mask as maskUtils
+import torch
 from mmengine.testing import assert_allclose
 
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, PolygonMasks, RLEMasks
 
 
 class TestMaskStructures(TestCase):
@@ -71,3 +73,92 @@ class TestMaskStructures(TestCase):
         assert len(cat_mask) == 3 * 5
         for i, m in enumerate(masks):
             assert_allclose(m.masks, cat_mask.masks[i * 3:(i + 1) * 3])
+
+    def test_rle_encode(self):
+        bitmaps = BitmapMasks.random(4, 13, 17, rng=0)
+        bitmaps.masks[1] = 0
+        bitmaps.masks[2] = 1
+        masks = RLEMasks.from_bitmaps(bitmaps.masks, 13, 17)
+        assert len(masks) == 4
+        assert_allclose(masks.to_ndarray(), bitmaps.masks)
+        assert_allclose(
+            masks.to_tensor(torch.bool, 'cpu'),
+            bitmaps.to_tensor(torch.bool, 'cpu'))
+        np.testing.assert_array_equal(masks.areas, bitmaps.areas)
+        assert_allclose(
+            masks.get_bboxes('hbox').tensor,
+            bitmaps.get_bboxes('hbox').tensor)
+
+        # compressed and uncompressed COCO RLEs
+        rles = maskUtils.encode(
+            np.asfortranarray(bitmaps.masks.transpose(1, 2, 0)))
+        assert_allclose(RLEMasks.from_coco_rles(rles, 13, 17).runs, masks.runs)
+        rles = [
+            dict(size=[13, 17], counts=[0, 13 * 17]),
+            dict(size=[13, 17], counts=[13 * 17 - 2, 0, 0, 2])
+        ]
+        assert_allclose(
+            RLEMasks.from_coco_rles(rles, 13, 17).areas, np.array([221, 2]))
+
+        empty = RLEMasks.from_coco_rles([], 13, 17)
+        assert len(empty) == 0
+        assert empty.to_ndarray().shape == (0, 13, 17)
+
+    def test_rle_transforms(self):
+        bitmaps = BitmapMasks.random(3, 20, 24, rng=0)
+        masks = RLEMasks.from_bitmaps(bitmaps.masks, 20, 24)
+
+        def assert_equal(rle_masks, bitmap_masks):
+            assert isinstance(rle_masks, RLEMasks)
+            assert (rle_masks.height, rle_masks.width) == \
+                (bitmap_masks.height, bitmap_masks.width)
+            assert_allclose(rle_masks.to_ndarray(), bitmap_masks.masks)
+
+        for direction in ('horizontal', 'vertical', 'diagonal'):
+            assert_equal(masks.flip(direction), bitmaps.flip(direction))
+        assert_equal(masks.pad((25, 30)), bitmaps.pad((25, 30)))
+        assert_equal(masks.pad((25, 30), 1), bitmaps.pad((25, 30), 1))
+        for bbox in ([3, 4, 15, 10], [-5, 15, 30, 30], [10, 10, 10, 10]):
+            bbox = np.array(bbox)
+            assert_equal(masks.crop(bbox), bitmaps.crop(bbox))
+        assert_equal(masks.expand(30, 40, 3, 5), bitmaps.expand(30, 40, 3, 5))
+        for out_shape, offset, direction in [((20, 24), 5, 'horizontal'),
+                                             ((15, 30), -3, 'vertical'),
+                                             ((25, 20), -6, 'horizontal'),
+                                             ((20, 24), 2.5, 'vertical')]:
+            assert_equal(
+                masks.translate(out_shape, offset, direction),
+                bitmaps.translate(out_shape, offset, direction))
+        assert_equal(masks.rescale((10, 12)), bitmaps.rescale((10, 12)))
+        assert_equal(masks.resize((30, 11)), bitmaps.resize((30, 11)))
+        assert_equal(masks.shear((20, 24), 0.3), bitmaps.shear((20, 24), 0.3))
+        assert_equal(masks.rotate((20, 24), 30), bitmaps.rotate((20, 24), 30))
+
+        bboxes = np.array([[0, 0, 12, 10], [5, 5, 20, 18]], dtype=np.float32)
+        inds = np.array([2, 0])
+        assert_allclose(
+            masks.crop_and_resize(bboxes, (7, 7), inds).masks,
+            bitmaps.crop_and_resize(bboxes, (7, 7), inds).masks)
+
+        # indexing and empty masks
+        assert_equal(masks[1], bitmaps[1])
+        assert_equal(masks[np.array([True, False, True])],
+                     bitmaps[np.array([True, False, True])])
+        assert_equal(masks[[]].flip(), bitmaps[[]].flip())
+        assert_equal(masks[[]].resize((10, 10)), bitmaps[[]].resize((10, 10)))
+
+    def test_rle_cat(self):
+        # test invalid inputs
+        with self.assertRaises(AssertionError):
+            RLEMasks.cat(RLEMasks.random(4))
+        with self.assertRaises(ValueError):
+            RLEMasks.cat([])
+        with self.assertRaises(AssertionError):
+            RLEMasks.cat([RLEMasks.random(2), BitmapMasks.random(3)])
+
+        masks = [RLEMasks.random(num_masks=3) for _ in range(5)]
+        cat_mask = RLEMasks.cat(masks)
+        assert len(cat_mask) == 3 * 5
+        for i, m in enumerate(masks):
+            assert_allclose(m.to_ndarray(),
+                            cat_mask.to_ndarray()[i * 3:(i + 1) * 3])
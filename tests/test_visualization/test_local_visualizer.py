@@ -8,6 +8,7 @@ from mmengine.structures import InstanceData, PixelData
 
 from mmdet.evaluation import INSTANCE_OFFSET
 from mmdet.structures import DetDataSample
+from mmdet.structures.mask import RLEMasks, encode_mask_results
 from mmdet.visualization import DetLocalVisualizer, TrackLocalVisualizer
 
 
@@ -91,6 +92,25 @@ class TestDetLocalVisualizer(TestCase):
             out_file=out_file)
         self._assert_image_and_shape(out_file, (h, w, 3))
 
+        # test RLE encoded pred masks
+        masks = np.random.rand(num_bboxes, h, w) > 0.5
+        pred_instances.masks = encode_mask_results(masks)
+        det_local_visualizer.add_datasample(
+            'image', image, det_data_sample, draw_gt=False, out_file=out_file)
+        self._assert_image_and_shape(out_file, (h, w, 3))
+
+        # test RLEMasks gt masks
+        gt_instances.masks = RLEMasks.from_bitmaps(masks, h, w)
+        det_local_visualizer.add_datasample(
+            'image',
+            image,
+            det_data_sample,
+            draw_pred=False,
+            out_file=out_file)
+        self._assert_image_and_shape(out_file, (h, w, 3))
+        del pred_instances.masks
+        del gt_instances.masks
+
         # test gt_panoptic_seg and pred_panoptic_seg
         det_local_visualizer.dataset_meta = dict(classes=('1', '2'))
         gt_sem_seg = _create_panoptic_data(num_bboxes, h, w)
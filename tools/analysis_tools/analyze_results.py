@@ -1,7 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import argparse
 import os.path as osp
-from multiprocessing import Pool
 
 import mmcv
 import numpy as np
@@ -13,7 +12,7 @@ from mmengine.structures import InstanceData, PixelData
 from mmengine.utils import ProgressBar, check_file_exist, mkdir_or_exist
 
 from mmdet.datasets import get_loading_pipeline
-from mmdet.evaluation import eval_map
+from mmdet.evaluation import concat_imgs, eval_map_per_img, get_img_gts
 from mmdet.registry import DATASETS, RUNNERS
 from mmdet.structures import DetDataSample
 from mmdet.utils import replace_cfg_vals, update_data_root
@@ -35,8 +34,8 @@ def bbox_map_eval(det_result, annotation, nproc=4):
             - bboxes_ignore (optional): numpy array of shape (k, 4)
             - labels_ignore (optional): numpy array of shape (k, )
 
-        nproc (int): Processes used for computing mAP.
-            Default: 4.
+        nproc (int): Not used anymore, all the IoU thresholds are evaluated
+            at once. Default: 4.
 
     Returns:
         float: mAP
@@ -44,33 +43,56 @@ def bbox_map_eval(det_result, annotation, nproc=4):
 
     # use only bbox det result
     if isinstance(det_result, tuple):
-        bbox_det_result = [det_result[0]]
-    else:
-        bbox_det_result = [det_result]
+        det_result = det_result[0]
+    num_classes = len(det_result)
+    det_bboxes = np.concatenate(
+        [np.asarray(dets).reshape(-1, 5) for dets in det_result])
+    det_labels = np.repeat(
+        np.arange(num_classes), [len(dets) for dets in det_result])
+
+    gt_bboxes = [np.asarray(annotation['bboxes']).reshape(-1, 4)]
+    gt_labels = [np.asarray(annotation['labels']).reshape(-1)]
+    if annotation.get('bboxes_ignore') is not None:
+        gt_bboxes.append(
+            np.asarray(annotation['bboxes_ignore']).reshape(-1, 4))
+        gt_labels.append(np.asarray(annotation['labels_ignore']).reshape(-1))
+    gt_ignore_inds = np.repeat([False, True][:len(gt_labels)],
+                               [len(labels) for labels in gt_labels])
+    gt_labels = np.concatenate(gt_labels).astype(np.int64)
+
     # mAP
-    iou_thrs = np.linspace(
-        .5, 0.95, int(np.round((0.95 - .5) / .05)) + 1, endpoint=True)
-
-    processes = []
-    workers = Pool(processes=nproc)
-    for thr in iou_thrs:
-        p = workers.apply_async(eval_map, (bbox_det_result, [annotation]), {
-            'iou_thr': thr,
-            'logger': 'silent',
-            'nproc': 1
-        })
-        processes.append(p)
-
-    workers.close()
-    workers.join()
-
-    mean_aps = []
-    for p in processes:
-        mean_aps.append(p.get()[0])
+    mean_aps = eval_map_per_img(
+        det_bboxes.astype(np.float32),
+        det_labels,
+        np.zeros(len(det_labels), dtype=np.int64),
+        np.concatenate(gt_bboxes).astype(np.float32),
+        gt_labels,
+        np.zeros(len(gt_labels), dtype=np.int64),
+        1,
+        num_classes,
+        gt_ignore_inds=gt_ignore_inds)[0]
 
     return sum(mean_aps) / len(mean_aps)
 
 
+def get_img_dets(result):
+    """Get the detection results of an image.
+
+    Args:
+        result (dict): Predicted instances with ``bboxes``, ``scores`` and
+            ``labels``.
+
+    Returns:
+        tuple[ndarray]: Bboxes with scores of shape (n, 5) and labels of
+        shape (n, ).
+    """
+    det_bboxes = np.hstack([
+        result['bboxes'].cpu().numpy().reshape(-1, 4),
+        result['scores'].cpu().numpy().reshape(-1, 1)
+    ]).astype(np.float32)
+    return det_bboxes, result['labels'].cpu().numpy().astype(np.int64)
+
+
 class ResultVisualizer:
     """Display and save evaluation results.
 
@@ -227,14 +249,48 @@ class ResultVisualizer:
         """
 
         if eval_fn is None:
-            eval_fn = bbox_map_eval
+            _mAPs = self._batched_map_eval(dataset, results)
         else:
             assert callable(eval_fn)
+            _mAPs = self._custom_map_eval(dataset, results, eval_fn)
+
+        # descending select topk image
+        _mAPs = list(sorted(_mAPs.items(), key=lambda kv: kv[1]))
+        good_mAPs = _mAPs[-topk:]
+        bad_mAPs = _mAPs[:topk]
 
+        return good_mAPs, bad_mAPs
+
+    def _batched_map_eval(self, dataset, results, batch_size=1000):
+        """Evaluate the mAP of every image with :func:`eval_map_per_img`,
+        ``batch_size`` images at once.
+
+        The ground truths are read from the data infos of the dataset
+        without running its pipeline.
+        """
+        num_classes = len(dataset.metainfo['classes'])
         prog_bar = ProgressBar(len(results))
         _mAPs = {}
-        data_info = {}
-        for i, (result, ) in enumerate(zip(results)):
+        for start in range(0, len(results), batch_size):
+            inds = range(start, min(start + batch_size, len(results)))
+            dets = [get_img_dets(results[i]['pred_instances']) for i in inds]
+            gts = [
+                get_img_gts(dataset.get_data_info(i)['instances'])
+                for i in inds
+            ]
+            mean_aps = eval_map_per_img(*concat_imgs(dets), *concat_imgs(gts),
+                                        len(inds), num_classes)
+            # the mAP of an image is averaged over the IoU thresholds
+            for i, img_aps in zip(inds, mean_aps):
+                _mAPs[i] = sum(img_aps) / len(img_aps)
+            prog_bar.update(len(inds))
+        return _mAPs
+
+    def _custom_map_eval(self, dataset, results, eval_fn):
+        """Evaluate the mAP of every image with a custom ``eval_fn``."""
+        prog_bar = ProgressBar(len(results))
+        _mAPs = {}
+        for i, result in enumerate(results):
 
             # self.dataset[i] should not call directly
             # because there is a risk of mismatch
@@ -242,27 +298,13 @@ class ResultVisualizer:
             data_info['bboxes'] = data_info['gt_bboxes'].tensor
             data_info['labels'] = data_info['gt_bboxes_labels']
 
-            pred = result['pred_instances']
-            pred_bboxes = pred['bboxes'].cpu().numpy()
-            pred_scores = pred['scores'].cpu().numpy()
-            pred_labels = pred['labels'].cpu().numpy()
-
+            pred_bboxes, pred_labels = get_img_dets(result['pred_instances'])
             dets = []
             for label in range(len(dataset.metainfo['classes'])):
-                index = np.where(pred_labels == label)[0]
-                pred_bbox_scores = np.hstack(
-                    [pred_bboxes[index], pred_scores[index].reshape((-1, 1))])
-                dets.append(pred_bbox_scores)
-            mAP = eval_fn(dets, data_info)
-
-            _mAPs[i] = mAP
+                dets.append(pred_bboxes[pred_labels == label])
+            _mAPs[i] = eval_fn(dets, data_info)
             prog_bar.update()
-        # descending select topk image
-        _mAPs = list(sorted(_mAPs.items(), key=lambda kv: kv[1]))
-        good_mAPs = _mAPs[-topk:]
-        bad_mAPs = _mAPs[:topk]
-
-        return good_mAPs, bad_mAPs
+        return _mAPs
 
     def panoptic_evaluate(self, dataset, results, topk=20):
         """Evaluation for panoptic segmentation.
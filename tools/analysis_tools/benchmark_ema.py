@@ -0,0 +1,119 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import copy
+import time
+
+import torch
+from mmengine.config import Config, DictAction
+from mmengine.registry import init_default_scope
+
+from mmdet.models.layers import MultiTensorEMA
+from mmdet.registry import MODELS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the fused EMA update against the per-tensor '
+        'loop, on the parameters of a model')
+    parser.add_argument('config', help='config file path')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for the benchmark')
+    parser.add_argument(
+        '--update-buffers',
+        action='store_true',
+        help='whether to average the buffers besides the parameters')
+    parser.add_argument(
+        '--num-iters', type=int, default=200, help='number of updates')
+    parser.add_argument(
+        '--num-warmup', type=int, default=10, help='number of warmup')
+    parser.add_argument(
+        '--cfg-options',
+        nargs='+',
+        action=DictAction,
+        help='override some settings in the used config, the key-value pair '
+        'in xxx=yyy format will be merged into config file. If the value to '
+        'be overwritten is a list, it should be like key="[a,b]" or key=a,b '
+        'It also allows nested list/tuple values, e.g. key="[(a,b),(c,d)]" '
+        'Note that the quotation marks are necessary and that no white space '
+        'is allowed.')
+    args = parser.parse_args()
+    return args
+
+
+def per_tensor_update(student, teacher, momentum, update_buffers):
+    """The per-tensor update of ``MeanTeacherHook`` before it was fused."""
+    if not update_buffers:
+        for src_parm, dst_parm in zip(student.parameters(),
+                                      teacher.parameters()):
+            dst_parm.data.mul_(1 - momentum).add_(
+                src_parm.data, alpha=momentum)
+    else:
+        for src_parm, dst_parm in zip(student.state_dict().values(),
+                                      teacher.state_dict().values()):
+            if dst_parm.dtype.is_floating_point:
+                dst_parm.data.mul_(1 - momentum).add_(
+                    src_parm.data, alpha=momentum)
+
+
+def measure(update_func, device, num_iters, num_warmup):
+    """Return the mean time in ms of ``update_func``."""
+    for _ in range(num_warmup):
+        update_func()
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        update_func()
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+    return (time.perf_counter() - start) / num_iters * 1000
+
+
+def main():
+    args = parse_args()
+    cfg = Config.fromfile(args.config)
+    if args.cfg_options is not None:
+        cfg.merge_from_dict(args.cfg_options)
+    init_default_scope(cfg.get('default_scope', 'mmdet'))
+
+    device = torch.device(args.device)
+    model = MODELS.build(cfg.model).to(device)
+    if hasattr(model, 'student') and hasattr(model, 'teacher'):
+        student, teacher = model.student, model.teacher
+    else:
+        student, teacher = model, copy.deepcopy(model)
+    tensors = list(student.state_dict().values()) \
+        if args.update_buffers else list(student.parameters())
+    print(f'{len(tensors)} tensors with '
+          f'{sum(t.numel() for t in tensors)} elements')
+
+    def loop_update():
+        per_tensor_update(student, teacher, 0.001, args.update_buffers)
+
+    if args.update_buffers:
+        ema = MultiTensorEMA(
+            list(teacher.state_dict(keep_vars=True).values()),
+            list(student.state_dict(keep_vars=True).values()))
+    else:
+        ema = MultiTensorEMA(
+            list(teacher.parameters()), list(student.parameters()))
+
+    loop_time = measure(loop_update, device, args.num_iters, args.num_warmup)
+    fused_time = measure(lambda: ema.update(0.001), device, args.num_iters,
+                         args.num_warmup)
+    print(f'per-tensor loop: {loop_time:.3f} ms/update')
+    print(f'fused:           {fused_time:.3f} ms/update '
+          f'({loop_time / fused_time:.1f}x)')
+
+    # check the results of the two updates
+    teacher_copy = copy.deepcopy(teacher)
+    per_tensor_update(student, teacher_copy, 0.1, args.update_buffers)
+    ema.update(0.1)
+    max_diff = max((a.float() - b.float()).abs().max().item()
+                   for a, b in zip(teacher.state_dict().values(),
+                                   teacher_copy.state_dict().values()))
+    print(f'max difference between the two updates: {max_diff:.3g}')
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,8 @@ from mmengine.fileio import load
 from mmengine.registry import init_default_scope
 from mmengine.utils import ProgressBar
 
-from mmdet.evaluation import bbox_overlaps
+from mmdet.evaluation import (accumulate_confusion_matrix, concat_imgs,
+                              get_img_gts)
 from mmdet.registry import DATASETS
 from mmdet.utils import replace_cfg_vals, update_data_root
 
@@ -63,7 +64,8 @@ def calculate_confusion_matrix(dataset,
                                results,
                                score_thr=0,
                                nms_iou_thr=None,
-                               tp_iou_thr=0.5):
+                               tp_iou_thr=0.5,
+                               batch_size=1000):
     """Calculate the confusion matrix.
 
     Args:
@@ -76,20 +78,64 @@ def calculate_confusion_matrix(dataset,
             change the nms IoU threshold. Default: None.
         tp_iou_thr (float|optional): IoU threshold to be considered as matched.
             Default: 0.5.
+        batch_size (int): Number of images analyzed at once. Default: 1000.
     """
     num_classes = len(dataset.metainfo['classes'])
     confusion_matrix = np.zeros(shape=[num_classes + 1, num_classes + 1])
     assert len(dataset) == len(results)
     prog_bar = ProgressBar(len(results))
-    for idx, per_img_res in enumerate(results):
-        res_bboxes = per_img_res['pred_instances']
-        gts = dataset.get_data_info(idx)['instances']
-        analyze_per_img_dets(confusion_matrix, gts, res_bboxes, score_thr,
-                             tp_iou_thr, nms_iou_thr)
-        prog_bar.update()
+    for start in range(0, len(results), batch_size):
+        inds = range(start, min(start + batch_size, len(results)))
+        dets = [
+            get_img_dets(results[idx]['pred_instances'], score_thr,
+                         nms_iou_thr) for idx in inds
+        ]
+        gts = [
+            get_img_gts(dataset.get_data_info(idx)['instances'])
+            for idx in inds
+        ]
+        accumulate_confusion_matrix(confusion_matrix, *concat_imgs(dets),
+                                    *concat_imgs(gts), len(inds), score_thr,
+                                    tp_iou_thr)
+        prog_bar.update(len(inds))
     return confusion_matrix
 
 
+def get_img_dets(result, score_thr=0, nms_iou_thr=None):
+    """Get the detection results of an image.
+
+    Args:
+        result (dict): Predicted instances with ``bboxes``, ``scores`` and
+            ``labels``.
+        score_thr (float): Score threshold to filter bboxes, only applied
+            with nms. Default: 0.
+        nms_iou_thr (float|optional): nms IoU threshold of each class.
+            Default: None.
+
+    Returns:
+        tuple[ndarray]: Bboxes with scores of shape (n, 5) and labels of
+        shape (n, ).
+    """
+    det_bboxes = np.hstack([
+        result['bboxes'].numpy().reshape(-1, 4),
+        result['scores'].numpy().reshape(-1, 1)
+    ]).astype(np.float32)
+    det_labels = result['labels'].numpy()
+    if nms_iou_thr:
+        bboxes, labels = [], []
+        for det_label in np.unique(det_labels):
+            dets, _ = nms(
+                det_bboxes[det_labels == det_label, :4],
+                det_bboxes[det_labels == det_label, 4],
+                nms_iou_thr,
+                score_threshold=score_thr)
+            bboxes.append(dets)
+            labels.append(np.full(len(dets), det_label))
+        det_bboxes = np.concatenate(bboxes or [np.zeros((0, 5), np.float32)])
+        det_labels = np.concatenate(labels or [np.zeros(0, np.int64)])
+    return det_bboxes, det_labels
+
+
 def analyze_per_img_dets(confusion_matrix,
                          gts,
                          result,
@@ -101,10 +147,10 @@ def analyze_per_img_dets(confusion_matrix,
     Args:
         confusion_matrix (ndarray): The confusion matrix,
             has shape (num_classes + 1, num_classes + 1).
-        gt_bboxes (ndarray): Ground truth bboxes, has shape (num_gt, 4).
-        gt_labels (ndarray): Ground truth labels, has shape (num_gt).
-        result (ndarray): Detection results, has shape
-            (num_classes, num_bboxes, 5).
+        gts (list[dict]): Ground truth instances with ``bbox`` and
+            ``bbox_label``.
+        result (dict): Predicted instances with ``bboxes``, ``scores`` and
+            ``labels``.
         score_thr (float): Score threshold to filter bboxes.
             Default: 0.
         tp_iou_thr (float): IoU threshold to be considered as matched.
@@ -113,41 +159,10 @@ def analyze_per_img_dets(confusion_matrix,
             have done nms in the detector, only applied when users want to
             change the nms IoU threshold. Default: None.
     """
-    true_positives = np.zeros(len(gts))
-    gt_bboxes = []
-    gt_labels = []
-    for gt in gts:
-        gt_bboxes.append(gt['bbox'])
-        gt_labels.append(gt['bbox_label'])
-
-    gt_bboxes = np.array(gt_bboxes)
-    gt_labels = np.array(gt_labels)
-
-    unique_label = np.unique(result['labels'].numpy())
-
-    for det_label in unique_label:
-        mask = (result['labels'] == det_label)
-        det_bboxes = result['bboxes'][mask].numpy()
-        det_scores = result['scores'][mask].numpy()
-
-        if nms_iou_thr:
-            det_bboxes, _ = nms(
-                det_bboxes, det_scores, nms_iou_thr, score_threshold=score_thr)
-        ious = bbox_overlaps(det_bboxes[:, :4], gt_bboxes)
-        for i, score in enumerate(det_scores):
-            det_match = 0
-            if score >= score_thr:
-                for j, gt_label in enumerate(gt_labels):
-                    if ious[i, j] >= tp_iou_thr:
-                        det_match += 1
-                        if gt_label == det_label:
-                            true_positives[j] += 1  # TP
-                        confusion_matrix[gt_label, det_label] += 1
-                if det_match == 0:  # BG FP
-                    confusion_matrix[-1, det_label] += 1
-    for num_tp, gt_label in zip(true_positives, gt_labels):
-        if num_tp == 0:  # FN
-            confusion_matrix[gt_label, -1] += 1
+    dets = concat_imgs([get_img_dets(result, score_thr, nms_iou_thr)])
+    gts = concat_imgs([get_img_gts(gts)])
+    accumulate_confusion_matrix(confusion_matrix, *dets, *gts, 1, score_thr,
+                                tp_iou_thr)
 
 
 def plot_confusion_matrix(confusion_matrix,
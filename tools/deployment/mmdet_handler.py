@@ -1,17 +1,76 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import base64
 import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 import mmcv
 import numpy as np
 import torch
+from mmcv.transforms import Compose
 from ts.torch_handler.base_handler import BaseHandler
 
-from mmdet.apis import inference_detector, init_detector
+from mmdet.apis import init_detector
+from mmdet.utils import get_test_pipeline_cfg
+
+# Header of the binary output: the number of instances.
+_BINARY_HEADER = struct.Struct('<I')
+
+
+def encode_binary(bboxes, labels, scores):
+    """Encode the predictions of an image into compact bytes.
+
+    The layout is the number of instances N (uint32), followed by the bboxes
+    (N x 4 float32), the scores (N float32) and the labels (N int32), all in
+    little endian.
+    """
+    return b''.join([
+        _BINARY_HEADER.pack(len(labels)),
+        np.ascontiguousarray(bboxes, dtype='<f4').tobytes(),
+        np.ascontiguousarray(scores, dtype='<f4').tobytes(),
+        np.ascontiguousarray(labels, dtype='<i4').tobytes()
+    ])
+
+
+def decode_binary(buffer):
+    """Decode the bytes produced by :func:`encode_binary`.
+
+    Returns:
+        dict: ``bboxes`` (N, 4), ``scores`` (N, ) and ``labels`` (N, )
+        arrays.
+    """
+    num = _BINARY_HEADER.unpack_from(buffer)[0]
+    offset = _BINARY_HEADER.size
+    bboxes = np.frombuffer(buffer, '<f4', num * 4, offset).reshape(num, 4)
+    offset += num * 16
+    scores = np.frombuffer(buffer, '<f4', num, offset)
+    offset += num * 4
+    labels = np.frombuffer(buffer, '<i4', num, offset)
+    return dict(bboxes=bboxes, scores=scores, labels=labels)
 
 
 class MMdetHandler(BaseHandler):
+    """TorchServe handler of MMDetection models.
+
+    TorchServe gathers the concurrent requests of a model into batches of at
+    most ``batch_size`` requests, waiting at most ``max_batch_delay`` ms, as
+    configured when the model is registered. The images of a batch are
+    decoded and transformed by the test pipeline in a thread pool, and are
+    forwarded by a single ``model.test_step`` call. ``threshold``,
+    ``num_decode_threads`` and ``output_format`` can be overridden in the
+    ``handler`` section of the model yaml config.
+
+    ``output_format`` decides the response of an image:
+
+    - ``json``: a list of dicts with ``class_label``, ``class_name``,
+      ``bbox`` and ``score`` of every instance.
+    - ``columnar``: a dict of ``labels``, ``scores`` and ``bboxes`` lists.
+    - ``binary``: compact bytes, see :func:`encode_binary` and
+      :func:`decode_binary`.
+    """
     threshold = 0.5
+    num_decode_threads = 4
+    output_format = 'json'
 
     def initialize(self, context):
         properties = context.system_properties
@@ -26,47 +85,83 @@ class MMdetHandler(BaseHandler):
         checkpoint = os.path.join(model_dir, serialized_file)
         self.config_file = os.path.join(model_dir, 'config.py')
 
-        self.model = init_detector(self.config_file, checkpoint, self.device)
-        self.initialized = True
+        model_yaml_config = getattr(context, 'model_yaml_config', None) or {}
+        for key, value in model_yaml_config.get('handler', {}).items():
+            if key in ('threshold', 'num_decode_threads', 'output_format'):
+                setattr(self, key, value)
+        assert self.output_format in ('json', 'columnar', 'binary'), \
+            f'Unsupported output_format {self.output_format}.'
 
-    def preprocess(self, data):
-        images = []
+        self.model = init_detector(
+            self.config_file, checkpoint, device=self.device)
+        test_pipeline = get_test_pipeline_cfg(self.model.cfg.copy())
+        test_pipeline[0].type = 'mmdet.LoadImageFromNDArray'
+        self.test_pipeline = Compose(test_pipeline)
+        self.decode_pool = ThreadPoolExecutor(self.num_decode_threads)
+        self.initialized = True
 
-        for row in data:
-            image = row.get('data') or row.get('body')
-            if isinstance(image, str):
-                image = base64.b64decode(image)
-            image = mmcv.imfrombytes(image)
-            images.append(image)
+    def load(self, img_id, row):
+        """Decode an image and transform it by the test pipeline."""
+        image = row.get('data') or row.get('body')
+        if isinstance(image, str):
+            image = base64.b64decode(image)
+        image = mmcv.imfrombytes(image)
+        return self.test_pipeline(dict(img=image, img_id=img_id))
 
-        return images
+    def preprocess(self, data):
+        """Load the images of a batch and collate them for the model."""
+        inputs = list(self.decode_pool.map(self.load, range(len(data)), data))
+        return dict(
+            inputs=[x['inputs'] for x in inputs],
+            data_samples=[x['data_samples'] for x in inputs])
 
     def inference(self, data, *args, **kwargs):
-        results = inference_detector(self.model, data)
-        return results
+        """Forward the images of a batch at once and filter the predictions
+        by score.
+
+        The filtering is done on the device and the kept instances of all
+        images are moved to the CPU at once.
+        """
+        with torch.no_grad():
+            results = self.model.test_step(data)
+        bboxes, labels, scores = [], [], []
+        for data_sample in results:
+            pred_instances = data_sample.pred_instances
+            keep = pred_instances.scores >= self.threshold
+            bboxes.append(pred_instances.bboxes[keep])
+            labels.append(pred_instances.labels[keep])
+            scores.append(pred_instances.scores[keep])
+        split = np.cumsum([len(x) for x in labels])[:-1]
+        bboxes = np.split(torch.cat(bboxes).float().cpu().numpy(), split)
+        labels = np.split(torch.cat(labels).int().cpu().numpy(), split)
+        scores = np.split(torch.cat(scores).float().cpu().numpy(), split)
+        return [
+            dict(bboxes=b, labels=l, scores=s)
+            for b, l, s in zip(bboxes, labels, scores)
+        ]
 
     def postprocess(self, data):
-        # Format output following the example ObjectDetectionHandler format
         output = []
-        for data_sample in data:
-            pred_instances = data_sample.pred_instances
-            bboxes = pred_instances.bboxes.cpu().numpy().astype(
-                np.float32).tolist()
-            labels = pred_instances.labels.cpu().numpy().astype(
-                np.int32).tolist()
-            scores = pred_instances.scores.cpu().numpy().astype(
-                np.float32).tolist()
-            preds = []
-            for idx in range(len(labels)):
-                cls_score, bbox, cls_label = scores[idx], bboxes[idx], labels[
-                    idx]
-                if cls_score >= self.threshold:
-                    class_name = self.model.dataset_meta['classes'][cls_label]
-                    result = dict(
-                        class_label=cls_label,
-                        class_name=class_name,
-                        bbox=bbox,
-                        score=cls_score)
-                    preds.append(result)
-            output.append(preds)
+        for pred in data:
+            if self.output_format == 'binary':
+                output.append(
+                    encode_binary(pred['bboxes'], pred['labels'],
+                                  pred['scores']))
+            elif self.output_format == 'columnar':
+                output.append({k: v.tolist() for k, v in pred.items()})
+            else:
+                # Format output following the example ObjectDetectionHandler
+                # format
+                classes = self.model.dataset_meta['classes']
+                preds = []
+                for bbox, label, score in zip(pred['bboxes'].tolist(),
+                                              pred['labels'].tolist(),
+                                              pred['scores'].tolist()):
+                    preds.append(
+                        dict(
+                            class_label=label,
+                            class_name=classes[label],
+                            bbox=bbox,
+                            score=score))
+                output.append(preds)
         return output